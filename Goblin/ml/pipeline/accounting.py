@@ -1,13 +1,16 @@
 """
 Accounting System - Track all gold earned, spent, and profit/loss
 """
+from collections import Counter
 from dataclasses import dataclass, asdict
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from typing import Dict, List, Optional
 import json
 import os
 from loguru import logger
 
+from ml.pipeline.ledger import LEDGER_COLUMNS, Ledger, ledger_row, new_source_key, sale_rows, source_key
+
 @dataclass
 class Transaction:
     """A single buy or sell transaction."""
@@ -21,21 +24,37 @@ class Transaction:
     character: str
     realm: str
     notes: Optional[str] = None
+    source_key: Optional[int] = None  # Ledger dedup key; kept in saves so reloading skips it
     
 class AccountingSystem:
-    """Track financial performance."""
+    """
+    Track financial performance.
+    
+    Transactions live in an append-only Ledger (SQLite) whose
+    per-character, per-item and per-day totals are maintained on insert,
+    so reports don't rescan the history.
+    
+    The default ledger is in memory and gone when the process exits; pass
+    db_path to keep it. Without one, save() writes every transaction to
+    JSON and that file is the only copy.
+    """
     
-    def __init__(self):
-        self.transactions: List[Transaction] = []
+    def __init__(self, db_path: str = ':memory:'):
+        self.ledger = Ledger(db_path)
         self.session_start = datetime.now()
-        self.starting_gold = {}  # Per character
+        self.starting_gold = json.loads(self.ledger.get_meta('starting_gold', '{}'))  # Per character
+    
+    @property
+    def transactions(self) -> List[Transaction]:
+        """Every stored transaction in order (reads the whole ledger)."""
+        return [_transaction(row) for row in self.ledger.rows()]
         
     def record_purchase(self, item_id: int, item_name: str, quantity: int,
                        price_per_item: int, character: str, realm: str):
         """Record an item purchase."""
         total = quantity * price_per_item
         
-        self.transactions.append(Transaction(
+        self.ledger.append([ledger_row(
             timestamp=datetime.now(),
             transaction_type='buy',
             item_id=item_id,
@@ -44,118 +63,74 @@ class AccountingSystem:
             price_per_item=price_per_item,
             total_amount=-total,  # Negative (expense)
             character=character,
-            realm=realm
-        ))
+            realm=realm,
+            source_key=new_source_key()
+        )])
         
         logger.info(f"Recorded purchase: {item_name} x{quantity} for {total} copper")
     
     def record_sale(self, item_id: int, item_name: str, quantity: int,
                    price_per_item: int, character: str, realm: str):
-        """Record an item sale."""
-        gross = quantity * price_per_item
-        ah_cut = int(gross * 0.05)
-        net = gross - ah_cut
-        
-        # Record sale
-        self.transactions.append(Transaction(
-            timestamp=datetime.now(),
-            transaction_type='sell',
-            item_id=item_id,
-            item_name=item_name,
-            quantity=quantity,
-            price_per_item=price_per_item,
-            total_amount=net,  # Positive (income)
-            character=character,
-            realm=realm
-        ))
-        
-        # Record AH cut
-        self.transactions.append(Transaction(
-            timestamp=datetime.now(),
-            transaction_type='ah_cut',
-            item_id=item_id,
-            item_name=item_name,
-            quantity=quantity,
-            price_per_item=price_per_item,
-            total_amount=-ah_cut,  # Negative (fee)
-            character=character,
-            realm=realm,
-            notes=f"5% AH cut on sale of {item_name}"
-        ))
+        """Record an item sale (net income plus the 5% AH cut as an expense)."""
+        rows = sale_rows(datetime.now(), item_id, item_name, quantity, price_per_item, character, realm,
+                         source_key=new_source_key())
+        self.ledger.append(rows)
         
+        net = rows[0][LEDGER_COLUMNS.index('total_amount')]
         logger.info(f"Recorded sale: {item_name} x{quantity} for {net} copper (after cut)")
     
+    def import_tsm_csv(self, filepath: str, realm: str = '', kind: Optional[str] = None) -> int:
+        """
+        Bulk import a TSM accounting export (Accounting_<realm>_sales.csv,
+        _purchases, _income, _expenses). Rows already imported are skipped.
+        """
+        added = self.ledger.import_tsm_csv(filepath, realm, kind)
+        logger.success(f"Imported {added} ledger rows from {filepath}")
+        return added
+    
     def set_starting_gold(self, character: str, gold_amount: int):
         """Set starting gold for a character."""
         self.starting_gold[f"{character}"] = gold_amount
+        self.ledger.set_meta('starting_gold', json.dumps(self.starting_gold))
     
     def get_total_profit(self) -> int:
         """Get total profit across all transactions."""
-        return sum(t.total_amount for t in self.transactions)
+        return self.ledger.total_profit()
     
     def get_session_profit(self) -> int:
         """Get profit for current session."""
-        session_transactions = [
-            t for t in self.transactions 
-            if t.timestamp >= self.session_start
-        ]
-        return sum(t.total_amount for t in session_transactions)
+        return self.ledger.profit_since(self.session_start)
     
     def get_profit_by_character(self) -> Dict[str, int]:
         """Get profit breakdown by character."""
-        by_char = {}
-        for t in self.transactions:
-            key = t.character
-            by_char[key] = by_char.get(key, 0) + t.total_amount
-        return by_char
+        return self.ledger.profit_by_character()
     
-    def get_profit_by_item(self) -> List[Dict]:
+    def get_profit_by_item(self, limit: Optional[int] = None) -> List[Dict]:
         """Get profit breakdown by item (best/worst sellers)."""
-        by_item = {}
-        
-        for t in self.transactions:
-            if t.item_id not in by_item:
-                by_item[t.item_id] = {
-                    'item_id': t.item_id,
-                    'item_name': t.item_name,
-                    'total_profit': 0,
-                    'total_sold': 0,
-                    'total_bought': 0
-                }
-            
-            by_item[t.item_id]['total_profit'] += t.total_amount
-            
-            if t.transaction_type == 'sell':
-                by_item[t.item_id]['total_sold'] += t.quantity
-            elif t.transaction_type == 'buy':
-                by_item[t.item_id]['total_bought'] += t.quantity
-        
-        # Sort by profit
-        items = sorted(by_item.values(), key=lambda x: x['total_profit'], reverse=True)
-        return items
+        return self.ledger.profit_by_item(limit)
     
     def get_daily_report(self, days: int = 7) -> Dict:
         """Get profit per day for last N days."""
         cutoff = datetime.now() - timedelta(days=days)
-        recent = [t for t in self.transactions if t.timestamp >= cutoff]
-        
-        by_day = {}
-        for t in recent:
-            day = t.timestamp.date()
-            by_day[day] = by_day.get(day, 0) + t.total_amount
-        
-        return dict(sorted(by_day.items()))
+        next_day = cutoff.date() + timedelta(days=1)
+        # Whole days come from the per-day totals; the cutoff day only counts from the cutoff on
+        report = {}
+        first_day = self.ledger.profit_between(cutoff, datetime.combine(next_day, time()))
+        if first_day is not None:
+            report[cutoff.date()] = first_day
+        report.update(self.ledger.profit_by_day(next_day))
+        return report
     
     def get_session_stats(self) -> Dict:
         """Get detailed session statistics."""
-        session_txns = [t for t in self.transactions if t.timestamp >= self.session_start]
+        by_type = self.ledger.stats_since(self.session_start)
+        empty = {'transactions': 0, 'quantity': 0, 'amount': 0}
+        buys = by_type.get('buy', empty)
+        sells = by_type.get('sell', empty)
         
-        buys = [t for t in session_txns if t.transaction_type == 'buy']
-        sells = [t for t in session_txns if t.transaction_type == 'sell']
-        
-        total_spent = abs(sum(t.total_amount for t in buys))
-        total_earned = sum(t.total_amount for t in sells)
-        profit = sum(t.total_amount for t in session_txns)
+        total_spent = abs(buys['amount'])
+        total_earned = sells['amount']
+        profit = sum(row['amount'] for row in by_type.values())
         
         session_duration = (datetime.now() - self.session_start).seconds
         gold_per_hour = (profit / session_duration * 3600) if session_duration > 0 else 0
@@ -163,9 +138,9 @@ class AccountingSystem:
         return {
             'session_start': self.session_start,
             'session_duration_minutes': session_duration // 60,
-            'total_transactions': len(session_txns),
-            'items_bought': sum(t.quantity for t in buys),
-            'items_sold': sum(t.quantity for t in sells),
+            'total_transactions': sum(row['transactions'] for row in by_type.values()),
+            'items_bought': buys['quantity'],
+            'items_sold': sells['quantity'],
             'total_spent': total_spent,
             'total_earned': total_earned,
             'net_profit': profit,
@@ -179,12 +154,14 @@ class AccountingSystem:
         
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         
+        count = 0
         with open(filepath, 'w', newline='') as f:
             writer = csv.writer(f)
             writer.writerow(['Timestamp', 'Type', 'Character', 'Item ID', 'Item Name', 
                            'Quantity', 'Price Per Item', 'Total Amount', 'Notes'])
             
-            for t in self.transactions:
+            for row in self.ledger.rows():
+                t = _transaction(row)
                 writer.writerow([
                     t.timestamp.isoformat(),
                     t.transaction_type,
@@ -196,11 +173,12 @@ class AccountingSystem:
                     t.total_amount,
                     t.notes or ''
                 ])
+                count += 1
         
-        logger.success(f"Exported {len(self.transactions)} transactions to {filepath}")
+        logger.success(f"Exported {count} transactions to {filepath}")
     
     def save(self, filepath: str):
-        """Save accounting data."""
+        """Save accounting data, with every transaction, as JSON (an export when the ledger has a db_path)."""
         data = {
             'session_start': self.session_start.isoformat(),
             'starting_gold': self.starting_gold,
@@ -218,24 +196,71 @@ class AccountingSystem:
         logger.success(f"Saved accounting data to {filepath}")
     
     def load(self, filepath: str):
-        """Load accounting data."""
+        """
+        Load accounting data saved as JSON into the ledger. Transactions
+        whose source_key is already stored (including ones saved from this
+        ledger) are skipped, so loading twice is harmless.
+        """
         try:
             with open(filepath, 'r') as f:
                 data = json.load(f)
             
             self.session_start = datetime.fromisoformat(data['session_start'])
-            self.starting_gold = data['starting_gold']
-            
-            self.transactions = []
-            for txn_dict in data['transactions']:
-                txn_dict['timestamp'] = datetime.fromisoformat(txn_dict['timestamp'])
-                self.transactions.append(Transaction(**txn_dict))
+            self.starting_gold.update(data['starting_gold'])
+            self.ledger.set_meta('starting_gold', json.dumps(self.starting_gold))
             
-            logger.success(f"Loaded {len(self.transactions)} transactions")
+            added = self.ledger.append(_json_rows(data['transactions']))
+            logger.success(f"Loaded {added} transactions")
         except FileNotFoundError:
             logger.warning("No accounting data found")
 
 
+def _transaction(row) -> Transaction:
+    """Ledger row (LEDGER_COLUMNS order) -> Transaction"""
+    values = dict(zip(LEDGER_COLUMNS, row))
+    return Transaction(
+        timestamp=datetime.fromtimestamp(values['timestamp']),
+        transaction_type=values['transaction_type'],
+        item_id=values['item_id'],
+        item_name=values['item_name'],
+        quantity=values['quantity'],
+        price_per_item=values['price_per_item'],
+        total_amount=values['total_amount'],
+        character=values['character'],
+        realm=values['realm'],
+        notes=values['notes'],
+        source_key=values['source_key']
+    )
+
+
+def _json_rows(transactions: List[Dict]):
+    """
+    Ledger rows for saved transactions under their saved source_key; saves
+    from before keys were written are keyed by content instead.
+    """
+    seen = Counter()
+    for txn in transactions:
+        key = txn.get('source_key')
+        if key is None:
+            identity = 'json|' + '|'.join(str(txn.get(field)) for field in sorted(txn))
+            seen[identity] += 1
+            key = source_key(f"{identity}|{seen[identity]}")
+        timestamp = datetime.fromisoformat(txn['timestamp'])
+        yield ledger_row(
+            timestamp=timestamp,
+            transaction_type=txn['transaction_type'],
+            item_id=txn['item_id'],
+            item_name=txn['item_name'],
+            quantity=txn['quantity'],
+            price_per_item=txn['price_per_item'],
+            total_amount=txn['total_amount'],
+            character=txn['character'],
+            realm=txn['realm'],
+            notes=txn.get('notes'),
+            source_key=key
+        )
+
+
 if __name__ == "__main__":
     # Example
     accounting = AccountingSystem()
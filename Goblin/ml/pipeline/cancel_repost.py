@@ -1,12 +1,16 @@
 """
 Cancel/Repost Automation - Detect undercuts and manage reposting
 """
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Union
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from loguru import logger
 import time
 
+import numpy as np
+
+from ml.pipeline.order_book import NO_PRICE, OrderBook
+
 @dataclass
 class ActiveAuction:
     """Represents an active auction."""
@@ -35,30 +39,53 @@ class CancelRepostManager:
         self.repost_queue: List[Dict] = []
         self.last_scan_time = None
         self.min_cancel_interval = 60  # seconds between cancel scans
+        # Last scan's order book and lowest competitor per item (excluding our auctions)
+        self.order_book: Optional[OrderBook] = None
+        self._lowest_competitor: Dict[int, int] = {}
+        self._lowest_for: Optional[frozenset] = None  # our auction ids the cache was built for
         
-    def scan_for_undercuts(self, ah_data: List[Dict]) -> List[UndercutDetection]:
+    def _update_lowest_competitors(self, book: OrderBook):
+        """Refresh the per-item lowest competitor, only for items whose listings changed."""
+        our_ids = frozenset(a.auction_id for a in self.our_auctions)
+        our_items = np.unique(np.fromiter((a.item_id for a in self.our_auctions), dtype=np.int64,
+                                          count=len(self.our_auctions)))
+        if self._lowest_for == our_ids and self.order_book is not None:
+            items = book.diff(self.order_book, our_items)['changed_items']
+        else:
+            self._lowest_competitor = {}
+            items = our_items
+        
+        lowest = book.lowest_competitors(items, list(our_ids))
+        for item_id, price in zip(items.tolist(), lowest.tolist()):
+            if price == NO_PRICE:
+                self._lowest_competitor.pop(item_id, None)
+            else:
+                self._lowest_competitor[item_id] = price
+        self.order_book = book
+        self._lowest_for = our_ids
+        
+    def scan_for_undercuts(self, ah_data: Union[Sequence[Dict], OrderBook]) -> List[UndercutDetection]:
         """
         Scan AH for undercuts on our auctions.
         
-        ah_data: List of current AH listings
+        ah_data: List of current AH listings (or an OrderBook built from them)
         Returns: List of detected undercuts
+        
+        Competitors are listings that are not ours; the order book is kept
+        and the next scan only re-checks items whose listings changed.
         """
         undercuts = []
+        book = ah_data if isinstance(ah_data, OrderBook) else OrderBook(ah_data)
+        self._update_lowest_competitors(book)
+        self.last_scan_time = datetime.now()
         
         for our_auction in self.our_auctions:
-            # Find lowest competing price for this item
-            competing_prices = [
-                listing['price_per_item'] 
-                for listing in ah_data 
-                if listing['item_id'] == our_auction.item_id 
-                and listing.get('auction_id') != our_auction.auction_id
-            ]
+            # Lowest competing price for this item
+            lowest_competitor = self._lowest_competitor.get(our_auction.item_id)
             
-            if not competing_prices:
+            if lowest_competitor is None:
                 continue  # No competition
             
-            lowest_competitor = min(competing_prices)
-            
             if lowest_competitor < our_auction.price_per_item:
                 # We've been undercut!
                 undercut_amount = our_auction.price_per_item - lowest_competitor
@@ -212,14 +239,19 @@ class AuctionTracker:
         """Get all currently tracked auctions."""
         return list(self.auctions.values())
     
-    def update_from_ah_scan(self, ah_scan_data: List[Dict]):
-        """Update tracked auctions based on AH scan."""
+    def update_from_ah_scan(self, ah_scan_data: Union[Sequence[Dict], OrderBook]):
+        """Update tracked auctions based on AH scan (listings or the scan's OrderBook)."""
         # Remove auctions no longer on AH (sold)
-        current_ids = {a['auction_id'] for a in ah_scan_data if 'auction_id' in a}
+        tracked = list(self.auctions.keys())
+        if isinstance(ah_scan_data, OrderBook):
+            listed = ah_scan_data.contains_auctions(tracked).tolist()
+        else:
+            current_ids = {a['auction_id'] for a in ah_scan_data if 'auction_id' in a}
+            listed = [auction_id in current_ids for auction_id in tracked]
         
         sold = []
-        for auction_id in list(self.auctions.keys()):
-            if auction_id not in current_ids:
+        for auction_id, still_listed in zip(tracked, listed):
+            if not still_listed:
                 sold.append(auction_id)
                 self.remove_auction(auction_id)
         
@@ -3,99 +3,229 @@ AI Item Clustering - Automatically discover item behavior patterns
 and create intelligent TSM-style groups.
 """
 import os
+import copy
+import glob
 import json
+import pickle
 import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
+from scipy.optimize import linear_sum_assignment
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
 from loguru import logger
 from datetime import datetime
 from typing import List, Dict, Any
 
+CLUSTER_FEATURES = [
+    'price_mean', 'price_volatility', 'price_range',
+    'volume_score', 'supply_score'
+]
+
+
+class ItemFeatureAggregates:
+    """
+    Running per-item listing statistics, merged one snapshot at a time.
+    
+    Each item keeps count, mean and M2 (sum of squared deviations) of its
+    prices, min, max and total quantity; a snapshot is reduced per item
+    and merged with the parallel (Chan) update, so features never need
+    the raw listings of older snapshots.
+    """
+    
+    def __init__(self):
+        self.item_id = np.zeros(0, dtype=np.int64)  # sorted
+        self.count = np.zeros(0, dtype=np.int64)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+        self.price_min = np.zeros(0)
+        self.price_max = np.zeros(0)
+        self.quantity_sum = np.zeros(0)
+        self.processed_files: List[str] = []
+    
+    def __len__(self):
+        return len(self.item_id)
+    
+    def add(self, df: pd.DataFrame) -> np.ndarray:
+        """Merge one snapshot of listings (item_id, price, quantity); returns the item ids it touched."""
+        if df.empty:
+            return np.zeros(0, dtype=np.int64)
+        items, inverse = np.unique(df['item_id'].to_numpy(dtype=np.int64), return_inverse=True)
+        prices = df['price'].to_numpy(dtype=float)
+        count = np.bincount(inverse, minlength=len(items))
+        mean = np.bincount(inverse, weights=prices, minlength=len(items)) / count
+        m2 = np.bincount(inverse, weights=(prices - mean[inverse]) ** 2, minlength=len(items))
+        order = np.argsort(inverse, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(count)[:-1]))
+        price_min = np.minimum.reduceat(prices[order], starts)
+        price_max = np.maximum.reduceat(prices[order], starts)
+        quantity = np.bincount(inverse, weights=df['quantity'].to_numpy(dtype=float), minlength=len(items))
+        
+        # Grow to the union of item ids, then merge the batch rows in
+        merged = np.union1d(self.item_id, items)
+        if len(merged) != len(self.item_id):
+            old = np.searchsorted(merged, self.item_id)
+            grown = {
+                'count': np.zeros(len(merged), dtype=np.int64), 'mean': np.zeros(len(merged)),
+                'm2': np.zeros(len(merged)), 'price_min': np.full(len(merged), np.inf),
+                'price_max': np.full(len(merged), -np.inf), 'quantity_sum': np.zeros(len(merged)),
+            }
+            for name, column in grown.items():
+                column[old] = getattr(self, name)
+                setattr(self, name, column)
+            self.item_id = merged
+        rows = np.searchsorted(self.item_id, items)
+        
+        n_a, n_b = self.count[rows], count
+        total = n_a + n_b
+        delta = mean - self.mean[rows]
+        self.mean[rows] += delta * n_b / total
+        self.m2[rows] += m2 + delta ** 2 * n_a * n_b / total
+        self.count[rows] = total
+        self.price_min[rows] = np.minimum(self.price_min[rows], price_min)
+        self.price_max[rows] = np.maximum(self.price_max[rows], price_max)
+        self.quantity_sum[rows] += quantity
+        return items
+    
+    def features(self, min_count: int = 3) -> pd.DataFrame:
+        """
+        Per-item features (price stats, quantity and the CLUSTER_FEATURES
+        scores) for items with at least min_count listings.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            price_std = np.sqrt(self.m2 / (self.count - 1))  # sample std like pandas
+        features = pd.DataFrame({
+            'item_id': self.item_id,
+            'price_mean': self.mean,
+            'price_std': np.where(self.count > 1, price_std, np.nan),
+            'price_min': self.price_min,
+            'price_max': self.price_max,
+            'price_count': self.count,
+            'quantity_mean': self.quantity_sum / np.maximum(self.count, 1),
+            'quantity_sum': self.quantity_sum,
+        })
+        features['price_volatility'] = features['price_std'] / (features['price_mean'] + 1)
+        features['price_range'] = (features['price_max'] - features['price_min']) / (features['price_mean'] + 1)
+        features['volume_score'] = np.log1p(features['price_count'])
+        features['supply_score'] = np.log1p(features['quantity_sum'])
+        return features[features['price_count'] >= min_count].reset_index(drop=True)
+
 class ItemClusterer:
     """Unsupervised learning to discover item market patterns."""
     
-    def __init__(self, n_clusters: int = 8):
+    def __init__(self, n_clusters: int = 8, move_tolerance: float = 0.05):
         self.n_clusters = n_clusters
         self.scaler = StandardScaler()
         self.kmeans = None
         self.cluster_names = {}
-        
-    def load_historical_data(self) -> pd.DataFrame:
-        """Load all historical price data."""
+        # Incremental mode: items whose scaled features moved more than this get reassigned
+        self.move_tolerance = move_tolerance
+        self.aggregates = ItemFeatureAggregates()
+        self.assignments = pd.DataFrame(columns=['item_id', 'cluster'])
+        self._assigned_X = np.zeros((0, len(CLUSTER_FEATURES)))  # scaled features at last assignment
+        self.output_dir = os.path.join(os.path.dirname(__file__), "../data/groups")
+        
+    def _snapshot_files(self) -> List[str]:
         raw_dir = os.path.join(os.path.dirname(__file__), "../data/raw")
-        
-        import glob
-        all_files = glob.glob(os.path.join(raw_dir, "blizzard_*.csv"))
-        
-        if not all_files:
-            logger.error("No historical data found for clustering")
-            return pd.DataFrame()
-        
-        logger.info(f"Loading {len(all_files)} historical snapshots...")
-        df_list = []
-        for file in all_files:
-            try:
-                df = pd.read_csv(file)
-                df_list.append(df)
-            except Exception as e:
-                logger.warning(f"Failed to load {file}: {e}")
-        
-        if not df_list:
-            return pd.DataFrame()
-            
-        combined = pd.concat(df_list, ignore_index=True)
-        logger.info(f"Loaded {len(combined)} total auction records")
-        return combined
-    
-    def calculate_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Calculate clustering features for each item."""
-        logger.info("Calculating item features...")
-        
-        # Group by item
-        features = df.groupby('item_id').agg({
-            'price': ['mean', 'std', 'min', 'max', 'count'],
-            'quantity': ['mean', 'sum']
-        }).reset_index()
-        
-        # Flatten column names
-        features.columns = ['_'.join(col).strip('_') for col in features.columns.values]
-        features.rename(columns={'item_id_': 'item_id'}, inplace=True)
-        
-        # Calculate additional features
-        features['price_volatility'] = features['price_std'] / (features['price_mean'] + 1)
-        features['price_range'] = (features['price_max'] - features['price_min']) / (features['price_mean'] + 1)
-        features['volume_score'] = np.log1p(features['price_count'])  # Log of listing frequency
-        features['supply_score'] = np.log1p(features['quantity_sum'])  # Total supply
-        
-        # Drop items with insufficient data
-        features = features[features['price_count'] >= 3]  # At least 3 listings
-        
-        logger.info(f"Calculated features for {len(features)} items")
-        return features
+        return sorted(glob.glob(os.path.join(raw_dir, "blizzard_*.csv")))
     
     def fit_clusters(self, features: pd.DataFrame) -> pd.DataFrame:
-        """Fit K-means clustering on item features."""
-        logger.info(f"Fitting {self.n_clusters} clusters...")
+        """
+        Fit K-means clustering on item features.
         
-        # Select features for clustering
-        cluster_features = [
-            'price_mean', 'price_volatility', 'price_range',
-            'volume_score', 'supply_score'
-        ]
+        When a previous model exists, the new clusters are renumbered to
+        match the nearest previous centroids so cluster ids stay stable.
+        """
+        logger.info(f"Fitting {self.n_clusters} clusters...")
         
-        X = features[cluster_features].fillna(0)
+        X = features[CLUSTER_FEATURES].fillna(0)
+        previous = (copy.deepcopy(self.scaler), self.kmeans.cluster_centers_) if self.kmeans is not None else None
         
         # Standardize
         X_scaled = self.scaler.fit_transform(X)
         
         # Fit K-means
         self.kmeans = KMeans(n_clusters=self.n_clusters, random_state=42, n_init=10)
-        features['cluster'] = self.kmeans.fit_predict(X_scaled)
+        labels = self.kmeans.fit_predict(X_scaled)
+        if previous is not None and len(previous[1]) == self.n_clusters:
+            labels = self._match_previous_ids(labels, *previous)
+        features['cluster'] = labels
+        self._remember_assignments(features, X_scaled)
         
         logger.success(f"Clustering complete. {self.n_clusters} groups discovered.")
         return features
     
+    def _match_previous_ids(self, labels: np.ndarray, previous_scaler: StandardScaler,
+                            previous_centers: np.ndarray) -> np.ndarray:
+        """Renumber clusters to their nearest previous centroid (one-to-one, min total distance)."""
+        previous_centers = self.scaler.transform(pd.DataFrame(
+            previous_scaler.inverse_transform(previous_centers), columns=CLUSTER_FEATURES))
+        centers = self.kmeans.cluster_centers_
+        cost = ((centers[:, None, :] - previous_centers[None, :, :]) ** 2).sum(axis=2)
+        new_ids, old_ids = linear_sum_assignment(cost)
+        mapping = np.empty(self.n_clusters, dtype=np.int64)
+        mapping[new_ids] = old_ids
+        self.kmeans.cluster_centers_ = self.kmeans.cluster_centers_[np.argsort(mapping)]
+        return mapping[labels]
+    
+    def _remember_assignments(self, features: pd.DataFrame, X_scaled: np.ndarray):
+        self.assignments = features[['item_id', 'cluster']].reset_index(drop=True)
+        self._assigned_X = np.asarray(X_scaled, dtype=float)
+    
+    def update_clusters(self, features: pd.DataFrame) -> pd.DataFrame:
+        """
+        Incremental clustering step over the current per-item features.
+        
+        The scaler stays as fitted; a MiniBatchKMeans seeded with the
+        previous centroids (weighted by their cluster sizes) takes a
+        partial_fit on the items whose features moved (or are new), and
+        only those items are reassigned. Everything else keeps its
+        cluster, so ids are stable across runs.
+        """
+        X_scaled = self.scaler.transform(features[CLUSTER_FEATURES].fillna(0))
+        item_ids = features['item_id'].to_numpy(dtype=np.int64)
+        
+        # Previous assignment per item (-1 for new items)
+        known_ids = self.assignments['item_id'].to_numpy(dtype=np.int64)
+        labels = np.full(len(item_ids), -1, dtype=np.int64)
+        known = np.zeros(len(item_ids), dtype=bool)
+        rows = np.zeros(len(item_ids), dtype=np.int64)
+        if len(known_ids):
+            order = np.argsort(known_ids)
+            k = np.minimum(np.searchsorted(known_ids[order], item_ids), len(known_ids) - 1)
+            rows = order[k]
+            known = known_ids[rows] == item_ids
+            labels[known] = self.assignments['cluster'].to_numpy(dtype=np.int64)[rows[known]]
+        moved = ~known
+        moved[known] = np.linalg.norm(X_scaled[known] - self._assigned_X[rows[known]], axis=1) > self.move_tolerance
+        
+        if not isinstance(self.kmeans, MiniBatchKMeans):
+            self._seed_minibatch()
+        if moved.any():
+            changed = X_scaled[moved]
+            self.kmeans.partial_fit(changed)
+            labels[moved] = self.kmeans.predict(changed)
+        
+        features['cluster'] = labels
+        # Unmoved items keep the features they were assigned with, so slow drift still adds up
+        assigned_X = X_scaled.copy()
+        assigned_X[~moved] = self._assigned_X[rows[~moved]]
+        self.assignments = features[['item_id', 'cluster']].reset_index(drop=True)
+        self._assigned_X = assigned_X
+        logger.success(f"Incremental clustering: reassigned {int(moved.sum())} of {len(features)} items")
+        return features
+    
+    def _seed_minibatch(self):
+        """
+        Replace the full-fit KMeans by a MiniBatchKMeans with the same
+        centroids: one partial_fit on the centroids themselves, weighted by
+        cluster size, leaves them in place and sets their sample counts.
+        """
+        centers = self.kmeans.cluster_centers_
+        sizes = np.bincount(self.assignments['cluster'].to_numpy(dtype=np.int64), minlength=self.n_clusters)
+        self.kmeans = MiniBatchKMeans(n_clusters=self.n_clusters, init=centers,
+                                      n_init=1, random_state=42, batch_size=4096)
+        self.kmeans.partial_fit(centers, sample_weight=np.maximum(sizes, 1).astype(float))
+    
     def label_clusters(self, features: pd.DataFrame) -> Dict[int, Dict[str, Any]]:
         """Assign human-readable names to clusters based on characteristics."""
         logger.info("Labeling discovered groups...")
@@ -188,38 +318,98 @@ class ItemClusterer:
             return "Steady investment - Buy and hold"
     
     def export_tsm_groups(self, features: pd.DataFrame, cluster_profiles: Dict) -> str:
-        """Generate TSM group import string."""
+        """Generate TSM group import string (group names carry the stable cluster id)."""
         logger.info("Generating TSM group export...")
         
         tsm_string = "group:GoblinAI\\n"
         
-        for cluster_id, profile in cluster_profiles.items():
-            group_name = profile['name'].replace(' ', '_')
+        for cluster_id, profile in sorted(cluster_profiles.items()):
+            group_name = f"{profile['name'].replace(' ', '_')}_{cluster_id}"
             items = features[features['cluster'] == cluster_id]['item_id'].tolist()
             
             tsm_string += f"  group:{group_name}\\n"
-            tsm_string += f"    items:{'i:'.join(map(str, items))}\\n"
+            tsm_string += f"    items:{','.join(f'i:{item_id}' for item_id in items)}\\n"
         
         return tsm_string
     
-    def run(self) -> Dict[str, Any]:
-        """Execute full clustering pipeline."""
+    # --- Incremental state ---
+    
+    def _state_path(self) -> str:
+        return os.path.join(self.output_dir, "cluster_state.pkl")
+    
+    def save_state(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(self._state_path(), 'wb') as f:
+            pickle.dump({
+                'n_clusters': self.n_clusters,
+                'scaler': self.scaler,
+                'kmeans': self.kmeans,
+                'aggregates': self.aggregates,
+                'assignments': self.assignments,
+                'assigned_X': self._assigned_X,
+            }, f)
+    
+    def load_state(self) -> bool:
+        """Restore the previous run's model and aggregates; False if there is none."""
+        try:
+            with open(self._state_path(), 'rb') as f:
+                state = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        if state['n_clusters'] != self.n_clusters:
+            logger.warning("Saved clustering state has a different cluster count; ignoring it")
+            return False
+        self.scaler = state['scaler']
+        self.kmeans = state['kmeans']
+        self.aggregates = state['aggregates']
+        self.assignments = state['assignments']
+        self._assigned_X = state['assigned_X']
+        return True
+    
+    def ingest_new_snapshots(self) -> int:
+        """Fold snapshot files not seen before into the per-item aggregates."""
+        done = set(self.aggregates.processed_files)
+        new_files = [path for path in self._snapshot_files() if os.path.basename(path) not in done]
+        for path in new_files:
+            try:
+                self.aggregates.add(pd.read_csv(path, usecols=['item_id', 'price', 'quantity']))
+            except Exception as e:
+                logger.warning(f"Failed to load {path}: {e}")
+                continue
+            self.aggregates.processed_files.append(os.path.basename(path))
+        logger.info(f"Ingested {len(new_files)} new snapshots ({len(self.aggregates)} items tracked)")
+        return len(new_files)
+    
+    def run(self, incremental: bool = False) -> Dict[str, Any]:
+        """
+        Execute full clustering pipeline.
+        
+        incremental: fold only new snapshots into the saved per-item
+        aggregates and update the saved model instead of refitting
+        (falls back to a full run when there is no saved state).
+        """
         logger.info("Starting AI item clustering...")
         
-        #  Load data
-        df = self.load_historical_data()
-        if df.empty:
-            logger.error("No data available for clustering")
-            return {}
-        
-        # Calculate features
-        features = self.calculate_features(df)
-        if features.empty:
-            logger.error("Feature calculation failed")
-            return {}
-        
-        # Cluster
-        features = self.fit_clusters(features)
+        if incremental and self.load_state() and self.kmeans is not None:
+            self.ingest_new_snapshots()
+            features = self.aggregates.features()
+            if features.empty:
+                logger.error("Feature calculation failed")
+                return {}
+            features = self.update_clusters(features)
+        else:
+            # Full run: rebuild aggregates from every snapshot and refit
+            self.load_state()  # previous centroids, for stable cluster ids
+            self.aggregates = ItemFeatureAggregates()
+            self.ingest_new_snapshots()
+            if not len(self.aggregates):
+                logger.error("No data available for clustering")
+                return {}
+            features = self.aggregates.features()
+            if features.empty:
+                logger.error("Feature calculation failed")
+                return {}
+            features = self.fit_clusters(features)
         
         # Label
         cluster_profiles = self.label_clusters(features)
@@ -228,7 +418,7 @@ class ItemClusterer:
         tsm_export = self.export_tsm_groups(features, cluster_profiles)
         
         # Save results
-        output_dir = os.path.join(os.path.dirname(__file__), "../data/groups")
+        output_dir = self.output_dir
         os.makedirs(output_dir, exist_ok=True)
         
         result = {
@@ -244,6 +434,7 @@ class ItemClusterer:
         
         with open(os.path.join(output_dir, "tsm_export.txt"), "w") as f:
             f.write(tsm_export)
+        self.save_state()
         
         logger.success(f"AI grouping complete! Discovered {self.n_clusters} intelligent groups.")
         logger.info(f"Results saved to {output_dir}")
@@ -251,8 +442,9 @@ class ItemClusterer:
         return result
 
 if __name__ == "__main__":
+    import sys
     clusterer = ItemClusterer(n_clusters=8)
-    result = clusterer.run()
+    result = clusterer.run(incremental='--incremental' in sys.argv)
     
     # Print summary
     if result:
@@ -0,0 +1,342 @@
+"""
+Accounting Ledger - append-only SQLite transaction store with running aggregates
+
+Every transaction is appended to the `ledger` table and never updated.
+Each append (a single record or a whole batch) folds the new rows into
+aggregate tables keyed by character, item and day inside the same SQLite
+transaction, so totals and per-character/item/day reports are key lookups
+or short index scans instead of passes over the full history. Time-range
+queries (session stats) use the timestamp index.
+
+TSM accounting CSV exports (sales, purchases, income, expenses) can be
+bulk imported; every row carries a unique source_key (a hash of the
+imported record, random for live records) so re-importing an export that
+has grown since last time, or reloading a save, only adds the new rows.
+"""
+import csv
+import hashlib
+import os
+import sqlite3
+from collections import Counter
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+AH_CUT = 0.05
+
+# Columns of the ledger table, in insert order
+LEDGER_COLUMNS = ('timestamp', 'day', 'transaction_type', 'item_id', 'item_name', 'quantity',
+                  'price_per_item', 'total_amount', 'character', 'realm', 'notes', 'source_key')
+
+_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS ledger (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp REAL NOT NULL,      -- epoch seconds
+        day INTEGER NOT NULL,         -- local date ordinal
+        transaction_type TEXT NOT NULL,
+        item_id INTEGER NOT NULL,
+        item_name TEXT,
+        quantity INTEGER NOT NULL,
+        price_per_item INTEGER NOT NULL,
+        total_amount INTEGER NOT NULL,
+        character TEXT NOT NULL,
+        realm TEXT,
+        notes TEXT,
+        source_key INTEGER UNIQUE     -- dedup key, see source_key()
+    );
+    CREATE INDEX IF NOT EXISTS ledger_timestamp ON ledger(timestamp);
+
+    CREATE TABLE IF NOT EXISTS ledger_by_character (
+        character TEXT PRIMARY KEY,
+        profit INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS ledger_by_item (
+        item_id INTEGER PRIMARY KEY,
+        item_name TEXT,
+        profit INTEGER NOT NULL,
+        sold INTEGER NOT NULL,
+        bought INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS ledger_by_item_profit ON ledger_by_item(profit);
+    CREATE TABLE IF NOT EXISTS ledger_by_day (
+        day INTEGER PRIMARY KEY,
+        profit INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS ledger_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+'''
+
+# Fold rows with id > ? into the aggregates (upserts; the ledger is append-only)
+_FOLD = (
+    '''INSERT INTO ledger_by_character (character, profit)
+       SELECT character, SUM(total_amount) FROM ledger WHERE id > ? GROUP BY character
+       ON CONFLICT(character) DO UPDATE SET profit = profit + excluded.profit''',
+    # item_name is the first one seen (bare column next to MIN(id))
+    '''INSERT INTO ledger_by_item (item_id, item_name, profit, sold, bought)
+       SELECT item_id, item_name, profit, sold, bought FROM (
+           SELECT item_id, item_name, MIN(id), SUM(total_amount) AS profit,
+                  SUM(CASE WHEN transaction_type = 'sell' THEN quantity ELSE 0 END) AS sold,
+                  SUM(CASE WHEN transaction_type = 'buy' THEN quantity ELSE 0 END) AS bought
+           FROM ledger WHERE id > ? GROUP BY item_id) WHERE true
+       ON CONFLICT(item_id) DO UPDATE SET
+           item_name = COALESCE(item_name, excluded.item_name),
+           profit = profit + excluded.profit,
+           sold = sold + excluded.sold,
+           bought = bought + excluded.bought''',
+    '''INSERT INTO ledger_by_day (day, profit)
+       SELECT day, SUM(total_amount) FROM ledger WHERE id > ? GROUP BY day
+       ON CONFLICT(day) DO UPDATE SET profit = profit + excluded.profit''',
+)
+
+# TSM export kind -> (transaction_type, sign of total_amount)
+TSM_KINDS = {
+    'sales': ('sell', 1),
+    'purchases': ('buy', -1),
+    'income': ('income', 1),
+    'expenses': ('expense', -1),
+}
+
+
+Timestamp = Union[datetime, float]
+
+
+@lru_cache(maxsize=4096)
+def _local_day(quarter_hour: int) -> int:
+    # Local UTC offsets are whole quarter hours, so a day never changes within one
+    return datetime.fromtimestamp(quarter_hour * 900).date().toordinal()
+
+
+def _epoch_day(timestamp: Timestamp) -> Tuple[float, int]:
+    """(epoch seconds, local date ordinal) for a datetime or epoch seconds."""
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp(), timestamp.date().toordinal()
+    return timestamp, _local_day(int(timestamp) // 900)
+
+
+def source_key(identity: str) -> int:
+    """
+    Dedup key for an imported row: a 64-bit hash of the whole record's
+    text, as a signed SQLite integer (bit 0 is left for the AH-cut row
+    that goes with a sale).
+    """
+    digest = hashlib.blake2b(identity.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True) & ~1
+
+
+def new_source_key() -> int:
+    """Dedup key for a live record: random, so identical records stay distinct."""
+    return int.from_bytes(os.urandom(8), 'big', signed=True) & ~1
+
+
+def ledger_row(timestamp: Timestamp, transaction_type: str, item_id: int, item_name: Optional[str],
+               quantity: int, price_per_item: int, total_amount: int, character: str,
+               realm: str, notes: Optional[str] = None, source_key: Optional[int] = None) -> Tuple:
+    """One ledger row in LEDGER_COLUMNS order."""
+    epoch, day = _epoch_day(timestamp)
+    return (epoch, day, transaction_type, item_id, item_name,
+            quantity, price_per_item, total_amount, character, realm, notes, source_key)
+
+
+def sale_rows(timestamp: Timestamp, item_id: int, item_name: str, quantity: int, price_per_item: int,
+              character: str, realm: str, auction: bool = True,
+              source_key: Optional[int] = None) -> List[Tuple]:
+    """A sale as ledger rows: net income plus the AH cut as its own expense row."""
+    epoch, day = _epoch_day(timestamp)
+    gross = quantity * price_per_item
+    ah_cut = int(gross * AH_CUT) if auction else 0
+    rows = [(epoch, day, 'sell', item_id, item_name, quantity, price_per_item,
+             gross - ah_cut, character, realm, None, source_key)]
+    if ah_cut:
+        rows.append((epoch, day, 'ah_cut', item_id, item_name, quantity, price_per_item,
+                     -ah_cut, character, realm, f"5% AH cut on sale of {item_name}",
+                     None if source_key is None else source_key | 1))
+    return rows
+
+
+def parse_item_string(item_string: str) -> int:
+    """TSM item string ("i:12345", "i:12345:1:2", "p:..." or a bare id) -> item id (0 if none)."""
+    parts = item_string.split(':')
+    if len(parts) == 1:
+        return int(parts[0]) if parts[0].isdigit() else 0
+    return int(parts[1]) if parts[0] == 'i' and parts[1].isdigit() else 0
+
+
+def tsm_kind(path: str) -> str:
+    """Export kind from the file name (Accounting_<realm>_sales.csv etc.)."""
+    name = os.path.basename(path).lower()
+    for kind in TSM_KINDS:
+        if kind in name:
+            return kind
+    raise ValueError(f"Cannot tell which TSM accounting export {path} is; pass kind= one of {list(TSM_KINDS)}")
+
+
+def tsm_rows(path: str, realm: str = '', kind: Optional[str] = None) -> Iterator[Tuple]:
+    """
+    Ledger rows for a TSM accounting CSV export.
+
+    sales/purchases: itemString,itemName,stackSize,quantity,price,otherPlayer,player,time,source
+    income/expenses: type,amount,otherPlayer,player,time
+    Auction sales are booked net of the AH cut like AccountingSystem.record_sale.
+    """
+    kind = kind or tsm_kind(path)
+    transaction_type, sign = TSM_KINDS[kind]
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        column = {name: i for i, name in enumerate(next(reader, []))}
+        time_at, player_at = column['time'], column['player']
+        other_at, source_at = column.get('otherPlayer'), column.get('source')
+        seen = Counter()
+        for record in reader:
+            if not record:
+                continue
+            # Identical rows (same second, same stack) are distinct sales: number them
+            identity = f"{kind}|{','.join(record)}"
+            seen[identity] += 1
+            epoch = float(record[time_at])
+            key = source_key(f"{identity}|{seen[identity]}")
+            character = record[player_at]
+            if kind in ('income', 'expenses'):
+                amount = int(record[column['amount']])
+                other = record[other_at] if other_at is not None else ''
+                notes = f"{record[column['type']]} ({other})" if other else record[column['type']]
+                yield ledger_row(epoch, transaction_type, 0, None, 1, amount,
+                                 sign * amount, character, realm, notes=notes, source_key=key)
+                continue
+            item_id = parse_item_string(record[column['itemString']])
+            item_name = record[column['itemName']]
+            quantity, price = int(record[column['quantity']]), int(record[column['price']])
+            if kind == 'sales':
+                auction = source_at is None or record[source_at] == 'Auction'
+                yield from sale_rows(epoch, item_id, item_name, quantity, price, character, realm,
+                                     auction=auction, source_key=key)
+            else:
+                yield ledger_row(epoch, transaction_type, item_id, item_name, quantity, price,
+                                 -quantity * price, character, realm, source_key=key)
+
+
+class Ledger:
+    """Append-only transaction store with per-character, per-item and per-day running totals."""
+
+    def __init__(self, db_path: str = ':memory:'):
+        self.db_path = db_path
+        if db_path != ':memory:' and os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA cache_size = -65536')  # 64 MB: keeps the indexes hot during imports
+        if db_path != ':memory:':
+            self.conn.execute('PRAGMA journal_mode = WAL')
+            self.conn.execute('PRAGMA synchronous = NORMAL')
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COALESCE(MAX(id), 0) FROM ledger').fetchone()[0]
+
+    # --- Writes ---
+
+    def append(self, rows: Iterable[Tuple], batch_size: int = 50000) -> int:
+        """
+        Append ledger rows (LEDGER_COLUMNS order) and fold them into the
+        aggregates; rows whose source_key is already stored are skipped.
+        Returns the number of rows added.
+        """
+        added = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                added += self._append_batch(batch)
+                batch = []
+        if batch:
+            added += self._append_batch(batch)
+        return added
+
+    def _append_batch(self, rows: List[Tuple]) -> int:
+        with self.conn:
+            before = self.conn.execute('SELECT COALESCE(MAX(id), 0) FROM ledger').fetchone()[0]
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO ledger ({', '.join(LEDGER_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(LEDGER_COLUMNS))})", rows)
+            after = self.conn.execute('SELECT COALESCE(MAX(id), 0) FROM ledger').fetchone()[0]
+            if after > before:
+                for statement in _FOLD:
+                    self.conn.execute(statement, (before,))
+        return after - before
+
+    def import_tsm_csv(self, path: str, realm: str = '', kind: Optional[str] = None) -> int:
+        """Bulk import one TSM accounting export; returns the number of new rows."""
+        return self.append(tsm_rows(path, realm, kind))
+
+    def set_meta(self, key: str, value: str):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO ledger_meta (key, value) VALUES (?, ?)', (key, value))
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.conn.execute('SELECT value FROM ledger_meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    # --- Reports ---
+
+    def total_profit(self) -> int:
+        return self.conn.execute('SELECT COALESCE(SUM(profit), 0) FROM ledger_by_character').fetchone()[0]
+
+    def profit_by_character(self) -> Dict[str, int]:
+        return dict(self.conn.execute('SELECT character, profit FROM ledger_by_character ORDER BY rowid'))
+
+    def character_profit(self, character: str) -> int:
+        row = self.conn.execute('SELECT profit FROM ledger_by_character WHERE character = ?',
+                                (character,)).fetchone()
+        return row[0] if row else 0
+
+    def profit_by_item(self, limit: Optional[int] = None) -> List[Dict]:
+        """Items by profit, best first (ties in first-seen order)."""
+        rows = self.conn.execute(
+            'SELECT item_id, item_name, profit, sold, bought FROM ledger_by_item '
+            'ORDER BY profit DESC, rowid LIMIT ?', (-1 if limit is None else limit,))
+        return [{'item_id': item_id, 'item_name': name, 'total_profit': profit,
+                 'total_sold': sold, 'total_bought': bought}
+                for item_id, name, profit, sold, bought in rows]
+
+    def item_profit(self, item_id: int) -> Optional[Dict]:
+        row = self.conn.execute('SELECT item_id, item_name, profit, sold, bought FROM ledger_by_item '
+                                'WHERE item_id = ?', (item_id,)).fetchone()
+        if not row:
+            return None
+        return {'item_id': row[0], 'item_name': row[1], 'total_profit': row[2],
+                'total_sold': row[3], 'total_bought': row[4]}
+
+    def profit_by_day(self, since: date) -> Dict[date, int]:
+        rows = self.conn.execute('SELECT day, profit FROM ledger_by_day WHERE day >= ? ORDER BY day',
+                                 (since.toordinal(),))
+        return {date.fromordinal(day): profit for day, profit in rows}
+
+    def profit_since(self, since: datetime) -> int:
+        return self.conn.execute('SELECT COALESCE(SUM(total_amount), 0) FROM ledger WHERE timestamp >= ?',
+                                 (since.timestamp(),)).fetchone()[0]
+
+    def profit_between(self, start: datetime, end: datetime) -> Optional[int]:
+        """Profit of transactions in [start, end); None when there are none."""
+        count, profit = self.conn.execute(
+            'SELECT COUNT(*), SUM(total_amount) FROM ledger WHERE timestamp >= ? AND timestamp < ?',
+            (start.timestamp(), end.timestamp())).fetchone()
+        return profit if count else None
+
+    def stats_since(self, since: datetime) -> Dict[str, Dict[str, int]]:
+        """Per transaction type since a time: transactions, quantity, amount."""
+        rows = self.conn.execute(
+            'SELECT transaction_type, COUNT(*), SUM(quantity), SUM(total_amount) FROM ledger '
+            'WHERE timestamp >= ? GROUP BY transaction_type', (since.timestamp(),))
+        return {kind: {'transactions': n, 'quantity': quantity, 'amount': amount}
+                for kind, n, quantity, amount in rows}
+
+    def rows(self, since: Optional[datetime] = None) -> Iterator[Tuple]:
+        """Stored rows in append order (LEDGER_COLUMNS order), optionally from a time on."""
+        columns = ', '.join(LEDGER_COLUMNS)
+        if since is None:
+            return self.conn.execute(f'SELECT {columns} FROM ledger ORDER BY id')
+        return self.conn.execute(f'SELECT {columns} FROM ledger WHERE timestamp >= ? ORDER BY id',
+                                 (since.timestamp(),))
@@ -1,109 +1,176 @@
 """
 Market Manipulation Detection - Identify price fixing, resets, and artificial scarcity
+
+Each item's latest point is checked against its previous point and the
+rolling median (and MAD z-score) of up to `window` points before it. The
+rules, thresholds and alert payloads are the same as Holocron's
+StreamingMarketDetector:
+
+- MARKET_RESET: price > reset_threshold x previous (0.9 confidence when
+  the supply dropped by half, else 0.6)
+- PRICE_CRASH: price < dump_threshold x previous (dumping)
+- FLASH_CRASH: price more than crash_drop below the rolling median
+- ARTIFICIAL_SCARCITY: one seller holds >= scarcity_share of the listings
+  and the price is scarcity_markup x the rolling median
 """
 import pandas as pd
 import numpy as np
 from loguru import logger
 from typing import List, Dict
 
+MAD_SCALE = 1.4826  # MAD -> standard deviation for normal data
+
+
+def _rolling_median(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Row medians of the first counts[i] valid entries of each row (NaN padded)."""
+    ordered = np.sort(values, axis=1)  # NaN sorts last
+    rows = np.arange(len(values))
+    low = ordered[rows, np.maximum((counts - 1) // 2, 0)]
+    high = ordered[rows, np.maximum(counts // 2, 0)]
+    return np.where(counts > 0, (low + high) / 2, np.nan)
+
+
 class ManipulationDetector:
     """Detect potential market manipulation and high-risk/high-reward events."""
-    
-    def __init__(self):
+
+    def __init__(self, window: int = 48, min_history: int = 5):
+        self.window = window
+        self.min_history = min_history  # points including the latest one
         self.reset_threshold = 2.0  # Price jumps > 200%
-        self.scarcity_threshold = 0.2 # Supply drops to < 20% of average
-        
+        self.dump_threshold = 0.5  # Price falls > 50%
+        self.crash_drop = 0.4  # > 40% under the rolling median
+        self.scarcity_share = 0.8  # One seller holds >= 80% of the listings...
+        self.scarcity_markup = 1.5  # ...at > 1.5x the rolling median
+
+    def _last_points(self, price_history: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Latest point of every item with at least min_history priced rows,
+        with its previous point and the rolling median / MAD of the window
+        before it: one stable sort by (item_id, timestamp), then group ends.
+        """
+        priced = price_history[price_history['price'] > 0]
+        ordered = priced.sort_values(['item_id', 'timestamp'], kind='mergesort')
+        item_ids = ordered['item_id'].to_numpy()
+        prices = ordered['price'].to_numpy(dtype=float)
+        if len(item_ids):
+            ends = np.flatnonzero(np.append(item_ids[1:] != item_ids[:-1], True))
+            starts = np.concatenate(([0], ends[:-1] + 1))
+            enough = ends - starts + 1 >= self.min_history
+            last, first = ends[enough], starts[enough]
+        else:
+            last = first = np.zeros(0, dtype=np.int64)
+
+        # Up to `window` points before the latest one, NaN padded
+        slots = last[:, None] - self.window + np.arange(self.window)
+        valid = slots >= first[:, None]
+        window_prices = np.where(valid, prices[np.maximum(slots, 0)], np.nan)
+        counts = valid.sum(axis=1)
+        median = _rolling_median(window_prices, counts)
+        mad = _rolling_median(np.abs(window_prices - median[:, None]), counts)
+
+        quantities = ordered['quantity'].to_numpy(dtype=float) if 'quantity' in ordered.columns else np.zeros(len(prices))
+        return {'item_id': item_ids[last], 'last': last, 'previous': last - 1, 'median': median, 'mad': mad,
+                'ordered': ordered, 'prices': prices, 'quantities': quantities}
+
+    def _alerts(self, rule: str, points: Dict[str, np.ndarray], selected: np.ndarray) -> List[Dict]:
+        """Alerts for the selected items, in the StreamingMarketDetector payload format."""
+        ordered, prices = points['ordered'], points['prices']
+        last, previous = points['last'], points['previous']
+        shares = (ordered['top_seller_share'].to_numpy(dtype=float) if 'top_seller_share' in ordered.columns
+                  else np.zeros(len(prices)))
+        timestamps = ordered['timestamp'].to_numpy()
+
+        alerts = []
+        for i in selected:
+            price, median = float(prices[last[i]]), float(points['median'][i])
+            change = price / prices[previous[i]]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                z = (price - median) / (MAD_SCALE * points['mad'][i])
+            alert = {'type': rule, 'item_id': points['item_id'][i], 'timestamp': timestamps[last[i]], 'price': price,
+                     'rolling_median': round(median, 1), 'z_score': round(float(z), 2) if np.isfinite(z) else None}
+            if rule == 'MARKET_RESET':
+                # Supply dropped significantly before price hike (classic reset), else maybe organic
+                quantity, previous_quantity = points['quantities'][last[i]], points['quantities'][previous[i]]
+                volume_change = quantity / previous_quantity if previous_quantity > 0 else 1.0
+                jump = round((change - 1) * 100)
+                alert.update(price_jump_pct=jump, confidence=0.9 if volume_change < 0.5 else 0.6,
+                             action='SELL', message=f"Market Reset Detected! Price jumped {jump}%")
+            elif rule == 'PRICE_CRASH':
+                fall = round((1 - change) * 100)
+                alert.update(drop_pct=fall, confidence=0.8, action='BUY',
+                             message=f"Price Crash! Dropped {fall}%")
+            elif rule == 'FLASH_CRASH':
+                drop = (median - price) / median
+                alert.update(drop_pct=round(drop * 100, 1), confidence=0.9,
+                             action='BUY MAXIMUM - This is a panic sell',
+                             expected_recovery=f"{round(median / 10000, 1)}g",
+                             message=f"Flash crash: {round(drop * 100, 1)}% under the rolling median")
+            else:
+                share = float(shares[last[i]])
+                alert.update(seller_share=round(share, 2), confidence=0.75,
+                             action='DO NOT BUY - one seller controls supply',
+                             message=f"Artificial scarcity: one seller holds {round(share * 100)}% at "
+                                     f"{round(price / median, 1)}x the rolling median")
+            alerts.append(alert)
+        return alerts
+
     def detect_market_resets(self, price_history: pd.DataFrame) -> List[Dict]:
         """
         Detect recent market resets (someone bought everything and reposted higher).
-        
+
         Logic:
         1. Sudden price spike (> 200%)
         2. Sudden volume drop (supply cleared)
         3. New listings appear at higher price
         """
-        alerts = []
-        
-        # Group by item
-        for item_id, group in price_history.groupby('item_id'):
-            if len(group) < 5: continue
-            
-            # Sort by time
-            group = group.sort_values('timestamp')
-            
-            # Check last 2 data points
-            current = group.iloc[-1]
-            previous = group.iloc[-2]
-            
-            price_change = current['price'] / previous['price']
-            volume_change = current['quantity'] / previous['quantity'] if previous['quantity'] > 0 else 1.0
-            
-            if price_change > self.reset_threshold:
-                # Potential reset
-                confidence = 0.0
-                
-                if volume_change < 0.5:
-                    # Supply dropped significantly before price hike (classic reset)
-                    confidence = 0.9
-                else:
-                    # Price just jumped, maybe organic?
-                    confidence = 0.6
-                
-                alerts.append({
-                    'type': 'MARKET_RESET',
-                    'item_id': item_id,
-                    'price_jump_pct': round((price_change - 1) * 100),
-                    'confidence': confidence,
-                    'timestamp': current['timestamp'],
-                    'action': 'SELL', # Sell into the reset
-                    'message': f"Market Reset Detected! Price jumped {round((price_change - 1) * 100)}%"
-                })
-                
-        return alerts
+        points = self._last_points(price_history)
+        prices = points['prices']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            price_change = prices[points['last']] / prices[points['previous']]
+        return self._alerts('MARKET_RESET', points, np.flatnonzero(price_change > self.reset_threshold))
 
     def detect_artificial_scarcity(self, price_history: pd.DataFrame) -> List[Dict]:
         """
         Detect items being monopolized (one seller controlling supply).
-        
-        Requires seller data (from addon scan).
+
+        Requires seller data (from addon scan): a top_seller_share column.
+        If top_seller_share >= 80% AND price > rolling median * 1.5 -> Monopoly
         """
-        alerts = []
-        # This requires seller name data which we might not have in basic history
-        # Placeholder for logic:
-        # If top_seller_share > 80% AND price > historical_avg * 1.5 -> Monopoly
-        return alerts
+        if 'top_seller_share' not in price_history.columns:
+            return []
+        points = self._last_points(price_history)
+        shares = points['ordered']['top_seller_share'].to_numpy(dtype=float)[points['last']]
+        prices = points['prices'][points['last']]
+        scarce = (shares >= self.scarcity_share) & (prices > points['median'] * self.scarcity_markup)
+        return self._alerts('ARTIFICIAL_SCARCITY', points, np.flatnonzero(scarce))
 
     def detect_dumping(self, price_history: pd.DataFrame) -> List[Dict]:
         """
         Detect panic selling or dumping (price crashing).
         """
-        alerts = []
-        for item_id, group in price_history.groupby('item_id'):
-            if len(group) < 5: continue
-            group = group.sort_values('timestamp')
-            
-            current = group.iloc[-1]
-            previous = group.iloc[-2]
-            
-            price_change = current['price'] / previous['price']
-            
-            if price_change < 0.5: # 50% drop
-                alerts.append({
-                    'type': 'PRICE_CRASH',
-                    'item_id': item_id,
-                    'drop_pct': round((1 - price_change) * 100),
-                    'confidence': 0.8,
-                    'timestamp': current['timestamp'],
-                    'action': 'BUY', # Potential snipe if overreaction
-                    'message': f"Price Crash! Dropped {round((1 - price_change) * 100)}%"
-                })
-        return alerts
+        points = self._last_points(price_history)
+        prices = points['prices']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            price_change = prices[points['last']] / prices[points['previous']]
+        return self._alerts('PRICE_CRASH', points, np.flatnonzero(price_change < self.dump_threshold))
+
+    def detect_flash_crashes(self, price_history: pd.DataFrame) -> List[Dict]:
+        """
+        Detect flash crashes (price far under the rolling median).
+        """
+        points = self._last_points(price_history)
+        median = points['median']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drop = (median - points['prices'][points['last']]) / median
+        return self._alerts('FLASH_CRASH', points, np.flatnonzero(drop > self.crash_drop))
 
     def analyze_market(self, price_history: pd.DataFrame) -> List[Dict]:
         """Run all detection algorithms."""
         all_alerts = []
         all_alerts.extend(self.detect_market_resets(price_history))
         all_alerts.extend(self.detect_dumping(price_history))
-        
+        all_alerts.extend(self.detect_flash_crashes(price_history))
+        all_alerts.extend(self.detect_artificial_scarcity(price_history))
+
         logger.info(f"Manipulation detection found {len(all_alerts)} alerts")
         return all_alerts
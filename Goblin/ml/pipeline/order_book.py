@@ -0,0 +1,149 @@
+"""
+Order Book - per-item sorted AH listings built once per scan
+
+An AH scan (list of listing dicts) becomes parallel NumPy arrays sorted by
+(item, price, auction id), with per-item offsets, so one item's book is a
+slice whose first entry is its lowest listing. Lowest-competitor prices for
+many auctions at once mask out our own auction ids and take the first
+remaining row per item. Successive books diff by auction id to find the
+items whose listings changed.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+NO_PRICE = -1  # lowest_competitors() value for items without competition
+
+
+class OrderBook:
+    """Immutable snapshot of one AH scan."""
+
+    def __init__(self, ah_data: Sequence[Dict]):
+        n = len(ah_data)
+        item_ids = np.fromiter((l['item_id'] for l in ah_data), dtype=np.int64, count=n)
+        prices = np.fromiter((l['price_per_item'] for l in ah_data), dtype=np.int64, count=n)
+        # Listings without an auction id get unique negative ids so they never match ours
+        auction_ids = np.fromiter((l.get('auction_id', -1 - i) for i, l in enumerate(ah_data)),
+                                  dtype=np.int64, count=n)
+        seller_index: Dict[str, int] = {}
+        seller_codes = np.fromiter(
+            (seller_index.setdefault(l['seller'], len(seller_index)) if l.get('seller') else -1
+             for l in ah_data), dtype=np.int64, count=n)
+        self.sellers: List[str] = list(seller_index)
+
+        order = np.lexsort((auction_ids, prices, item_ids))
+        self.item_id = item_ids[order]
+        self.price = prices[order]
+        self.auction_id = auction_ids[order]
+        self.seller = seller_codes[order]
+
+        # items[k] occupies rows offsets[k]:offsets[k + 1]
+        starts = np.flatnonzero(np.diff(self.item_id, prepend=self.item_id[:1] - 1)) if n else np.zeros(0, dtype=np.int64)
+        self.items = self.item_id[starts]
+        self.offsets = np.append(starts, n).astype(np.int64)
+        self._auction_order = np.argsort(self.auction_id, kind='stable')
+        self._sorted_auction_ids = self.auction_id[self._auction_order]
+
+    def __len__(self):
+        return len(self.item_id)
+
+    def _slice(self, item_id: int) -> slice:
+        k = np.searchsorted(self.items, item_id)
+        if k >= len(self.items) or self.items[k] != item_id:
+            return slice(0, 0)
+        return slice(self.offsets[k], self.offsets[k + 1])
+
+    def listings(self, item_id: int) -> Dict[str, np.ndarray]:
+        """One item's listings, cheapest first: price, auction_id, seller (code; -1 unknown)."""
+        rows = self._slice(item_id)
+        return {'price': self.price[rows], 'auction_id': self.auction_id[rows], 'seller': self.seller[rows]}
+
+    def lowest(self, item_id: int, exclude: Iterable[int] = ()) -> Optional[int]:
+        """Cheapest listing of item_id whose auction id is not excluded."""
+        exclude = set(exclude)
+        rows = self._slice(item_id)
+        for price, auction_id in zip(self.price[rows].tolist(), self.auction_id[rows].tolist()):
+            if auction_id not in exclude:
+                return price
+        return None
+
+    def lowest_competitors(self, item_ids: Sequence[int], exclude_auctions: Sequence[int]) -> np.ndarray:
+        """
+        Lowest price per requested item ignoring exclude_auctions (our own),
+        NO_PRICE where nothing else is listed. Aligned with item_ids.
+        """
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        # Only the requested items' slices, minus excluded auctions
+        rows = self._rows_for(np.unique(item_ids))
+        rows = rows[~np.isin(self.auction_id[rows], np.asarray(exclude_auctions, dtype=np.int64))]
+        kept_items = self.item_id[rows]
+        # Rows are sorted by (item, price): the first kept row of each item is its lowest
+        first = np.flatnonzero(np.diff(kept_items, prepend=kept_items[:1] - 1)) if len(rows) else rows
+        items, lowest = kept_items[first], self.price[rows[first]]
+
+        result = np.full(len(item_ids), NO_PRICE, dtype=np.int64)
+        if len(items):
+            k = np.minimum(np.searchsorted(items, item_ids), len(items) - 1)
+            found = items[k] == item_ids
+            result[found] = lowest[k[found]]
+        return result
+
+    def contains_auctions(self, auction_ids: Sequence[int]) -> np.ndarray:
+        """Boolean per auction id: still listed in this scan."""
+        return self._match(np.asarray(auction_ids, dtype=np.int64), self._sorted_auction_ids)[0]
+
+    def _rows_for(self, items: np.ndarray) -> np.ndarray:
+        """Row indices of every listing of the given items (concatenated slices)."""
+        if not len(self.items) or not len(items):
+            return np.zeros(0, dtype=np.int64)
+        k = np.minimum(np.searchsorted(self.items, items), len(self.items) - 1)
+        k = k[self.items[k] == items]
+        starts, lengths = self.offsets[k], self.offsets[k + 1] - self.offsets[k]
+        # arange over the total, shifted so each slice restarts at its own start
+        shift = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return np.arange(lengths.sum(), dtype=np.int64) + shift
+
+    def _by_auction(self, rows: Optional[np.ndarray]):
+        """(rows, rows ordered by auction id, their sorted auction ids)."""
+        if rows is None:
+            return np.arange(len(self), dtype=np.int64), self._auction_order, self._sorted_auction_ids
+        ordered = rows[np.argsort(self.auction_id[rows], kind='stable')]
+        return rows, ordered, self.auction_id[ordered]
+
+    @staticmethod
+    def _match(needles: np.ndarray, haystack: np.ndarray):
+        """(found mask, position in haystack) for sorted needles in sorted haystack."""
+        if not len(haystack):
+            return np.zeros(len(needles), dtype=bool), np.zeros(len(needles), dtype=np.int64)
+        k = np.minimum(np.searchsorted(haystack, needles), len(haystack) - 1)
+        return haystack[k] == needles, k
+
+    def diff(self, previous: Optional['OrderBook'], items: Optional[Sequence[int]] = None) -> Dict[str, np.ndarray]:
+        """
+        What changed since previous: added/removed auction ids and the items
+        whose listings changed (every item when there is no previous book).
+        An auction listed in both at different prices also marks its item.
+        items: only compare these items' listings (e.g. the ones we sell).
+        """
+        if items is not None:
+            items = np.unique(np.asarray(items, dtype=np.int64))
+        if previous is None:
+            rows = self._rows_for(items) if items is not None else slice(None)
+            return {'added': self.auction_id[rows].copy(), 'removed': np.zeros(0, dtype=np.int64),
+                    'changed_items': np.unique(self.item_id[rows])}
+
+        _, mine, mine_ids = self._by_auction(self._rows_for(items) if items is not None else None)
+        _, theirs, their_ids = previous._by_auction(previous._rows_for(items) if items is not None else None)
+        # Both sides sorted by auction id: searchsorted on sorted needles is cache friendly
+        found, k = self._match(mine_ids, their_ids)
+        added = mine[~found]
+        same = mine[found]
+        repriced = same[previous.price[theirs[k[found]]] != self.price[same]]
+        removed = theirs[~self._match(their_ids, mine_ids)[0]]
+        changed = np.union1d(np.union1d(self.item_id[added], self.item_id[repriced]),
+                             previous.item_id[removed])
+        return {
+            'added': self.auction_id[added],
+            'removed': previous.auction_id[removed],
+            'changed_items': changed,
+        }
@@ -2,10 +2,14 @@
 Posting Operations System - Manage auction posting with operations
 """
 import json
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence
 from dataclasses import dataclass, asdict
+
+import numpy as np
 from loguru import logger
 
+UNDERCUT_UNITS = {'copper': 1, 'silver': 100, 'gold': 10000}
+
 @dataclass
 class PostingOperation:
     """Defines how to post an item on AH."""
@@ -37,8 +41,12 @@ class PostingOperation:
     auto_cancel_undercut: bool = True
     repost_delay_seconds: int = 60
     
-    def calculate_price(self, market_price: int, ml_prediction: int, current_lowest: int) -> int:
-        """Calculate posting price based on operation settings."""
+    def calculate_price(self, market_price: int, ml_prediction: int, current_lowest: int,
+                        formula_price: Optional[int] = None) -> int:
+        """Calculate posting price based on operation settings.
+        
+        formula_price: custom_formula evaluated for this item (market price if None)
+        """
         base_price = None
         
         if self.pricing_method == 'fixed':
@@ -48,8 +56,7 @@ class PostingOperation:
         elif self.pricing_method == 'ml_predicted':
             base_price = ml_prediction
         elif self.pricing_method == 'custom_formula':
-            # Would evaluate custom formula
-            base_price = market_price
+            base_price = market_price if formula_price is None else formula_price
         else:
             base_price = market_price
         
@@ -77,13 +84,45 @@ class PostingOperation:
             final_price = self.max_price
         
         return max(1, final_price)  # At least 1 copper
+    
+    def calculate_prices(self, market_prices: np.ndarray, ml_predictions: np.ndarray,
+                         current_lowest: np.ndarray, formula_prices: Optional[np.ndarray] = None) -> np.ndarray:
+        """calculate_price over aligned arrays (one entry per item), as int64 copper."""
+        market_prices = np.asarray(market_prices, dtype=np.int64)
+        current_lowest = np.asarray(current_lowest, dtype=np.int64)
+        
+        if self.pricing_method == 'fixed':
+            base_price = np.full(len(market_prices), self.fixed_price, dtype=np.int64)
+        elif self.pricing_method == 'ml_predicted':
+            base_price = np.asarray(ml_predictions, dtype=np.int64)
+        elif self.pricing_method == 'custom_formula' and formula_prices is not None:
+            base_price = np.asarray(formula_prices, dtype=np.int64)
+        else:
+            base_price = market_prices
+        base_price = np.trunc(base_price * self.price_multiplier).astype(np.int64)
+        
+        if self.undercut_type == 'percent':
+            undercut_price = np.trunc(current_lowest * (1 - self.undercut_amount / 100)).astype(np.int64)
+        else:
+            undercut_price = current_lowest - self.undercut_amount * UNDERCUT_UNITS.get(self.undercut_type, 0)
+        
+        final_price = np.where(undercut_price > 0, np.minimum(base_price, undercut_price), base_price)
+        if self.min_price:
+            final_price = np.maximum(final_price, self.min_price)
+        if self.max_price:
+            final_price = np.minimum(final_price, self.max_price)
+        return np.maximum(final_price, 1)
 
 
 class PostingManager:
     """Manage posting operations."""
     
-    def __init__(self):
+    def __init__(self, pricing_engine=None):
         self.operations: Dict[str, PostingOperation] = {}
+        # Evaluates custom_formula operations (a PricingEngine)
+        self.pricing_engine = pricing_engine
+        self._item_operations: Dict[int, PostingOperation] = {}
+        self._item_operations_key = None
         
     def add_operation(self, operation: PostingOperation):
         """Add or update a posting operation."""
@@ -96,12 +135,21 @@ class PostingManager:
             del self.operations[name]
             logger.info(f"Removed operation: {name}")
     
+    def _operation_index(self) -> Dict[int, PostingOperation]:
+        """item_id -> first operation listing it; rebuilt when operations or their items change."""
+        key = tuple((name, id(op), len(op.item_ids)) for name, op in self.operations.items())
+        if key != self._item_operations_key:
+            index = {}
+            for op in self.operations.values():
+                for item_id in op.item_ids:
+                    index.setdefault(item_id, op)
+            self._item_operations = index
+            self._item_operations_key = key
+        return self._item_operations
+    
     def get_operation_for_item(self, item_id: int) -> Optional[PostingOperation]:
         """Find which operation applies to this item."""
-        for op in self.operations.values():
-            if item_id in op.item_ids:
-                return op
-        return None
+        return self._operation_index().get(item_id)
     
     def generate_posting_instructions(self, item_id: int, quantity: int,
                                      market_price: int, ml_prediction: int,
@@ -127,7 +175,10 @@ class PostingManager:
                 'operation_name': 'Default'
             }
         
-        price = operation.calculate_price(market_price, ml_prediction, current_lowest)
+        formula_price = None
+        if operation.pricing_method == 'custom_formula' and operation.custom_formula and self.pricing_engine:
+            formula_price = self.pricing_engine.evaluate(operation.custom_formula, item_id)
+        price = operation.calculate_price(market_price, ml_prediction, current_lowest, formula_price)
         stack_size = operation.stack_size
         num_stacks = min(quantity // stack_size, operation.max_stacks)
         
@@ -140,6 +191,64 @@ class PostingManager:
             'auto_cancel_undercut': operation.auto_cancel_undercut
         }
     
+    def generate_posting_batch(self, item_ids: Sequence[int], quantities: Sequence[int],
+                               market_prices: Sequence[int], ml_predictions: Sequence[int],
+                               current_lowest: Sequence[int]) -> List[Dict]:
+        """
+        generate_posting_instructions for many items at once (aligned sequences).
+        
+        Items are grouped by operation; each group is priced with array
+        arithmetic and its custom formula is evaluated once for the whole
+        group through the pricing engine.
+        """
+        item_ids = list(item_ids)
+        quantities = np.asarray(quantities, dtype=np.int64)
+        market_prices = np.asarray(market_prices, dtype=np.int64)
+        ml_predictions = np.asarray(ml_predictions, dtype=np.int64)
+        current_lowest = np.asarray(current_lowest, dtype=np.int64)
+        
+        index = self._operation_index()
+        groups: Dict[Optional[str], List[int]] = {}
+        for row, item_id in enumerate(item_ids):
+            op = index.get(item_id)
+            groups.setdefault(op.name if op else None, []).append(row)
+        
+        instructions: List[Optional[Dict]] = [None] * len(item_ids)
+        for name, rows in groups.items():
+            rows = np.asarray(rows)
+            if name is None:
+                # Default operation
+                prices = np.minimum(market_prices[rows], current_lowest[rows] - 1)
+                stacks = np.minimum(quantities[rows], 5)
+                for row, price, num_stacks in zip(rows.tolist(), prices.tolist(), stacks.tolist()):
+                    instructions[row] = {
+                        'price': price,
+                        'stack_size': 1,
+                        'num_stacks': num_stacks,
+                        'duration': '24h',
+                        'operation_name': 'Default'
+                    }
+                continue
+            
+            operation = self.operations[name]
+            formula_prices = None
+            if operation.pricing_method == 'custom_formula' and operation.custom_formula and self.pricing_engine:
+                formula_prices = self.pricing_engine.evaluate_many(
+                    operation.custom_formula, [item_ids[row] for row in rows])
+            prices = operation.calculate_prices(market_prices[rows], ml_predictions[rows],
+                                                current_lowest[rows], formula_prices)
+            stacks = np.minimum(quantities[rows] // operation.stack_size, operation.max_stacks)
+            for row, price, num_stacks in zip(rows.tolist(), prices.tolist(), stacks.tolist()):
+                instructions[row] = {
+                    'price': price,
+                    'stack_size': operation.stack_size,
+                    'num_stacks': num_stacks,
+                    'duration': operation.duration,
+                    'operation_name': operation.name,
+                    'auto_cancel_undercut': operation.auto_cancel_undercut
+                }
+        return instructions
+    
     def save(self, filepath: str):
         """Save operations to file."""
         data = {name: asdict(op) for name, op in self.operations.items()}
@@ -215,7 +324,7 @@ def create_default_operations() -> PostingManager:
 
 if __name__ == "__main__":
     # Example
-manager = create_default_operations()
+    manager = create_default_operations()
     manager.save("posting_operations.json")
     
     # Example instruction generation
@@ -0,0 +1,354 @@
+"""
+Pricing Formula Compiler - TSM-style price formulas compiled once, evaluated over columns
+
+A formula such as "max(dbminbuyout, 90% dbmarket)" is tokenized and parsed
+into an AST once, then turned into a tree of closures over NumPy arrays.
+Evaluating it prices every item in one pass over the market-data columns:
+no per-item string substitution and no eval.
+
+Supported syntax:
+- numbers, percentages ("95%" = 0.95, "120% dbmarket" = 1.2 * dbmarket)
+- gold literals: 10g, 50s, 25c, 1g50s (in copper)
+- + - * / and parentheses, unary minus
+- min, max, avg, first (first non-zero), abs, round
+- ifgt/ifgte/iflt/iflte/ifeq(a, b, then[, else]); else defaults to 0
+- sources (column names) and named custom sources, which are other formulas
+  expanded in place
+"""
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+import numpy as np
+
+Columns = Mapping[str, np.ndarray]
+
+
+class FormulaError(ValueError):
+    """A formula that cannot be parsed or refers to an unknown source."""
+
+
+# --- Tokenizer ---
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<money>(?:\d+(?:\.\d+)?[gsc])+)(?![a-z_])
+      | (?P<number>\d+(?:\.\d+)?|\.\d+)
+      | (?P<name>[a-z_][a-z0-9_]*)
+      | (?P<op>[-+*/(),%])
+    )""", re.VERBOSE)
+
+_MONEY_RE = re.compile(r"(\d+(?:\.\d+)?)([gsc])")
+_MONEY_UNITS = {'g': 10000, 's': 100, 'c': 1}
+
+
+def tokenize(formula: str) -> List[Tuple[str, object]]:
+    text = formula.strip().lower()
+    tokens, pos = [], 0
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise FormulaError(f"Unexpected character {text[pos:].strip()[:1]!r} in formula {formula!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'money':
+            tokens.append(('number', float(sum(float(n) * _MONEY_UNITS[u] for n, u in _MONEY_RE.findall(value)))))
+        elif kind == 'number':
+            tokens.append(('number', float(value)))
+        else:
+            tokens.append((kind, value))
+        if not text[pos:].strip():
+            break
+    return tokens
+
+
+# --- AST ---
+
+class Node:
+    def sources(self) -> Set[str]:
+        return set()
+
+
+class Number(Node):
+    def __init__(self, value: float):
+        self.value = value
+
+    def __repr__(self):
+        return f"Number({self.value})"
+
+
+class Source(Node):
+    def __init__(self, name: str):
+        self.name = name
+
+    def sources(self):
+        return {self.name}
+
+    def __repr__(self):
+        return f"Source({self.name})"
+
+
+class BinOp(Node):
+    def __init__(self, op: str, left: Node, right: Node):
+        self.op, self.left, self.right = op, left, right
+
+    def sources(self):
+        return self.left.sources() | self.right.sources()
+
+    def __repr__(self):
+        return f"BinOp({self.op!r}, {self.left}, {self.right})"
+
+
+class Negate(Node):
+    def __init__(self, operand: Node):
+        self.operand = operand
+
+    def sources(self):
+        return self.operand.sources()
+
+    def __repr__(self):
+        return f"Negate({self.operand})"
+
+
+class Call(Node):
+    def __init__(self, name: str, args: List[Node]):
+        self.name, self.args = name, args
+
+    def sources(self):
+        return set().union(*(arg.sources() for arg in self.args))
+
+    def __repr__(self):
+        return f"Call({self.name}, {self.args})"
+
+
+_COMPARISONS = {
+    'ifgt': np.greater, 'ifgte': np.greater_equal,
+    'iflt': np.less, 'iflte': np.less_equal, 'ifeq': np.equal,
+}
+# name -> (min args, max args or None for variadic)
+FUNCTIONS = {
+    'min': (1, None), 'max': (1, None), 'avg': (1, None), 'first': (1, None),
+    'abs': (1, 1), 'round': (1, 1),
+    **{name: (3, 4) for name in _COMPARISONS},
+}
+
+
+# --- Parser ---
+
+class _Parser:
+    """Recursive descent: expr := term (+|- term)*; term := unary (*|/ unary)*"""
+
+    def __init__(self, formula: str):
+        self.formula = formula
+        self.tokens = tokenize(formula)
+        self.pos = 0
+
+    def peek(self) -> Tuple[Optional[str], object]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, kind: str, value=None):
+        token = self.peek()
+        if token[0] != kind or (value is not None and token[1] != value):
+            expected = value or kind
+            found = token[1] if token[0] else 'end of formula'
+            raise FormulaError(f"Expected {expected!r} but found {found!r} in formula {self.formula!r}")
+        self.pos += 1
+        return token[1]
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise FormulaError("Empty formula")
+        node = self.expr()
+        if self.pos != len(self.tokens):
+            raise FormulaError(f"Unexpected {self.peek()[1]!r} in formula {self.formula!r}")
+        return node
+
+    def expr(self) -> Node:
+        node = self.term()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            op = self.take('op')
+            node = BinOp(op, node, self.term())
+        return node
+
+    def term(self) -> Node:
+        node = self.unary()
+        while self.peek() in (('op', '*'), ('op', '/')):
+            op = self.take('op')
+            node = BinOp(op, node, self.unary())
+        return node
+
+    def unary(self) -> Node:
+        if self.peek() == ('op', '-'):
+            self.take('op')
+            return Negate(self.unary())
+        if self.peek() == ('op', '+'):
+            self.take('op')
+            return self.unary()
+        return self.percent()
+
+    def percent(self) -> Node:
+        node = self.primary()
+        if self.peek() == ('op', '%'):
+            self.take('op')
+            node = BinOp('*', node, Number(0.01))
+            # TSM: "120% dbmarket" multiplies the following operand
+            kind, value = self.peek()
+            if kind in ('name', 'number') or (kind, value) == ('op', '('):
+                node = BinOp('*', node, self.percent())
+        return node
+
+    def primary(self) -> Node:
+        kind, value = self.peek()
+        if kind == 'number':
+            self.pos += 1
+            return Number(value)
+        if kind == 'name':
+            self.pos += 1
+            if self.peek() == ('op', '('):
+                return self.call(value)
+            return Source(value)
+        if (kind, value) == ('op', '('):
+            self.take('op', '(')
+            node = self.expr()
+            self.take('op', ')')
+            return node
+        found = value if kind else 'end of formula'
+        raise FormulaError(f"Unexpected {found!r} in formula {self.formula!r}")
+
+    def call(self, name: str) -> Node:
+        if name not in FUNCTIONS:
+            raise FormulaError(f"Unknown function {name!r} in formula {self.formula!r}")
+        self.take('op', '(')
+        args = [self.expr()]
+        while self.peek() == ('op', ','):
+            self.take('op')
+            args.append(self.expr())
+        self.take('op', ')')
+        low, high = FUNCTIONS[name]
+        if len(args) < low or (high is not None and len(args) > high):
+            raise FormulaError(f"{name}() takes {low}{'' if high == low else '+' if high is None else f'-{high}'} "
+                               f"arguments, got {len(args)} in formula {self.formula!r}")
+        return Call(name, args)
+
+
+@lru_cache(maxsize=1024)
+def parse(formula: str) -> Node:
+    """Formula text -> AST (cached; nodes are never mutated)"""
+    return _Parser(formula).parse()
+
+
+# --- Compiler ---
+
+Evaluator = Callable[[Columns], np.ndarray]
+
+
+def _first(values: List[np.ndarray]) -> np.ndarray:
+    result = values[-1]
+    for value in reversed(values[:-1]):
+        result = np.where(value != 0, value, result)
+    return result
+
+
+def _compile(node: Node, custom: Mapping[str, str], expanding: Tuple[str, ...]) -> Evaluator:
+    if isinstance(node, Number):
+        value = node.value
+        return lambda cols: value
+    if isinstance(node, Source):
+        name = node.name
+        if name in custom:
+            if name in expanding:
+                raise FormulaError(f"Custom source cycle: {' -> '.join(expanding + (name,))}")
+            return _compile(parse(custom[name]), custom, expanding + (name,))
+        return lambda cols: cols[name]
+    if isinstance(node, Negate):
+        operand = _compile(node.operand, custom, expanding)
+        return lambda cols: -operand(cols)
+    if isinstance(node, BinOp):
+        left = _compile(node.left, custom, expanding)
+        right = _compile(node.right, custom, expanding)
+        op = {'+': np.add, '-': np.subtract, '*': np.multiply, '/': np.divide}[node.op]
+        return lambda cols: op(left(cols), right(cols))
+    if isinstance(node, Call):
+        args = [_compile(arg, custom, expanding) for arg in node.args]
+        name = node.name
+        if name in _COMPARISONS:
+            compare = _COMPARISONS[name]
+            a, b, then = args[:3]
+            otherwise = args[3] if len(args) == 4 else (lambda cols: 0.0)
+            return lambda cols: np.where(compare(a(cols), b(cols)), then(cols), otherwise(cols))
+        if name == 'min':
+            return lambda cols: _reduce(np.minimum, [arg(cols) for arg in args])
+        if name == 'max':
+            return lambda cols: _reduce(np.maximum, [arg(cols) for arg in args])
+        if name == 'avg':
+            return lambda cols: _reduce(np.add, [arg(cols) for arg in args]) / len(args)
+        if name == 'first':
+            return lambda cols: _first([arg(cols) for arg in args])
+        if name == 'abs':
+            return lambda cols: np.abs(args[0](cols))
+        if name == 'round':
+            return lambda cols: np.round(args[0](cols))
+    raise FormulaError(f"Cannot compile {node!r}")
+
+
+def _reduce(op, values: List[np.ndarray]) -> np.ndarray:
+    result = values[0]
+    for value in values[1:]:
+        result = op(result, value)
+    return result
+
+
+class CompiledFormula:
+    """A parsed formula bound to a set of custom sources."""
+
+    def __init__(self, formula: str, custom_sources: Optional[Mapping[str, str]] = None):
+        self.formula = formula
+        custom = dict(custom_sources or {})
+        self._evaluate = _compile(parse(formula), custom, ())
+        self.sources = self._expanded_sources(parse(formula), custom, set())
+
+    @staticmethod
+    def _expanded_sources(node: Node, custom: Mapping[str, str], seen: Set[str]) -> Set[str]:
+        sources = set()
+        for name in node.sources():
+            if name in custom:
+                if name not in seen:
+                    sources |= CompiledFormula._expanded_sources(parse(custom[name]), custom, seen | {name})
+            else:
+                sources.add(name)
+        return sources
+
+    def check_sources(self, known):
+        unknown = self.sources - set(known)
+        if unknown:
+            raise FormulaError(f"Unknown source(s) {sorted(unknown)} in formula {self.formula!r}")
+
+    def __call__(self, columns: Columns, size: Optional[int] = None) -> np.ndarray:
+        """Evaluate over aligned columns; returns a float array (constants broadcast to size)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = np.asarray(self._evaluate(columns), dtype=float)
+        if size is not None and result.shape != (size,):
+            result = np.broadcast_to(result, (size,)).copy()
+        return result
+
+    def __repr__(self):
+        return f"CompiledFormula({self.formula!r})"
+
+
+class FormulaCache:
+    """Compiled formulas by text; cleared when custom sources change."""
+
+    def __init__(self, custom_sources: Optional[Dict[str, str]] = None):
+        self.custom_sources: Dict[str, str] = dict(custom_sources or {})
+        self._compiled: Dict[str, CompiledFormula] = {}
+
+    def set_custom_source(self, name: str, formula: str):
+        self.custom_sources[name.lower()] = formula
+        self._compiled.clear()
+
+    def get(self, formula: str) -> CompiledFormula:
+        compiled = self._compiled.get(formula)
+        if compiled is None:
+            compiled = self._compiled[formula] = CompiledFormula(formula, self.custom_sources)
+        return compiled
@@ -1,10 +1,32 @@
 """
 Pricing Formula Engine - TSM-compatible pricing with ML enhancements
 """
-import re
-from typing import Dict, Optional
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 from loguru import logger
 
+from ml.pipeline.order_book import OrderBook
+from ml.pipeline.pricing_formula import FormulaCache, FormulaError
+
+# Formula source -> (store, key, default when missing)
+PRICE_SOURCES = {
+    'dbmarket': ('market', 'market_value', 0),
+    'dbminbuyout': ('market', 'min_buyout', 0),
+    'dbhistorical': ('market', 'historical_avg', 0),
+    'mlpredicted': ('ml', 'price', 0),
+    'mlconfidence': ('ml', 'confidence', 0.5),
+    'crafting': ('market', 'crafting_cost', 0),
+    'vendorsell': ('market', 'vendor_sell', 0),
+    'vendorbuy': ('market', 'vendor_buy', 0),
+}
+
+# Named sources that are themselves formulas
+DEFAULT_CUSTOM_SOURCES = {
+    'crafting_cost': 'crafting',
+}
+
 class PricingEngine:
     """Evaluate pricing formulas (TSM-compatible + AI enhancements)."""
     
@@ -12,10 +34,40 @@ class PricingEngine:
         # Market data cache
         self.market_data = {}
         self.ml_predictions = {}
+        # The same data as aligned columns (one row per item), kept in step
+        # by update_market_data/update_ml_prediction
+        self.item_index: Dict[int, int] = {}
+        self._item_ids = np.zeros(0, dtype=np.int64)
+        self._columns = {source: np.zeros(0) for source in PRICE_SOURCES}
+        self._sorted = None  # (sorted item ids, their rows); rebuilt after new items
+        self.formulas = FormulaCache(DEFAULT_CUSTOM_SOURCES)
         
+    def _row(self, item_id: int) -> int:
+        row = self.item_index.get(item_id)
+        if row is None:
+            row = self.item_index[item_id] = len(self.item_index)
+            if row >= len(self._item_ids):
+                capacity = max(64, 2 * len(self._item_ids))
+                self._item_ids = np.resize(self._item_ids, capacity)
+                for source, (_, _, default) in PRICE_SOURCES.items():
+                    column = np.full(capacity, float(default))
+                    column[:row] = self._columns[source][:row]
+                    self._columns[source] = column
+            self._item_ids[row] = item_id
+            self._sorted = None
+        return row
+    
+    def _store(self, store: str, item_id: int, data: Dict):
+        row = self._row(item_id)
+        for source, (source_store, key, default) in PRICE_SOURCES.items():
+            if source_store == store:
+                value = data.get(key)
+                self._columns[source][row] = default if value is None else value
+    
     def update_market_data(self, item_id: int, data: Dict):
         """Update market data for an item."""
         self.market_data[item_id] = data
+        self._store('market', item_id, data)
     
     def update_ml_prediction(self, item_id: int, predicted_price: int, confidence: float):
         """Update ML prediction for an item."""
@@ -23,6 +75,59 @@ class PricingEngine:
             'price': predicted_price,
             'confidence': confidence
         }
+        self._store('ml', item_id, self.ml_predictions[item_id])
+    
+    def set_custom_source(self, name: str, formula: str):
+        """Define a named source usable inside other formulas."""
+        self.formulas.set_custom_source(name, formula)
+    
+    def columns(self, item_ids: Optional[List[int]] = None) -> Dict[str, np.ndarray]:
+        """Source columns for item_ids (default: every known item, in insertion order)."""
+        size = len(self.item_index)
+        if item_ids is None:
+            return {source: column[:size] for source, column in self._columns.items()}
+        rows, known = self.lookup_rows(item_ids)
+        columns = {}
+        for source, (_, _, default) in PRICE_SOURCES.items():
+            column = np.full(len(rows), float(default))
+            column[known] = self._columns[source][rows[known]]
+            columns[source] = column
+        return columns
+    
+    def lookup_rows(self, item_ids) -> Tuple[np.ndarray, np.ndarray]:
+        """(row per item id, known mask) via a sorted-id join; unknown rows are 0."""
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        size = len(self.item_index)
+        if not size:
+            return np.zeros(len(item_ids), dtype=np.int64), np.zeros(len(item_ids), dtype=bool)
+        if self._sorted is None:
+            order = np.argsort(self._item_ids[:size], kind='stable')
+            self._sorted = (self._item_ids[:size][order], order)
+        sorted_ids, sorted_rows = self._sorted
+        k = np.minimum(np.searchsorted(sorted_ids, item_ids), size - 1)
+        known = sorted_ids[k] == item_ids
+        return np.where(known, sorted_rows[k], 0), known
+    
+    def evaluate_many(self, formula: str, item_ids: Optional[List[int]] = None) -> np.ndarray:
+        """
+        Evaluate a formula for many items at once (copper, int64).
+        
+        item_ids defaults to every item with data; the result is aligned with it.
+        Items where the formula is not finite (e.g. division by zero) fall back
+        to dbmarket, as does everything when the formula is invalid.
+        """
+        columns = self.columns(item_ids)
+        fallback = columns['dbmarket']
+        try:
+            compiled = self.formulas.get(formula)
+            compiled.check_sources(PRICE_SOURCES)
+        except FormulaError as e:
+            logger.error(f"Error evaluating formula '{formula}': {e}")
+            return np.trunc(fallback).astype(np.int64)
+        
+        result = compiled(columns, len(fallback))
+        result = np.where(np.isfinite(result), result, fallback)
+        return np.trunc(result).astype(np.int64)
     
     def evaluate(self, formula: str, item_id: int) -> int:
         """
@@ -38,39 +143,15 @@ class PricingEngine:
         - vendorsell: Vendor sell price
         - vendorbuy: Vendor buy price
         
+        Plus TSM functions (min, max, avg, first, ifgt, ...), percentages,
+        gold literals and custom sources; see pricing_formula.
+        
         Examples:
         - "dbmarket * 0.95" = 95% of market
         - "max(dbminbuyout, mlpredicted)" = Higher of min or ML prediction
         - "mlpredicted * mlconfidence + dbmarket * (1 - mlconfidence)" = Weighted blend
         """
-        # Get data
-        market = self.market_data.get(item_id, {})
-        ml = self.ml_predictions.get(item_id, {})
-        
-        # Define variables
-        variables = {
-            'dbmarket': market.get('market_value', 0),
-            'dbminbuyout': market.get('min_buyout', 0),
-            'dbhistorical': market.get('historical_avg', 0),
-            'mlpredicted': ml.get('price', 0),
-            'mlconfidence': ml.get('confidence', 0.5),
-            'crafting': market.get('crafting_cost', 0),
-            'vendorsell': market.get('vendor_sell', 0),
-            'vendorbuy': market.get('vendor_buy', 0)
-        }
-        
-        # Replace variables in formula
-        formula_eval = formula
-        for var, value in variables.items():
-            formula_eval = re.sub(r'\b' + var + r'\b', str(value), formula_eval)
-        
-        # Evaluate
-        try:
-            result = eval(formula_eval, {"__builtins__": {}, "max": max, "min": min, "abs": abs})
-            return int(result)
-        except Exception as e:
-            logger.error(f"Error evaluating formula '{formula}': {e}")
-            return variables.get('dbmarket', 0)
+        return int(self.evaluate_many(formula, [item_id])[0])
     
     def get_preset_formulas(self) -> Dict[str, str]:
         """Get common preset formulas."""
@@ -82,9 +163,57 @@ class PricingEngine:
             'Safe Minimum': 'max(dbminbuyout, mlpredicted * 0.8)',
             'Crafting Profit 30%': 'crafting * 1.3',
             'Above Vendor': 'max(vendorsell * 2, dbmarket)',
+            'TSM Style Floor': 'max(90% dbmarket, first(dbminbuyout, dbhistorical), 10s)',
         }
 
 
+class ListingBatch:
+    """
+    One AH scan as columns: item_id, price per item (input order; an
+    OrderBook keeps its own item order). items holds the distinct item ids
+    and item_code each listing's index into it, so per-item lookups are
+    done once per item rather than once per listing.
+    """
+    
+    def __init__(self, ah_data: Union[Sequence[Dict], OrderBook]):
+        if isinstance(ah_data, OrderBook):
+            self.item_id, self.price = ah_data.item_id, ah_data.price
+            self.items = ah_data.items
+            self.item_code = np.repeat(np.arange(len(ah_data.items)), np.diff(ah_data.offsets))
+        else:
+            n = len(ah_data)
+            self.item_id = np.fromiter((l['item_id'] for l in ah_data), dtype=np.int64, count=n)
+            self.price = np.fromiter((l['price_per_item'] for l in ah_data), dtype=np.int64, count=n)
+            self.items, self.item_code = np.unique(self.item_id, return_inverse=True)
+    
+    def __len__(self):
+        return len(self.item_id)
+    
+    def columns(self, pricing_engine: 'PricingEngine') -> Dict[str, np.ndarray]:
+        """Pricing source columns aligned with the listings."""
+        return {source: column[self.item_code]
+                for source, column in pricing_engine.columns(self.items).items()}
+
+
+def _copper(value: float):
+    """A column value as the int copper amount it was stored as (non-whole values stay float)."""
+    return int(value) if value.is_integer() else value
+
+
+def _top_per_group(groups: np.ndarray, scores: np.ndarray, n_groups: int, top_n: Optional[int]) -> List[np.ndarray]:
+    """Indices per group ordered by score desc (ties keep input order), cut to top_n."""
+    order = np.lexsort((-scores, groups))  # lexsort is stable: equal scores stay in input order
+    sorted_groups = groups[order]
+    bounds = np.searchsorted(sorted_groups, np.arange(n_groups + 1))
+    result = []
+    for g in range(n_groups):
+        start, end = bounds[g], bounds[g + 1]
+        if top_n is not None:
+            end = min(end, start + top_n)
+        result.append(order[start:end])
+    return result
+
+
 class ShoppingSystem:
     """Advanced shopping and sniper mode."""
     
@@ -94,96 +223,162 @@ class ShoppingSystem:
         self.great_deals_threshold = 0.7  # 70% of market = great deal
         
     def create_shopping_list(self, name: str, item_ids: List[int], 
-                             max_price_per_item: Optional[Dict[int, int]] = None):
-        """Create a shopping list."""
+                             max_price_per_item: Optional[Dict[int, int]] = None,
+                             deal_threshold: Optional[float] = None):
+        """
+        Create a shopping list.
+        
+        Items with a max price match listings at or below it; the others
+        match listings at deal_threshold of market value or less
+        (default: great_deals_threshold).
+        """
         self.shopping_lists[name] = {
             'items': item_ids,
             'max_prices': max_price_per_item or {},
+            'deal_threshold': deal_threshold,
             'created_at': datetime.now()
         }
         logger.info(f"Created shopping list: {name} with {len(item_ids)} items")
     
-    def scan_for_deals(self, ah_data: List[Dict], pricing_engine: PricingEngine) -> List[Dict]:
+    def _deal(self, item_id: int, price: int, market_value: float, discount_pct: float) -> Dict:
+        market_value = _copper(market_value)
+        return {
+            'item_id': item_id,
+            'price': price,
+            'market_value': market_value,
+            'discount_pct': discount_pct * 100,
+            'savings': market_value - price,
+            'reason': f'{discount_pct*100:.0f}% below market'
+        }
+    
+    def scan_for_deals(self, ah_data: Union[List[Dict], ListingBatch], pricing_engine: PricingEngine,
+                       limit: Optional[int] = None) -> List[Dict]:
         """
         Scan AH for great deals.
         
-        Returns list of deals with:
+        Returns list of deals (best limit, default all) with:
         - item_id, price, market_value, discount_pct, reason
         """
-        deals = []
-        
-        for listing in ah_data:
-            item_id = listing['item_id']
-            price = listing['price_per_item']
-            
-            # Get market value
-            market_data = pricing_engine.market_data.get(item_id, {})
-            market_value = market_data.get('market_value', 0)
-            
-            if market_value == 0:
-                continue
-            
-            # Calculate discount
-            discount_pct = (market_value - price) / market_value
-            
-            if discount_pct >= (1 - self.great_deals_threshold):
-                deals.append({
-                    'item_id': item_id,
-                    'price': price,
-                    'market_value': market_value,
-                    'discount_pct': discount_pct * 100,
-                    'savings': market_value - price,
-                    'reason': f'{discount_pct*100:.0f}% below market'
-                })
+        batch = ah_data if isinstance(ah_data, ListingBatch) else ListingBatch(ah_data)
+        market_value = batch.columns(pricing_engine)['dbmarket']
         
+        priced = market_value != 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            discount_pct = (market_value - batch.price) / market_value
+        rows = np.flatnonzero(priced & (discount_pct >= (1 - self.great_deals_threshold)))
         # Sort by best deals first
-        deals.sort(key=lambda x: x['discount_pct'], reverse=True)
+        rows = rows[np.argsort(-discount_pct[rows], kind='stable')][:limit]
+        
+        deals = [self._deal(item_id, price, value, discount)
+                 for item_id, price, value, discount in zip(
+                     batch.item_id[rows].tolist(), batch.price[rows].tolist(),
+                     market_value[rows].tolist(), discount_pct[rows].tolist())]
         
         logger.info(f"Found {len(deals)} great deals")
         return deals
     
-    def sniper_mode(self, ah_data: List[Dict], pricing_engine: PricingEngine) -> List[Dict]:
+    def sniper_mode(self, ah_data: Union[List[Dict], ListingBatch], pricing_engine: PricingEngine) -> List[Dict]:
         """
         Real-time sniper - find items posted way below value.
         
         More aggressive than shopping - looks for mistakes, underpricing.
         """
-        snipes = []
-        
-        for listing in ah_data:
-            item_id = listing['item_id']
-            price = listing['price_per_item']
-            
-            # Get ML prediction
-            ml = pricing_engine.ml_predictions.get(item_id, {})
-            predicted = ml.get('price', 0)
-            confidence = ml.get('confidence', 0)
-            
-            if predicted == 0 or confidence < 0.7:
-                continue
-            
-            # Snipe if posted < 50% of predicted value (and high confidence)
-            if price < predicted * 0.5:
-                potential_profit = predicted - price
-                roi = (potential_profit / price) * 100
-                
-                snipes.append({
-                    'item_id': item_id,
-                    'buy_price': price,
-                    'predicted_sell': predicted,
-                    'potential_profit': potential_profit,
-                    'roi_pct': roi,
-                    'confidence': confidence,
-                    'reason': 'SNIPE - Posted at 50% of predicted value'
-                })
+        batch = ah_data if isinstance(ah_data, ListingBatch) else ListingBatch(ah_data)
+        columns = batch.columns(pricing_engine)
+        predicted, confidence = columns['mlpredicted'], columns['mlconfidence']
+        price = batch.price
         
+        # Snipe if posted < 50% of predicted value (and high confidence);
+        # zero-priced listings are ignored (no ROI)
+        snipe = (predicted != 0) & (confidence >= 0.7) & (price < predicted * 0.5) & (price > 0)
+        rows = np.flatnonzero(snipe)
+        potential_profit = predicted[rows] - price[rows]
+        roi = (potential_profit / price[rows]) * 100
         # Sort by ROI
-        snipes.sort(key=lambda x: x['roi_pct'], reverse=True)
+        order = np.argsort(-roi, kind='stable')
+        
+        snipes = [
+            {
+                'item_id': item_id,
+                'buy_price': buy_price,
+                'predicted_sell': _copper(predicted_sell),
+                'potential_profit': _copper(profit),
+                'roi_pct': roi_pct,
+                'confidence': conf,
+                'reason': 'SNIPE - Posted at 50% of predicted value'
+            }
+            for item_id, buy_price, predicted_sell, profit, roi_pct, conf in zip(
+                batch.item_id[rows][order].tolist(), price[rows][order].tolist(),
+                predicted[rows][order].tolist(), potential_profit[order].tolist(),
+                roi[order].tolist(), confidence[rows][order].tolist())
+        ]
         
         if snipes:
             logger.warning(f"🎯 SNIPER: Found {len(snipes)} snipe opportunities!")
         
         return snipes
+    
+    def _list_entries(self) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Every (list, item) pair sorted by item: names, list index, item, max price (-1 none), threshold."""
+        names = list(self.shopping_lists)
+        lists, items, max_prices, thresholds = [], [], [], []
+        for index, name in enumerate(names):
+            shopping_list = self.shopping_lists[name]
+            threshold = shopping_list.get('deal_threshold')
+            threshold = self.great_deals_threshold if threshold is None else threshold
+            max_price = shopping_list['max_prices']
+            for item_id in dict.fromkeys(shopping_list['items']):
+                lists.append(index)
+                items.append(item_id)
+                max_prices.append(max_price.get(item_id, -1))
+                thresholds.append(threshold)
+        items = np.asarray(items, dtype=np.int64)
+        order = np.argsort(items, kind='stable')
+        return (names, np.asarray(lists, dtype=np.int64)[order], items[order],
+                np.asarray(max_prices, dtype=np.int64)[order], np.asarray(thresholds, dtype=float)[order])
+    
+    def scan_shopping_lists(self, ah_data: Union[List[Dict], ListingBatch], pricing_engine: PricingEngine,
+                            top_n: Optional[int] = 20) -> Dict[str, List[Dict]]:
+        """
+        Match one AH scan against every shopping list in a single pass.
+        
+        Listings are joined to the (list, item) entries by item id, each pair
+        is checked against its max price or deal threshold, and each list gets
+        its best top_n matches (largest discount first).
+        """
+        batch = ah_data if isinstance(ah_data, ListingBatch) else ListingBatch(ah_data)
+        names, lists, items, max_prices, thresholds = self._list_entries()
+        results: Dict[str, List[Dict]] = {name: [] for name in names}
+        if not len(items) or not len(batch):
+            return results
+        
+        # Listing x entry pairs for equal item ids: each listing expands to its item's entry range
+        first = np.searchsorted(items, batch.items, side='left')[batch.item_code]
+        counts = np.searchsorted(items, batch.items, side='right')[batch.item_code] - first
+        listing = np.repeat(np.arange(len(batch)), counts)
+        entry = np.arange(counts.sum()) + np.repeat(first - (np.cumsum(counts) - counts), counts)
+        
+        price = batch.price[listing]
+        market_value = pricing_engine.columns(items)['dbmarket'][entry]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            discount_pct = np.where(market_value != 0, (market_value - price) / market_value, 0.0)
+        capped = max_prices[entry] >= 0
+        match = np.where(capped, price <= max_prices[entry],
+                         (market_value != 0) & (discount_pct >= (1 - thresholds[entry])))
+        
+        pairs = np.flatnonzero(match)
+        for name, chosen in zip(names, _top_per_group(lists[entry[pairs]], discount_pct[pairs], len(names), top_n)):
+            rows = pairs[chosen]
+            results[name] = [
+                {**self._deal(item_id, p, value, discount), 'max_price': cap if cap >= 0 else None}
+                for item_id, p, value, discount, cap in zip(
+                    batch.item_id[listing[rows]].tolist(), price[rows].tolist(), market_value[rows].tolist(),
+                    discount_pct[rows].tolist(), max_prices[entry[rows]].tolist())
+            ]
+        
+        logger.info(f"Scanned {len(batch)} listings against {len(names)} shopping lists: "
+                    f"{sum(len(v) for v in results.values())} matches")
+        return results
 
 
 class GroupManager:
@@ -235,8 +430,6 @@ class GroupManager:
 
 
 if __name__ == "__main__":
-    from datetime import datetime
-    
     # Example
     pricing = PricingEngine()
     pricing.update_market_data(12345, {'market_value': 10000, 'min_buyout': 9500})
@@ -0,0 +1,71 @@
+import json
+import os
+import tempfile
+
+from ml.pipeline.accounting import AccountingSystem
+from ml.pipeline.ledger import Ledger, tsm_rows
+
+
+def record(accounting):
+    accounting.record_purchase(1, "Ore", 20, 500, "Main", "Realm")
+    accounting.record_purchase(1, "Ore", 20, 500, "Main", "Realm")  # identical, still two rows
+    accounting.record_sale(1, "Ore", 10, 1500, "Main", "Realm")
+
+
+def test_save_load_round_trip_does_not_duplicate():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "saves", "accounting.json")
+        accounting = AccountingSystem()
+        record(accounting)
+        assert len(accounting.transactions) == 4
+        for _ in range(3):
+            accounting.save(path)
+            accounting.load(path)
+        assert len(accounting.transactions) == 4
+        assert len({t.source_key for t in accounting.transactions}) == 4
+
+        other = AccountingSystem()
+        other.load(path)
+        other.load(path)
+        assert [(t.transaction_type, t.total_amount, t.source_key) for t in other.transactions] == \
+               [(t.transaction_type, t.total_amount, t.source_key) for t in accounting.transactions]
+        assert other.get_total_profit() == accounting.get_total_profit() == -20000 + 14250 - 750
+        # New records on either side merge without duplicating the shared ones
+        other.record_sale(2, "Herb", 1, 100, "Alt", "Realm")
+        other.save(path)
+        accounting.load(path)
+        assert len(accounting.transactions) == 6
+        assert accounting.get_profit_by_character() == other.get_profit_by_character()
+
+
+def test_saves_without_keys_load_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "accounting.json")
+        accounting = AccountingSystem()
+        record(accounting)
+        accounting.save(path)
+        with open(path) as f:
+            data = json.load(f)
+        for txn in data['transactions']:
+            del txn['source_key']
+        with open(path, 'w') as f:
+            json.dump(data, f)
+        fresh = AccountingSystem()
+        fresh.load(path)
+        fresh.load(path)
+        assert len(fresh.transactions) == 4
+
+
+def test_tsm_rows_in_the_same_second_are_kept():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "Accounting_Realm_purchases.csv")
+        with open(path, 'w') as f:
+            f.write("itemString,itemName,stackSize,quantity,price,otherPlayer,player,time,source\n")
+            for i in range(2000):
+                f.write(f"i:{i % 7},Item,1,1,{i},Seller,Main,1700000000,Auction\n")
+            f.write("i:1,Item,1,1,1,Seller,Main,1700000000,Auction\n")  # repeat of row 1
+        rows = list(tsm_rows(path))
+        assert len({row[-1] for row in rows}) == 2001
+        ledger = Ledger()
+        assert ledger.import_tsm_csv(path) == 2001
+        assert ledger.import_tsm_csv(path) == 0
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from ml.pipeline.clustering import CLUSTER_FEATURES, ItemClusterer, ItemFeatureAggregates
+
+
+def make_snapshots(seed=4, n_items=300, n_snapshots=4):
+    rng = np.random.default_rng(seed)
+    base = rng.choice([500, 20000, 800000], n_items) * rng.uniform(0.5, 1.5, n_items)
+    spread = rng.choice([0.02, 0.3, 0.8], n_items)
+    snapshots = []
+    for _ in range(n_snapshots):
+        item_id = np.repeat(np.arange(n_items), rng.integers(0, 6, n_items))
+        price = np.maximum(base[item_id] * (1 + spread[item_id] * rng.standard_normal(len(item_id))), 1).round()
+        snapshots.append(pd.DataFrame({'item_id': item_id, 'price': price,
+                                       'quantity': rng.integers(1, 200, len(item_id))}))
+    return snapshots
+
+
+def test_aggregates_match_groupby():
+    snapshots = make_snapshots()
+    aggregates = ItemFeatureAggregates()
+    for df in snapshots:
+        aggregates.add(df)
+    combined = pd.concat(snapshots, ignore_index=True)
+    grouped = combined.groupby('item_id').agg(price_mean=('price', 'mean'), price_std=('price', 'std'),
+                                              price_count=('price', 'count'), quantity_sum=('quantity', 'sum'),
+                                              price_min=('price', 'min'), price_max=('price', 'max'))
+    grouped = grouped[grouped['price_count'] >= 3].reset_index()
+    features = aggregates.features()
+    assert features['item_id'].tolist() == grouped['item_id'].tolist()
+    for column in ('price_mean', 'price_std', 'price_count', 'quantity_sum', 'price_min', 'price_max'):
+        np.testing.assert_allclose(features[column], grouped[column])
+
+
+def test_incremental_updates_keep_ids():
+    clusterer = ItemClusterer(n_clusters=4)
+    for df in make_snapshots():
+        clusterer.aggregates.add(df)
+    fitted = clusterer.fit_clusters(clusterer.aggregates.features())
+    before = dict(zip(fitted['item_id'], fitted['cluster']))
+
+    # Nothing moved: nothing is reassigned
+    updated = clusterer.update_clusters(clusterer.aggregates.features())
+    assert dict(zip(updated['item_id'], updated['cluster'])) == before
+
+    # Fewer moved items than clusters
+    features = clusterer.aggregates.features()
+    moved_ids = features['item_id'].iloc[:2].tolist()
+    features.loc[:1, 'price_mean'] *= 50
+    updated = clusterer.update_clusters(features)
+    after = dict(zip(updated['item_id'], updated['cluster']))
+    assert {i: c for i, c in after.items() if i not in moved_ids} == \
+           {i: c for i, c in before.items() if i not in moved_ids}
+    centers = clusterer.kmeans.cluster_centers_
+    X = clusterer.scaler.transform(features[CLUSTER_FEATURES].fillna(0))[:2]
+    assert [after[i] for i in moved_ids] == \
+           np.argmin(((X[:, None, :] - centers[None]) ** 2).sum(axis=2), axis=1).tolist()
+
+    # A new item gets a cluster; everyone else keeps theirs
+    new = features.iloc[[5]].assign(item_id=10**6)
+    updated = clusterer.update_clusters(pd.concat([features, new], ignore_index=True))
+    latest = dict(zip(updated['item_id'], updated['cluster']))
+    assert 0 <= latest[10**6] < 4
+    assert {i: latest[i] for i in after} == after
+
+
+def test_refit_keeps_cluster_ids():
+    clusterer = ItemClusterer(n_clusters=4)
+    for df in make_snapshots():
+        clusterer.aggregates.add(df)
+    features = clusterer.aggregates.features()
+    first = clusterer.fit_clusters(features.copy())
+    # Same data in another order: KMeans lands on (nearly) the same clusters
+    # under other numbers, which are mapped back onto the previous centroids
+    shuffled = features.sample(frac=1, random_state=1).reset_index(drop=True)
+    second = clusterer.fit_clusters(shuffled)
+    previous = first.set_index('item_id')['cluster']
+    counts = pd.crosstab(second['cluster'].to_numpy(), previous[second['item_id']].to_numpy())
+    assert counts.idxmax(axis=1).tolist() == list(range(4))
+    assert np.trace(counts.to_numpy()) >= 0.95 * len(features)
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from ml.pipeline.manipulation_detection import ManipulationDetector
+
+
+def history(rows):
+    """(item_id, price, quantity, top_seller_share) rows, one timestamp per row in order"""
+    return pd.DataFrame([{'item_id': item_id, 'timestamp': t, 'price': price, 'quantity': quantity,
+                          'top_seller_share': share}
+                         for t, (item_id, price, quantity, share) in enumerate(rows)])
+
+
+def reference_rules(points, share, detector):
+    """Rules recomputed from an item's price list (latest point last)"""
+    if len(points) < detector.min_history:
+        return set()
+    price, previous = points[-1], points[-2]
+    median = np.median(points[:-1][-detector.window:])
+    holds = set()
+    if price / previous > detector.reset_threshold:
+        holds.add('MARKET_RESET')
+    if price / previous < detector.dump_threshold:
+        holds.add('PRICE_CRASH')
+    if (median - price) / median > detector.crash_drop:
+        holds.add('FLASH_CRASH')
+    if share >= detector.scarcity_share and price > median * detector.scarcity_markup:
+        holds.add('ARTIFICIAL_SCARCITY')
+    return holds
+
+
+def test_scarcity_uses_the_rolling_median():
+    # The spike lifts the mean (2800) above 1600 / 1.5 but not the median (1000)
+    rows = [(7, price, 10, 0.9) for price in (1000, 1000, 1000, 1000, 10000, 1600)]
+    rows += [(8, price, 10, 0.5) for price in (1000, 1000, 1000, 1000, 10000, 1600)]
+    alerts = ManipulationDetector().detect_artificial_scarcity(history(rows))
+    assert [a['item_id'] for a in alerts] == [7]
+    alert = alerts[0]
+    assert alert['action'] == 'DO NOT BUY - one seller controls supply'
+    assert (alert['rolling_median'], alert['seller_share'], alert['confidence']) == (1000.0, 0.9, 0.75)
+    assert alert['message'] == "Artificial scarcity: one seller holds 90% at 1.6x the rolling median"
+    assert ManipulationDetector().detect_artificial_scarcity(history(rows).drop(columns='top_seller_share')) == []
+
+
+def test_rules_match_price_lists():
+    rng = np.random.default_rng(8)
+    detector = ManipulationDetector(window=6)
+    rows, prices, shares = [], {}, {}
+    for _ in range(600):
+        item_id = int(rng.integers(0, 40))
+        price = float(rng.choice([1000, 1000, 1100, 300, 2500, rng.integers(200, 4000)]))
+        share = float(rng.choice([0.1, 0.8, 0.9]))
+        rows.append((item_id, price, int(rng.integers(0, 50)), share))
+        prices.setdefault(item_id, []).append(price)
+        shares[item_id] = share
+    alerts = detector.analyze_market(history(rows))
+    expected = {(rule, item_id) for item_id in prices
+                for rule in reference_rules(prices[item_id], shares[item_id], detector)}
+    assert {(a['type'], a['item_id']) for a in alerts} == expected
+    assert {a['type'] for a in alerts} == {'MARKET_RESET', 'PRICE_CRASH', 'FLASH_CRASH', 'ARTIFICIAL_SCARCITY'}
+    crash = next(a for a in alerts if a['type'] == 'FLASH_CRASH')
+    assert crash['action'] == 'BUY MAXIMUM - This is a panic sell'
+    assert detector.analyze_market(history(rows).iloc[:0]) == []
@@ -0,0 +1,75 @@
+import random
+from datetime import datetime, timedelta
+
+from ml.pipeline.cancel_repost import ActiveAuction, CancelRepostManager
+from ml.pipeline.order_book import NO_PRICE, OrderBook
+
+
+def next_scan(rng, scan, next_id):
+    """Randomly remove, reprice and add listings."""
+    scan = [dict(l) for l in scan if rng.random() > 0.1]
+    for listing in scan:
+        if rng.random() < 0.1:
+            listing['price_per_item'] = rng.randint(100, 1000)
+    for _ in range(rng.randint(0, 30)):
+        scan.append({'auction_id': next_id, 'item_id': rng.randint(1, 40),
+                     'price_per_item': rng.randint(100, 1000), 'seller': rng.choice(['a', 'b', None])})
+        next_id += 1
+    return scan, next_id
+
+
+def lowest_by_loop(scan, item_ids, exclude):
+    lowest = {}
+    for l in scan:
+        if l['item_id'] in item_ids and l.get('auction_id') not in exclude:
+            lowest[l['item_id']] = min(lowest.get(l['item_id'], l['price_per_item']), l['price_per_item'])
+    return lowest
+
+
+def test_book_lookups_match_loops():
+    rng = random.Random(5)
+    scan, _ = next_scan(rng, [], 0)
+    scan += [{'item_id': 7, 'price_per_item': 50}]  # no auction id
+    book = OrderBook(scan)
+    items, ours = list(range(0, 45)), [l['auction_id'] for l in scan[:10]]
+    expected = lowest_by_loop(scan, set(items), set(ours))
+    assert book.lowest_competitors(items, ours).tolist() == [expected.get(i, NO_PRICE) for i in items]
+    assert book.lowest(7) == 50
+    assert book.contains_auctions([scan[0]['auction_id'], -99999]).tolist() == [True, False]
+
+
+def test_successive_scans_match_rebuild():
+    rng = random.Random(11)
+    scan, next_id = next_scan(rng, [], 0)
+    previous = None
+    manager = CancelRepostManager()
+    posted = datetime.now() - timedelta(hours=1)
+    for step in range(40):
+        scan, next_id = next_scan(rng, scan, next_id)
+        if step % 10 == 0:
+            # Our auctions change now and then; the cache must be rebuilt for them
+            manager.our_auctions = [ActiveAuction(l['auction_id'], l['item_id'], 1, l['price_per_item'], 'LONG', posted)
+                                    for l in rng.sample(scan, 8)]
+        book = OrderBook(scan)
+
+        diff = book.diff(previous)
+        before = {l['auction_id']: l for l in previous_scan} if previous is not None else {}
+        now = {l['auction_id']: l for l in scan}
+        assert set(diff['added'].tolist()) == now.keys() - before.keys()
+        assert set(diff['removed'].tolist()) == before.keys() - now.keys()
+        changed = {now[a]['item_id'] for a in now.keys() - before.keys()} | \
+                  {before[a]['item_id'] for a in before.keys() - now.keys()} | \
+                  {now[a]['item_id'] for a in now.keys() & before.keys()
+                   if now[a]['price_per_item'] != before[a]['price_per_item']}
+        assert set(diff['changed_items'].tolist()) == changed
+
+        incremental = manager.scan_for_undercuts(book)
+        fresh = CancelRepostManager()
+        fresh.our_auctions = manager.our_auctions
+        rebuilt = fresh.scan_for_undercuts(OrderBook(scan))
+        assert manager._lowest_competitor == fresh._lowest_competitor
+        assert [(u.our_auction.auction_id, u.undercut_price) for u in incremental] == \
+               [(u.our_auction.auction_id, u.undercut_price) for u in rebuilt]
+        ours = {a.auction_id for a in manager.our_auctions}
+        assert manager._lowest_competitor == lowest_by_loop(scan, {a.item_id for a in manager.our_auctions}, ours)
+        previous, previous_scan = book, scan
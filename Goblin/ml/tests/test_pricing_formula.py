@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from ml.pipeline.pricing_formula import CompiledFormula, FormulaCache, FormulaError, parse
+from ml.pipeline.pricing_shopping import PricingEngine
+
+COLUMNS = {
+    'dbmarket': np.array([10000.0, 20000.0, 0.0]),
+    'dbminbuyout': np.array([0.0, 18000.0, 500.0]),
+    'dbhistorical': np.array([12000.0, 0.0, 0.0]),
+}
+
+
+def evaluate(formula, custom=None):
+    return CompiledFormula(formula, custom)(COLUMNS, 3).tolist()
+
+
+def test_percent_of_source():
+    assert evaluate("120% dbmarket") == [12000, 24000, 0]
+    assert evaluate("90% (dbmarket + 1000)") == [9900, 18900, 900]
+    assert evaluate("dbmarket * 95%") == [9500, 19000, 0]
+    assert evaluate("50%") == [0.5] * 3
+
+
+def test_gold_literals():
+    assert evaluate("1g50s") == [15000] * 3
+    assert evaluate("10s + 25c") == [1025] * 3
+    assert evaluate("max(dbmarket, 1.5g)") == [15000, 20000, 15000]
+
+
+def test_comparisons():
+    assert evaluate("ifgt(dbmarket, 1g50s, dbmarket, dbminbuyout)") == [0, 20000, 500]
+    # else defaults to 0
+    assert evaluate("ifgte(dbmarket, 10000, 1)") == [1, 1, 0]
+    assert evaluate("iflt(dbminbuyout, dbmarket, dbminbuyout)") == [0, 18000, 0]
+
+
+def test_first_non_zero():
+    assert evaluate("first(dbminbuyout, dbhistorical, 10s)") == [12000, 18000, 500]
+    assert evaluate("first(dbhistorical, dbmarket)") == [12000, 20000, 0]
+
+
+def test_custom_sources_expand_and_detect_cycles():
+    assert evaluate("floor * 2", {'floor': "max(dbminbuyout, 1g)"}) == [20000, 36000, 20000]
+    with pytest.raises(FormulaError):
+        CompiledFormula("a", {'a': "b + 1", 'b': "a"})
+    cache = FormulaCache()
+    cache.set_custom_source("Floor", "1g")
+    assert cache.get("floor")(COLUMNS, 3).tolist() == [10000] * 3
+
+
+@pytest.mark.parametrize("formula", ["", "max(dbmarket,", "dbmarket $ 2", "sqrt(dbmarket)", "ifgt(dbmarket, 1)", "2 3"])
+def test_malformed_formulas_raise(formula):
+    with pytest.raises(FormulaError):
+        parse(formula)
+
+
+def test_engine_falls_back_to_market():
+    engine = PricingEngine()
+    engine.update_market_data(1, {'market_value': 10000, 'min_buyout': 0})
+    engine.update_market_data(2, {'market_value': 20000, 'min_buyout': 18000})
+    assert engine.evaluate_many("max(dbmarket,").tolist() == [10000, 20000]
+    assert engine.evaluate_many("dbmarket * unknownsource").tolist() == [10000, 20000]
+    # Division by zero falls back per item
+    assert engine.evaluate_many("dbmarket * 10000 / dbminbuyout").tolist() == [10000, 11111]
+    assert engine.evaluate("90% dbmarket", 2) == 18000
+    # Unknown items price at 0
+    assert engine.evaluate_many("dbmarket + 1g", [2, 99]).tolist() == [30000, 10000]
@@ -0,0 +1,100 @@
+import random
+
+from ml.pipeline.order_book import OrderBook
+from ml.pipeline.pricing_shopping import ListingBatch, PricingEngine, ShoppingSystem
+
+
+def make_market(seed=3):
+    rng = random.Random(seed)
+    engine = PricingEngine()
+    for item_id in range(1, 30):
+        engine.update_market_data(item_id, {'market_value': rng.choice([0, 1000, rng.randint(100, 5000)])})
+        if rng.random() < 0.7:
+            engine.update_ml_prediction(item_id, rng.randint(0, 6000), rng.choice([0.69, 0.7, rng.random()]))
+    # Item 40 has listings but no market data
+    ah_data = [{'auction_id': i, 'item_id': rng.choice(list(range(1, 30)) + [40]),
+                'price_per_item': rng.choice([0, 300, 700, rng.randint(1, 6000)])} for i in range(600)]
+    return engine, ah_data
+
+
+def deals_by_loop(ah_data, engine, threshold):
+    deals = []
+    for listing in ah_data:
+        market_value = engine.market_data.get(listing['item_id'], {}).get('market_value', 0)
+        if market_value == 0:
+            continue
+        discount = (market_value - listing['price_per_item']) / market_value
+        if discount >= 1 - threshold:
+            deals.append((listing['item_id'], listing['price_per_item'], market_value, discount * 100))
+    deals.sort(key=lambda d: d[3], reverse=True)
+    return deals
+
+
+def lists_by_loop(system, ah_data, engine, top_n):
+    results = {}
+    for name, shopping_list in system.shopping_lists.items():
+        threshold = shopping_list['deal_threshold'] or system.great_deals_threshold
+        matches = []
+        for listing in ah_data:
+            item_id, price = listing['item_id'], listing['price_per_item']
+            if item_id not in shopping_list['items']:
+                continue
+            market_value = engine.market_data.get(item_id, {}).get('market_value', 0)
+            discount = (market_value - price) / market_value if market_value else 0.0
+            cap = shopping_list['max_prices'].get(item_id)
+            if (price <= cap) if cap is not None else (market_value and discount >= 1 - threshold):
+                matches.append((item_id, price, market_value, discount * 100, cap))
+        matches.sort(key=lambda m: m[3], reverse=True)
+        results[name] = matches[:top_n]
+    return results
+
+
+def test_deals_and_snipes_match_loops():
+    engine, ah_data = make_market()
+    system = ShoppingSystem()
+    deals = system.scan_for_deals(ah_data, engine)
+    assert [(d['item_id'], d['price'], d['market_value'], d['discount_pct']) for d in deals] == \
+           deals_by_loop(ah_data, engine, system.great_deals_threshold)
+    # Copper amounts stay ints, as they were stored
+    assert all(type(d['market_value']) is int and type(d['savings']) is int for d in deals)
+    assert system.scan_for_deals(ah_data, engine, limit=3) == deals[:3]
+
+    snipes = system.sniper_mode(ah_data, engine)
+    expected = []
+    for listing in ah_data:
+        ml = engine.ml_predictions.get(listing['item_id'], {})
+        predicted, price = ml.get('price', 0), listing['price_per_item']
+        if predicted and ml['confidence'] >= 0.7 and 0 < price < predicted * 0.5:
+            expected.append((listing['item_id'], price, predicted, predicted - price))
+    expected.sort(key=lambda s: (s[2] - s[1]) / s[1], reverse=True)
+    assert [(s['item_id'], s['buy_price'], s['predicted_sell'], s['potential_profit']) for s in snipes] == expected
+    assert all(type(s['predicted_sell']) is int for s in snipes)
+
+
+def test_batch_from_order_book():
+    engine, ah_data = make_market()
+    batch, from_book = ListingBatch(ah_data), ListingBatch(OrderBook(ah_data))
+    assert len(batch) == len(from_book) == len(ah_data)
+    assert sorted(zip(batch.item_id.tolist(), batch.price.tolist())) == \
+           sorted(zip(from_book.item_id.tolist(), from_book.price.tolist()))
+    assert (from_book.items[from_book.item_code] == from_book.item_id).all()
+    columns = from_book.columns(engine)
+    assert columns['dbmarket'].tolist() == \
+           [engine.market_data.get(i, {}).get('market_value', 0) for i in from_book.item_id.tolist()]
+
+
+def test_shopping_lists_match_loop():
+    engine, ah_data = make_market()
+    system = ShoppingSystem()
+    system.create_shopping_list("Herbs", [1, 2, 3, 3, 40], {2: 700, 40: 300})
+    system.create_shopping_list("Ores", [3, 4, 5, 6, 7, 8], deal_threshold=0.9)
+    system.create_shopping_list("Empty", [])
+    for top_n in (None, 2):
+        results = system.scan_shopping_lists(ah_data, engine, top_n=top_n)
+        expected = lists_by_loop(system, ah_data, engine, top_n)
+        assert list(results) == ["Herbs", "Ores", "Empty"]
+        for name, matches in results.items():
+            assert [(m['item_id'], m['price'], m['market_value'], m['discount_pct'], m['max_price'])
+                    for m in matches] == expected[name]
+    assert any(m['item_id'] == 40 for m in system.scan_shopping_lists(ah_data, engine, top_n=None)["Herbs"])
+    assert system.scan_shopping_lists([], engine) == {"Herbs": [], "Ores": [], "Empty": []}
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Activity Index - top-K ordering for the Navigator
+
+Activities are kept in binary heaps keyed by score and by PPM, one pair
+over every activity and one over the default view (not owned, at least one
+character with the lockout open). The K best are read by a best-first walk
+of the heap array, O(K log K), without popping or re-sorting anything.
+
+Ownership and lockout changes re-push only the changed activity; its old
+heap entries are left behind with a stale version and skipped (the heaps
+are compacted when stale entries outnumber live ones). Statistics counters
+are adjusted on each change instead of rescanning.
+"""
+
+import heapq
+import threading
+from typing import Dict, Iterator, List, Optional
+
+URGENT_SCORE = 80
+ORDERS = ('score', 'ppm')
+
+
+def activity_row(activity) -> Dict:
+    """API representation of one activity"""
+    return {
+        "instance": activity.instance_name,
+        "drop": activity.drop_name,
+        "type": activity.drop_type.value,
+        "expansion": activity.expansion,
+        "instance_type": activity.instance_type,
+        "available_chars": activity.available_chars,
+        "score": activity.score,
+        "ppm": round(activity.ppm, 2),
+        "time": activity.time_estimate,
+        "priority": activity.priority_label,
+        "rarity": activity.rarity,
+        "is_owned": activity.is_owned,
+        "zone_id": activity.zone_id
+    }
+
+
+class ActivityIndex:
+    def __init__(self, activities: List):
+        self.activities = list(activities)
+        self._lock = threading.Lock()
+        self._rebuild()
+
+    def __len__(self):
+        return len(self.activities)
+
+    # --- Maintenance ---
+
+    def _rebuild(self):
+        n = len(self.activities)
+        self._version = [0] * n
+        self._rows: List[Optional[Dict]] = [None] * n
+        self._keys = [self._key(a) for a in self.activities]
+        # heaps[(view, order)] holds (-key, activity_id, version); ties keep load order
+        self._heaps = {(view, order): [] for view in ('all', 'default') for order in ORDERS}
+        for aid in range(n):
+            self._push(aid)
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+        self._live = {name: len(heap) for name, heap in self._heaps.items()}
+
+        self.by_drop: Dict[str, List[int]] = {}
+        self.by_instance: Dict[str, List[int]] = {}
+        for aid, activity in enumerate(self.activities):
+            self.by_drop.setdefault(activity.drop_name, []).append(aid)
+            self.by_instance.setdefault(activity.instance_name, []).append(aid)
+
+        self._counts = {"owned": 0, "available": 0, "locked": 0, "urgent": 0}
+        self._by_type: Dict[str, int] = {}
+        for activity in self.activities:
+            self._count(activity, +1)
+
+    @staticmethod
+    def _key(activity):
+        return {"score": activity.score, "ppm": activity.ppm}
+
+    @staticmethod
+    def _in_default_view(activity) -> bool:
+        return not activity.is_owned and activity.available_chars >= 1
+
+    def _push(self, aid: int, heappush=False):
+        activity = self.activities[aid]
+        keys = self._keys[aid]
+        views = ('all', 'default') if self._in_default_view(activity) else ('all',)
+        for view in views:
+            for order in ORDERS:
+                entry = (-keys[order], aid, self._version[aid])
+                heap = self._heaps[(view, order)]
+                if heappush:
+                    heapq.heappush(heap, entry)
+                    self._live[(view, order)] += 1
+                else:
+                    heap.append(entry)
+
+    def _count(self, activity, sign: int):
+        counts = self._counts
+        counts["owned"] += sign * activity.is_owned
+        counts["available"] += sign * (activity.available_chars > 0 and not activity.is_owned)
+        counts["locked"] += sign * (activity.available_chars == 0)
+        counts["urgent"] += sign * (self._in_default_view(activity) and activity.score >= URGENT_SCORE)
+        type_name = activity.drop_type.value
+        self._by_type[type_name] = self._by_type.get(type_name, 0) + sign
+
+    def update(self, aid: int, is_owned: Optional[bool] = None, available_chars: Optional[int] = None):
+        """Change ownership/lockouts of one activity and reposition it."""
+        with self._lock:
+            activity = self.activities[aid]
+            if ((is_owned is None or is_owned == activity.is_owned) and
+                    (available_chars is None or available_chars == activity.available_chars)):
+                return
+            was_default = self._in_default_view(activity)
+            self._count(activity, -1)
+            if is_owned is not None:
+                activity.is_owned = is_owned
+            if available_chars is not None:
+                activity.available_chars = available_chars
+            self._count(activity, +1)
+
+            # Old entries go stale; push fresh ones
+            self._version[aid] += 1
+            self._rows[aid] = None
+            self._keys[aid] = self._key(activity)
+            for order in ORDERS:
+                self._live[('all', order)] -= 1
+                if was_default:
+                    self._live[('default', order)] -= 1
+            self._push(aid, heappush=True)
+            self._compact()
+
+    def _compact(self):
+        for name, heap in self._heaps.items():
+            if len(heap) > 2 * self._live[name] + 16:
+                fresh = [e for e in heap if e[2] == self._version[e[1]]]
+                heapq.heapify(fresh)
+                self._heaps[name] = fresh
+                self._live[name] = len(fresh)
+
+    # --- Queries ---
+
+    def _walk(self, heap) -> Iterator[int]:
+        """Activity ids in heap order, best first, skipping stale entries."""
+        if not heap:
+            return
+        frontier = [(heap[0], 0)]
+        size = len(heap)
+        while frontier:
+            entry, i = heapq.heappop(frontier)
+            if entry[2] == self._version[entry[1]]:
+                yield entry[1]
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < size:
+                    heapq.heappush(frontier, (heap[child], child))
+
+    def _row(self, aid: int) -> Dict:
+        # Rows are cached until the activity changes; callers get a copy
+        row = self._rows[aid]
+        if row is None:
+            row = self._rows[aid] = activity_row(self.activities[aid])
+        return dict(row)
+
+    def top(self, limit: Optional[int] = None, order: str = 'score',
+            include_owned: bool = False, min_available: int = 1) -> List[Dict]:
+        """Best activities by score (or ppm) passing the filters."""
+        if order not in ORDERS:
+            raise ValueError(f"Unknown order {order!r}; expected one of {ORDERS}")
+        default_view = not include_owned and min_available == 1
+        with self._lock:
+            heap = self._heaps[('default' if default_view else 'all', order)]
+            rows = []
+            for aid in self._walk(heap):
+                if limit is not None and len(rows) >= limit:
+                    break
+                activity = self.activities[aid]
+                if not default_view:
+                    if not include_owned and activity.is_owned:
+                        continue
+                    if activity.available_chars < min_available:
+                        continue
+                rows.append(self._row(aid))
+            return rows
+
+    def urgent(self, limit: int = 5) -> List[Dict]:
+        """Default-view activities scoring URGENT_SCORE or more, best first."""
+        with self._lock:
+            rows = []
+            for aid in self._walk(self._heaps[('default', 'score')]):
+                if len(rows) >= limit or self._keys[aid]['score'] < URGENT_SCORE:
+                    break
+                rows.append(self._row(aid))
+            return rows
+
+    def statistics(self) -> Dict:
+        with self._lock:
+            total = len(self.activities)
+            owned = self._counts["owned"]
+            return {
+                "total_activities": total,
+                "owned": owned,
+                "available": self._counts["available"],
+                "locked": self._counts["locked"],
+                "by_type": {k: v for k, v in self._by_type.items() if v},
+                "completion_percent": int((owned / total) * 100) if total > 0 else 0
+            }
+
+    @property
+    def urgent_count(self) -> int:
+        return self._counts["urgent"]
@@ -6,13 +6,14 @@ import socket
 import shutil
 import hashlib
 from datetime import datetime
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
+from sv_watcher import SavedVariablesWatcher
+from delta_upload import DeltaUploadClient
 
 # CONFIGURATION
 # TODO: User needs to set the correct Account Name
 WOW_SAVED_VARIABLES_PATH = "/Applications/World of Warcraft/_retail_/WTF/Account/YOUR_ACCOUNT_NAME_HERE/SavedVariables"
 SERVER_URL = "http://localhost:5001/upload_data"
+DELTA_UPLOAD_URL = f"{SERVER_URL}/delta"
 
 class MirrorClient:
     def __init__(self, server_url, wtf_path):
@@ -104,59 +105,41 @@ class MirrorClient:
         except Exception as e:
             print(f"[Mirror] Sync failed: {e}")
 
-class SavedVariablesHandler(FileSystemEventHandler):
-    def on_modified(self, event):
-        if event.is_directory:
-            return
-        
-        filename = os.path.basename(event.src_path)
-        
-        # Phase 1-5: DataStore
-        if filename.startswith("DataStore") and filename.endswith(".lua"):
-            print(f"Detected change in {filename}. Processing...")
-            self.process_lua_file(event.src_path, filename)
-            
-        # Phase 6: SavedInstances (Pathfinder)
-        elif filename == "SavedInstances.lua":
-            print(f"Detected change in {filename}. Processing...")
-            self.process_lua_file(event.src_path, filename)
-
-        # Phase 8: DataStore_Reputations (Diplomat)
-        elif filename == "DataStore_Reputations.lua":
-            print(f"Detected change in {filename}. Processing...")
-            self.process_lua_file(event.src_path, filename)
+class SavedVariablesHandler:
+    def __init__(self, uploader=None):
+        self.uploader = uploader or DeltaUploadClient(DELTA_UPLOAD_URL)
 
-        # Transmog
-        elif filename == "CanIMogIt.lua":
-            print(f"Detected change in {filename}. Processing...")
-            self.process_lua_file(event.src_path, filename)
+    # SavedVariables files the server knows how to ingest
+    WATCHED_FILES = [
+        "DataStore*.lua",          # Phase 1-5: DataStore (incl. DataStore_Reputations for Diplomat)
+        "SavedInstances.lua",      # Phase 6: Pathfinder
+        "CanIMogIt.lua",           # Transmog
+        "DeepPockets.lua",         # DeepPockets (Inventory & Recipes)
+    ]
 
-        # DeepPockets (Inventory & Recipes)
-        elif filename == "DeepPockets.lua":
-            print(f"Detected change in {filename}. Processing...")
-            self.process_lua_file(event.src_path, filename)
+    def register(self, watcher):
+        """Route the watched files through a debounced SavedVariablesWatcher."""
+        for pattern in self.WATCHED_FILES:
+            watcher.register(pattern, self.process_lua_file)
 
     def process_lua_file(self, filepath, filename):
         """
-        Reads the Lua file, attempts to parse it (naive parsing or using a library),
-        and sends it to the server.
+        Reads the Lua file and uploads it with the delta protocol: only blocks
+        the server does not already hold are sent. The server parses it in
+        the background and answers with a job id.
         """
         try:
-            # TODO: Implement robust Lua to JSON parsing. 
-            # For now, we will just read the raw content and send it wrapped.
-            # In a real scenario, we'd use slpp or similar to parse Lua tables to Python dicts.
-            
             with open(filepath, 'r', encoding='utf-8') as f:
                 content = f.read()
 
-            payload = {
-                "source": filename.replace(".lua", ""),
-                "data": content # Sending raw content for server to parse for now
-            }
-
-            response = requests.post(SERVER_URL, json=payload)
-            if response.status_code == 200:
-                print(f"Successfully uploaded {filename}")
+            source = filename.replace(".lua", "")
+            response = self.uploader.upload(source, content)
+            if response.status_code in (200, 202):
+                result = response.json()
+                if result.get("status") == "unchanged":
+                    print(f"{filename} unchanged on server")
+                else:
+                    print(f"Successfully uploaded {filename} (job {result.get('job_id')})")
             else:
                 print(f"Failed to upload {filename}: {response.text}")
 
@@ -168,19 +151,19 @@ if __name__ == "__main__":
     print(f"Watching: {WOW_SAVED_VARIABLES_PATH}")
     
     event_handler = SavedVariablesHandler()
-    observer = Observer()
+    watcher = SavedVariablesWatcher(WOW_SAVED_VARIABLES_PATH)
+    event_handler.register(watcher)
     
     # Check if path exists to avoid immediate crash
     if not os.path.exists(WOW_SAVED_VARIABLES_PATH):
         print(f"WARNING: Path not found: {WOW_SAVED_VARIABLES_PATH}")
         print("Please edit bridge.py to set the correct WOW_SAVED_VARIABLES_PATH.")
     else:
-        observer.schedule(event_handler, WOW_SAVED_VARIABLES_PATH, recursive=False)
-        observer.start()
+        watcher.start()
         
     try:
         while True:
             time.sleep(1)
     except KeyboardInterrupt:
-        observer.stop()
-    observer.join()
+        pass
+    watcher.stop()
@@ -8,6 +8,10 @@ from typing import List, Dict, Any
 from datetime import datetime
 import random
 
+from summary_materializer import SummaryMaterializer
+
+SECTION_TTL = 60  # Seconds; emissary timers, alerts and the greeting follow the clock
+
 class BriefingEngine:
     """
     Aggregates data from other engines to generate a prioritized briefing.
@@ -22,44 +26,45 @@ class BriefingEngine:
         self.goblin = goblin
         self.quartermaster = quartermaster
         self.museum = museum
-        
+
+        # Sections are keyed to the engines they read; feed summary.notify
+        # with engine data-change events (see EngineRegistry.changed)
+        self.summary = SummaryMaterializer('briefing', self._assemble_briefing)
+        self.summary.section('header', self._header_section, ttl=SECTION_TTL)
+        self.summary.section('summary', self._generate_executive_summary,
+                             ['vault', 'scout'], ttl=SECTION_TTL)
+        self.summary.section('action_items', self._action_items_section,
+                             ['diplomat', 'scout', 'vault', 'knowledge', 'quartermaster', 'museum'],
+                             ttl=SECTION_TTL)
+        self.summary.section('market', self._get_market_highlights, ['goblin'])
+        self.summary.section('progression', self._get_progression_status)
+
     def generate_briefing(self) -> Dict[str, Any]:
         """
         Generate the full briefing data structure.
         """
-        print("DEBUG: Starting generate_briefing")
+        return self.summary.get().payload
+
+    def _assemble_briefing(self, sections: Dict[str, Any], updated_at: float) -> Dict[str, Any]:
+        return {
+            "date": sections['header']['date'],
+            "greeting": sections['header']['greeting'],
+            "summary": sections['summary'],
+            "action_items": sections['action_items'],
+            "market": sections['market'],
+            "progression": sections['progression']
+        }
+
+    def _header_section(self) -> Dict[str, str]:
         now = datetime.now()
-        
-        # 1. Executive Summary
-        print("DEBUG: Generating Executive Summary...")
-        summary = self._generate_executive_summary()
-        print("DEBUG: Executive Summary Done")
-        
-        # 3. Collect Action Items
+        return {"date": now.strftime("%A, %B %d, %Y"), "greeting": self._get_greeting(now)}
+
+    def _action_items_section(self) -> List[Dict]:
         action_items = []
         action_items.extend(self._collect_action_items())
         action_items.extend(self._collect_logistics_items())
         action_items.extend(self._collect_museum_items())
-        print("DEBUG: Action Items Done")
-        
-        # 3. Market Opportunities
-        print("DEBUG: Getting Market Highlights...")
-        market_opps = self._get_market_highlights()
-        print("DEBUG: Market Highlights Done")
-        
-        # 4. Progression Status
-        print("DEBUG: Getting Progression Status...")
-        progression = self._get_progression_status()
-        print("DEBUG: Progression Status Done")
-        
-        return {
-            "date": now.strftime("%A, %B %d, %Y"),
-            "greeting": self._get_greeting(now),
-            "summary": summary,
-            "action_items": action_items,
-            "market": market_opps,
-            "progression": progression
-        }
+        return action_items
         
     def _get_greeting(self, now: datetime) -> str:
         hour = now.hour
@@ -0,0 +1,332 @@
+"""
+competitor_store.py - Bounded, persistent store of competitor (seller) activity
+
+Full-realm scans see every seller on the auction house, so keeping every
+action per seller grows without bound over a season. This store keeps a
+fixed number of seller slots instead:
+
+- Space-Saving heavy hitters: `capacity` monitored sellers. A seller not
+  in the table takes the slot of the least active one and inherits its
+  count as an overestimate (`error`), so any seller more active than
+  total / capacity is always monitored.
+- Count-Min sketch over all sellers: an activity estimate (an upper
+  bound) for sellers that are not in the table.
+- Per monitored seller: listing/undercut counters and an hour-of-week
+  (7 x 24) activity histogram.
+- Time decay: activity, listings and histograms decay exponentially with
+  `half_life_hours`. Forward decay (weights grow as 2^(t / half-life) from
+  a landmark and are divided out on read) means an update never has to
+  touch the other sellers; values are rescaled now and then to stay in
+  float range.
+
+Memory is capacity x (168 + 8) floats plus the sketch, and a top-K query
+looks at the capacity slots only, whatever the number of sellers or
+actions seen. With a db_path the table and sketch are saved to SQLite
+(at most every save_interval seconds on record(), and on save()/close()).
+One lock guards the arrays and the connection, so a store can be shared
+between request threads.
+
+Usage:
+    store = CompetitorStore("competitors.db", capacity=1000)
+    store.record(["Goblinator", "Undercutz"], ["listing", "undercut"],
+                 [time.time()] * 2, amounts=[0, 5])
+    store.top(5)  # [{"name": "Goblinator", "threat_level": ..., ...}, ...]
+"""
+
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+HOURS_PER_WEEK = 7 * 24
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MAX_EXPONENT = 256  # rescale the forward-decay weights past 2^256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS competitor_slots (
+    slot INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    activity REAL NOT NULL,
+    error REAL NOT NULL,
+    listings_decayed REAL NOT NULL,
+    listings INTEGER NOT NULL,
+    undercuts INTEGER NOT NULL,
+    undercut_total REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    hours BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS competitor_meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+
+def hour_of_week(timestamps: Sequence[float]) -> np.ndarray:
+    """Local weekday * 24 + hour per epoch timestamp (one conversion per distinct minute)."""
+    minutes, inverse = np.unique(np.floor_divide(np.asarray(timestamps, dtype=float), 60), return_inverse=True)
+    local = [datetime.fromtimestamp(m * 60) for m in minutes.tolist()]
+    return np.array([d.weekday() * 24 + d.hour for d in local], dtype=np.int64)[inverse.reshape(-1)]
+
+
+class CompetitorStore:
+    """Space-Saving table of the most active sellers, with decayed counters and hour-of-week histograms."""
+
+    def __init__(self, db_path: Optional[str] = None, capacity: int = 1000,
+                 half_life_hours: float = 168, sketch_width: int = 2048, sketch_depth: int = 4,
+                 save_interval: float = 60):
+        self.db_path = db_path
+        self.capacity = capacity
+        self.half_life = half_life_hours * 3600
+        self.save_interval = save_interval
+
+        self.names: List[Optional[str]] = [None] * capacity
+        self._slots: Dict[str, int] = {}
+        self.activity = np.zeros(capacity)  # Space-Saving counts (forward-decayed)
+        self.error = np.zeros(capacity)     # overestimate inherited on entry
+        self.listings_decayed = np.zeros(capacity)
+        self.listings = np.zeros(capacity, dtype=np.int64)
+        self.undercuts = np.zeros(capacity, dtype=np.int64)
+        self.undercut_total = np.zeros(capacity)
+        self.last_seen = np.zeros(capacity)
+        self.hours = np.zeros((capacity, HOURS_PER_WEEK))
+        self.sketch = np.zeros((sketch_depth, sketch_width))
+        self.landmark: Optional[float] = None
+        self._saved_at = 0.0
+        self._lock = threading.RLock()
+
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.executescript(SCHEMA)
+            self._load()
+
+    def __len__(self):
+        return len(self._slots)
+
+    # ------------------------------------------------------------------
+    # Decay
+    # ------------------------------------------------------------------
+
+    def _weights(self, timestamps: np.ndarray) -> np.ndarray:
+        return np.exp2((timestamps - self.landmark) / self.half_life)
+
+    def _advance(self, now: float):
+        """Start the landmark, or move it to `now` once weights would get too large."""
+        if self.landmark is None:
+            self.landmark = now
+            return
+        exponent = (now - self.landmark) / self.half_life
+        if exponent > MAX_EXPONENT:
+            scale = np.exp2(-exponent)
+            for array in (self.activity, self.error, self.listings_decayed, self.hours, self.sketch):
+                array *= scale
+            self.landmark = now
+
+    def _decayed(self, values: np.ndarray, now: Optional[float]) -> np.ndarray:
+        if self.landmark is None:
+            return np.zeros_like(values)
+        now = time.time() if now is None else now
+        return values * np.exp2(-(now - self.landmark) / self.half_life)
+
+    # ------------------------------------------------------------------
+    # Count-Min sketch
+    # ------------------------------------------------------------------
+
+    def _sketch_columns(self, names: Sequence[str]) -> np.ndarray:
+        """Sketch column per (row, name), by double hashing two CRC32s."""
+        encoded = [name.encode('utf-8') for name in names]
+        h1 = np.array([zlib.crc32(b) for b in encoded], dtype=np.int64)
+        h2 = np.array([zlib.crc32(b, 0x9E3779B9) | 1 for b in encoded], dtype=np.int64)
+        rows = np.arange(self.sketch.shape[0], dtype=np.int64)[:, None]
+        return (h1[None, :] + rows * h2[None, :]) % self.sketch.shape[1]
+
+    def _sketch_estimate(self, columns: np.ndarray) -> np.ndarray:
+        return self.sketch[np.arange(self.sketch.shape[0])[:, None], columns].min(axis=0)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def record(self, sellers: Sequence[str], kinds: Sequence[str], timestamps: Sequence[float],
+               amounts: Optional[Sequence[float]] = None):
+        """
+        Record a batch of actions: kind 'listing', 'undercut' (with an
+        amount) or anything else (counts as activity only).
+        """
+        if not len(sellers):
+            return
+        with self._lock:
+            self._record(sellers, kinds, timestamps, amounts)
+
+    def _record(self, sellers: Sequence[str], kinds: Sequence[str], timestamps: Sequence[float],
+                amounts: Optional[Sequence[float]]):
+        timestamps = np.asarray(timestamps, dtype=float)
+        kinds = np.asarray(kinds, dtype=object)
+        amounts = np.zeros(len(timestamps)) if amounts is None else np.asarray(amounts, dtype=float)
+        self._advance(float(timestamps.max()))
+        weights = self._weights(timestamps)
+
+        # Per distinct seller in the batch
+        index: Dict[str, int] = {}
+        codes = np.fromiter((index.setdefault(s, len(index)) for s in sellers), dtype=np.int64, count=len(sellers))
+        names = list(index)
+        n = len(names)
+        totals = np.bincount(codes, weights=weights, minlength=n)
+        columns = self._sketch_columns(names)
+        for row in range(self.sketch.shape[0]):
+            np.add.at(self.sketch[row], columns[row], totals)
+
+        # Space-Saving: known sellers add up, newcomers replace the least active
+        slots = np.array([self._slots.get(name, -1) for name in names], dtype=np.int64)
+        known = slots >= 0
+        self.activity[slots[known]] += totals[known]
+        self._admit(names, slots, totals)
+
+        # Counters and histograms of monitored sellers
+        action_slots = slots[codes]
+        monitored = action_slots >= 0
+        if monitored.any():
+            self._count(action_slots[monitored], kinds[monitored], weights[monitored],
+                        amounts[monitored], timestamps[monitored])
+
+        if self._conn is not None and time.time() - self._saved_at >= self.save_interval:
+            self._save()
+
+    def _admit(self, names: List[str], slots: np.ndarray, totals: np.ndarray):
+        """Give newcomers slots (fills `slots` in place); lightest first so the heaviest stay."""
+        newcomers = np.flatnonzero(slots < 0)
+        if len(newcomers) > self.capacity:
+            # Lighter ones would only be replaced again within this batch
+            newcomers = newcomers[np.argpartition(-totals[newcomers], self.capacity - 1)[:self.capacity]]
+        newcomers = newcomers[np.argsort(totals[newcomers], kind='stable')]
+        for i in newcomers.tolist():
+            slot = int(np.argmin(self.activity))
+            evicted = self.names[slot]
+            if evicted is not None:
+                del self._slots[evicted]
+                slots[slots == slot] = -1  # a newcomer of this batch can be replaced again
+            self.names[slot] = names[i]
+            self._slots[names[i]] = slot
+            self.error[slot] = self.activity[slot]
+            self.activity[slot] += totals[i]
+            self.listings_decayed[slot] = 0
+            self.listings[slot] = self.undercuts[slot] = 0
+            self.undercut_total[slot] = 0
+            self.last_seen[slot] = 0
+            self.hours[slot] = 0
+            slots[i] = slot
+
+    def _count(self, slots: np.ndarray, kinds: np.ndarray, weights: np.ndarray,
+               amounts: np.ndarray, timestamps: np.ndarray):
+        listing = kinds == 'listing'
+        undercut = kinds == 'undercut'
+        np.add.at(self.listings_decayed, slots[listing], weights[listing])
+        self.listings += np.bincount(slots[listing], minlength=self.capacity)
+        self.undercuts += np.bincount(slots[undercut], minlength=self.capacity)
+        self.undercut_total += np.bincount(slots[undercut], weights=amounts[undercut], minlength=self.capacity)
+        np.maximum.at(self.last_seen, slots, timestamps)
+        np.add.at(self.hours, (slots, hour_of_week(timestamps)), weights)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def estimate(self, seller: str, now: Optional[float] = None) -> float:
+        """Decayed activity of any seller (upper bound; exact-ish for monitored ones)."""
+        with self._lock:
+            slot = self._slots.get(seller)
+            value = self.activity[slot] if slot is not None else self._sketch_estimate(self._sketch_columns([seller]))[0]
+            return float(self._decayed(np.array([value]), now)[0])
+
+    def top(self, limit: int = 5, now: Optional[float] = None) -> List[Dict]:
+        """
+        Most threatening sellers: threat = decayed listings / 100 (capped at
+        1), ties by decayed activity.
+        """
+        with self._lock:
+            return self._top(limit, now)
+
+    def _top(self, limit: int, now: Optional[float]) -> List[Dict]:
+        occupied = np.array(sorted(self._slots.values()), dtype=np.int64)
+        if not len(occupied):
+            return []
+        activity = self._decayed(self.activity[occupied], now)
+        error = self._decayed(self.error[occupied], now)
+        threat = np.minimum(self._decayed(self.listings_decayed[occupied], now) / 100, 1.0)
+        ranked = []
+        for k in np.lexsort((-activity, -threat))[:limit].tolist():
+            slot = occupied[k]
+            week = self.hours[slot]
+            peak_hour = int(np.argmax(week.reshape(7, 24).sum(axis=0)))
+            peak = int(np.argmax(week))
+            ranked.append({
+                "name": self.names[slot],
+                "listings": int(self.listings[slot]),
+                "avg_undercut": self.undercut_total[slot] / self.undercuts[slot] if self.undercuts[slot] else 0,
+                "threat_level": float(threat[k]),
+                "activity": round(float(activity[k]), 2),
+                "activity_error": round(float(error[k]), 2),
+                "active_hours": f"{peak_hour}:00-{peak_hour+2}:00" if week.any() else "Unknown",
+                "peak_time": f"{WEEKDAYS[peak // 24]} {peak % 24}:00" if week.any() else "Unknown",
+                "last_seen": float(self.last_seen[slot]),
+            })
+        return ranked
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self):
+        """Write the whole table and sketch (bounded by capacity) in one transaction."""
+        with self._lock:
+            if self._conn is not None:
+                self._save()
+
+    def _save(self):
+        rows = [(slot, self.names[slot], float(self.activity[slot]), float(self.error[slot]),
+                 float(self.listings_decayed[slot]), int(self.listings[slot]), int(self.undercuts[slot]),
+                 float(self.undercut_total[slot]), float(self.last_seen[slot]), self.hours[slot].tobytes())
+                for slot in self._slots.values()]
+        meta = [('landmark', self.landmark), ('half_life', self.half_life), ('sketch', self.sketch.tobytes()),
+                ('sketch_shape', f"{self.sketch.shape[0]}x{self.sketch.shape[1]}")]
+        with self._conn:
+            self._conn.execute("DELETE FROM competitor_slots")
+            self._conn.executemany("INSERT INTO competitor_slots VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.executemany("INSERT OR REPLACE INTO competitor_meta VALUES (?, ?)", meta)
+        self._saved_at = time.time()
+
+    def _load(self):
+        meta = dict(self._conn.execute("SELECT key, value FROM competitor_meta"))
+        if meta.get('landmark') is None:
+            return
+        if meta.get('sketch_shape') != f"{self.sketch.shape[0]}x{self.sketch.shape[1]}" or meta['half_life'] != self.half_life:
+            print(f"⚠️ {self.db_path}: competitor store saved with other settings; starting empty")
+            return
+        self.landmark = meta['landmark']
+        self.sketch = np.frombuffer(meta['sketch'], dtype=float).reshape(self.sketch.shape).copy()
+        rows = self._conn.execute("SELECT * FROM competitor_slots ORDER BY activity DESC").fetchall()
+        # A smaller capacity keeps the most active sellers
+        for slot, row in enumerate(rows[:self.capacity]):
+            _, name, activity, error, listings_decayed, listings, undercuts, undercut_total, last_seen, hours = row
+            self.names[slot] = name
+            self._slots[name] = slot
+            self.activity[slot] = activity
+            self.error[slot] = error
+            self.listings_decayed[slot] = listings_decayed
+            self.listings[slot] = listings
+            self.undercuts[slot] = undercuts
+            self.undercut_total[slot] = undercut_total
+            self.last_seen[slot] = last_seen
+            self.hours[slot] = np.frombuffer(hours, dtype=float)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._save()
+                self._conn.close()
+                self._conn = None
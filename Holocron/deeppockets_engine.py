@@ -2,20 +2,71 @@
 """
 DeepPockets Engine - Smart Inventory Management
 Aggregates inventory data from all characters and provides "Incinerator" logic.
+
+Stacks live in InventoryColumns (parallel arrays, see inventory_columns.py);
+inventory, character_inventory and item_locations are views over them.
 """
 
 import json
 import os
-from typing import Dict, List, Optional
-from collections import defaultdict
+import re
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from inventory_columns import InventoryColumns
+from item_name_index import ItemNameIndex
+
+# Item links look like |cffa335ee|Hitem:191380::...|h[Elemental Potion of Ultimate Power]|h|r
+ITEM_LINK_NAME_RE = re.compile(r"\|h\[(.+?)\]\|h")
+
+def _item_id(value) -> int:
+    """Item id from request data; anything that isn't a whole number is 0 (unpriced)"""
+    if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        return int(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return 0
 
 class DeepPocketsEngine:
-    def __init__(self):
-        self.inventory = defaultdict(int)  # item_id -> total_count
-        self.character_inventory = defaultdict(dict)  # char_guid -> {item_id: count}
-        self.item_locations = defaultdict(list) # item_id -> [{char, container, slot, count}]
+    def __init__(self, name_source: Optional[Callable[[], Dict[int, str]]] = None):
+        """
+        name_source() -> {item_id: name}, e.g. names from Goblin price data;
+        merged into the name index on every load.
+        """
+        self.columns = InventoryColumns()
         self.prices = {} # item_id -> gold_value (from Goblin)
-        
+        self.names = ItemNameIndex()
+        self.name_source = name_source
+
+    @property
+    def inventory(self) -> Dict[int, int]:
+        """item_id -> total_count"""
+        return dict(self.columns.totals())
+
+    @property
+    def character_inventory(self) -> Dict[str, Dict[int, int]]:
+        """char_guid -> {item_id: count}"""
+        return {char: self.columns.character_items(char) for char in self.columns.character_totals()}
+
+    @property
+    def item_locations(self) -> Dict[int, List[Dict]]:
+        """item_id -> [{character, container, slot, count}]"""
+        return {item_id: self.columns.locations(item_id) for item_id in self.columns.totals()}
+
+    @item_locations.setter
+    def item_locations(self, locations: Dict[int, List[Dict]]):
+        self.columns.load_locations(locations)
+
+    @property
+    def prices(self) -> Dict[int, float]:
+        return self._prices
+
+    @prices.setter
+    def prices(self, price_map: Dict[int, float]):
+        self._prices = price_map
+        self.columns.set_prices(price_map)
+
     def load_real_data(self):
         """Load DataStore_Containers.json"""
         json_path = "DataStore_Containers.json"
@@ -28,7 +79,9 @@ class DeepPocketsEngine:
             with open(json_path, "r") as f:
                 data = json.load(f)
             self._process_containers(data)
-            print(f"✓ DeepPockets loaded inventory for {len(self.character_inventory)} characters")
+            self._load_names()
+            print(f"✓ DeepPockets loaded inventory for {len(self.get_character_totals())} characters, "
+                  f"{len(self.names)} item names")
         except Exception as e:
             print(f"Error loading containers: {e}")
             self.load_mock_data()
@@ -43,11 +96,14 @@ class DeepPocketsEngine:
             
             for char_key, char_data in characters.items():
                 containers = char_data.get("Containers", {})
+                # A re-sync replaces this character's stacks
+                stacks = []
                 
                 for bag_name, bag_data in containers.items():
                     # bag_name might be "Bag0", "Bag1", "Bank0", etc.
                     ids = bag_data.get("ids", [])
                     counts = bag_data.get("counts", [])
+                    links = bag_data.get("links", [])
                     
                     # Ensure lists are same length (DataStore uses sparse arrays sometimes?)
                     # Usually they match index for index
@@ -58,41 +114,50 @@ class DeepPocketsEngine:
                         count = 1
                         if i < len(counts) and counts[i]:
                             count = counts[i]
-                            
-                        # Update aggregates
-                        self.inventory[item_id] += count
-                        
-                        if item_id not in self.character_inventory[char_key]:
-                            self.character_inventory[char_key][item_id] = 0
-                        self.character_inventory[char_key][item_id] += count
-                        
-                        self.item_locations[item_id].append({
-                            "character": char_key,
-                            "container": bag_name,
-                            "slot": i + 1,
-                            "count": count
-                        })
-                        
+                        stacks.append((item_id, bag_name, i + 1, count))
+
+                        if item_id not in self.names and i < len(links) and links[i]:
+                            match = ITEM_LINK_NAME_RE.search(links[i])
+                            if match:
+                                self.names.add(item_id, match.group(1))
+
+                self.columns.set_character(char_key, stacks)
+
+            # Characters missing from the upload were deleted or left the account
+            if characters:
+                for character in set(self.columns.held_characters()) - set(characters):
+                    self.columns.drop_character(character)
+
         except Exception as e:
             print(f"Error processing container data: {e}")
 
+    def sync_containers(self, data):
+        """Apply a fresh DataStore_Containers upload in place (characters it lacks are dropped)"""
+        self._process_containers(data)
+
     def load_mock_data(self):
         """Load mock inventory data"""
-        # Mock: 2000 Potions on Alt B
+        # Mock: 2000 Potions on Alt B, plus trash items
         potion_id = 191380 # Elemental Potion of Ultimate Power
-        self.inventory[potion_id] = 2000
-        self.character_inventory["Alt-B"][potion_id] = 2000
-        self.item_locations[potion_id].append({
-            "character": "Alt-B",
-            "container": "Bank",
-            "slot": 1,
-            "count": 2000
-        })
-        
-        # Mock: Trash items
         grey_rock = 12345
-        self.inventory[grey_rock] = 5
-        self.prices[grey_rock] = 0.0005 # 5 copper
+        self.columns.set_character("Alt-B", [(potion_id, "Bank", 1, 2000), (grey_rock, "Bag0", 1, 5)])
+        self.prices = {grey_rock: 0.0005} # 5 copper
+
+        self.names.update({potion_id: "Elemental Potion of Ultimate Power", grey_rock: "Grey Rock"})
+        self._load_names()
+
+    def _load_names(self):
+        """Merge names from name_source (Goblin/TSM price data)"""
+        if not self.name_source:
+            return
+        try:
+            self.names.update(self.name_source())
+        except Exception as e:
+            print(f"DeepPockets: could not load item names: {e}")
+
+    def set_item_names(self, names: Dict[int, str]):
+        """Add or rename items in the name index (incremental)"""
+        self.names.update(names)
         
     def set_prices(self, price_map: Dict[int, float]):
         """Update price data from Goblin Engine"""
@@ -100,53 +165,36 @@ class DeepPocketsEngine:
 
     def get_total_count(self, item_id: int) -> int:
         """Get account-wide count of an item"""
-        return self.inventory.get(item_id, 0)
+        return self.columns.total(item_id)
 
     def find_item(self, item_id: int) -> List[Dict]:
         """Find where an item is located"""
-        return self.item_locations.get(item_id, [])
+        return self.columns.locations(item_id)
 
-    def search_inventory(self, query: str) -> List[Dict]:
+    def get_character_totals(self, item_id: Optional[int] = None) -> Dict[str, Dict]:
+        """Per-character {count, stacks, items}, for everything or one item"""
+        return self.columns.character_totals(item_id)
+
+    def search_inventory(self, query: str, limit: int = 20) -> List[Dict]:
         """
         Search for items by name or ID.
-        Returns list of item locations.
+        Returns list of item locations; for name searches the best `limit`
+        items (ranked by match, then count held), each location tagged with
+        item_id, name and match score.
         """
-        results = []
-        query = query.lower()
+        query = query.strip()
         
         # Search by ID if query is numeric
         if query.isdigit():
-            item_id = int(query)
-            if item_id in self.item_locations:
-                return self.item_locations[item_id]
-        
-        # Search by Name (requires iterating all items since we don't have a name index yet)
-        # In a real app, we'd have a name->id map.
-        # For now, we'll search the item_locations keys and try to look up names if available
-        # Or rely on the fact that we might have names in self.prices or elsewhere.
-        
-        # Actually, let's just iterate item_locations and return matches if we can find a name
-        # Since we don't have a reliable name DB in this engine yet, we might need to rely on 
-        # what we have.
-        
-        # Optimization: If we have Goblin prices, we have names there.
-        for item_id, locations in self.item_locations.items():
-            item_name = "Unknown Item"
-            # Try to find name in prices
-            if item_id in self.prices:
-                # prices is {id: price} or {id: ItemPrice} depending on how it's set
-                # set_prices takes a Dict[int, float], so we lose names there.
-                # We might need to update set_prices or how we store data.
-                pass
-            
-            # If we can't find the name, we can't search by string effectively without an external DB.
-            # But let's assume the query might match the ID for now, or we skip string search 
-            # if we can't resolve names.
-            
-            # However, the prompt implies we should implement it.
-            # Let's return the locations if the ID matches.
-            pass
+            return self.columns.locations(int(query))
 
+        held = self.columns.totals()
+        ranked = self.names.search(query, limit=limit, within=held.keys(), tiebreak=held.get)
+        results = []
+        for item_id, score in ranked:
+            name = self.names.name(item_id)
+            for location in self.columns.locations(item_id):
+                results.append({**location, "item_id": item_id, "name": name, "match_score": round(score, 1)})
         return results
 
     def get_remote_stash(self, main_char: str) -> List[Dict]:
@@ -154,28 +202,7 @@ class DeepPocketsEngine:
         Get items located on alts but NOT on the main character.
         Returns list of {item_id, count, character, container}
         """
-        remote_items = []
-        
-        for item_id, locations in self.item_locations.items():
-            on_main = any(loc['character'] == main_char for loc in locations)
-            
-            if not on_main:
-                # Item is not on main at all.
-                # Sum up total on alts
-                total_on_alts = sum(loc['count'] for loc in locations if loc['character'] != main_char)
-                
-                if total_on_alts > 0:
-                    # Pick the first location for display purposes
-                    first_loc = next(loc for loc in locations if loc['character'] != main_char)
-                    
-                    remote_items.append({
-                        "item_id": item_id,
-                        "count": total_on_alts,
-                        "character": first_loc['character'],
-                        "container": first_loc['container']
-                    })
-                    
-        return remote_items
+        return self.columns.remote_stash(main_char)
 
     def calculate_value_density(self, bag_items: List[Dict]) -> List[Dict]:
         """
@@ -183,27 +210,17 @@ class DeepPocketsEngine:
         bag_items: [{item_id, count, slot}]
         Returns: List sorted by density (lowest first) - candidates for deletion
         """
-        scored_items = []
-        for item in bag_items:
-            item_id = item.get("item_id")
-            count = item.get("count", 1)
-            
-            # Get unit price (default to 0)
-            # self.prices is expected to be {item_id: price_float}
-            unit_price = self.prices.get(item_id, 0.0)
-            
-            # Total slot value
-            slot_value = unit_price * count
-            
-            scored_items.append({
-                **item,
-                "slot_value": slot_value,
-                "unit_price": unit_price
-            })
-            
-        # Sort ascending (Lowest value first)
-        scored_items.sort(key=lambda x: x["slot_value"])
-        return scored_items
+        item_ids = np.array([_item_id(item.get("item_id")) for item in bag_items], dtype=np.int64)
+        counts = np.array([item.get("count", 1) for item in bag_items], dtype=float)
+        # Unit prices come from the price vector (0 for unpriced items)
+        unit = self.columns.unit_prices(item_ids)
+        order, slot_value = self.columns.value_density(unit, counts)
+        return [{**bag_items[i], "slot_value": float(slot_value[i]), "unit_price": float(unit[i])}
+                for i in order]
+
+    def get_incinerator_candidates(self, character: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Held stacks (one character or the whole account) lowest slot value first"""
+        return self.columns.stacks_by_value(character, limit)
 
 if __name__ == "__main__":
     engine = DeepPocketsEngine()
@@ -0,0 +1,256 @@
+"""
+delta_upload.py - Content-addressed SavedVariables upload protocol
+
+The bridge used to POST every SavedVariables file in full on every change,
+even though WoW rewrites most of a multi-MB DataStore file unchanged. This
+module splits a file into content-defined blocks and uploads it in (at most)
+two round trips to /upload_data/delta:
+
+    1. Client sends the manifest: source name, file digest and block hashes.
+    2. Server answers with the hashes it does not already have.
+    3. Client resends the manifest together with just those blocks.
+
+Block boundaries are chosen from line content (not offsets), so an insert
+near the top of a file only changes the blocks around it. Request bodies are
+compressed with zstd when `zstandard` is installed, otherwise gzip.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Block sizing (in characters). A boundary is placed after a line whose CRC
+# matches BOUNDARY_MASK once a block is at least BLOCK_MIN long; BLOCK_MAX
+# caps runs of lines that never match.
+BLOCK_MIN = 4 * 1024
+BLOCK_MAX = 64 * 1024
+BOUNDARY_MASK = 0xFF
+
+PROTOCOL_VERSION = 1
+
+_HASH_RE = re.compile(r'^[0-9a-f]{32}$')
+_SOURCE_RE = re.compile(r'^[A-Za-z0-9_\-]+$')
+
+
+def split_blocks(content: str) -> List[str]:
+    """Split text into line-aligned, content-defined blocks."""
+    blocks = []
+    current = []
+    size = 0
+    for line in content.splitlines(keepends=True):
+        current.append(line)
+        size += len(line)
+        if size >= BLOCK_MAX or (size >= BLOCK_MIN and zlib.crc32(line.encode('utf-8')) & BOUNDARY_MASK == 0):
+            blocks.append(''.join(current))
+            current = []
+            size = 0
+    if current:
+        blocks.append(''.join(current))
+    return blocks
+
+
+def block_hash(block: str) -> str:
+    return hashlib.blake2b(block.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def content_digest(content: str) -> str:
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=32).hexdigest()
+
+
+def build_manifest(source: str, content: str) -> Tuple[Dict, Dict[str, str]]:
+    """
+    Returns (manifest, blocks_by_hash) for a file.
+    The manifest is what gets sent first; blocks are sent only on request.
+    """
+    blocks = split_blocks(content)
+    hashes = [block_hash(b) for b in blocks]
+    manifest = {
+        "version": PROTOCOL_VERSION,
+        "source": source,
+        "digest": content_digest(content),
+        "size": len(content),
+        "blocks": hashes,
+    }
+    return manifest, dict(zip(hashes, blocks))
+
+
+def encode_body(payload: Dict) -> Tuple[bytes, str]:
+    """Serialize and compress a request body. Returns (body, content_encoding)."""
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    if ZSTD_AVAILABLE:
+        return zstandard.ZstdCompressor(level=3).compress(raw), "zstd"
+    return gzip.compress(raw, compresslevel=6), "gzip"
+
+
+def decode_body(body: bytes, content_encoding: Optional[str]) -> Dict:
+    """Inverse of encode_body; raises ValueError for unsupported encodings."""
+    encoding = (content_encoding or "identity").lower()
+    if encoding == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise ValueError("zstd request body received but zstandard is not installed")
+        body = zstandard.ZstdDecompressor().decompress(body)
+    elif encoding == "gzip":
+        body = gzip.decompress(body)
+    elif encoding != "identity":
+        raise ValueError(f"Unsupported Content-Encoding: {content_encoding}")
+    return json.loads(body.decode('utf-8'))
+
+
+class BlockStore:
+    """
+    Server-side content-addressed block store.
+
+    Blocks live as files named by hash under `root`; the last committed
+    manifest per source is kept alongside so blocks no manifest references
+    any more can be pruned.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.manifest_dir = os.path.join(root, "manifests")
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _block_path(self, h: str) -> str:
+        if not _HASH_RE.match(h):
+            raise ValueError(f"Invalid block hash: {h!r}")
+        return os.path.join(self.root, h)
+
+    def _manifest_path(self, source: str) -> str:
+        if not _SOURCE_RE.match(source):
+            raise ValueError(f"Invalid source name: {source!r}")
+        return os.path.join(self.manifest_dir, f"{source}.json")
+
+    def last_manifest(self, source: str) -> Optional[Dict]:
+        try:
+            with open(self._manifest_path(source), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def missing(self, hashes: List[str]) -> List[str]:
+        seen = set()
+        result = []
+        for h in hashes:
+            if h not in seen and not os.path.exists(self._block_path(h)):
+                result.append(h)
+            seen.add(h)
+        return result
+
+    def put(self, h: str, block: str):
+        if block_hash(block) != h:
+            raise ValueError(f"Block content does not match hash {h}")
+        path = self._block_path(h)
+        if os.path.exists(path):
+            return
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8', newline='') as f:
+            f.write(block)
+        os.replace(tmp, path)
+
+    def assemble(self, manifest: Dict) -> str:
+        parts = []
+        for h in manifest["blocks"]:
+            with open(self._block_path(h), 'r', encoding='utf-8', newline='') as f:
+                parts.append(f.read())
+        content = ''.join(parts)
+        if content_digest(content) != manifest["digest"]:
+            raise ValueError(f"Assembled {manifest['source']} does not match manifest digest")
+        return content
+
+    def receive(self, manifest: Dict, blocks: Optional[Dict[str, str]] = None) -> Tuple[str, object]:
+        """
+        Apply one upload request.
+
+        Returns one of:
+            ("unchanged", None)     - digest matches the last committed upload
+            ("missing", [hashes])   - client must send these blocks
+            ("complete", content)   - file assembled and committed
+        """
+        source = manifest["source"]
+        with self._lock:
+            last = self.last_manifest(source)
+            if last and last.get("digest") == manifest["digest"]:
+                return "unchanged", None
+
+            for h, block in (blocks or {}).items():
+                self.put(h, block)
+
+            missing = self.missing(manifest["blocks"])
+            if missing:
+                return "missing", missing
+
+            content = self.assemble(manifest)
+            committed = {k: manifest[k] for k in ("version", "source", "digest", "size", "blocks") if k in manifest}
+            with open(self._manifest_path(source), 'w') as f:
+                json.dump(committed, f, separators=(',', ':'))
+            self._prune()
+            return "complete", content
+
+    def _prune(self):
+        referenced = set()
+        for name in os.listdir(self.manifest_dir):
+            try:
+                with open(os.path.join(self.manifest_dir, name), 'r') as f:
+                    referenced.update(json.load(f).get("blocks", []))
+            except (OSError, ValueError):
+                continue
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if os.path.isfile(path) and name not in referenced:
+                os.remove(path)
+
+
+class DeltaUploadClient:
+    """Client half of the protocol, used by bridge.py."""
+
+    def __init__(self, upload_url: str, timeout: float = 30):
+        self.upload_url = upload_url
+        self.timeout = timeout
+        self.stats = {"uploads": 0, "bytes_sent": 0, "bytes_raw": 0, "blocks_sent": 0}
+
+    def _post(self, payload: Dict):
+        body, encoding = encode_body(payload)
+        self.stats["bytes_sent"] += len(body)
+        return requests.post(
+            self.upload_url,
+            data=body,
+            headers={"Content-Type": "application/json", "Content-Encoding": encoding},
+            timeout=self.timeout,
+        )
+
+    def upload(self, source: str, content: str):
+        """
+        Upload `content` for `source`. Returns the final server response
+        (status "unchanged" or "accepted" with a job_id on success).
+        """
+        manifest, blocks = build_manifest(source, content)
+        self.stats["uploads"] += 1
+        self.stats["bytes_raw"] += len(content)
+
+        response = self._post(manifest)
+        if response.status_code != 200:
+            return response
+
+        result = response.json()
+        if result.get("status") != "missing":
+            return response
+
+        wanted = result.get("missing", [])
+        self.stats["blocks_sent"] += len(wanted)
+        payload = dict(manifest)
+        payload["data"] = {h: blocks[h] for h in wanted if h in blocks}
+        return self._post(payload)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Domination Analytics - array scoring for reset sniping and monopolies
+
+A scan is read into columns once; reset and monopoly scores for every
+item are a few vectorized expressions over them, with the eligibility
+rules as boolean masks. Which resets to actually fund is a 0/1 knapsack
+over the investment budget (greedy prefix plus an exact DP over the items
+around the break point, costs rounded up so the set always fits), instead
+of taking the best ROIs until the money runs out.
+"""
+
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+# Scan columns: name -> (dtype, default)
+SCAN_COLUMNS = {
+    'item_id': (np.int64, 0),
+    'num_auctions': (np.int64, 0),
+    'avg_buyout': (float, 0),  # Prices may be fractional copper
+    'market_value': (float, 0),
+    'sale_rate': (float, 0),
+    'num_sellers': (np.int64, 0),
+    'profit_margin': (float, 0),
+    'is_craftable': (bool, False),
+}
+
+ScanData = Union[List[Dict], Dict[str, Sequence]]
+
+
+class ScanColumns(dict):
+    """Scan columns, each read from the item dicts on first use."""
+
+    def __init__(self, columns=(), records: Optional[List[Dict]] = None):
+        super().__init__(columns)
+        self.records = records
+
+    def __missing__(self, key):
+        if self.records is None or key not in SCAN_COLUMNS:
+            raise KeyError(key)
+        dtype, default = SCAN_COLUMNS[key]
+        self[key] = np.array([item.get(key) or default for item in self.records], dtype=dtype)
+        return self[key]
+
+
+def scan_columns(scan_data: ScanData) -> Dict[str, np.ndarray]:
+    """Scan as arrays, from a list of item dicts or columnar data (missing columns get defaults)."""
+    if isinstance(scan_data, ScanColumns):
+        return scan_data
+    if isinstance(scan_data, list):
+        return ScanColumns(records=scan_data)
+    n = len(scan_data['item_id'])
+    return ScanColumns((key, np.asarray(scan_data[key], dtype=dtype) if key in scan_data else np.full(n, default, dtype=dtype))
+                       for key, (dtype, default) in SCAN_COLUMNS.items())
+
+
+def reset_scores(columns: Dict[str, np.ndarray], max_investment: float,
+                 min_supply: int = 2, max_supply: int = 15, price_multiplier: int = 3,
+                 sell_fraction: float = 0.5, min_profit: int = 50000) -> Dict[str, np.ndarray]:
+    """
+    Buy-out-and-relist economics for every item: cost of all listings,
+    relist price (price_multiplier x market value), profit when
+    sell_fraction of the stock sells, ROI %, and whether the item
+    qualifies (supply in range, affordable, profit >= min_profit).
+    """
+    supply = columns['num_auctions']
+    cost = columns['avg_buyout'] * supply
+    reset_price = columns['market_value'] * price_multiplier
+    profit = reset_price * (supply * sell_fraction) - cost
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi = np.where(cost > 0, profit / cost * 100, 0.0)
+    eligible = ((supply >= min_supply) & (supply <= max_supply) &
+                (cost <= max_investment) & (profit >= min_profit))
+    return {'eligible': eligible, 'cost': cost, 'reset_price': reset_price, 'profit': profit, 'roi': roi}
+
+
+def monopoly_scores(columns: Dict[str, np.ndarray], min_demand: float = 10,
+                    max_sellers: int = 8, min_margin: float = 0.5,
+                    craft_bonus: float = 20) -> Dict[str, np.ndarray]:
+    """Monopoly score (demand, margin, few sellers, crafted bonus) and eligibility for every item."""
+    demand = columns['sale_rate'] * 100  # Sales per day
+    sellers = columns['num_sellers']
+    margin = columns['profit_margin']
+    score = demand * 2 + margin * 100 - sellers * 10 + np.where(columns['is_craftable'], craft_bonus, 0)
+    eligible = (demand >= min_demand) & (sellers <= max_sellers) & (margin >= min_margin)
+    return {'eligible': eligible, 'demand': demand, 'score': score}
+
+
+def knapsack(costs: Sequence[float], values: Sequence[float], budget: float,
+             resolution: int = 2000, core: int = 200) -> np.ndarray:
+    """
+    Indices of the items maximising total value with total cost <= budget
+    (0/1 knapsack); items worth <= 0 are never taken.
+
+    Core method: items sorted by value per cost, the greedy prefix well
+    before the first item that no longer fits is fixed, and the `core`
+    items on either side of it are solved exactly by a DP over the
+    remaining budget with costs rounded up to a grid of remaining /
+    resolution (so the answer always fits). The result is never worse
+    than filling the budget in value-per-cost order.
+    """
+    costs = np.maximum(np.asarray(costs, dtype=float), 0)
+    values = np.asarray(values, dtype=float)
+    items = np.flatnonzero((values > 0) & (costs <= budget))
+    with np.errstate(divide='ignore'):
+        efficiency = values[items] / costs[items]  # inf for free items
+    order = items[np.argsort(-efficiency, kind='stable')]
+    breaking = int(np.searchsorted(np.cumsum(costs[order]), budget, side='right'))
+    lo, hi = max(breaking - core, 0), min(breaking + core, len(order))
+    fixed, window = order[:lo], order[lo:hi]
+    remaining = budget - costs[fixed].sum()
+
+    solved = np.concatenate([fixed, window[_knapsack_dp(costs[window], values[window], remaining, resolution)]])
+    # Filling in value-per-cost order, skipping what no longer fits
+    filled = list(fixed)
+    for i in order[lo:].tolist():
+        if costs[i] <= remaining:
+            filled.append(i)
+            remaining -= costs[i]
+    filled = np.array(filled, dtype=np.int64)
+    best = solved if values[solved].sum() >= values[filled].sum() else filled
+    return np.sort(best).astype(np.int64)
+
+
+def _knapsack_dp(costs: np.ndarray, values: np.ndarray, budget: float, resolution: int) -> np.ndarray:
+    """Exact 0/1 knapsack on costs rounded up to budget / resolution steps; one vectorized row update per item."""
+    if budget < 0 or not len(costs):
+        return np.zeros(0, dtype=np.int64)
+    step = max(budget / resolution, 1.0)
+    capacity = int(budget // step)
+    weights = np.ceil(costs / step).astype(np.int64)
+    items = np.flatnonzero(weights <= capacity)
+
+    best = np.zeros(capacity + 1)  # best[c]: best value within c grid steps
+    taken = np.zeros((len(items), capacity + 1), dtype=bool)
+    for k, i in enumerate(items):
+        w, v = weights[i], values[i]
+        with_item = best[:capacity + 1 - w] + v
+        better = with_item > best[w:]
+        taken[k, w:] = better
+        best[w:] = np.where(better, with_item, best[w:])
+
+    chosen = []
+    c = int(np.argmax(best))
+    for k in range(len(items) - 1, -1, -1):
+        if taken[k, c]:
+            chosen.append(items[k])
+            c -= weights[items[k]]
+    return np.array(chosen, dtype=np.int64)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Engine Registry - lazy, shared engine instances for the Holocron server
+
+server.py used to construct and load every engine at import time (and
+DashboardEngine built a second copy of half of them). Engines are now
+registered as factories: each one is built on first use, or ahead of time
+by warm_up() in a thread pool, exactly once, and shared by every route and
+by DashboardEngine. Load timings are kept per engine for /api/engines.
+
+changed(name) is the data-change event: subscribers (the dashboard and
+briefing summaries) hear about the engine and everything registered as
+depending on it.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional
+
+
+class EngineProxy:
+    """
+    Stand-in returned by EngineRegistry.register. Attribute access builds
+    the engine on first use and then forwards to it, so module globals and
+    constructor arguments can refer to engines before they exist.
+    """
+
+    __slots__ = ('_registry', '_name')
+
+    def __init__(self, registry, name):
+        object.__setattr__(self, '_registry', registry)
+        object.__setattr__(self, '_name', name)
+
+    def __getattr__(self, attr):
+        return getattr(self._registry.get(self._name), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._registry.get(self._name), attr, value)
+
+    def __repr__(self):
+        return f"<EngineProxy {self._name} ({self._registry.status(self._name)})>"
+
+
+class _Entry:
+    def __init__(self, name, factory, load, depends_on):
+        self.name = name
+        self.factory = factory
+        self.load = load
+        self.depends_on = tuple(depends_on)
+        self.instance = None
+        self.lock = threading.Lock()
+        self.status = "pending"
+        self.seconds = None
+        self.loaded_at = None
+        self.error = None
+
+
+class EngineRegistry:
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._entries: Dict[str, _Entry] = {}
+        self._building = threading.local()
+        self._warmup = None
+        self._subscribers = []
+
+    def register(self, name: str, factory: Callable, load: Optional[str] = None,
+                 depends_on: Iterable[str] = ()) -> EngineProxy:
+        """
+        Register an engine. factory() builds the instance; if `load` is given
+        that method is called on it afterwards (e.g. "load_mock_data").
+        depends_on names engines whose data changes also change this one's.
+        Returns a proxy for the engine.
+        """
+        if name in self._entries:
+            raise ValueError(f"Engine {name!r} is already registered")
+        self._entries[name] = _Entry(name, factory, load, depends_on)
+        return EngineProxy(self, name)
+
+    def proxy(self, name: str) -> EngineProxy:
+        if name not in self._entries:
+            raise KeyError(f"Unknown engine {name!r}")
+        return EngineProxy(self, name)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def get(self, name: str):
+        """The engine instance, building it (and anything it needs) on first use."""
+        entry = self._entries[name]
+        if entry.instance is not None:
+            return entry.instance
+
+        building = getattr(self._building, 'stack', None)
+        if building is None:
+            building = self._building.stack = []
+        if name in building:
+            raise RuntimeError(f"Engine dependency cycle: {' -> '.join(building + [name])}")
+
+        with entry.lock:
+            if entry.instance is not None:
+                return entry.instance
+            building.append(name)
+            try:
+                instance = self._build(entry)
+            finally:
+                building.pop()
+        self.changed(name)
+        return instance
+
+    def _build(self, entry: _Entry):
+        """Run factory + load with entry.lock held; records status and timing."""
+        entry.status = "loading"
+        start = time.perf_counter()
+        try:
+            instance = entry.factory()
+            if entry.load:
+                getattr(instance, entry.load)()
+        except Exception as e:
+            entry.status = "failed"
+            entry.error = str(e)
+            print(f"EngineRegistry: {entry.name} failed to load: {e}")
+            raise
+        finally:
+            entry.seconds = time.perf_counter() - start
+        entry.instance = instance
+        entry.status = "ready"
+        entry.loaded_at = time.time()
+        entry.error = None
+        print(f"✓ Engine {entry.name} ready in {entry.seconds * 1000:.1f}ms")
+        return instance
+
+    def reload(self, name: str, build_if_pending: bool = False):
+        """
+        Replace an engine with a freshly built one (e.g. after new
+        SavedVariables were uploaded) and announce the change. Proxies pick
+        up the new instance. An engine nobody has used yet is left for its
+        first use unless build_if_pending.
+        """
+        entry = self._entries[name]
+        if entry.instance is None and not build_if_pending:
+            return None
+        with entry.lock:
+            instance = self._build(entry)
+        self.changed(name)
+        return instance
+
+    def subscribe(self, callback: Callable[[str], None]):
+        """callback(engine_name) on every data change"""
+        self._subscribers.append(callback)
+
+    def changed(self, name: str):
+        """
+        Announce that an engine's data changed. Engines registered with
+        depends_on it (transitively) are announced too.
+        """
+        affected, queue = [], [name]
+        while queue:
+            current = queue.pop()
+            if current in affected:
+                continue
+            affected.append(current)
+            queue.extend(n for n, e in self._entries.items() if current in e.depends_on)
+        for engine_name in affected:
+            for callback in list(self._subscribers):
+                try:
+                    callback(engine_name)
+                except Exception as e:
+                    print(f"EngineRegistry: change subscriber failed for {engine_name}: {e}")
+
+    def status(self, name: str) -> str:
+        return self._entries[name].status
+
+    def warm_up(self, names: Optional[Iterable[str]] = None, wait: bool = False):
+        """
+        Build engines in a background thread pool. Failures are recorded in
+        timings() rather than raised; the engine is retried on next use.
+        """
+        names = list(names) if names is not None else list(self._entries)
+
+        def build(name):
+            try:
+                self.get(name)
+            except Exception:
+                pass
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="engine-warmup")
+        futures = [pool.submit(build, name) for name in names]
+        pool.shutdown(wait=wait)
+        self._warmup = futures
+        return futures
+
+    def timings(self) -> Dict[str, Dict]:
+        """Per-engine status and build time (including engines it pulled in)."""
+        return {
+            name: {
+                "status": entry.status,
+                "load_ms": round(entry.seconds * 1000, 1) if entry.seconds is not None else None,
+                "loaded_at": entry.loaded_at,
+                "error": entry.error,
+            }
+            for name, entry in self._entries.items()
+        }
@@ -89,7 +89,11 @@ def extend_recipe_table():
             ADD COLUMN IF NOT EXISTS crafted_item_id INT,
             ADD COLUMN IF NOT EXISTS crafted_quantity INT DEFAULT 1,
             ADD COLUMN IF NOT EXISTS min_crafts INT,
-            ADD COLUMN IF NOT EXISTS max_crafts INT
+            ADD COLUMN IF NOT EXISTS max_crafts INT,
+            ADD COLUMN IF NOT EXISTS skill_required INT,
+            ADD COLUMN IF NOT EXISTS skill_yellow INT,
+            ADD COLUMN IF NOT EXISTS skill_green INT,
+            ADD COLUMN IF NOT EXISTS skill_gray INT
         """)
         conn.commit()
         print("✅ Table extended successfully")
@@ -205,7 +209,8 @@ def verify_materials():
         SELECT 
             profession_name,
             COUNT(*) as total,
-            COUNT(materials) as with_materials
+            COUNT(materials) as with_materials,
+            COUNT(skill_required) as with_skill
         FROM goblin.recipe_reference
         GROUP BY profession_name
         ORDER BY total DESC
@@ -214,10 +219,12 @@ def verify_materials():
     print("\n📊 Recipe Materials Status:")
     print("-" * 60)
     for row in cur.fetchall():
-        prof, total, with_mats = row
+        prof, total, with_mats, with_skill = row
         pct = (with_mats / total * 100) if total > 0 else 0
-        print(f"  {prof:20} - {with_mats:4}/{total:4} ({pct:5.1f}%)")
+        print(f"  {prof:20} - {with_mats:4}/{total:4} ({pct:5.1f}%)  skill data: {with_skill:4}")
     print("-" * 60)
+    # The recipe API has no skill thresholds; fill skill_required/yellow/green/gray
+    # from another source. Until then leveling guides use fixed brackets.
     
     cur.close()
     conn.close()
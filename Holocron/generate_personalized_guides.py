@@ -7,8 +7,11 @@ Shows exactly what to craft next from their current level to max.
 import os
 import psycopg2
 import json
+import numpy as np
 from collections import defaultdict
 
+from intelligent_profession_engine import IntelligentProfessionEngine
+
 DATABASE_URL = os.getenv('DATABASE_URL', 'postgresql://jgrayson@localhost/holocron')
 
 def get_db_connection():
@@ -48,24 +51,26 @@ def get_character_professions(character_name):
     conn.close()
     return professions
 
-def estimate_skill_gain(recipe_difficulty, current_skill):
-    """Estimate how many skill points a recipe will give"""
-    # Simplified skill gain model
-    diff = recipe_difficulty - current_skill
-    
-    if diff >= 20:  # Orange
-        return 1
-    elif diff >= 10:  # Yellow
-        return 0.5
-    elif diff >= 0:  # Green
-        return 0.25
-    else:  # Gray
-        return 0
-    
-    return 1  # Default
+_profession_engine = None
+
+def get_profession_engine():
+    """Shared engine so recipe matrices and prices are loaded once per run"""
+    global _profession_engine
+    if _profession_engine is None:
+        _profession_engine = IntelligentProfessionEngine()
+    return _profession_engine
+
+def get_leveling_steps(profession_name, current_skill, target_skill):
+    """Cheapest expected leveling plan for a skill range (empty without recipe skill data)"""
+    engine = get_profession_engine()
+    if not engine.conn:
+        return []
+    
+    plan = engine.plan_leveling(profession_name, current_skill, target_skill)
+    return plan['steps']
 
 def get_recipes_for_skill_range(profession_name, current_skill, target_skill):
-    """Get optimal recipes for a skill range"""
+    """Get recipes for a skill range (fallback when recipes have no skill data)"""
     conn = get_db_connection()
     if not conn:
         return []
@@ -103,6 +108,57 @@ def get_recipes_for_skill_range(profession_name, current_skill, target_skill):
     # This is simplified - would need actual skill requirements from recipe data
     return all_recipes[:20]  # Return subset for now
 
+def planned_path(steps):
+    """One bracket per run of levels that share the optimal recipe"""
+    path = []
+    for step in steps:
+        path.append({
+            'skill_range': f"{step['from_skill']}-{step['to_skill']}",
+            'recipes': [{
+                'name': step['recipe'],
+                'materials': step['materials'],
+                'estimated_cost': round(step['expected_cost']),
+                'crafts_needed': int(np.ceil(step['expected_crafts'])),
+                'skill_points': step['to_skill'] - step['from_skill']
+            }]
+        })
+    return path
+
+def bracket_path(recipes, current, max_skill):
+    """Fixed 10-point brackets over the recipe list, with rough estimates"""
+    path = []
+    brackets = [
+        {'range': f'{current}-{min(current+10, max_skill)}', 'recipes': recipes[:3]},
+        {'range': f'{min(current+10, max_skill)}-{min(current+20, max_skill)}', 'recipes': recipes[3:6]},
+        {'range': f'{min(current+20, max_skill)}-{max_skill}', 'recipes': recipes[6:10]}
+    ]
+    
+    for bracket in brackets:
+        if int(bracket['range'].split('-')[0]) >= max_skill:
+            continue
+            
+        bracket_guide = {
+            'skill_range': bracket['range'],
+            'recipes': []
+        }
+        
+        for recipe in bracket['recipes']:
+            # Estimate cost
+            mat_count = len(recipe['materials'])
+            est_cost = mat_count * 50  # Simplified
+            
+            bracket_guide['recipes'].append({
+                'name': recipe['name'],
+                'materials': recipe['materials'],
+                'estimated_cost': est_cost,
+                'crafts_needed': '5-10',
+                'skill_points': '5-10'
+            })
+        
+        if bracket_guide['recipes']:
+            path.append(bracket_guide)
+    return path
+
 def generate_personalized_guide(character_name):
     """Generate personalized leveling guide for a character"""
     professions = get_character_professions(character_name)
@@ -129,8 +185,9 @@ def generate_personalized_guide(character_name):
         # Calculate skill points needed
         points_needed = max_skill - current
         
-        # Get appropriate recipes
-        recipes = get_recipes_for_skill_range(prof_name, current, max_skill)
+        # Planned path at current prices; plain recipe list if no skill data yet
+        steps = get_leveling_steps(prof_name, current, max_skill)
+        recipes = [] if steps else get_recipes_for_skill_range(prof_name, current, max_skill)
         
         prof_guide = {
             'profession': prof_name,
@@ -140,40 +197,12 @@ def generate_personalized_guide(character_name):
             'recommended_path': []
         }
         
-        if not recipes:
-            prof_guide['status'] = 'No recipe data available yet'
+        if steps:
+            prof_guide['recommended_path'] = planned_path(steps)
+        elif recipes:
+            prof_guide['recommended_path'] = bracket_path(recipes, current, max_skill)
         else:
-            # Group into skill brackets
-            brackets = [
-                {'range': f'{current}-{min(current+10, max_skill)}', 'recipes': recipes[:3]},
-                {'range': f'{min(current+10, max_skill)}-{min(current+20, max_skill)}', 'recipes': recipes[3:6]},
-                {'range': f'{min(current+20, max_skill)}-{max_skill}', 'recipes': recipes[6:10]}
-            ]
-            
-            for bracket in brackets:
-                if int(bracket['range'].split('-')[0]) >= max_skill:
-                    continue
-                    
-                bracket_guide = {
-                    'skill_range': bracket['range'],
-                    'recipes': []
-                }
-                
-                for recipe in bracket['recipes']:
-                    # Estimate cost
-                    mat_count = len(recipe['materials'])
-                    est_cost = mat_count * 50  # Simplified
-                    
-                    bracket_guide['recipes'].append({
-                        'name': recipe['name'],
-                        'materials': recipe['materials'],
-                        'estimated_cost': est_cost,
-                        'crafts_needed': '5-10',
-                        'skill_points': '5-10'
-                    })
-                
-                if bracket_guide['recipes']:
-                    prof_guide['recommended_path'].append(bracket_guide)
+            prof_guide['status'] = 'No recipe data available yet'
         
         guide['professions'].append(prof_guide)
     
@@ -13,11 +13,29 @@ Aggressive, competitive strategies for market control:
 WARNING: These strategies are AGGRESSIVE. Use responsibly.
 """
 
+import atexit
+import os
+import threading
+import time
 import numpy as np
 from typing import List, Dict, Tuple
-from collections import defaultdict
 from datetime import datetime, timedelta
 
+from market_detector import StreamingMarketDetector
+from competitor_store import CompetitorStore
+from domination_analytics import knapsack, monopoly_scores, reset_scores, scan_columns
+
+COMPETITORS_DB_PATH = os.getenv('HOLOCRON_COMPETITORS_DB',
+                                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'competitors.db'))
+
+def _round1(values: np.ndarray) -> np.ndarray:
+    """round(x, 1) as Python does it (np.round can differ on ties)"""
+    return np.array([round(v, 1) for v in values.tolist()], dtype=float)
+
+def _copper(value: float):
+    """Whole copper amounts as int, as the per-item loop reported them"""
+    return int(value) if value.is_integer() else value
+
 # ============================================================================
 # Market Reset Sniping
 # ============================================================================
@@ -41,41 +59,38 @@ class ResetSniper:
         """
         Find items ready for market reset
         
+        Criteria: 2-15 auctions, buying all of them fits max_investment,
+        relisting at 3x market value and selling half clears 50g profit.
+        
         Returns opportunities sorted by profit potential
         """
+        columns = scan_columns(scan_data)
+        scores = reset_scores(columns, self.max_investment)
+        rows = np.flatnonzero(scores['eligible'])
+        # Sort by ROI (as reported, i.e. rounded)
+        rows = rows[np.argsort(-_round1(scores['roi'][rows]), kind='stable')]
+        return self._opportunities(columns, scores, rows)
+    
+    def plan_resets(self, scan_data: List[Dict]) -> List[Dict]:
+        """
+        The resets to fund together: the eligible set with the most expected
+        profit whose total buyout cost fits max_investment (knapsack), by ROI
+        """
+        columns = scan_columns(scan_data)
+        scores = reset_scores(columns, self.max_investment)
+        rows = np.flatnonzero(scores['eligible'])
+        rows = rows[knapsack(scores['cost'][rows], scores['profit'][rows], self.max_investment)]
+        rows = rows[np.argsort(-_round1(scores['roi'][rows]), kind='stable')]
+        return self._opportunities(columns, scores, rows)
+    
+    def _opportunities(self, columns: Dict[str, np.ndarray], scores: Dict[str, np.ndarray],
+                       rows: np.ndarray) -> List[Dict]:
         opportunities = []
-        
-        for item in scan_data:
-            item_id = item.get('item_id')
-            num_auctions = item.get('num_auctions', 0)
-            avg_price = item.get('avg_buyout', 0)
-            market_value = item.get('market_value', 0)
-            
-            # Criteria for reset
-            if num_auctions > 15:
-                continue  # Too much supply
-            
-            if num_auctions < 2:
-                continue  # Already controlled
-            
-            # Calculate total buyout cost
-            total_cost = avg_price * num_auctions
-            
-            if total_cost > self.max_investment:
-                continue  # Too expensive
-            
-            # Calculate new price after reset (3x current)
-            reset_price = market_value * 3
-            
-            # Estimate profit (assume selling half your stock)
-            expected_sales = num_auctions * 0.5
-            gross_revenue = reset_price * expected_sales
-            profit = gross_revenue - total_cost
-            roi = (profit / total_cost) * 100 if total_cost > 0 else 0
-            
-            if profit < 50000:  # Minimum 50g profit
-                continue
-            
+        for item_id, num_auctions, total_cost, reset_price, profit, roi in zip(
+                columns['item_id'][rows].tolist(), columns['num_auctions'][rows].tolist(),
+                scores['cost'][rows].tolist(), scores['reset_price'][rows].tolist(),
+                scores['profit'][rows].tolist(), scores['roi'][rows].tolist()):
+            total_cost, reset_price = _copper(total_cost), _copper(reset_price)
             opportunities.append({
                 "item_id": item_id,
                 "current_supply": num_auctions,
@@ -86,10 +101,6 @@ class ResetSniper:
                 "risk": "medium",
                 "action": f"BUY ALL {num_auctions} listings for {self._format_gold(total_cost)}, relist at {self._format_gold(reset_price)}",
             })
-        
-        # Sort by ROI
-        opportunities.sort(key=lambda x: x['roi'], reverse=True)
-        
         return opportunities
     
     def _format_gold(self, copper: int) -> str:
@@ -126,43 +137,28 @@ class MonopolyController:
         - High margin (>100% profit possible)
         - Not easily farmable (crafted items better than drops)
         """
-        targets = []
-        
-        for item in scan_data:
-            demand = item.get('sale_rate', 0) * 100  # Sales per day
-            sellers = item.get('num_sellers', 0)
-            margin = item.get('profit_margin', 0)
-            is_craftable = item.get('is_craftable', False)
-            
-            # Monopoly criteria
-            if demand < 10:
-                continue  # Not enough demand
-            
-            if sellers > 8:
-                continue  # Too much competition
-            
-            if margin < 0.5:
-                continue  # Margins too thin
-            
-            # Scoring
-            score = (demand * 2) + (margin * 100) - (sellers * 10)
-            
-            if is_craftable:
-                score += 20  # Bonus for crafted (controllable supply)
-            
-            targets.append({
-                "item_id": item['item_id'],
-                "demand_score": round(demand, 1),
-                "competition": sellers,
-                "margin": round(margin * 100, 1),
-                "monopoly_score": round(score, 1),
-                "strategy": "Buy out daily, maintain high prices",
-            })
+        columns = scan_columns(scan_data)
+        scores = monopoly_scores(columns)
+        rows = np.flatnonzero(scores['eligible'])
+        if len(rows) > 10:
+            # Only scores that can still round into the top 10
+            score = scores['score'][rows]
+            rows = rows[score >= np.partition(score, len(rows) - 10)[len(rows) - 10] - 0.1]
         
         # Sort by monopoly score
-        targets.sort(key=lambda x: x['monopoly_score'], reverse=True)
-        
-        return targets[:10]  # Top 10 targets
+        rows = rows[np.argsort(-_round1(scores['score'][rows]), kind='stable')][:10]  # Top 10 targets
+        
+        return [{
+            "item_id": item_id,
+            "demand_score": round(demand, 1),
+            "competition": sellers,
+            "margin": round(margin * 100, 1),
+            "monopoly_score": round(score, 1),
+            "strategy": "Buy out daily, maintain high prices",
+        } for item_id, demand, sellers, margin, score in zip(
+            columns['item_id'][rows].tolist(), scores['demand'][rows].tolist(),
+            columns['num_sellers'][rows].tolist(), columns['profit_margin'][rows].tolist(),
+            scores['score'][rows].tolist())]
 
 # ============================================================================
 # Manipulation Detection & Counter-Play
@@ -189,14 +185,13 @@ class ManipulationDetector:
         if len(price_history) < 10:
             return {"manipulation": False}
         
-        recent_prices = [p['price'] for p in price_history[-10:]]
-        older_prices = [p['price'] for p in price_history[:-10]]
-        
-        recent_avg = np.mean(recent_prices)
-        older_avg = np.mean(older_prices)
+        prices = np.fromiter((p['price'] for p in price_history), dtype=float, count=len(price_history))
         
         # Check for sudden spike
-        spike = (recent_avg - older_avg) / older_avg
+        with np.errstate(divide='ignore', invalid='ignore'):
+            recent_avg = prices[-10:].mean()
+            older_avg = prices[:-10].mean() if len(prices) > 10 else np.nan
+            spike = (recent_avg - older_avg) / older_avg
         
         if spike > 2.0:  # 200% increase
             return {
@@ -207,11 +202,7 @@ class ManipulationDetector:
             }
         
         # Check for wall (many identical prices)
-        price_counts = defaultdict(int)
-        for p in price_history[-20:]:
-            price_counts[p['price']] += 1
-        
-        max_count = max(price_counts.values()) if price_counts else 0
+        max_count = np.unique(prices[-20:], return_counts=True)[1].max()
         
         if max_count > 15:
             return {
@@ -243,57 +234,23 @@ class CompetitorTracker:
     - Target their weak spots
     """
     
-    def __init__(self):
-        self.competitors = defaultdict(lambda: {
-            "listings": 0,
-            "undercuts": [],
-            "online_times": [],
-            "threat_level": 0
-        })
+    def __init__(self, store: CompetitorStore = None):
+        # Bounded heavy-hitter table with decayed counters and hour-of-week histograms
+        self.store = store if store is not None else CompetitorStore()
     
     def track_competitor(self, seller_name: str, action: Dict):
-        """Record competitor activity"""
-        comp = self.competitors[seller_name]
-        
-        if action['type'] == 'listing':
-            comp['listings'] += 1
-        elif action['type'] == 'undercut':
-            comp['undercuts'].append(action['amount'])
-        
-        comp['online_times'].append(datetime.now().hour)
-        
-        # Calculate threat level
-        comp['threat_level'] = min(comp['listings'] / 100, 1.0)
+        """Record competitor activity (action: type, amount for undercuts, optional timestamp)"""
+        self.store.record([seller_name], [action['type']], [action.get('timestamp') or time.time()],
+                          [action.get('amount', 0)])
+    
+    def track_competitors(self, sellers: List[str], kinds: List[str], timestamps: List[float],
+                          amounts: List[float] = None):
+        """Record a batch of competitor actions (e.g. one scan) in one pass"""
+        self.store.record(sellers, kinds, timestamps, amounts)
     
     def get_top_competitors(self, limit: int = 5) -> List[Dict]:
         """Get most dangerous competitors"""
-        ranked = []
-        
-        for name, data in self.competitors.items():
-            ranked.append({
-                "name": name,
-                "listings": data['listings'],
-                "avg_undercut": np.mean(data['undercuts']) if data['undercuts'] else 0,
-                "threat_level": data['threat_level'],
-                "active_hours": self._get_peak_hours(data['online_times']),
-            })
-        
-        ranked.sort(key=lambda x: x['threat_level'], reverse=True)
-        
-        return ranked[:limit]
-    
-    def _get_peak_hours(self, hours: List[int]) -> str:
-        """Determine when competitor is most active"""
-        if not hours:
-            return "Unknown"
-        
-        hour_counts = defaultdict(int)
-        for h in hours:
-            hour_counts[h] += 1
-        
-        peak = max(hour_counts.items(), key=lambda x: x[1])[0]
-        
-        return f"{peak}:00-{peak+2}:00"
+        return self.store.top(limit)
 
 # ============================================================================
 # Flash Crash Buyer
@@ -317,7 +274,8 @@ class FlashCrashBuyer:
             return {"crash": False}
         
         current_price = item.get('avg_buyout', 0)
-        historical_avg = np.mean([p['price'] for p in price_history])
+        historical_avg = np.fromiter((p['price'] for p in price_history), dtype=float,
+                                     count=len(price_history)).mean()
         
         drop = (historical_avg - current_price) / historical_avg
         
@@ -331,6 +289,12 @@ class FlashCrashBuyer:
             }
         
         return {"crash": False}
+    
+    def detect_crashes(self, alerts: List[Dict]) -> List[Dict]:
+        """Crash buys from a StreamingMarketDetector scan: flash crashes and dumps, deepest first"""
+        crashes = [a for a in alerts if a['type'] in ('FLASH_CRASH', 'PRICE_CRASH')]
+        crashes.sort(key=lambda a: a['drop_pct'], reverse=True)
+        return crashes
 
 # ============================================================================
 # Domination Strategy Coordinator
@@ -341,12 +305,16 @@ class MarketDominationEngine:
     Coordinates all aggressive strategies for maximum profit
     """
     
-    def __init__(self, capital: int = 5000000):  # 5000g starting capital
+    def __init__(self, capital: int = 5000000,  # 5000g starting capital
+                 detector: StreamingMarketDetector = None, competitors: CompetitorStore = None):
         self.capital = capital
+        # Rolling per-item state; share one detector across scans to get alerts over time
+        self.detector = detector or StreamingMarketDetector()
         self.reset_sniper = ResetSniper(max_investment=capital * 0.2)
         self.monopoly = MonopolyController()
         self.manipulation = ManipulationDetector()
-        self.competitor = CompetitorTracker()
+        # Pass a persistent store (see shared_competitor_store) to keep competitor history
+        self.competitor = CompetitorTracker(competitors)
         self.flash = FlashCrashBuyer()
     
     def analyze_and_dominate(self, scan_data: List[Dict]) -> Dict:
@@ -357,20 +325,27 @@ class MarketDominationEngine:
             "reset_opportunities": [],
             "monopoly_targets": [],
             "flash_crashes": [],
+            "manipulation_alerts": [],
             "competitor_analysis": [],
             "total_profit_potential": 0,
         }
         
-        # Reset sniping
-        resets = self.reset_sniper.find_reset_opportunities(scan_data)
-        results['reset_opportunities'] = resets[:5]
+        # New alerts from this scan (resets, dumps, crashes, scarcity)
+        alerts = self.detector.update_scan(scan_data)
+        results['flash_crashes'] = self.flash.detect_crashes(alerts)
+        results['manipulation_alerts'] = [a for a in alerts
+                                          if a['type'] in ('MARKET_RESET', 'ARTIFICIAL_SCARCITY')]
+        
+        # Reset sniping: the set of resets the budget can fund together
+        resets = self.reset_sniper.plan_resets(scan_data)
+        results['reset_opportunities'] = resets
         
         # Monopoly targets
         monopolies = self.monopoly.identify_monopoly_targets(scan_data)
         results['monopoly_targets'] = monopolies
         
         # Calculate profit potential
-        reset_profit = sum(r['expected_profit'] for r in resets[:5])
+        reset_profit = sum(r['expected_profit'] for r in resets)
         results['total_profit_potential'] = reset_profit
         
         return results
@@ -397,6 +372,23 @@ class MarketDominationEngine:
 # Flask Endpoint
 # ============================================================================
 
+# Detector state shared by endpoint calls (repeated identical scans are ignored;
+# updates are serialized by the detector's lock)
+_scan_detector = StreamingMarketDetector()
+
+# Competitor history shared by endpoint calls: opened on first use, saved to
+# COMPETITORS_DB_PATH and closed when the process exits
+_competitor_store = None
+_competitor_store_lock = threading.Lock()
+
+def shared_competitor_store() -> CompetitorStore:
+    global _competitor_store
+    with _competitor_store_lock:
+        if _competitor_store is None:
+            _competitor_store = CompetitorStore(COMPETITORS_DB_PATH)
+            atexit.register(_competitor_store.close)
+        return _competitor_store
+
 def get_domination_strategies(scan_data: List[Dict]) -> Dict:
     """
     Endpoint for domination strategies
@@ -407,7 +399,7 @@ def get_domination_strategies(scan_data: List[Dict]) -> Dict:
             scan = get_latest_scan()
             return get_domination_strategies(scan)
     """
-    engine = MarketDominationEngine()
+    engine = MarketDominationEngine(detector=_scan_detector, competitors=shared_competitor_store())
     
     strategies = engine.analyze_and_dominate(scan_data)
     strategies['daily_focus'] = engine.get_daily_strategy()
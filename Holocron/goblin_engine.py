@@ -8,6 +8,7 @@ from typing import List, Dict, Optional
 from dataclasses import dataclass
 from enum import Enum
 import random
+import time
 
 class ItemType(Enum):
     MATERIAL = "Material"
@@ -90,6 +91,7 @@ class GoblinEngine:
     def __init__(self, tsm_engine=None):
         self.tsm_engine = tsm_engine
         self.prices = {}  # {item_id: ItemPrice}
+        self.prices_updated_at = None  # Bumped whenever self.prices is reloaded
         self.recipes = []
         self.items = []
         self.history = self._load_history()
@@ -179,6 +181,7 @@ class GoblinEngine:
         self.prices[2002] = ItemPrice(2002, "Draconium Plate Helm", ItemType.GEAR, 2500, 2400, 2600, 0.20)
         self.prices[2003] = ItemPrice(2003, "Enchant Weapon - Sophic Devotion", ItemType.ENCHANT, 1200, 1150, 1250, 0.75)
         self.prices[2004] = ItemPrice(2004, "Khaz Algar Flask", ItemType.CONSUMABLE, 400, 380, 420, 0.65)
+        self.prices_updated_at = time.time()
         
         # 2. Define Recipes
         self.recipes = []
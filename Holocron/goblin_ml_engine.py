@@ -10,6 +10,9 @@ Features:
 4. Auto-create optimized trading groups
 5. Recommend operations per group
 
+Items are classified in one pass (first matching group wins) and each
+group keeps its most profitable items.
+
 Usage:
     from goblin_ml_engine import GoblinMLEngine
     
@@ -17,21 +20,107 @@ Usage:
     groups = ml.generate_auto_groups(scan_data)
 """
 
+import heapq
 import json
 import numpy as np
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from collections import defaultdict
 from datetime import datetime, timedelta
 
+MATERIAL_KEYWORDS = ['ore', 'herb', 'leather', 'cloth', 'dust', 'essence']
+WEEKEND_CATEGORIES = [
+    'consumables',  # Players raid on weekends
+    'crafted_gear',  # Players prep for weekly reset
+    'enchants',      # Players optimize gear
+]
+
+# Pricing rules per operation type
+OPERATIONS = {
+    "aggressive_undercut": {
+        "minPrice": "90% DBMarket",
+        "normalPrice": "105% DBMarket",
+        "maxPrice": "120% DBMarket",
+        "undercut": 1,  # 1 copper
+        "duration": 12,  # hours
+        "stackSize": 1,
+    },
+    "volume_pricing": {
+        "minPrice": "95% DBMarket",
+        "normalPrice": "110% DBMarket",
+        "maxPrice": "150% DBMarket",
+        "undercut": 5,  # 5 copper
+        "duration": 24,
+        "stackSize": 200,  # Bulk stacks
+    },
+    "craft_and_sell": {
+        "minPrice": "120% Crafting",
+        "normalPrice": "150% Crafting",
+        "maxPrice": "200% Crafting",
+        "undercut": 1,
+        "duration": 48,
+        "stackSize": 1,
+    },
+    "patient_sale": {
+        "minPrice": "200% DBMarket",
+        "normalPrice": "300% DBMarket",
+        "maxPrice": "500% DBMarket",
+        "undercut": 0,  # Don't undercut
+        "duration": 48,
+        "stackSize": 1,
+    },
+    "hold_for_spike": {
+        "minPrice": "150% DBMarket",
+        "normalPrice": "200% DBMarket",
+        "maxPrice": "300% DBMarket",
+        "undercut": 1,
+        "duration": 48,
+        "stackSize": 200,
+    }
+}
+
+# Auto-groups in classification order (an item goes in the first whose
+# "match" accepts it; match gets the engine and the item)
+GROUPS = [
+    {"name": "Instant Profit Flips", "operation": "aggressive_undercut",
+     "reason": "High margin (>50%), fast sales (>80%)", "priority": 1, "post_frequency": "immediately", "limit": 20,
+     "match": lambda ml, item: (item.get('profit_margin', 0) > ml.high_margin_threshold
+                                and item.get('sale_rate', 0) > 0.8)},
+    {"name": "Volume Trading", "operation": "volume_pricing",
+     "reason": "High turnover, consistent demand", "priority": 2, "post_frequency": "hourly", "limit": 30,
+     "match": lambda ml, item: (item.get('num_auctions', 0) > ml.high_volume_threshold
+                                and item.get('profit_margin', 0) > 0.1)},
+    {"name": "Profitable Crafts", "operation": "craft_and_sell",
+     "reason": "Crafting profit >50g per item", "priority": 3, "post_frequency": "daily", "limit": 15,
+     "match": lambda ml, item: item.get('is_craftable', False) and item.get('profit', 0) > 5000},
+    {"name": "Transmog Slow Burn", "operation": "patient_sale",
+     "reason": "High margin, low volume - be patient", "priority": 4, "post_frequency": "weekly", "limit": 25,
+     "match": lambda ml, item: item.get('profit_margin', 0) > 0.8 and item.get('sale_rate', 0) < 0.3},
+    {"name": "Material Stockpile", "operation": "hold_for_spike",
+     "reason": "Materials with predicted price increases", "priority": 5, "post_frequency": "wait", "limit": 20,
+     "match": lambda ml, item: ml._is_material(item)},
+]
+
 # ============================================================================
 # Auto-Group Generation Engine
 # ============================================================================
 
 class GoblinMLEngine:
-    def __init__(self):
+    def __init__(self, groups: Optional[List[Dict]] = None):
         self.min_profit_threshold = 1000  # 10 silver minimum
         self.high_volume_threshold = 100  # Sales per day
         self.high_margin_threshold = 0.5  # 50% profit margin
+        self.groups = GROUPS if groups is None else groups
+    
+    def classify(self, item: Dict) -> Optional[Dict]:
+        """The item's group (first match), None for unprofitable or unmatched items"""
+        # Skip unprofitable items
+        if item.get('profit', 0) < self.min_profit_threshold:
+            return None
+        
+        for group in self.groups:
+            if group["match"](self, item):
+                return group
+        return None
         
     def generate_auto_groups(self, market_data: List[Dict]) -> List[Dict]:
         """
@@ -41,88 +130,29 @@ class GoblinMLEngine:
             market_data: List of item opportunities from goblin_engine
         
         Returns:
-            List of auto-generated groups with items and operations
+            List of auto-generated groups with items and operations,
+            each group's items ranked by profit
         """
-        groups = []
-        
-        # Classify items
-        instant_flips = []
-        volume_trades = []
-        craft_profits = []
-        transmog_slow = []
-        material_stockpile = []
-        
+        members = {group["name"]: [] for group in self.groups}
         for item in market_data:
-            profit = item.get('profit', 0)
-            margin = item.get('profit_margin', 0)
-            sale_rate = item.get('sale_rate', 0)
-            volume = item.get('num_auctions', 0)
-            
-            # Skip unprofitable items
-            if profit < self.min_profit_threshold:
-                continue
-            
-            # Classify
-            if margin > 0.5 and sale_rate > 0.8:
-                instant_flips.append(item)
-            elif volume > self.high_volume_threshold and margin > 0.1:
-                volume_trades.append(item)
-            elif item.get('is_craftable', False) and profit > 5000:
-                craft_profits.append(item)
-            elif margin > 0.8 and sale_rate < 0.3:
-                transmog_slow.append(item)
-            elif self._is_material(item):
-                material_stockpile.append(item)
-        
-        # Create groups
-        if instant_flips:
-            groups.append({
-                "name": "Instant Profit Flips",
-                "items": [item['item_id'] for item in instant_flips[:20]],
-                "operation": "aggressive_undercut",
-                "reason": "High margin (>50%), fast sales (>80%)",
-                "priority": 1,
-                "post_frequency": "immediately",
-            })
+            group = self.classify(item)
+            if group is not None:
+                members[group["name"]].append(item)
         
-        if volume_trades:
-            groups.append({
-                "name": "Volume Trading",
-                "items": [item['item_id'] for item in volume_trades[:30]],
-                "operation": "volume_pricing",
-                "reason": "High turnover, consistent demand",
-                "priority": 2,
-                "post_frequency": "hourly",
-            })
-        
-        if craft_profits:
-            groups.append({
-                "name": "Profitable Crafts",
-                "items": [item['item_id'] for item in craft_profits[:15]],
-                "operation": "craft_and_sell",
-                "reason": "Crafting profit >50g per item",
-                "priority": 3,
-                "post_frequency": "daily",
-            })
-        
-        if transmog_slow:
-            groups.append({
-                "name": "Transmog Slow Burn",
-                "items": [item['item_id'] for item in transmog_slow[:25]],
-                "operation": "patient_sale",
-                "reason": "High margin, low volume - be patient",
-                "priority": 4,
-                "post_frequency": "weekly",
-            })
-        
-        if material_stockpile:
+        groups = []
+        for group in self.groups:
+            items = members[group["name"]]
+            if not items:
+                continue
+            # nlargest keeps input order among equal profits
+            best = heapq.nlargest(group["limit"], items, key=lambda item: item.get('profit', 0))
             groups.append({
-                "name": "Material Stockpile",
-                "items": [item['item_id'] for item in material_stockpile[:20]],
-                "operation": "hold_for_spike",
-                "reason": "Materials with predicted price increases",
-                "priority": 5,
-                "post_frequency": "wait",
+                "name": group["name"],
+                "items": [item['item_id'] for item in best],
+                "operation": group["operation"],
+                "reason": group["reason"],
+                "priority": group["priority"],
+                "post_frequency": group["post_frequency"],
             })
         
         return groups
@@ -130,9 +160,8 @@ class GoblinMLEngine:
     def _is_material(self, item: Dict) -> bool:
         """Check if item is a crafting material"""
         # Simplified check - in production, use item class
-        material_keywords = ['ore', 'herb', 'leather', 'cloth', 'dust', 'essence']
         name = item.get('name', '').lower()
-        return any(keyword in name for keyword in material_keywords)
+        return any(keyword in name for keyword in MATERIAL_KEYWORDS)
     
     def recommend_operation(self, group_type: str) -> Dict:
         """
@@ -140,50 +169,7 @@ class GoblinMLEngine:
         
         Returns operation with pricing rules
         """
-        operations = {
-            "aggressive_undercut": {
-                "minPrice": "90% DBMarket",
-                "normalPrice": "105% DBMarket",
-                "maxPrice": "120% DBMarket",
-                "undercut": 1,  # 1 copper
-                "duration": 12,  # hours
-                "stackSize": 1,
-            },
-            "volume_pricing": {
-                "minPrice": "95% DBMarket",
-                "normalPrice": "110% DBMarket",
-                "maxPrice": "150% DBMarket",
-                "undercut": 5,  # 5 copper
-                "duration": 24,
-                "stackSize": 200,  # Bulk stacks
-            },
-            "craft_and_sell": {
-                "minPrice": "120% Crafting",
-                "normalPrice": "150% Crafting",
-                "maxPrice": "200% Crafting",
-                "undercut": 1,
-                "duration": 48,
-                "stackSize": 1,
-            },
-            "patient_sale": {
-                "minPrice": "200% DBMarket",
-                "normalPrice": "300% DBMarket",
-                "maxPrice": "500% DBMarket",
-                "undercut": 0,  # Don't undercut
-                "duration": 48,
-                "stackSize": 1,
-            },
-            "hold_for_spike": {
-                "minPrice": "150% DBMarket",
-                "normalPrice": "200% DBMarket",
-                "maxPrice": "300% DBMarket",
-                "undercut": 1,
-                "duration": 48,
-                "stackSize": 200,
-            }
-        }
-        
-        return operations.get(group_type, operations["volume_pricing"])
+        return dict(OPERATIONS.get(group_type, OPERATIONS["volume_pricing"]))
     
     def predict_price_trend(self, item_id: int, price_history: List[Dict]) -> Dict:
         """
@@ -235,22 +221,9 @@ class GoblinMLEngine:
         Returns:
             List of item IDs with weekend spike patterns
         """
-        weekend_items = []
-        
         # This would analyze historical data to find patterns
         # For MVP, return items in certain categories known for weekend activity
-        
-        weekend_categories = [
-            'consumables',  # Players raid on weekends
-            'crafted_gear',  # Players prep for weekly reset
-            'enchants',      # Players optimize gear
-        ]
-        
-        for item in scan_data:
-            # Simplified check
-            if item.get('category') in weekend_categories:
-                weekend_items.append(item['item_id'])
-        
+        weekend_items = [item['item_id'] for item in scan_data if item.get('category') in WEEKEND_CATEGORIES]
         return weekend_items[:20]
     
     def calculate_optimal_posting_time(self, item_id: int, sale_history: List[Dict]) -> str:
@@ -29,6 +29,8 @@ from collections import defaultdict
 import psycopg2
 import os
 
+from price_history_cube import PriceHistoryCube, to_epoch
+
 # ============================================================================
 # Historical Data Loader
 # ============================================================================
@@ -108,12 +110,34 @@ class HistoricalDataLoader:
         
         cur.close()
         return history
+    
+    def load_price_cube(self, item_ids: List[int], start_date: datetime,
+                        end_date: datetime) -> PriceHistoryCube:
+        """
+        Load price history for many items in one query (see load_price_history)
+        """
+        cur = self.conn.cursor()
+        
+        cur.execute("""
+            SELECT si.item_id, s.timestamp, si.price
+            FROM auctionhouse.scan_items si
+            JOIN auctionhouse.scans s ON si.scan_id = s.scan_id
+            WHERE si.item_id = ANY(%s)
+              AND s.timestamp BETWEEN %s AND %s
+        """, (sorted(set(item_ids)), start_date, end_date))
+        
+        cube = PriceHistoryCube.from_rows(cur.fetchall())
+        cur.close()
+        return cube
 
 # ============================================================================
 # Event-Price Correlation Engine
 # ============================================================================
 
 class EventPriceCorrelator:
+    BASELINE_DAYS = 7
+    MIN_POINTS = 10  # Price points needed across baseline + window
+    
     def __init__(self, historical_loader: HistoricalDataLoader):
         self.loader = historical_loader
     
@@ -135,62 +159,62 @@ class EventPriceCorrelator:
             }
         """
         event_time = event['timestamp']
-        window_end = event_time + timedelta(hours=window_hours)
-        
-        item_impacts = []
+        cube = self.loader.load_price_cube(event.get('affected_items') or [],
+                                           event_time - timedelta(days=self.BASELINE_DAYS),
+                                           event_time + timedelta(hours=window_hours))
+        return self.correlate_events([event], cube, window_hours)[0]
+    
+    def correlate_events(self, events: List[Dict], cube: PriceHistoryCube,
+                         window_hours: int = 72) -> List[Dict]:
+        """
+        Correlate many events at once against a loaded price history cube
         
-        for item_id in event.get('affected_items', []):
-            # Get price history before and after event
-            before_start = event_time - timedelta(days=7)
-            
-            history = self.loader.load_price_history(item_id, before_start, window_end)
-            
-            if len(history) < 10:
-                continue  # Not enough data
-            
-            # Calculate baseline (7 days before event)
-            baseline_prices = [h['price'] for h in history 
-                             if h['timestamp'] < event_time]
-            
-            if not baseline_prices:
-                continue
-            
-            baseline_avg = np.mean(baseline_prices)
-            
-            # Find peak after event
-            after_prices = [h for h in history if h['timestamp'] >= event_time]
-            
-            if not after_prices:
-                continue
-            
-            peak_price = max(p['price'] for p in after_prices)
-            peak_time = next(p['timestamp'] for p in after_prices 
-                           if p['price'] == peak_price)
-            
-            # Calculate impact
-            price_change_pct = ((peak_price - baseline_avg) / baseline_avg) * 100
-            peak_time_hours = (peak_time - event_time).total_seconds() / 3600
-            
-            item_impacts.append({
-                "item_id": item_id,
-                "baseline_price": int(baseline_avg),
-                "peak_price": peak_price,
-                "price_change_pct": round(price_change_pct, 1),
-                "peak_time_hours": round(peak_time_hours, 1),
+        Every (event, affected item) pair is measured in one vectorized pass:
+        baseline = mean price over the BASELINE_DAYS before the event,
+        peak = highest price (and when it was first hit) within window_hours after.
+        """
+        event_index, item_ids = [], []
+        for i, event in enumerate(events):
+            for item_id in event.get('affected_items') or []:
+                event_index.append(i)
+                item_ids.append(item_id)
+        
+        event_times = to_epoch(event['timestamp'] for event in events)
+        windows = cube.event_windows(event_times[event_index] if event_index else np.zeros(0), item_ids,
+                                     window_hours=window_hours, baseline_days=self.BASELINE_DAYS,
+                                     min_points=self.MIN_POINTS)
+        baseline, peak = windows['baseline'], windows['peak']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            price_change_pct = (peak - baseline) / baseline * 100
+        
+        item_impacts = [[] for _ in events]
+        for pair in np.flatnonzero(windows['valid']).tolist():
+            item_impacts[event_index[pair]].append({
+                "item_id": item_ids[pair],
+                "baseline_price": int(baseline[pair]),
+                "peak_price": int(peak[pair]),
+                "price_change_pct": round(float(price_change_pct[pair]), 1),
+                "peak_time_hours": round(float(windows['peak_hours'][pair]), 1),
             })
         
-        return {
-            "event_id": event['event_id'],
-            "event_type": event['event_type'],
-            "event_time": event_time.isoformat(),
-            "item_impacts": item_impacts,
-        }
+        return [
+            {
+                "event_id": event['event_id'],
+                "event_type": event['event_type'],
+                "event_time": event['timestamp'].isoformat(),
+                "item_impacts": impacts,
+            }
+            for event, impacts in zip(events, item_impacts)
+        ]
     
     def build_training_dataset(self, start_date: datetime, 
-                               end_date: datetime) -> List[Dict]:
+                               end_date: datetime, window_hours: int = 72) -> List[Dict]:
         """
         Build complete training dataset from historical data
         
+        Price history for every affected item over the whole study period is
+        loaded once, then all events are correlated against it.
+        
         Returns:
             List of correlated event-price pairs
         """
@@ -199,15 +223,16 @@ class EventPriceCorrelator:
         
         print(f"Found {len(events)} historical events")
         
-        training_data = []
+        item_ids = sorted({item_id for event in events for item_id in event.get('affected_items') or []})
+        print(f"Loading price history for {len(item_ids)} items...")
+        cube = self.loader.load_price_cube(item_ids, start_date - timedelta(days=self.BASELINE_DAYS),
+                                           end_date + timedelta(hours=window_hours))
+        print(f"Loaded {len(cube)} price points")
         
-        for i, event in enumerate(events):
-            print(f"Correlating event {i+1}/{len(events)}: {event['title'][:50]}...")
-            
-            correlation = self.correlate_event_to_prices(event)
-            
-            if correlation['item_impacts']:
-                training_data.append(correlation)
+        training_data = [
+            correlation for correlation in self.correlate_events(events, cube, window_hours)
+            if correlation['item_impacts']
+        ]
         
         print(f"\nBuilt training dataset: {len(training_data)} correlated events")
         
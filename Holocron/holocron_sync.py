@@ -22,6 +22,8 @@ from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any, List
 
+from sv_watcher import SavedVariablesWatcher
+
 # Configuration
 # Try to auto-detect WoW path or use env var
 WOW_PATH = os.environ.get('WOW_PATH', '/Applications/World of Warcraft/_retail_')
@@ -365,11 +367,24 @@ class HolocronSync:
     def run(self):
         print("Holocron Sync Tool Running...")
         print("Press Ctrl+C to stop")
-        
-        while True:
-            for addon_name in ADDONS:
-                self.process_queue(addon_name)
-            time.sleep(2)  # Check every 2 seconds
+
+        if not self.account_dir:
+            return
+
+        # Drain anything queued while we were offline
+        for addon_name in ADDONS:
+            self.process_queue(addon_name)
+
+        watcher = SavedVariablesWatcher(str(self.account_dir / "SavedVariables"))
+        for addon_name, config in ADDONS.items():
+            watcher.register(config["saved_vars"], lambda path, name, addon=addon_name: self.process_queue(addon))
+        watcher.start()
+
+        try:
+            while True:
+                time.sleep(1)
+        finally:
+            watcher.stop()
 
 if __name__ == "__main__":
     sync = HolocronSync()
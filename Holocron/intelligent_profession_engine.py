@@ -9,8 +9,12 @@ import os
 import psycopg2
 import json
 import requests
+import numpy as np
 from datetime import datetime, timedelta
 
+from leveling_planner import LevelingPlanner, skill_bands
+from profession_cache import ProfessionAnalyticsCache
+
 DATABASE_URL = os.getenv('DATABASE_URL', 'postgresql://jgrayson@localhost/holocron')
 GOBLIN_API_URL = os.getenv('GOBLIN_API_URL', 'http://localhost:5005/api')
 
@@ -22,6 +26,10 @@ class IntelligentProfessionEngine:
         self.market_cache = {}
         self.inventory_cache = {}
         self.goblin_engine = goblin_engine
+        self._price_snapshot = None
+        self.analytics = ProfessionAnalyticsCache(
+            self._load_recipes, self.get_market_price, self.price_snapshot
+        )
     
     def _get_db_connection(self):
         try:
@@ -30,6 +38,57 @@ class IntelligentProfessionEngine:
             print(f"❌ Database connection failed: {e}")
             return None
     
+    def price_snapshot(self):
+        """
+        Token identifying the current price data. When it changes the
+        per-item market cache is dropped so prices are re-read.
+        """
+        tsm = getattr(self.goblin_engine, 'tsm_engine', None)
+        snapshot = (
+            getattr(tsm, 'prices_updated_at', None),
+            getattr(self.goblin_engine, 'prices_updated_at', None),
+        )
+        if snapshot != self._price_snapshot:
+            self.market_cache = {}
+            self._price_snapshot = snapshot
+        return snapshot
+    
+    def _load_recipes(self, profession):
+        """All recipes with materials for a profession"""
+        cur = self.conn.cursor()
+        cur.execute("""
+            SELECT 
+                recipe_id, recipe_name, skill_tier_name,
+                materials, crafted_item_id, crafted_quantity,
+                -- Skill colour thresholds are optional columns (extend_recipe_data.py)
+                (to_jsonb(r) ->> 'skill_required')::int,
+                (to_jsonb(r) ->> 'skill_yellow')::int,
+                (to_jsonb(r) ->> 'skill_green')::int,
+                (to_jsonb(r) ->> 'skill_gray')::int
+            FROM goblin.recipe_reference r
+            WHERE profession_name = %s
+            AND materials IS NOT NULL
+            ORDER BY recipe_id
+        """, (profession,))
+        
+        recipes = []
+        for row in cur.fetchall():
+            recipes.append({
+                'id': row[0],
+                'name': row[1],
+                'tier': row[2],
+                'materials': row[3],
+                'crafted_item_id': row[4],
+                'crafted_quantity': row[5],
+                'skill_required': row[6],
+                'skill_yellow': row[7],
+                'skill_green': row[8],
+                'skill_gray': row[9]
+            })
+        
+        cur.close()
+        return recipes
+    
     def get_market_price(self, item_id):
         """Get current market price from GoblinStack"""
         if item_id in self.market_cache:
@@ -125,69 +184,34 @@ class IntelligentProfessionEngine:
         5. ML predictions
         """
         
-        print(f"DEBUG: recommend_recipes_intelligent called for {character_name}, {profession}", flush=True)
-        cur = self.conn.cursor()
+        recipes = self.analytics.recipes(profession)
+        economics = self.analytics.profits(profession)
         
-        # Get recipes for this profession with materials
-        cur.execute("""
-            SELECT 
-                recipe_id, recipe_name, skill_tier_name,
-                materials, crafted_item_id, crafted_quantity
-            FROM goblin.recipe_reference
-            WHERE profession_name = %s
-            AND materials IS NOT NULL
-            ORDER BY recipe_id
-            LIMIT 100
-        """, (profession,))
-        
-        recommendations = []
+        # Gold/hour and score for every recipe at once
+        gph = self.calculate_gold_per_hour(None, economics)
+        scores = self._calculate_intelligence_score(None, economics, gph, skill_level)
         
-        rows = cur.fetchall()
-        print(f"DEBUG: Found {len(rows)} recipes", flush=True)
+        # Skip unprofitable recipes, best score first
+        candidates = np.flatnonzero(economics['has_output'] & (economics['profit'] > 0))
+        top = candidates[np.argsort(-scores[candidates], kind='stable')][:10]
         
-        for i, row in enumerate(rows):
-            if i % 10 == 0: print(f"DEBUG: Processing recipe {i}", flush=True)
-            recipe = {
-                'id': row[0],
-                'name': row[1],
-                'tier': row[2],
-             'materials': row[3],
-                'crafted_item_id': row[4],
-                'crafted_quantity': row[5]
-            }
-            
-            # Calculate real profit
-            profit_data = self.calculate_recipe_profit(recipe)
-            
-            if profit_data['profit'] <= 0:
-                continue  # Skip unprofitable recipes
-            
-            # Calculate gold/hour
-            gph = self.calculate_gold_per_hour(recipe, profit_data)
-            
-            # Calculate recommendation score
-            score = self._calculate_intelligence_score(
-                recipe, profit_data, gph, skill_level
-            )
-            
+        recommendations = []
+        for r in top:
+            profit_data = {key: float(values[r]) for key, values in economics.items() if key != 'has_output'}
             recommendations.append({
-                'recipe_name': recipe['name'],
+                'recipe_name': recipes.recipes[r]['name'],
                 'profit': profit_data['profit'],
                 'profit_margin': profit_data['profit_margin'],
-                'gold_per_hour': gph,
+                'gold_per_hour': float(gph[r]),
                 'cost': profit_data['material_cost'],
                 'value': profit_data['sell_price'],
-                'score': score,
+                'score': float(scores[r]),
                 'recommendation': self._generate_smart_reason(
-                    profit_data, gph, score
+                    profit_data, float(gph[r]), float(scores[r])
                 )
             })
         
-        # Sort by intelligence score
-        recommendations.sort(key=lambda x: x['intelligence_score'], reverse=True)
-        
-        cur.close()
-        return recommendations[:10]  # Top 10
+        return recommendations  # Top 10
     
     def _calculate_intelligence_score(self, recipe, profit_data, gph, skill_level):
         """
@@ -196,15 +220,16 @@ class IntelligentProfessionEngine:
         - Gold/hour (30%)
         - Material availability (20%)
         - Market trend (10%)
+        Works on a single recipe or on arrays covering every recipe.
         """
         score = 0
         
         # Factor 1: Profit margin (0-40 points)
         margin = profit_data['profit_margin']
-        score += min(margin / 2.5, 40)  # Cap at 40
+        score += np.minimum(margin / 2.5, 40)  # Cap at 40
         
         # Factor 2: Gold/hour (0-30 points)
-        gph_normalized = min(gph / 1000, 30)  # 30k+ gold/hour = max score
+        gph_normalized = np.minimum(gph / 1000, 30)  # 30k+ gold/hour = max score
         score += gph_normalized
         
         # Factor 3: Material availability (0-20 points)
@@ -280,7 +305,7 @@ class IntelligentProfessionEngine:
                 strategy['assignments'].append({
                     'character': char['name'],
                     'skill_level': char['skill'],
-                    'assigned_recipe': best_recipe['recipe'],
+                    'assigned_recipe': best_recipe['recipe_name'],
                     'expected_profit': best_recipe['profit'],
                     'gold_per_hour': best_recipe['gold_per_hour']
                 })
@@ -288,48 +313,93 @@ class IntelligentProfessionEngine:
         cur.close()
         return strategy
     
-    def generate_dynamic_leveling_guide(self, character_name, profession, current_skill, target_skill):
+    def plan_leveling(self, profession, current_skill, target_skill, tier=None):
+        """
+        Cheapest expected leveling plan at current prices (see
+        leveling_planner). The per-level solution is cached per
+        (profession, tier, price snapshot); each query just walks it.
+        """
+        def build(recipes, prices, economics):
+            required, yellow, _, gray = skill_bands(
+                recipes.skill['required'], recipes.skill['yellow'],
+                recipes.skill['green'], recipes.skill['gray']
+            )
+            if tier is not None:
+                # Other tiers level a different skill line
+                required = np.where(np.array(recipes.tiers) == tier, required, np.nan)
+            return LevelingPlanner(required, yellow, gray, economics['material_cost'])
+        
+        planner = self.analytics.derived(profession, ('leveling', tier), build)
+        plan = planner.plan(current_skill, target_skill)
+        
+        recipes = self.analytics.recipes(profession)
+        material_costs = self.analytics.profits(profession)['material_cost']
+        for step in plan['steps']:
+            recipe = recipes.recipes[step['recipe_index']]
+            step['recipe'] = recipe['name']
+            step['materials'] = recipe['materials']
+            step['cost_per_craft'] = float(material_costs[step['recipe_index']])
+        return plan
+    
+    def generate_dynamic_leveling_guide(self, character_name, profession, current_skill, target_skill, tier=None):
         """
         Generate DYNAMIC leveling guide that updates based on TODAY'S market prices
         Finds the cheapest path to level up right now
         """
+        plan = self.plan_leveling(profession, current_skill, target_skill, tier)
+        if not plan['steps']:
+            # No recipe has skill data to plan with yet
+            return self._bracket_leveling_guide(character_name, profession, current_skill, target_skill)
+        price_updated = datetime.now().strftime("%Y-%m-%d %H:%M")
         
-        cur = self.conn.cursor()
+        # One bracket per run of levels that share the optimal recipe
+        leveling_path = []
+        for step in plan['steps']:
+            leveling_path.append({
+                'skill_range': f"{step['from_skill']}-{step['to_skill']}",
+                'recommended_recipes': [{
+                    'recipe': step['recipe'],
+                    'cost_per_craft': step['cost_per_craft'],
+                    'crafts_needed': int(np.ceil(step['expected_crafts'])),
+                    'total_cost': step['expected_cost'],
+                    'materials_per_craft': step['materials'],
+                    'price_updated': price_updated
+                }]
+            })
         
-        # Get all recipes with materials for this profession
-        cur.execute("""
-            SELECT 
-                recipe_id, recipe_name, skill_tier_name,
-                materials, crafted_item_id, crafted_quantity
-            FROM goblin.recipe_reference
-            WHERE profession_name = %s
-            AND materials IS NOT NULL
-        """, (profession,))
+        guide = {
+            'character': character_name,
+            'profession': profession,
+            'current_skill': current_skill,
+            'target_skill': target_skill,
+            'points_needed': target_skill - current_skill,
+            'leveling_path': leveling_path,
+            'total_estimated_cost': plan['total_cost'],
+            'complete': plan['complete'],
+            'price_snapshot': price_updated,
+            'note': 'Prices update daily - re-run for cheapest path'
+        }
+        if not plan['complete']:
+            guide['note'] = (f"No recipe with skill data gives skill-ups at {plan['reached_skill']} - "
+                             f"path stops there")
         
-        all_recipes = []
-        for row in cur.fetchall():
-            all_recipes.append({
-                'id': row[0],
-                'name': row[1],
-                'tier': row[2],
-                'materials': row[3],
-                'crafted_item_id': row[4],
-                'crafted_quantity': row[5]
-            })
+        return guide
+
+    def _bracket_leveling_guide(self, character_name, profession, current_skill, target_skill):
+        """
+        Cheapest recipes per fixed 20-point bracket, assuming a flat skill-up
+        chance (used when recipes have no skill thresholds)
+        """
         
-        cur.close()
+        # Cost for each recipe using CURRENT market prices
+        recipes = self.analytics.recipes(profession)
+        material_costs = self.analytics.profits(profession)['material_cost']
         
-        # Calculate cost for each recipe using CURRENT market prices
         recipe_costs = []
-        for recipe in all_recipes:
-            material_cost = 0
-            for mat in recipe['materials']:
-                price = self.get_market_price(mat['item_id'])
-                material_cost += price * mat['quantity']
-            
+        for recipe, material_cost in zip(recipes.recipes, material_costs):
             recipe_costs.append({
                 'recipe': recipe['name'],
-                'cost_per_craft': material_cost,
+                'cost_per_craft': float(material_cost),
                 'materials': recipe['materials'],
                 'tier': recipe['tier']
             })
@@ -411,11 +481,11 @@ def main():
     
     print(f"\nTop {len(recipes)} Most Profitable Recipes:")
     for i, rec in enumerate(recipes[:5], 1):
-        print(f"\n{i}. {rec['recipe']}")
+        print(f"\n{i}. {rec['recipe_name']}")
         print(f"   💰 Profit: {rec['profit']:.0f}g ({rec['profit_margin']:.1f}% margin)")
         print(f"   ⏱️  Gold/Hour: {rec['gold_per_hour']:.0f}g")
-        print(f"   📊 Intelligence Score: {rec['intelligence_score']:.1f}/100")
-        print(f"   ℹ️  {rec['recommendation_reason']}")
+        print(f"   📊 Intelligence Score: {rec['score']:.1f}/100")
+        print(f"   ℹ️  {rec['recommendation']}")
     
     # Dynamic leveling guide
     print("\n" + "=" * 60)
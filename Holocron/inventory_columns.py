@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Inventory Columns - account-wide inventory as parallel arrays
+
+Every stack is one row of parallel arrays (item, character, container,
+slot, count); item ids, character names and container names are interned
+to small integer codes. Each character's rows are kept as a block so a
+re-sync replaces one character without touching the rest.
+
+Reads go through an immutable snapshot: the blocks concatenated and
+stably sorted by item code, plus per-item offsets, so one item's stacks
+are a slice and totals, per-character totals and remote-stash checks
+are bincount group-bys rather than loops over location dicts.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+COLUMNS = ('item', 'char', 'container', 'slot', 'count')
+
+
+class _Snapshot:
+    """Consolidated, read-only view of all blocks"""
+
+    def __init__(self, blocks: List[Dict[str, np.ndarray]], item_ids: List[int]):
+        n_items = len(item_ids)
+        if blocks:
+            merged = {name: np.concatenate([b[name] for b in blocks]) for name in COLUMNS}
+        else:
+            merged = {name: np.zeros(0, dtype=np.int64) for name in COLUMNS}
+        order = np.argsort(merged['item'], kind='stable')  # keeps character/slot order within an item
+        for name in COLUMNS:
+            setattr(self, name, merged[name][order])
+        self.n_items = n_items
+        self.totals = np.bincount(self.item, weights=self.count, minlength=n_items).astype(np.int64)
+        # Rows of item code c are [offsets[c], offsets[c + 1])
+        self.offsets = np.zeros(n_items + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.item, minlength=n_items), out=self.offsets[1:])
+        self.held: Optional[Dict[int, int]] = None  # item_id -> total, built on first use
+        self.code_ids = np.asarray(item_ids, dtype=np.int64)  # item code -> item_id
+
+
+class InventoryColumns:
+    def __init__(self):
+        self.item_ids: List[int] = []
+        self.characters: List[str] = []
+        self.containers: List[str] = []
+        self._codes: Dict[str, Dict] = {'item': {}, 'char': {}, 'container': {}}
+        self._blocks: Dict[int, Dict[str, np.ndarray]] = {}  # char code -> columns
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+        self._prices = (np.zeros(0, dtype=np.int64), np.zeros(0))  # sorted item ids, unit prices
+
+    def _code(self, kind: str, value, values: List) -> int:
+        codes = self._codes[kind]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    # --- Maintenance ---
+
+    def set_character(self, character: str, stacks: Iterable[Tuple[int, str, int, int]]):
+        """Replace one character's stacks: [(item_id, container, slot, count), ...]"""
+        with self._lock:
+            rows = [(self._code('item', item_id, self.item_ids),
+                     self._code('container', container, self.containers), slot, count)
+                    for item_id, container, slot, count in stacks]
+            char = self._code('char', character, self.characters)
+            block = np.array(rows, dtype=np.int64).reshape(-1, 4)
+            self._blocks[char] = {
+                'item': block[:, 0], 'char': np.full(len(block), char, dtype=np.int64),
+                'container': block[:, 1], 'slot': block[:, 2], 'count': block[:, 3],
+            }
+            self._snapshot = None
+
+    def drop_character(self, character: str):
+        with self._lock:
+            char = self._codes['char'].get(character)
+            if self._blocks.pop(char, None) is not None:
+                self._snapshot = None
+
+    def held_characters(self) -> List[str]:
+        """Characters that currently have stacks loaded"""
+        with self._lock:
+            return [self.characters[char] for char in self._blocks]
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+            self._snapshot = None
+
+    def load_locations(self, item_locations: Dict[int, List[Dict]]):
+        """Replace everything from the legacy {item_id: [{character, container, slot, count}]} shape"""
+        by_character: Dict[str, List[Tuple[int, str, int, int]]] = {}
+        for item_id, locations in item_locations.items():
+            for loc in locations:
+                by_character.setdefault(loc["character"], []).append(
+                    (item_id, loc.get("container", ""), loc.get("slot", 0), loc.get("count", 1)))
+        self.clear()
+        with self._lock:
+            for item_id in item_locations:  # Keep the caller's item order
+                self._code('item', item_id, self.item_ids)
+        for character, stacks in by_character.items():
+            self.set_character(character, stacks)
+
+    def set_prices(self, price_map: Dict[int, float]):
+        ids = np.fromiter(price_map.keys(), dtype=np.int64, count=len(price_map))
+        values = np.fromiter(price_map.values(), dtype=float, count=len(price_map))
+        order = np.argsort(ids)
+        self._prices = (ids[order], values[order])
+
+    def snapshot(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = _Snapshot(list(self._blocks.values()), list(self.item_ids))
+                snapshot = self._snapshot
+        return snapshot
+
+    # --- Queries ---
+
+    def unit_prices(self, item_ids: np.ndarray) -> np.ndarray:
+        """Price vector lookup; 0 for unpriced items"""
+        ids, values = self._prices
+        if not len(ids):
+            return np.zeros(len(item_ids))
+        pos = np.minimum(np.searchsorted(ids, item_ids), len(ids) - 1)
+        return np.where(ids[pos] == item_ids, values[pos], 0.0)
+
+    def totals(self) -> Dict[int, int]:
+        """item_id -> account-wide count, held items only (shared; do not mutate)"""
+        snap = self.snapshot()
+        if snap.held is None:
+            codes = np.flatnonzero(snap.totals > 0)
+            snap.held = dict(zip(np.asarray(self.item_ids, dtype=object)[codes].tolist(),
+                                 snap.totals[codes].tolist()))
+        return snap.held
+
+    def total(self, item_id: int) -> int:
+        code = self._codes['item'].get(item_id)
+        snap = self.snapshot()
+        return int(snap.totals[code]) if code is not None and code < snap.n_items else 0
+
+    def _location(self, snap: _Snapshot, row: int) -> Dict:
+        return {
+            "character": self.characters[snap.char[row]],
+            "container": self.containers[snap.container[row]],
+            "slot": int(snap.slot[row]),
+            "count": int(snap.count[row]),
+        }
+
+    def locations(self, item_id: int) -> List[Dict]:
+        code = self._codes['item'].get(item_id)
+        snap = self.snapshot()
+        if code is None or code >= snap.n_items:
+            return []
+        return [self._location(snap, row) for row in range(snap.offsets[code], snap.offsets[code + 1])]
+
+    def character_items(self, character: str) -> Dict[int, int]:
+        """item_id -> count held by one character"""
+        snap = self.snapshot()
+        char = self._codes['char'].get(character)
+        if char is None:
+            return {}
+        mask = snap.char == char
+        counts = np.bincount(snap.item[mask], weights=snap.count[mask], minlength=snap.n_items)
+        return {self.item_ids[c]: int(counts[c]) for c in np.flatnonzero(counts)}
+
+    def character_totals(self, item_id: Optional[int] = None) -> Dict[str, Dict]:
+        """character -> {count, stacks, items}; restricted to one item if given"""
+        snap = self.snapshot()
+        if item_id is not None:
+            code = self._codes['item'].get(item_id)
+            if code is None or code >= snap.n_items:
+                return {}
+            rows = slice(snap.offsets[code], snap.offsets[code + 1])
+            chars, items, counts = snap.char[rows], snap.item[rows], snap.count[rows]
+        else:
+            chars, items, counts = snap.char, snap.item, snap.count
+        n_chars = len(self.characters)
+        count = np.bincount(chars, weights=counts, minlength=n_chars)
+        stacks = np.bincount(chars, minlength=n_chars)
+        # Distinct items per character: mark (char, item) cells
+        seen = np.zeros((n_chars, snap.n_items), dtype=bool)
+        seen[chars, items] = True
+        distinct = seen.sum(axis=1)
+        return {
+            self.characters[c]: {"count": int(count[c]), "stacks": int(stacks[c]), "items": int(distinct[c])}
+            for c in np.flatnonzero(stacks)
+        }
+
+    def remote_stash(self, main_character: str) -> List[Dict]:
+        """Items held on alts but not on main_character, in first-seen item order"""
+        snap = self.snapshot()
+        main = self._codes['char'].get(main_character, -1)
+        on_main = np.zeros(snap.n_items, dtype=bool)
+        is_main = snap.char == main
+        on_main[snap.item[is_main]] = True
+
+        off_rows = np.flatnonzero(~is_main)
+        off_items = snap.item[off_rows]
+        totals = np.bincount(off_items, weights=snap.count[off_rows], minlength=snap.n_items)
+        # Rows are grouped by item, so an item's first off-main row is where its code changes
+        first = np.flatnonzero(np.diff(off_items, prepend=-1))
+        codes = off_items[first]
+        keep = ~on_main[codes] & (totals[codes] > 0)
+        codes, rows = codes[keep], off_rows[first[keep]]
+        item_ids, characters, containers = self.item_ids, self.characters, self.containers
+        return [
+            {"item_id": item_ids[code], "count": int(total), "character": characters[char],
+             "container": containers[container]}
+            for code, total, char, container in zip(
+                codes.tolist(), totals[codes].tolist(), snap.char[rows].tolist(), snap.container[rows].tolist())
+        ]
+
+    @staticmethod
+    def value_density(unit: np.ndarray, counts: np.ndarray,
+                      limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(order lowest slot value first, slot values); order cut to limit"""
+        slot_value = unit * counts
+        if limit is not None and limit < len(slot_value):
+            # Everything below the limit-th value, then ties in position order (as a stable sort)
+            kth = np.partition(slot_value, limit - 1)[limit - 1] if limit > 0 else -np.inf
+            below = np.flatnonzero(slot_value < kth)
+            tied = np.flatnonzero(slot_value == kth)[:max(limit - len(below), 0)]
+            cut = np.concatenate([below, tied])
+            order = cut[np.lexsort((cut, slot_value[cut]))]
+        else:
+            order = np.argsort(slot_value, kind='stable')
+        return order, slot_value
+
+    def stacks_by_value(self, character: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Held stacks ranked by slot value (lowest first), optionally for one character"""
+        snap = self.snapshot()
+        rows = np.arange(len(snap.item))
+        if character is not None:
+            char = self._codes['char'].get(character)
+            if char is None:
+                return []
+            rows = rows[snap.char == char]
+        # Price each distinct item once, then broadcast to its stacks
+        codes = snap.item[rows]
+        unit = self.unit_prices(snap.code_ids)[codes]
+        order, slot_value = self.value_density(unit, snap.count[rows], limit)
+        return [
+            {**self._location(snap, rows[i]), "item_id": int(snap.code_ids[codes[i]]),
+             "slot_value": float(slot_value[i]), "unit_price": float(unit[i])}
+            for i in order
+        ]
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Item Name Index - ranked name search for DeepPockets
+
+Structures over normalized (lowercase) item names, all updated per item:
+- name -> item ids, and a sorted name list for whole-name prefixes
+- token -> item ids (whole words)
+- sorted token vocabulary, for word-prefix lookups with bisect
+- trigram -> item ids, for substrings inside words
+- trigram -> vocabulary words, for typo-tolerant word matches
+
+Ranking: exact name > name prefix > all words matched > all word prefixes
+matched > substring > fuzzy (mean trigram Dice similarity of the words).
+"""
+
+import bisect
+import heapq
+import re
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+SCORE_EXACT = 100.0
+SCORE_PREFIX = 90.0
+SCORE_WORDS = 80.0
+SCORE_WORD_PREFIXES = 70.0
+SCORE_SUBSTRING = 60.0
+SCORE_FUZZY = 50.0  # Scaled by similarity
+FUZZY_THRESHOLD = 0.4
+
+
+def normalize(name: str) -> str:
+    return " ".join(_TOKEN_RE.findall(name.lower()))
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ItemNameIndex:
+    def __init__(self):
+        self.names: Dict[int, str] = {}
+        self._normalized: Dict[int, str] = {}
+        self._grams: Dict[int, Set[str]] = {}
+        self._token_ids: Dict[str, Set[int]] = {}
+        self._vocabulary: List[str] = []  # sorted tokens
+        self._trigram_ids: Dict[str, Set[int]] = {}
+        self._text_ids: Dict[str, Set[int]] = {}
+        self._token_grams: Dict[str, Set[str]] = {}  # vocabulary word -> trigrams
+        self._gram_tokens: Dict[str, Set[str]] = {}  # trigram -> vocabulary words
+        self._texts: List[Tuple[str, int]] = []  # sorted (normalized name, item_id)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, item_id):
+        return item_id in self.names
+
+    def name(self, item_id: int) -> Optional[str]:
+        return self.names.get(item_id)
+
+    # --- Maintenance ---
+
+    def add(self, item_id: int, name: str):
+        """Index (or rename) one item"""
+        if not name or self.names.get(item_id) == name:
+            return
+        if item_id in self.names:
+            self.remove(item_id)
+        text = normalize(name)
+        self.names[item_id] = name
+        self._normalized[item_id] = text
+        self._text_ids.setdefault(text, set()).add(item_id)
+        bisect.insort(self._texts, (text, item_id))
+        for token in set(text.split()):
+            ids = self._token_ids.get(token)
+            if ids is None:
+                ids = self._token_ids[token] = set()
+                bisect.insort(self._vocabulary, token)
+                grams = self._token_grams[token] = trigrams(token)
+                for gram in grams:
+                    self._gram_tokens.setdefault(gram, set()).add(token)
+            ids.add(item_id)
+        grams = self._grams[item_id] = trigrams(text)
+        for gram in grams:
+            self._trigram_ids.setdefault(gram, set()).add(item_id)
+
+    def update(self, names: Dict[int, str]):
+        for item_id, name in names.items():
+            self.add(item_id, name)
+
+    def remove(self, item_id: int):
+        text = self._normalized.pop(item_id, None)
+        if text is None:
+            return
+        del self.names[item_id]
+        self._text_ids[text].discard(item_id)
+        if not self._text_ids[text]:
+            del self._text_ids[text]
+        del self._texts[bisect.bisect_left(self._texts, (text, item_id))]
+        for token in set(text.split()):
+            ids = self._token_ids[token]
+            ids.discard(item_id)
+            if not ids:
+                del self._token_ids[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+                for gram in self._token_grams.pop(token):
+                    words = self._gram_tokens[gram]
+                    words.discard(token)
+                    if not words:
+                        del self._gram_tokens[gram]
+        for gram in self._grams.pop(item_id):
+            ids = self._trigram_ids[gram]
+            ids.discard(item_id)
+            if not ids:
+                del self._trigram_ids[gram]
+
+    # --- Search ---
+
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        """Items with a word starting with prefix"""
+        vocabulary = self._vocabulary
+        i = bisect.bisect_left(vocabulary, prefix)
+        ids = set()
+        while i < len(vocabulary) and vocabulary[i].startswith(prefix):
+            ids |= self._token_ids[vocabulary[i]]
+            i += 1
+        return ids
+
+    def _name_prefix_ids(self, prefix: str) -> Set[int]:
+        """Items whose whole normalized name starts with prefix"""
+        texts = self._texts
+        i = bisect.bisect_left(texts, (prefix, -1))
+        ids = set()
+        while i < len(texts) and texts[i][0].startswith(prefix):
+            ids.add(texts[i][1])
+            i += 1
+        return ids
+
+    def _all_tokens_ids(self, query_tokens: List[str], lookup) -> Set[int]:
+        result = None
+        for token in sorted(query_tokens, key=len, reverse=True):
+            ids = lookup(token)
+            result = set(ids) if result is None else result & ids
+            if not result:
+                return set()
+        return result
+
+    def _substring_ids(self, query: str, query_grams: Set[str]) -> Set[int]:
+        """Names containing query anywhere ("otion"): every inner trigram must be present"""
+        inner = {g for g in query_grams if not g.startswith(' ') and not g.endswith(' ')} or query_grams
+        postings = sorted((self._trigram_ids.get(g, set()) for g in inner), key=len)
+        if not postings or not postings[0]:
+            return set()
+        found = set(postings[0])
+        for ids in postings[1:]:
+            found &= ids
+            if not found:
+                return found
+        return {item_id for item_id in found if query in self._normalized[item_id]}
+
+    def _similar_tokens(self, token: str) -> Dict[str, float]:
+        """Vocabulary words within FUZZY_THRESHOLD trigram similarity of token"""
+        grams = trigrams(token)
+        pool = set()
+        for gram in grams:
+            pool |= self._gram_tokens.get(gram, set())
+        similar = {}
+        for word in pool:
+            word_grams = self._token_grams[word]
+            dice = 2 * len(grams & word_grams) / (len(grams) + len(word_grams))
+            if dice >= FUZZY_THRESHOLD:
+                similar[word] = dice
+        return similar
+
+    def _fuzzy(self, query_tokens: List[str], skip: Set[int], within) -> Dict[int, float]:
+        """
+        Every query word matches a word of the name by prefix or, failing
+        that, by typo-tolerant similarity; score is the mean similarity.
+        """
+        candidates = None
+        similarity: List[Dict[int, float]] = []
+        for token in sorted(query_tokens, key=len, reverse=True):
+            ids = self._prefix_ids(token)
+            if not ids and len(token) >= 3:
+                best: Dict[int, float] = {}
+                for word, dice in self._similar_tokens(token).items():
+                    for item_id in self._token_ids[word]:
+                        if dice > best.get(item_id, 0):
+                            best[item_id] = dice
+                similarity.append(best)
+                ids = best.keys()
+            candidates = set(ids) if candidates is None else candidates & ids
+            if not candidates:
+                return {}
+        if not similarity:
+            return {}  # Nothing was fuzzy: same as the word-prefix tier
+        candidates -= skip
+        if within is not None:
+            candidates &= within
+        n = len(query_tokens)
+        return {item_id: SCORE_FUZZY * (n - len(similarity) + sum(sim[item_id] for sim in similarity)) / n
+                for item_id in candidates}
+
+    def search(self, query: str, limit: int = 20, within=None,
+               tiebreak: Optional[Callable[[int], float]] = None) -> List[Tuple[int, float]]:
+        """
+        Best matching (item_id, score) pairs, highest first.
+
+        within: set-like of allowed item ids (e.g. inventory.keys()).
+        tiebreak(item_id): orders equal scores, higher first (e.g. count held);
+        then shorter names first.
+        """
+        query = normalize(query)
+        query_tokens = query.split()
+        if not query_tokens or limit <= 0:
+            return []
+        query_grams = trigrams(query) if len(query) >= 3 else set()
+
+        # Tiers best-first; each is a set computed with set operations so only
+        # the items that make the cut are ever looked at individually
+        tiers = (
+            (SCORE_EXACT, lambda: self._text_ids.get(query, set())),
+            (SCORE_PREFIX, lambda: self._name_prefix_ids(query)),
+            (SCORE_WORDS, lambda: self._all_tokens_ids(query_tokens, lambda t: self._token_ids.get(t, set()))),
+            (SCORE_WORD_PREFIXES, lambda: self._all_tokens_ids(query_tokens, self._prefix_ids)),
+            (SCORE_SUBSTRING, lambda: self._substring_ids(query, query_grams) if query_grams else set()),
+        )
+        tiebreak = tiebreak or (lambda item_id: 0)
+        order = lambda item_id: (-tiebreak(item_id), len(self._normalized[item_id]), item_id)
+        taken: Set[int] = set()
+        ranked: List[Tuple[int, float]] = []
+        for score, build in tiers:
+            ids = build() - taken
+            if within is not None:
+                ids &= within
+            if not ids:
+                continue
+            chosen = heapq.nsmallest(limit - len(ranked), ids, key=order)
+            ranked.extend((item_id, score) for item_id in chosen)
+            taken.update(ids)
+            if len(ranked) >= limit:
+                return ranked
+
+        fuzzy = self._fuzzy(query_tokens, taken, within)
+        if fuzzy:
+            chosen = heapq.nsmallest(limit - len(ranked), fuzzy,
+                                     key=lambda item_id: (-fuzzy[item_id],) + order(item_id))
+            ranked.extend((item_id, fuzzy[item_id]) for item_id in chosen)
+        return ranked
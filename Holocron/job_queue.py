@@ -0,0 +1,409 @@
+"""
+job_queue.py - Embedded background job queue for the Holocron server
+
+Long-running work (SavedVariables ingestion, SimC runs, route optimization,
+logistics job generation) used to run inside Flask request threads. Routes
+now submit a job here and return its id; a small worker pool executes jobs
+and clients poll /api/jobs/<id> for status, progress and the result.
+
+Jobs are persisted in SQLite so status survives a restart. A running job
+holds a lease that its process renews while it runs; jobs whose lease ran
+out (their process died) are re-queued. Several processes can share one
+database: a job is claimed only if it is still queued, and only the
+process holding its lease records progress or the outcome.
+
+Usage:
+    queue = JobQueue("jobs.db")
+    queue.register("sandbox_run", run_sim_job, concurrency=1, cache_ttl=3600)
+    queue.start()
+    job_id = queue.submit("sandbox_run", {"simc_input": "..."})
+    queue.get(job_id)  # {"status": "running", "progress": 0.4, ...}
+
+Handlers are called as handler(payload, progress) where
+progress(fraction, message=None) records how far along the job is.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    job_type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT,
+    result TEXT,
+    error TEXT,
+    cache_key TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 1,
+    progress REAL NOT NULL DEFAULT 0,
+    progress_message TEXT,
+    created_at REAL NOT NULL,
+    run_after REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner TEXT,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, run_after);
+CREATE INDEX IF NOT EXISTS idx_jobs_cache ON jobs (job_type, cache_key, status);
+"""
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobType:
+    def __init__(self, name: str, handler: Callable, concurrency: int, max_attempts: int,
+                 retry_delay: float, cache_ttl: Optional[float]):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.cache_ttl = cache_ttl
+
+
+class JobQueue:
+    """SQLite-backed job queue with a shared worker pool."""
+
+    def __init__(self, db_path: str, max_workers: int = 4, poll_interval: float = 1.0,
+                 history_ttl: float = 7 * 24 * 3600, lease_seconds: float = 60.0):
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.history_ttl = history_ttl
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex
+
+        self.job_types: Dict[str, JobType] = {}
+        self._running: Dict[str, int] = {}
+        # job id -> (fraction, message) not yet written; flushed by the dispatcher
+        self._progress: Dict[str, tuple] = {}
+        self._renewed_at = 0.0
+        self._db_lock = threading.Lock()
+        self._wake = threading.Condition()
+        self._stop = False
+        self._submitted = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._db_lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            # Databases created before leases existed
+            columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, sql_type in (("owner", "TEXT"), ("lease_until", "REAL")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {sql_type}")
+            self._conn.commit()
+
+    # ------------------------------------------------------------------
+    # Registration & submission
+    # ------------------------------------------------------------------
+
+    def register(self, job_type: str, handler: Callable, concurrency: int = 1, max_attempts: int = 1,
+                 retry_delay: float = 5.0, cache_ttl: Optional[float] = None):
+        """
+        Register a handler for `job_type`.
+
+        concurrency  - max jobs of this type running at once
+        max_attempts - total tries before a job is marked failed
+        retry_delay  - base backoff in seconds (doubles per attempt)
+        cache_ttl    - reuse a finished job with the same payload for this many seconds
+        """
+        self.job_types[job_type] = JobType(job_type, handler, concurrency, max_attempts, retry_delay, cache_ttl)
+        self._running.setdefault(job_type, 0)
+
+    @staticmethod
+    def cache_key_for(payload: Any) -> str:
+        raw = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(raw).hexdigest()
+
+    def submit(self, job_type: str, payload: Any = None, cache_key: Optional[str] = None) -> str:
+        """
+        Queue a job and return its id.
+
+        Identical submissions are coalesced: if a job with the same cache key is
+        already queued/running, or finished within the type's cache_ttl, that
+        job's id is returned instead of queueing new work.
+        """
+        spec = self.job_types.get(job_type)
+        if not spec:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        if cache_key is None and spec.cache_ttl:
+            cache_key = self.cache_key_for(payload)
+
+        now = time.time()
+        with self._db_lock:
+            if cache_key:
+                row = self._conn.execute(
+                    """
+                    SELECT id FROM jobs
+                    WHERE job_type = ? AND cache_key = ?
+                      AND (status IN (?, ?) OR (status = ? AND finished_at >= ?))
+                    ORDER BY created_at DESC LIMIT 1
+                    """,
+                    (job_type, cache_key, QUEUED, RUNNING, DONE, now - (spec.cache_ttl or 0)),
+                ).fetchone()
+                if row:
+                    return row["id"]
+
+            job_id = uuid.uuid4().hex
+            self._conn.execute(
+                """
+                INSERT INTO jobs (id, job_type, status, payload, cache_key, max_attempts, created_at, run_after)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (job_id, job_type, QUEUED, json.dumps(payload), cache_key, spec.max_attempts, now, now),
+            )
+            self._conn.commit()
+
+        with self._wake:
+            self._submitted = True
+            self._wake.notify()
+        return job_id
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _row_to_dict(row: sqlite3.Row, include_result: bool = True) -> Dict:
+        job = {
+            "job_id": row["id"],
+            "type": row["job_type"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "max_attempts": row["max_attempts"],
+            "progress": row["progress"],
+            "progress_message": row["progress_message"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "error": row["error"],
+        }
+        if include_result:
+            job["result"] = json.loads(row["result"]) if row["result"] else None
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._db_lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            pending = self._progress.get(job_id)
+        if not row:
+            return None
+        job = self._row_to_dict(row)
+        if pending and job["status"] == RUNNING:
+            job["progress"], job["progress_message"] = pending
+        return job
+
+    def list_jobs(self, job_type: Optional[str] = None, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        query = "SELECT * FROM jobs WHERE 1=1"
+        params: List[Any] = []
+        if job_type:
+            query += " AND job_type = ?"
+            params.append(job_type)
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._db_lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._row_to_dict(r, include_result=False) for r in rows]
+
+    def stats(self) -> Dict:
+        """Per-type status counts plus live worker usage."""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT job_type, status, COUNT(*) AS n FROM jobs GROUP BY job_type, status"
+            ).fetchall()
+        counts: Dict[str, Dict[str, int]] = {}
+        for r in rows:
+            counts.setdefault(r["job_type"], {})[r["status"]] = r["n"]
+        return {
+            "workers": self.max_workers,
+            "running": dict(self._running),
+            "limits": {name: spec.concurrency for name, spec in self.job_types.items()},
+            "counts": counts,
+        }
+
+    def wait(self, job_id: str, timeout: float = 30.0) -> Optional[Dict]:
+        """Block until the job finishes (or timeout). Mostly for tests and CLI use."""
+        deadline = time.time() + timeout
+        while True:
+            job = self.get(job_id)
+            if not job or job["status"] in (DONE, FAILED) or time.time() >= deadline:
+                return job
+            time.sleep(0.02)
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Recover jobs whose lease expired and start the dispatcher."""
+        if self._dispatcher:
+            return
+        with self._db_lock:
+            self._requeue_expired(time.time())
+            self._conn.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                               (time.time() - self.history_ttl,))
+            self._conn.commit()
+        self._stop = False
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job-worker")
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="job-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def stop(self, wait: bool = True):
+        with self._wake:
+            self._stop = True
+            self._wake.notify_all()
+        if self._dispatcher:
+            self._dispatcher.join()
+            self._dispatcher = None
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        self._heartbeat(renew=False)
+
+    def _dispatch_loop(self):
+        while True:
+            with self._wake:
+                if self._stop:
+                    return
+            self._heartbeat()
+            claimed = self._claim_ready()
+            for row in claimed:
+                self._executor.submit(self._execute, row)
+            with self._wake:
+                if self._stop:
+                    return
+                if not claimed and not self._submitted:
+                    self._wake.wait(self.poll_interval)
+                self._submitted = False
+
+    def _requeue_expired(self, now: float):
+        """Re-queue RUNNING jobs whose owner stopped renewing the lease (caller holds _db_lock)."""
+        self._conn.execute(
+            "UPDATE jobs SET status = ?, owner = NULL WHERE status = ? AND (lease_until IS NULL OR lease_until < ?)",
+            (QUEUED, RUNNING, now),
+        )
+
+    def _heartbeat(self, renew: Optional[bool] = None):
+        """Write buffered progress and, every third of a lease, renew this process's leases."""
+        now = time.time()
+        if renew is None:
+            renew = now - self._renewed_at >= self.lease_seconds / 3
+        with self._db_lock:
+            updates = list(self._progress.items())
+            self._progress.clear()
+            if not updates and not renew:
+                return
+            self._conn.executemany(
+                "UPDATE jobs SET progress = ?, progress_message = ? WHERE id = ? AND status = ? AND owner = ?",
+                [(fraction, message, job_id, RUNNING, self.owner) for job_id, (fraction, message) in updates],
+            )
+            if renew:
+                self._conn.execute("UPDATE jobs SET lease_until = ? WHERE owner = ? AND status = ?",
+                                   (now + self.lease_seconds, self.owner, RUNNING))
+                self._requeue_expired(now)
+                self._renewed_at = now
+            self._conn.commit()
+
+    def _claim_ready(self) -> List[sqlite3.Row]:
+        """Move runnable jobs to RUNNING, respecting per-type and global limits."""
+        claimed = []
+        now = time.time()
+        with self._db_lock:
+            free_workers = self.max_workers - sum(self._running.values())
+            if free_workers <= 0:
+                return claimed
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = ? AND run_after <= ? ORDER BY created_at",
+                (QUEUED, now),
+            ).fetchall()
+            for row in rows:
+                job_type = row["job_type"]
+                spec = self.job_types.get(job_type)
+                if not spec or self._running[job_type] >= spec.concurrency:
+                    continue
+                # Another process may have claimed it since the SELECT
+                cursor = self._conn.execute(
+                    """
+                    UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1,
+                                    owner = ?, lease_until = ?
+                    WHERE id = ? AND status = ?
+                    """,
+                    (RUNNING, now, self.owner, now + self.lease_seconds, row["id"], QUEUED),
+                )
+                if cursor.rowcount != 1:
+                    continue
+                self._running[job_type] += 1
+                claimed.append(row)
+                if len(claimed) >= free_workers:
+                    break
+            self._conn.commit()
+        return claimed
+
+    def _set_progress(self, job_id: str, fraction: float, message: Optional[str] = None):
+        # Buffered; the dispatcher writes the latest value once per poll
+        with self._db_lock:
+            self._progress[job_id] = (max(0.0, min(1.0, fraction)), message)
+
+    def _execute(self, row: sqlite3.Row):
+        job_id = row["id"]
+        spec = self.job_types[row["job_type"]]
+        payload = json.loads(row["payload"]) if row["payload"] else None
+        progress = lambda fraction, message=None: self._set_progress(job_id, fraction, message)
+
+        try:
+            result = spec.handler(payload, progress)
+            with self._db_lock:
+                _, message = self._progress.pop(job_id, (None, None))
+                self._conn.execute(
+                    """
+                    UPDATE jobs SET status = ?, result = ?, progress = 1,
+                                    progress_message = COALESCE(?, progress_message),
+                                    finished_at = ?, error = NULL, owner = NULL
+                    WHERE id = ? AND owner = ?
+                    """,
+                    (DONE, json.dumps(result, default=str), message, time.time(), job_id, self.owner),
+                )
+                self._conn.commit()
+        except Exception as e:
+            print(f"[Jobs] {spec.name} {job_id} failed (attempt {row['attempts'] + 1}/{spec.max_attempts}): {e}")
+            with self._db_lock:
+                self._progress.pop(job_id, None)
+                attempts = row["attempts"] + 1
+                if attempts < spec.max_attempts:
+                    backoff = spec.retry_delay * (2 ** (attempts - 1))
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, run_after = ?, owner = NULL WHERE id = ? AND owner = ?",
+                        (QUEUED, str(e), time.time() + backoff, job_id, self.owner),
+                    )
+                else:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, finished_at = ?, owner = NULL WHERE id = ? AND owner = ?",
+                        (FAILED, str(e), time.time(), job_id, self.owner),
+                    )
+                self._conn.commit()
+        finally:
+            with self._db_lock:
+                self._running[spec.name] -= 1
+            with self._wake:
+                self._submitted = True
+                self._wake.notify()
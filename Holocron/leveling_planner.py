@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Profession Leveling Planner
+Finds the cheapest expected way to level a profession at current prices.
+
+Skill-up model (one point per successful craft):
+- below the recipe's required skill: can't craft
+- orange (skill < yellow): always skills up
+- yellow..gray: chance falls linearly, (gray - skill) / (gray - yellow)
+- gray and above: never skills up
+
+Expected crafts to gain a point at skill s with recipe r is 1 / p_r(s), so
+the minimum expected gold to reach skill T from s is
+
+    V(T) = 0
+    V(s) = min_r  cost_r / p_r(s) + V(s + 1)
+
+solved for every level at once with array maths.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Band offsets from the required skill, used when a recipe only has skill_required
+YELLOW_OFFSET = 10
+GREEN_OFFSET = 15
+GRAY_OFFSET = 20
+
+CRAFT_TIEBREAK = 1e-6  # Gold-equivalent of one extra craft, only to break ties
+
+
+def skill_bands(required, yellow=None, green=None, gray=None):
+    """Fill in missing colour thresholds (NaN) from the required skill."""
+    required = np.asarray(required, dtype=float)
+
+    def band(values, offset):
+        if values is None:
+            return required + offset
+        values = np.asarray(values, dtype=float)
+        return np.where(np.isnan(values), required + offset, values)
+
+    return required, band(yellow, YELLOW_OFFSET), band(green, GREEN_OFFSET), band(gray, GRAY_OFFSET)
+
+
+def skill_up_chance(skill, required, yellow, gray):
+    """Chance that one craft gives a skill point (broadcasts over arrays)."""
+    skill = np.asarray(skill, dtype=float)
+    span = np.maximum(gray - yellow, 1e-9)
+    chance = np.clip((gray - skill) / span, 0.0, 1.0)
+    chance = np.where(skill < yellow, 1.0, chance)
+    # NaN required (no skill data) compares False, so those recipes stay unusable
+    return np.where(skill >= required, chance, 0.0)
+
+
+class LevelingPlanner:
+    """Per-level optimal recipe and expected cost for one set of recipes and prices."""
+
+    def __init__(self, required, yellow, gray, cost_per_craft, max_skill: Optional[int] = None):
+        self.required = np.asarray(required, dtype=float)
+        self.yellow = np.asarray(yellow, dtype=float)
+        self.gray = np.asarray(gray, dtype=float)
+        cost = np.asarray(cost_per_craft, dtype=float)
+
+        known = ~np.isnan(self.gray)
+        if max_skill is None:
+            max_skill = int(np.nanmax(self.gray)) if known.any() else 0
+        self.max_skill = max_skill
+
+        levels = np.arange(max_skill, dtype=float)[:, None]
+        chance = skill_up_chance(levels, self.required, self.yellow, self.gray)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            expected = np.where(chance > 0, cost / chance, np.inf)
+
+        if expected.shape[1]:
+            # Among equally cheap recipes prefer the one needing fewer crafts
+            with np.errstate(divide='ignore'):
+                tiebreak = CRAFT_TIEBREAK / chance
+            self.best_recipe = (expected + tiebreak).argmin(axis=1)
+            rows = np.arange(max_skill)
+            self.step_cost = expected[rows, self.best_recipe]
+            self.step_chance = chance[rows, self.best_recipe]
+        else:
+            self.best_recipe = np.zeros(max_skill, dtype=np.int64)
+            self.step_cost = np.full(max_skill, np.inf)
+            self.step_chance = np.zeros(max_skill)
+
+    def plan(self, current: int, target: int) -> Dict:
+        """
+        Optimal plan from current to target skill. Consecutive levels using
+        the same recipe are merged into one step. If some level has no
+        usable recipe the plan stops there with complete=False.
+        """
+        current = max(int(current), 0)
+        target = int(target)
+        steps: List[Dict] = []
+        total = 0.0
+        reached = current
+
+        for level in range(current, target):
+            if level >= self.max_skill or not np.isfinite(self.step_cost[level]):
+                break
+            recipe = int(self.best_recipe[level])
+            crafts = 1.0 / self.step_chance[level]
+            if steps and steps[-1]["recipe_index"] == recipe:
+                step = steps[-1]
+            else:
+                step = {"recipe_index": recipe, "from_skill": level, "to_skill": level,
+                        "expected_crafts": 0.0, "expected_cost": 0.0}
+                steps.append(step)
+            step["to_skill"] = level + 1
+            step["expected_crafts"] += crafts
+            step["expected_cost"] += float(self.step_cost[level])
+            total += float(self.step_cost[level])
+            reached = level + 1
+
+        return {
+            "current_skill": current,
+            "target_skill": target,
+            "reached_skill": max(reached, current),
+            "complete": reached >= target,
+            "total_cost": total,
+            "steps": steps,
+        }
@@ -3,58 +3,133 @@
 
 import sys
 import os
+import math
 from sandbox import Sandbox
+from sim_runner import SimRunner
 
 class LoadoutLottery:
-    def __init__(self):
+    def __init__(self, runner=None):
         self.sandbox = Sandbox()
+        self.runner = runner or SimRunner(self.sandbox)
         
-    def run_comparison(self, base_simc, talent_strings):
+    def build_profiles(self, base_simc, talent_strings):
         """
-        Runs a batch simulation comparing multiple talent strings.
+        One standalone profile per loadout (base first) so each can run as
+        its own SimC process and be cached independently.
         """
-        batch_input = ""
+        profiles = [("Base", base_simc)]
+        for i, talent_str in enumerate(talent_strings):
+            profiles.append((f"Loadout_{i+1}", f"{base_simc}\ntalents={talent_str}\n"))
+        return profiles
         
-        # Base profile
-        batch_input += base_simc + "\n\n"
+    @staticmethod
+    def _pool(entry, res, iterations):
+        """Fold a new independent sim into the candidate's running estimate."""
+        n_prev = entry["iterations"]
+        n_total = n_prev + iterations
+        err_prev = entry["dps_error"] or 0.0
+        err_new = res.get("dps_error") or 0.0
+        entry["dps"] = (entry["dps"] * n_prev + res["dps"] * iterations) / n_total
+        entry["dps_error"] = math.sqrt((err_prev * n_prev) ** 2 + (err_new * iterations) ** 2) / n_total
+        entry["iterations"] = n_total
+        entry["result"] = res
         
-        # Variations
-        for i, talent_str in enumerate(talent_strings):
-            batch_input += f"copy=Loadout_{i+1}\n"
-            batch_input += f"talents={talent_str}\n\n"
-            
-        print(f"Running comparison for {len(talent_strings)} loadouts...")
+    def run_comparison(self, base_simc, talent_strings, min_iterations=250, max_iterations=10000,
+                       growth=4, confidence_z=1.96, progress=None):
+        """
+        Races the base profile and every talent string against each other.
         
-        # Run SimC (using sandbox)
-        # Note: Sandbox currently runs single sim. We might need to adjust for batch.
-        # But SimC JSON output for batch contains multiple players.
+        All candidates start at `min_iterations`. After each round, any
+        candidate whose upper confidence bound (dps + z * error) is below the
+        leader's lower bound is dropped; survivors are simmed again with
+        `growth`x the iterations and their estimates pooled. The race stops
+        when one candidate is left or the leader reaches `max_iterations`.
         
-        # Run SimC (using sandbox)
-        results = self.sandbox.run_sim(batch_input, iterations=1000)
+        `progress(fraction, message)` is called after each round.
+        """
+        profiles = self.build_profiles(base_simc, talent_strings)
+        print(f"Racing {len(talent_strings)} loadouts ({min_iterations}-{max_iterations} iterations)...")
         
-        if not results:
+        entries = [
+            {"name": name, "profile": profile, "dps": 0.0, "dps_error": None,
+             "iterations": 0, "result": None, "eliminated_round": None}
+            for name, profile in profiles
+        ]
+        alive = entries
+        rounds = []
+        iterations = min_iterations
+        iterations_used = 0
+        
+        while alive:
+            for i, res in self.runner.run_iter([e["profile"] for e in alive], iterations=iterations):
+                if res:
+                    self._pool(alive[i], res, iterations)
+            iterations_used += iterations * len(alive)
+            alive = [e for e in alive if e["result"]]
+            if not alive:
+                break
+                
+            leader = max(alive, key=lambda e: e["dps"])
+            bar = leader["dps"] - confidence_z * (leader["dps_error"] or 0.0)
+            survivors = [e for e in alive
+                         if e is leader or e["dps"] + confidence_z * (e["dps_error"] or 0.0) >= bar]
+            for e in alive:
+                if e not in survivors:
+                    e["eliminated_round"] = len(rounds) + 1
+                    
+            rounds.append({
+                "iterations": iterations,
+                "candidates": len(alive),
+                "survivors": len(survivors),
+                "leader": leader["name"],
+                "leader_dps": leader["dps"],
+            })
+            print(f"Round {len(rounds)}: {len(alive)} sims x {iterations} iterations, "
+                  f"{len(survivors)} still in range of {leader['name']} ({leader['dps']:.0f} DPS)")
+            if progress:
+                progress(min(1.0, leader["iterations"] / max_iterations),
+                         f"round {len(rounds)}: {len(survivors)} loadouts left")
+                
+            alive = survivors
+            remaining = max_iterations - leader["iterations"]
+            if len(alive) == 1 or remaining <= 0:
+                break
+            iterations = min(iterations * growth, remaining)
+            
+        finished = [e for e in entries if e["result"]]
+        if not finished:
             print("Simulation failed.")
             return
             
-        # Ensure results is a list
-        if not isinstance(results, list):
-            results = [results]
-            
-        # Find winner
-        winner = max(results, key=lambda x: x['dps'])
+        # Winner is the best estimate among the candidates still in the race
+        contenders = alive or finished
+        best = max(contenders, key=lambda e: e["dps"])
+        
+        standings = sorted(finished, key=lambda e: e["dps"], reverse=True)
         
         print("-" * 40)
-        print(f"Simulation Complete: {len(results)} profiles simulated.")
+        print(f"Race Complete: {len(finished)} profiles, {iterations_used} iterations "
+              f"(fixed {max_iterations} would need {len(finished) * max_iterations}).")
         print("-" * 40)
         
-        for res in results:
-            is_winner = "*" if res == winner else " "
-            print(f"{is_winner} {res['name']}: {res['dps']:.0f} DPS")
+        for e in standings:
+            is_winner = "*" if e is best else " "
+            err = e["dps_error"] or 0.0
+            print(f"{is_winner} {e['name']}: {e['dps']:.0f} ± {confidence_z * err:.0f} DPS ({e['iterations']} it)")
             
         print("-" * 40)
-        print(f"Winner: {winner['name']} with {winner['dps']:.0f} DPS")
-        print(f"Talents: {winner['talents']}")
+        print(f"Winner: {best['name']} with {best['dps']:.0f} DPS")
+        print(f"Talents: {best['result'].get('talents')}")
         
+        winner = dict(best["result"], name=best["name"], dps=best["dps"],
+                      dps_error=best["dps_error"], iterations=best["iterations"])
+        winner["standings"] = [
+            {"name": e["name"], "dps": e["dps"], "dps_error": e["dps_error"],
+             "iterations": e["iterations"], "eliminated_round": e["eliminated_round"]}
+            for e in standings
+        ]
+        winner["rounds"] = rounds
+        winner["iterations_used"] = iterations_used
         return winner
 
 if __name__ == "__main__":
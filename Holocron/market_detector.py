@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Market Detector - streaming reset/dump/crash/scarcity detection over AH scans
+
+Per-item state lives in dense arrays (one row per item, interned on first
+sight): a ring buffer of the last `window` prices and quantities. Each
+scan is written in one vectorized step; before writing, the rules are
+evaluated for every item in the scan at once against that item's rolling
+median, MAD-based z-score and previous point:
+
+- MARKET_RESET: price > reset_threshold x previous (0.9 confidence when
+  the supply dropped by half, else 0.6)
+- PRICE_CRASH: price < dump_threshold x previous (dumping)
+- FLASH_CRASH: price more than crash_drop below the rolling median
+- ARTIFICIAL_SCARCITY: one seller holds >= scarcity_share of the listings
+  and the price is scarcity_markup x the rolling median
+
+Alerts are edge triggered: an item raises a rule's alert when the rule
+starts to hold and stays quiet while it keeps holding, so callers get
+only what is new in each scan instead of re-analysing the history.
+
+One lock guards the state, so a detector can be shared between request
+threads.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+RULES = ('MARKET_RESET', 'PRICE_CRASH', 'FLASH_CRASH', 'ARTIFICIAL_SCARCITY')
+MAD_SCALE = 1.4826  # MAD -> standard deviation for normal data
+
+
+def _rolling_median(values: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Row medians of the first counts[i] valid entries of each row (NaN padded)."""
+    ordered = np.sort(values, axis=1)  # NaN sorts last
+    rows = np.arange(len(values))
+    low = ordered[rows, np.maximum((counts - 1) // 2, 0)]
+    high = ordered[rows, np.maximum(counts // 2, 0)]
+    return np.where(counts > 0, (low + high) / 2, np.nan)
+
+
+class StreamingMarketDetector:
+    def __init__(self, window: int = 48, min_history: int = 5,
+                 reset_threshold: float = 2.0, dump_threshold: float = 0.5,
+                 crash_drop: float = 0.4, scarcity_share: float = 0.8,
+                 scarcity_markup: float = 1.5):
+        self.window = window
+        self.min_history = min_history  # points including the current one
+        self.reset_threshold = reset_threshold
+        self.dump_threshold = dump_threshold
+        self.crash_drop = crash_drop
+        self.scarcity_share = scarcity_share
+        self.scarcity_markup = scarcity_markup
+
+        self.item_ids: List[int] = []
+        self._rows: Dict[int, int] = {}
+        self._prices = np.full((0, window), np.nan)
+        self._quantities = np.zeros((0, window))
+        self._count = np.zeros(0, dtype=np.int64)  # points seen (capped at window for stats)
+        self._head = np.zeros(0, dtype=np.int64)   # next ring slot
+        self._active = np.zeros((0, len(RULES)), dtype=bool)
+        self._last_scan = None
+        self.scans = 0
+        self._lock = threading.RLock()
+
+    def _row_codes(self, item_ids: Sequence[int]) -> np.ndarray:
+        rows = self._rows
+        codes = np.fromiter((rows.setdefault(item_id, len(rows)) for item_id in item_ids),
+                            dtype=np.int64, count=len(item_ids))
+        if len(rows) > len(self.item_ids):
+            self.item_ids.extend(list(rows)[len(self.item_ids):])
+            grow = len(rows) - len(self._count)
+            self._prices = np.vstack([self._prices, np.full((grow, self.window), np.nan)])
+            self._quantities = np.vstack([self._quantities, np.zeros((grow, self.window))])
+            self._count = np.concatenate([self._count, np.zeros(grow, dtype=np.int64)])
+            self._head = np.concatenate([self._head, np.zeros(grow, dtype=np.int64)])
+            self._active = np.vstack([self._active, np.zeros((grow, len(RULES)), dtype=bool)])
+        return codes
+
+    def stats(self, item_ids: Optional[Sequence[int]] = None) -> Dict[str, np.ndarray]:
+        """Rolling median, MAD and point count per item (all items by default)."""
+        with self._lock:
+            return self._stats(item_ids)
+
+    def _stats(self, item_ids: Optional[Sequence[int]]) -> Dict[str, np.ndarray]:
+        rows = (np.arange(len(self.item_ids)) if item_ids is None
+                else np.array([self._rows.get(i, -1) for i in item_ids], dtype=np.int64))
+        known = rows >= 0
+        rows = np.where(known, rows, 0)
+        if not len(self.item_ids):
+            nan = np.full(len(rows), np.nan)
+            return {'median': nan, 'mad': nan.copy(), 'count': np.zeros(len(rows), dtype=np.int64)}
+        counts = np.where(known, np.minimum(self._count[rows], self.window), 0)
+        prices = self._prices[rows]
+        median = _rolling_median(prices, counts)
+        mad = _rolling_median(np.abs(prices - median[:, None]), counts)
+        return {'median': median, 'mad': mad, 'count': counts}
+
+    def update(self, item_ids: Sequence[int], prices: Sequence[float],
+               quantities: Optional[Sequence[float]] = None,
+               seller_shares: Optional[Sequence[float]] = None,
+               timestamp: Optional[float] = None) -> List[Dict]:
+        """
+        Ingest one scan (one entry per item) and return the alerts it raises.
+        A scan identical to the previous one is ignored.
+        """
+        with self._lock:
+            return self._update(item_ids, prices, quantities, seller_shares, timestamp)
+
+    def _update(self, item_ids: Sequence[int], prices: Sequence[float], quantities: Optional[Sequence[float]],
+                seller_shares: Optional[Sequence[float]], timestamp: Optional[float]) -> List[Dict]:
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        prices = np.asarray(prices, dtype=float)
+        quantities = np.zeros(len(item_ids)) if quantities is None else np.asarray(quantities, dtype=float)
+        shares = np.zeros(len(item_ids)) if seller_shares is None else np.asarray(seller_shares, dtype=float)
+        scan = (item_ids, prices, quantities, shares)
+        if self._last_scan is not None and all(
+                len(a) == len(b) and np.array_equal(a, b) for a, b in zip(scan, self._last_scan)):
+            return []
+        self._last_scan = scan
+        self.scans += 1
+        timestamp = time.time() if timestamp is None else timestamp
+
+        # Ignore unpriced entries; keep the last entry of an item listed twice
+        priced = np.flatnonzero(prices > 0)
+        _, last = np.unique(item_ids[priced][::-1], return_index=True)
+        keep = priced[len(priced) - 1 - last]
+        item_ids, prices, quantities, shares = item_ids[keep], prices[keep], quantities[keep], shares[keep]
+        rows = self._row_codes(item_ids.tolist())
+
+        # Statistics of the history before this scan
+        history = self._count[rows]
+        previous_slot = (self._head[rows] - 1) % self.window
+        previous_price = self._prices[rows, previous_slot]
+        previous_quantity = self._quantities[rows, previous_slot]
+        counts = np.minimum(history, self.window)
+        window_prices = self._prices[rows]
+        median = _rolling_median(window_prices, counts)
+        mad = _rolling_median(np.abs(window_prices - median[:, None]), counts)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = prices / previous_price
+            volume_change = np.where(previous_quantity > 0, quantities / previous_quantity, 1.0)
+            z = (prices - median) / (MAD_SCALE * mad)
+            drop = (median - prices) / median
+        enough = history + 1 >= self.min_history
+        holds = np.stack([
+            enough & (change > self.reset_threshold),
+            enough & (change < self.dump_threshold),
+            enough & (drop > self.crash_drop),
+            enough & (shares >= self.scarcity_share) & (prices > median * self.scarcity_markup),
+        ], axis=1)
+        fresh = holds & ~self._active[rows]
+        self._active[rows] = holds
+
+        # Write the scan into the rings
+        head = self._head[rows]
+        self._prices[rows, head] = prices
+        self._quantities[rows, head] = quantities
+        self._head[rows] = (head + 1) % self.window
+        self._count[rows] = history + 1
+
+        alerts = []
+        for i, rule in zip(*np.nonzero(fresh)):
+            alerts.append(self._alert(RULES[rule], int(item_ids[i]), timestamp, float(prices[i]),
+                                      float(change[i]), float(volume_change[i]), float(median[i]),
+                                      float(z[i]), float(drop[i]), float(shares[i])))
+        return alerts
+
+    def update_scan(self, scan_data: Iterable[Dict], timestamp: Optional[float] = None) -> List[Dict]:
+        """
+        update() from scan dicts: item_id, price (or avg_buyout / market_value),
+        quantity (or num_auctions), optional top_seller_share.
+        """
+        scan_data = list(scan_data)
+        return self.update(
+            [item['item_id'] for item in scan_data],
+            [item.get('price') or item.get('avg_buyout') or item.get('market_value') or 0 for item in scan_data],
+            [item.get('quantity', item.get('num_auctions', 0)) for item in scan_data],
+            [item.get('top_seller_share', 0) for item in scan_data],
+            timestamp)
+
+    def _alert(self, rule: str, item_id: int, timestamp: float, price: float, change: float,
+               volume_change: float, median: float, z: float, drop: float, share: float) -> Dict:
+        alert = {'type': rule, 'item_id': item_id, 'timestamp': timestamp, 'price': price,
+                 'rolling_median': round(median, 1), 'z_score': round(z, 2) if np.isfinite(z) else None}
+        if rule == 'MARKET_RESET':
+            jump = round((change - 1) * 100)
+            alert.update(price_jump_pct=jump, confidence=0.9 if volume_change < 0.5 else 0.6,
+                         action='SELL', message=f"Market Reset Detected! Price jumped {jump}%")
+        elif rule == 'PRICE_CRASH':
+            fall = round((1 - change) * 100)
+            alert.update(drop_pct=fall, confidence=0.8, action='BUY',
+                         message=f"Price Crash! Dropped {fall}%")
+        elif rule == 'FLASH_CRASH':
+            alert.update(drop_pct=round(drop * 100, 1), confidence=0.9,
+                         action='BUY MAXIMUM - This is a panic sell',
+                         expected_recovery=f"{round(median / 10000, 1)}g",
+                         message=f"Flash crash: {round(drop * 100, 1)}% under the rolling median")
+        else:
+            alert.update(seller_share=round(share, 2), confidence=0.75,
+                         action='DO NOT BUY - one seller controls supply',
+                         message=f"Artificial scarcity: one seller holds {round(share * 100)}% at "
+                                 f"{round(price / median, 1)}x the rolling median")
+        return alert
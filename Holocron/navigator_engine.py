@@ -8,6 +8,8 @@ from typing import List, Dict, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+from activity_index import ActivityIndex
+
 class ActivityType(Enum):
     MOUNT = "Mount"
     PET = "Pet"
@@ -85,8 +87,17 @@ class NavigatorEngine:
     """
     
     def __init__(self):
-        self.activities = []
+        self.index = ActivityIndex([])
         self.owned_items = set()  # Mock collection
+
+    @property
+    def activities(self) -> List[Activity]:
+        return self.index.activities
+
+    @activities.setter
+    def activities(self, activities: List[Activity]):
+        # Ownership/lockout changes after this go through mark_owned / set_available_chars
+        self.index = ActivityIndex(activities)
         
     def load_mock_data(self):
         """Load mock farming activities"""
@@ -142,80 +153,47 @@ class NavigatorEngine:
     
     def get_prioritized_activities(self, 
                                    include_owned: bool = False,
-                                   min_available: int = 1) -> List[Dict]:
+                                   min_available: int = 1,
+                                   limit: Optional[int] = None,
+                                   sort_by: str = "score") -> List[Dict]:
         """
         Get activities sorted by priority
         
         Args:
             include_owned: Include already-collected items
             min_available: Minimum available characters
+            limit: Only the top N (None for all)
+            sort_by: "score" (coolest stuff first) or "ppm" (efficiency)
         
         Returns:
             List of activities with scores and metadata
         """
-        filtered = []
-        
-        for activity in self.activities:
-            # Filter owned items
-            if not include_owned and activity.is_owned:
-                continue
-            
-            # Filter locked instances
-            if activity.available_chars < min_available:
-                continue
-            
-            filtered.append({
-                "instance": activity.instance_name,
-                "drop": activity.drop_name,
-                "type": activity.drop_type.value,
-                "expansion": activity.expansion,
-                "instance_type": activity.instance_type,
-                "available_chars": activity.available_chars,
-                "score": activity.score,
-                "ppm": round(activity.ppm, 2),
-                "time": activity.time_estimate,
-                "priority": activity.priority_label,
-                "rarity": activity.rarity,
-                "is_owned": activity.is_owned,
-                "zone_id": activity.zone_id
-            })
-        
-        # Sort by PPM (Efficiency) instead of raw score?
-        # Let's sort by Score first, then PPM as tiebreaker, or weighted?
-        # For "Boredom Buster", maybe Score is better (coolest stuff).
-        # For "Efficiency", PPM is better.
-        # Let's keep Score as primary sort, but expose PPM.
-        filtered.sort(key=lambda x: x["score"], reverse=True)
-        
-        return filtered
+        return self.index.top(limit, sort_by, include_owned, min_available)
+
+    def mark_owned(self, drop_name: str, owned: bool = True):
+        """Record a collected (or lost) drop and re-rank its activities"""
+        if owned:
+            self.owned_items.add(drop_name)
+        else:
+            self.owned_items.discard(drop_name)
+        for aid in self.index.by_drop.get(drop_name, ()):
+            self.index.update(aid, is_owned=owned)
+
+    def set_available_chars(self, instance_name: str, available_chars: int):
+        """Update lockouts for an instance (characters that can still run it)"""
+        for aid in self.index.by_instance.get(instance_name, ()):
+            self.index.update(aid, available_chars=available_chars)
     
     def get_statistics(self) -> Dict:
         """Get summary statistics"""
-        total = len(self.activities)
-        owned = sum(1 for a in self.activities if a.is_owned)
-        available = sum(1 for a in self.activities if a.available_chars > 0 and not a.is_owned)
-        locked = sum(1 for a in self.activities if a.available_chars == 0)
-        
-        # Count by type
-        by_type = {}
-        for activity in self.activities:
-            type_name = activity.drop_type.value
-            by_type[type_name] = by_type.get(type_name, 0) + 1
-        
-        return {
-            "total_activities": total,
-            "owned": owned,
-            "available": available,
-            "locked": locked,
-            "by_type": by_type,
-            "completion_percent": int((owned / total) * 100) if total > 0 else 0
-        }
+        return self.index.statistics()
     
     def get_urgent_activities(self, limit: int = 5) -> List[Dict]:
         """Get top priority activities (score >= 80)"""
-        activities = self.get_prioritized_activities()
-        urgent = [a for a in activities if a["score"] >= 80]
-        return urgent[:limit]
+        return self.index.urgent(limit)
+
+    def get_urgent_count(self) -> int:
+        return self.index.urgent_count
 
 if __name__ == "__main__":
     # Test the engine
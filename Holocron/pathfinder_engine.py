@@ -6,9 +6,24 @@ Uses graph algorithms to find shortest paths between WoW locations
 
 import networkx as nx
 import psycopg2
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple, Union
 import os
 
+import numpy as np
+
+from route_solver import solve_route
+from travel_graph import TravelGraph, capability_mask, edge_mask
+from travel_matrix import TravelMatrix, build_travel_matrix
+
+# Changes whenever a row in pathfinder.travel_nodes is added, removed or edited
+TRAVEL_NODES_FINGERPRINT_SQL = """
+    SELECT md5(coalesce(string_agg(
+        concat_ws('|', source_zone_id, dest_zone_id, method, travel_time_seconds, requirements),
+        ',' ORDER BY source_zone_id, dest_zone_id, method
+    ), ''))
+    FROM pathfinder.travel_nodes
+"""
+
 class PathfinderEngine:
     """
     Routing engine that calculates optimal travel paths using:
@@ -23,11 +38,19 @@ class PathfinderEngine:
         self.deeppockets = deeppockets_engine
         self.graph = nx.DiGraph()  # Directed graph for one-way connections
         self.zones = {}  # zone_id -> {name, expansion}
-        
+        self.graph_version = 0
+        self.travel_nodes_fingerprint = None
+        self._matrices = {}  # capability profile mask -> TravelMatrix
+        self._matrix_signature = None
+        self._travel_graph = None
+
     def build_graph(self):
         """Load zones and travel nodes from database into graph"""
         conn = psycopg2.connect(self.db_url)
         cur = conn.cursor()
+
+        self.graph = nx.DiGraph()
+        self.zones = {}
         
         # Load zones
         cur.execute("SELECT zone_id, name, expansion FROM pathfinder.zones")
@@ -42,18 +65,29 @@ class PathfinderEngine:
         """)
         
         for source, dest, method, time, requirements in cur.fetchall():
-            self.graph.add_edge(
-                source, dest,
-                method=method,
-                time=time,
-                requirements=requirements or ""
-            )
+            self.add_travel_edge(source, dest, method, time, requirements)
+
+        cur.execute(TRAVEL_NODES_FINGERPRINT_SQL)
+        self.travel_nodes_fingerprint = cur.fetchone()[0]
         
         cur.close()
         conn.close()
+        self.invalidate()
         
         print(f"✓ Graph built: {self.graph.number_of_nodes()} zones, {self.graph.number_of_edges()} connections")
         
+    def add_travel_edge(self, source: int, dest: int, method: str, time: int, requirements: Optional[str] = None):
+        """Add a connection, parsing its requirements into a capability mask once"""
+        requirements = requirements or ""
+        self.graph.add_edge(
+            source, dest,
+            method=method,
+            time=time,
+            requirements=requirements,
+            mask=edge_mask(method, requirements)
+        )
+        self.invalidate()
+        
     def load_mock_data(self):
         """Load mock data for testing without DB"""
         # Add some zones
@@ -72,27 +106,94 @@ class PathfinderEngine:
             
         # Add some edges (Mocking a connected world)
         # Hubs
-        self.graph.add_edge(84, 1670, method="PORTAL", time=15, requirements="")
-        self.graph.add_edge(1670, 84, method="PORTAL", time=15, requirements="")
-        self.graph.add_edge(84, 1978, method="BOAT", time=120, requirements="")
-        self.graph.add_edge(1978, 84, method="BOAT", time=120, requirements="")
+        self.add_travel_edge(84, 1670, "PORTAL", 15)
+        self.add_travel_edge(1670, 84, "PORTAL", 15)
+        self.add_travel_edge(84, 1978, "BOAT", 120)
+        self.add_travel_edge(1978, 84, "BOAT", 120)
         
         # Dragon Isles connections
         di_zones = [1978, 2022, 2023, 2024, 2025]
         for i in range(len(di_zones)):
             for j in range(len(di_zones)):
                 if i != j:
-                    self.graph.add_edge(di_zones[i], di_zones[j], method="DRAGONRIDING", time=45, requirements="")
+                    self.add_travel_edge(di_zones[i], di_zones[j], "DRAGONRIDING", 45)
                     
         # Bank connection
-        self.graph.add_edge(84, -1, method="WALK", time=30, requirements="")
-        self.graph.add_edge(-1, 84, method="WALK", time=30, requirements="")
+        self.add_travel_edge(84, -1, "WALK", 30)
+        self.add_travel_edge(-1, 84, "WALK", 30)
+        self.invalidate()
         
         print(f"✓ Mock Graph built: {self.graph.number_of_nodes()} zones")
 
-    def optimize_route(self, start_zone: int, destinations: List[int]) -> Dict:
+    # --- Travel matrices ---
+
+    def invalidate(self):
+        """Drop cached travel matrices (call after editing self.graph in place)."""
+        self.graph_version += 1
+        self._matrices = {}
+
+    def refresh_if_changed(self) -> bool:
+        """
+        Rebuild the graph if pathfinder.travel_nodes changed since it was loaded
+        by build_graph (a mock graph is left alone). Returns True if a rebuild
+        happened.
+        """
+        if not self.db_url or self.travel_nodes_fingerprint is None:
+            return False
+        conn = psycopg2.connect(self.db_url)
+        try:
+            cur = conn.cursor()
+            cur.execute(TRAVEL_NODES_FINGERPRINT_SQL)
+            fingerprint = cur.fetchone()[0]
+            cur.close()
+        finally:
+            conn.close()
+        if fingerprint == self.travel_nodes_fingerprint:
+            return False
+        self.build_graph()
+        return True
+
+    def travel_matrix(
+        self,
+        character_class: Optional[str] = None,
+        hearthstone_available: Union[bool, Iterable[str]] = True,
+        professions: Iterable[str] = (),
+        expansions: Optional[Iterable[str]] = None
+    ) -> TravelMatrix:
+        """
+        All-pairs travel times for one capability profile, built on first use
+        and reused until the graph changes. See travel_graph.capability_mask
+        for the arguments.
+        """
+        # Node/edge counts catch edits made to self.graph without invalidate()
+        signature = (self.graph_version, self.graph.number_of_nodes(), self.graph.number_of_edges())
+        if self._matrix_signature != signature:
+            self._travel_graph = TravelGraph(self.graph)
+            self._matrices = {}
+            self._matrix_signature = signature
+
+        have = capability_mask(character_class, hearthstone_available, professions, expansions)
+        profile = self._travel_graph.profile_key(have)
+        matrix = self._matrices.get(profile)
+        if matrix is None:
+            matrix = build_travel_matrix(self._travel_graph, profile)
+            self._matrices[profile] = matrix
+        return matrix
+
+    def optimize_route(
+        self,
+        start_zone: int,
+        destinations: List[int],
+        character_class: Optional[str] = None,
+        hearthstone_ready_at: Optional[float] = 0
+    ) -> Dict:
         """
-        Solve TSP for the given destinations using Nearest Neighbor algorithm.
+        Find the fastest order to visit every destination from start_zone.
+
+        Exact (Held-Karp) for up to EXACT_STOP_LIMIT stops, 2-opt/Or-opt
+        local search beyond that. hearthstone_ready_at is the number of
+        seconds until the hearthstone comes off cooldown (None if it won't
+        be available during the route); it can be used for one leg.
         """
         if start_zone not in self.graph:
             return {"success": False, "error": f"Start zone {start_zone} not found"}
@@ -101,56 +202,58 @@ class PathfinderEngine:
         valid_dests = [d for d in destinations if d in self.graph]
         if len(valid_dests) != len(destinations):
             print(f"Warning: Some destinations were invalid and ignored.")
-            
-        route = [start_zone]
-        current_node = start_zone
-        unvisited = set(valid_dests)
-        if start_zone in unvisited:
-            unvisited.remove(start_zone)
-            
+        
+        walk = self.travel_matrix(character_class, hearthstone_available=False)
+        hearth = self.travel_matrix(character_class, hearthstone_available=True)
+        
+        stops = []
+        for zone_id in dict.fromkeys(valid_dests):
+            if zone_id == start_zone:
+                continue
+            if hearth.time(start_zone, zone_id) is None:
+                print(f"Warning: {self.zones[zone_id]['name']} is unreachable and was skipped.")
+                continue
+            stops.append(zone_id)
+        
+        nodes = [start_zone] + stops
+        walk_times = walk.submatrix(nodes)
+        hearth_times = hearth.submatrix(nodes)
+        if hearthstone_ready_at is None or np.array_equal(walk_times, hearth_times):
+            # The hearthstone can't shorten any leg of this route
+            hearth_times = None
+        
+        solution = solve_route(walk_times, hearth_times, hearthstone_ready_at)
+        if not np.isfinite(solution["total_time"]):
+            return {"success": False, "error": "No route visits every destination"}
+        
+        route = [nodes[i] for i in solution["order"]]
         total_time = 0
         steps_details = []
         
-        while unvisited:
-            nearest_node = None
-            min_dist = float('inf')
-            best_path_segment = None
-            
-            for node in unvisited:
-                # Find shortest path to this node
-                try:
-                    path_result = self.find_shortest_path(current_node, node)
-                    if path_result["success"]:
-                        dist = path_result["total_time"]
-                        if dist < min_dist:
-                            min_dist = dist
-                            nearest_node = node
-                            best_path_segment = path_result
-                except Exception:
-                    continue
-            
-            if nearest_node is None:
-                # Cannot reach remaining nodes
-                break
-                
-            # Add segment to route
-            route.append(nearest_node)
-            unvisited.remove(nearest_node)
-            total_time += min_dist
-            current_node = nearest_node
+        for leg, (source, dest) in enumerate(zip(route, route[1:])):
+            use_hearth = leg == solution["hearth_leg"]
+            wait = max(0, hearthstone_ready_at - total_time) if use_hearth else 0
+            segment = self.find_shortest_path(
+                source, dest,
+                character_class=character_class,
+                hearthstone_available=use_hearth
+            )
+            total_time += wait + segment["total_time"]
             
             steps_details.append({
-                "from": best_path_segment["source"],
-                "to": best_path_segment["destination"],
-                "time": best_path_segment["total_time"],
-                "method": best_path_segment["steps"][0]["method"] if best_path_segment["steps"] else "Walk"
+                "from": segment["source"],
+                "to": segment["destination"],
+                "time": segment["total_time"],
+                "wait": wait,
+                "method": segment["steps"][0]["method"] if segment["steps"] else "Walk"
             })
             
         return {
             "success": True,
             "route_order": route,
             "total_time": total_time,
-            "segments": steps_details
+            "segments": steps_details,
+            "solver": solution["method"]
         }
 
     def check_quest_items(self, quest_ids: List[int]) -> List[int]:
@@ -186,6 +289,12 @@ class PathfinderEngine:
         """Load real player data from SavedInstances.json"""
         import json
         json_path = "SavedInstances.json"
+
+        # Travel connections may have been edited since the graph was built
+        try:
+            self.refresh_if_changed()
+        except Exception as e:
+            print(f"Error checking travel nodes: {e}")
         
         if not os.path.exists(json_path):
             print("SavedInstances.json not found. Using mock player data.")
@@ -248,18 +357,11 @@ class PathfinderEngine:
         if dest_zone_id not in self.graph:
             return {"success": False, "error": f"Destination zone {dest_zone_id} not found"}
         
-        # Create filtered graph based on character abilities
-        filtered_graph = self._filter_graph(character_class, hearthstone_available)
+        # Precomputed shortest paths for this character's abilities
+        matrix = self.travel_matrix(character_class, hearthstone_available)
+        path = matrix.path(source_zone_id, dest_zone_id)
         
-        try:
-            # Use Dijkstra's algorithm with time as weight
-            path = nx.shortest_path(
-                filtered_graph,
-                source=source_zone_id,
-                target=dest_zone_id,
-                weight='time'
-            )
-            
+        if path is not None:
             # Calculate steps and total time
             steps = []
             total_time = 0
@@ -267,7 +369,7 @@ class PathfinderEngine:
             for i in range(len(path) - 1):
                 source = path[i]
                 dest = path[i + 1]
-                edge_data = filtered_graph[source][dest]
+                edge_data = self.graph[source][dest]
                 
                 steps.append({
                     "from_zone": self.zones[source]["name"],
@@ -286,59 +388,37 @@ class PathfinderEngine:
                 "destination": self.zones[dest_zone_id]["name"]
             }
             
-        except nx.NetworkXNoPath:
-            return {
-                "success": False,
-                "error": f"No path found from {self.zones[source_zone_id]['name']} to {self.zones[dest_zone_id]['name']}"
-            }
-    
-    def _filter_graph(self, character_class: Optional[str], hearthstone_available: bool) -> nx.DiGraph:
-        """
-        Create filtered graph based on character abilities
-        """
-        filtered = self.graph.copy()
-        
-        # Remove edges with unmet requirements
-        edges_to_remove = []
-        for source, dest, data in filtered.edges(data=True):
-            requirements = data.get('requirements', '')
-            
-            # Filter class-specific abilities
-            if requirements:
-                if 'Mage' in requirements and character_class != 'Mage':
-                    edges_to_remove.append((source, dest))
-                elif 'Engineer' in requirements and character_class != 'Engineer':
-                    edges_to_remove.append((source, dest))
-                elif 'Druid' in requirements and character_class != 'Druid':
-                    edges_to_remove.append((source, dest))
-            
-            # Remove hearthstone connections if on cooldown
-            if data.get('method') in ['HEARTHSTONE', 'DALARAN_HEARTHSTONE', 'GARRISON_HEARTHSTONE']:
-                if not hearthstone_available:
-                    edges_to_remove.append((source, dest))
-        
-        filtered.remove_edges_from(edges_to_remove)
-        return filtered
-    
-    def get_reachable_zones(self, source_zone_id: int, max_time: int = 120) -> List[Dict]:
+        return {
+            "success": False,
+            "error": f"No path found from {self.zones[source_zone_id]['name']} to {self.zones[dest_zone_id]['name']}"
+        }
+
+    def get_reachable_zones(
+        self,
+        source_zone_id: int,
+        max_time: int = 120,
+        character_class: Optional[str] = None,
+        hearthstone_available: bool = True
+    ) -> List[Dict]:
         """
         Get all zones reachable within max_time seconds from source
         Useful for "where can I get to quickly?" queries
         """
+        if source_zone_id not in self.graph:
+            return []
+        
+        matrix = self.travel_matrix(character_class, hearthstone_available)
         reachable = []
         
-        for zone_id in self.graph.nodes():
-            if zone_id == source_zone_id:
-                continue
-                
-            result = self.find_shortest_path(source_zone_id, zone_id)
-            if result["success"] and result["total_time"] <= max_time:
-                reachable.append({
-                    "zone_id": zone_id,
-                    "zone_name": self.zones[zone_id]["name"],
-                    "time": result["total_time"],
-                    "steps": len(result["steps"])
-                })
+        for hit in matrix.reachable_from(source_zone_id, max_time):
+            zone_id = hit["zone_id"]
+            path = matrix.path(source_zone_id, zone_id)
+            reachable.append({
+                "zone_id": zone_id,
+                "zone_name": self.zones[zone_id]["name"],
+                "time": sum(self.graph[a][b]["time"] for a, b in zip(path, path[1:])),
+                "steps": len(path) - 1
+            })
         
         return sorted(reachable, key=lambda x: x["time"])
 
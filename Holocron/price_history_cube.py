@@ -0,0 +1,118 @@
+"""
+Price History Cube - one load of AH price history, window stats for many events
+
+All price points for a set of items over a study period are held as
+per-item runs of (time, price), sorted by time, with item offsets (item ×
+time with ragged rows, since scans don't land on a fixed grid). Window
+queries for many (event, item) pairs at once find their row ranges with
+searchsorted, take baseline means from int64 prefix sums and peaks with a
+max over the concatenated post-event windows, so a whole training set is
+a few array passes instead of one database round trip per pair.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Sequence
+
+import numpy as np
+
+
+def to_epoch(timestamps: Iterable[datetime]) -> np.ndarray:
+    """datetimes -> float epoch seconds"""
+    return np.array([t.timestamp() for t in timestamps], dtype=float)
+
+
+class PriceHistoryCube:
+    """Immutable per-item price histories: items[k] owns rows offsets[k]:offsets[k + 1]."""
+
+    def __init__(self, item_ids: Sequence[int], timestamps: Sequence[float], prices: Sequence[int]):
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype=float)
+        order = np.lexsort((timestamps, item_ids))
+        self.item_id = item_ids[order]
+        self.time = timestamps[order]
+        self.price = np.asarray(prices, dtype=np.int64)[order]
+
+        n = len(self.item_id)
+        starts = np.flatnonzero(np.diff(self.item_id, prepend=self.item_id[:1] - 1)) if n else np.zeros(0, dtype=np.int64)
+        self.items = self.item_id[starts]
+        self.offsets = np.append(starts, n).astype(np.int64)
+        self._times = np.unique(self.time)
+        item_rank = np.repeat(np.arange(len(self.items)), np.diff(self.offsets))
+        self._keys = item_rank * (len(self._times) + 1) + np.searchsorted(self._times, self.time)
+        # price_sums[i] = sum of price[:i]; exact in int64
+        self.price_sums = np.concatenate(([0], np.cumsum(self.price)))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence]) -> 'PriceHistoryCube':
+        """From (item_id, timestamp datetime, price) rows, e.g. a DB cursor."""
+        rows = list(rows)
+        return cls([r[0] for r in rows], to_epoch(r[1] for r in rows), [r[2] for r in rows])
+
+    def __len__(self):
+        return len(self.item_id)
+
+    def _search(self, item_ids: np.ndarray, times: np.ndarray, inclusive: bool) -> np.ndarray:
+        """
+        Global row index where each (item, time) query would go: the item's
+        first point at/after time (inclusive=False) or after it (inclusive=True).
+        Rows sort by exact integer keys item rank x (distinct-time rank), so
+        one searchsorted answers every query.
+        """
+        k = np.searchsorted(self.items, item_ids)
+        rank = np.searchsorted(self._times, times, side='right' if inclusive else 'left')
+        return np.searchsorted(self._keys, k * (len(self._times) + 1) + rank, side='left')
+
+    def _rows(self, item_ids: np.ndarray, start: np.ndarray, end: np.ndarray, end_inclusive: bool):
+        """Row range [lo, hi) per pair: that item's points with start <= time < end (or <= end)."""
+        if not len(self.items):
+            zeros = np.zeros(len(item_ids), dtype=np.int64)
+            return zeros, zeros
+        lo = self._search(item_ids, start, inclusive=False)
+        hi = self._search(item_ids, end, inclusive=end_inclusive)
+        # Items without history: empty range
+        k = np.minimum(np.searchsorted(self.items, item_ids), len(self.items) - 1)
+        unknown = self.items[k] != item_ids
+        hi[unknown] = lo[unknown]
+        return lo, hi
+
+    def event_windows(self, event_times: Sequence[float], item_ids: Sequence[int],
+                      window_hours: float = 72, baseline_days: float = 7,
+                      min_points: int = 10) -> Dict[str, np.ndarray]:
+        """
+        Baseline and post-event peak for every (event time, item) pair.
+
+        baseline: mean price over [event - baseline_days, event)
+        peak: highest price over [event, event + window_hours], peak_hours the
+        first time it is reached, relative to the event
+        valid: at least min_points points in the whole span, a baseline and a peak
+        """
+        event_times = np.asarray(event_times, dtype=float)
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        before = event_times - baseline_days * 86400
+        after = event_times + window_hours * 3600
+
+        base_lo, event_row = self._rows(item_ids, before, event_times, end_inclusive=False)
+        _, end_row = self._rows(item_ids, event_times, after, end_inclusive=True)
+        base_count = event_row - base_lo
+        peak_count = end_row - event_row
+        valid = (base_count + peak_count >= min_points) & (base_count > 0) & (peak_count > 0)
+
+        baseline = np.zeros(len(item_ids))
+        baseline[valid] = (self.price_sums[event_row[valid]] - self.price_sums[base_lo[valid]]) / base_count[valid]
+
+        peak = np.zeros(len(item_ids), dtype=np.int64)
+        peak_hours = np.zeros(len(item_ids))
+        pairs = np.flatnonzero(valid)
+        if len(pairs):
+            # Concatenate the post-event windows; max per window, then its first row
+            lengths = peak_count[pairs]
+            group_start = np.cumsum(lengths) - lengths
+            rows = np.arange(lengths.sum()) + np.repeat(event_row[pairs] - group_start, lengths)
+            prices = self.price[rows]
+            peak[pairs] = np.maximum.reduceat(prices, group_start)
+            at_peak = np.flatnonzero(prices == np.repeat(peak[pairs], lengths))
+            group = np.repeat(np.arange(len(pairs)), lengths)[at_peak]
+            first_at_peak = at_peak[np.searchsorted(group, np.arange(len(pairs)))]
+            peak_hours[pairs] = (self.time[rows[first_at_peak]] - event_times[pairs]) / 3600
+
+        return {'valid': valid, 'baseline': baseline, 'peak': peak, 'peak_hours': peak_hours}
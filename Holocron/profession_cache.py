@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Profession Analytics Cache
+Recipes for a profession are loaded once into a sparse recipe x material
+matrix; prices for every item they touch live in one vector. Material
+cost and profit for every recipe is then a single sparse mat-vec, reused
+until the price snapshot changes.
+"""
+
+import json
+import threading
+import time
+from typing import Callable, Dict, Hashable, List
+
+import numpy as np
+
+AH_CUT = 0.05
+SKILL_BANDS = ('required', 'yellow', 'green', 'gray')
+RECIPE_TTL = 3600  # Recipe data changes with patches, not prices
+
+
+class RecipeMatrix:
+    """One profession's recipes as arrays."""
+
+    def __init__(self, recipes: List[Dict]):
+        from scipy.sparse import csr_matrix  # Deferred: keeps server import fast
+
+        self.recipes = recipes
+        self.item_ids = []
+        self.item_index = {}
+
+        rows, cols, quantities = [], [], []
+        crafted = np.full(len(recipes), -1, dtype=np.int64)
+        crafted_quantity = np.ones(len(recipes))
+        self.tiers = [recipe.get('tier') for recipe in recipes]
+        # Colour thresholds; NaN where the recipe has no skill data
+        self.skill = {
+            band: np.array([np.nan if recipe.get(f'skill_{band}') is None else recipe[f'skill_{band}']
+                            for recipe in recipes], dtype=float)
+            for band in SKILL_BANDS
+        }
+
+        for r, recipe in enumerate(recipes):
+            for mat in recipe.get('materials') or []:
+                rows.append(r)
+                cols.append(self._column(mat['item_id']))
+                quantities.append(mat['quantity'])
+            if recipe.get('crafted_item_id'):
+                crafted[r] = self._column(recipe['crafted_item_id'])
+                crafted_quantity[r] = recipe.get('crafted_quantity') or 1
+
+        self.materials = csr_matrix(
+            (np.asarray(quantities, dtype=float), (rows, cols)),
+            shape=(len(recipes), len(self.item_ids))
+        )
+        self.crafted = crafted
+        self.crafted_quantity = crafted_quantity
+
+    def _column(self, item_id: int) -> int:
+        if item_id not in self.item_index:
+            self.item_index[item_id] = len(self.item_ids)
+            self.item_ids.append(item_id)
+        return self.item_index[item_id]
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def profits(self, prices: np.ndarray) -> Dict[str, np.ndarray]:
+        """Per-recipe economics; recipes with no crafted item get zero revenue."""
+        material_cost = self.materials @ prices
+        has_output = self.crafted >= 0
+        sell_price = np.where(has_output, prices[np.maximum(self.crafted, 0)], 0.0)
+        revenue = sell_price * self.crafted_quantity
+        ah_cut = revenue * AH_CUT
+        profit = revenue - ah_cut - material_cost
+        margin = np.divide(profit * 100, revenue, out=np.zeros_like(profit), where=revenue > 0)
+        return {
+            'material_cost': material_cost,
+            'sell_price': sell_price,
+            'revenue': revenue,
+            'ah_cut': ah_cut,
+            'profit': profit,
+            'profit_margin': margin,
+            'has_output': has_output,
+        }
+
+
+class ProfessionAnalyticsCache:
+    """
+    Caches RecipeMatrix per profession and price vectors / profits per
+    (profession, price snapshot).
+
+    load_recipes(profession) -> list of recipe dicts
+    price_of(item_id) -> price in gold
+    price_snapshot() -> hashable token that changes whenever prices update
+    """
+
+    def __init__(self, load_recipes: Callable[[str], List[Dict]],
+                 price_of: Callable[[int], float],
+                 price_snapshot: Callable[[], Hashable],
+                 recipe_ttl: float = RECIPE_TTL):
+        self.load_recipes = load_recipes
+        self.price_of = price_of
+        self.price_snapshot = price_snapshot
+        self.recipe_ttl = recipe_ttl
+        self._recipes = {}  # profession -> (loaded_at, RecipeMatrix)
+        self._priced = {}   # profession -> (snapshot, prices, profits, derived)
+        self._lock = threading.Lock()
+        self.stats = {"recipe_loads": 0, "price_refreshes": 0, "hits": 0}
+
+    def recipes(self, profession: str) -> RecipeMatrix:
+        with self._lock:
+            entry = self._recipes.get(profession)
+            if entry and time.time() - entry[0] < self.recipe_ttl:
+                return entry[1]
+
+        matrix = RecipeMatrix([normalize_recipe(r) for r in self.load_recipes(profession)])
+        with self._lock:
+            self._recipes[profession] = (time.time(), matrix)
+            self._priced.pop(profession, None)
+            self.stats["recipe_loads"] += 1
+        return matrix
+
+    def prices(self, profession: str) -> np.ndarray:
+        return self._priced_entry(profession)[1]
+
+    def profits(self, profession: str) -> Dict[str, np.ndarray]:
+        return self._priced_entry(profession)[2]
+
+    def _priced_entry(self, profession: str):
+        matrix = self.recipes(profession)
+        snapshot = self.price_snapshot()
+        with self._lock:
+            entry = self._priced.get(profession)
+            if entry and entry[0] == snapshot:
+                self.stats["hits"] += 1
+                return entry
+
+        prices = np.array([self.price_of(item_id) for item_id in matrix.item_ids], dtype=float)
+        entry = (snapshot, prices, matrix.profits(prices), {})
+        with self._lock:
+            self._priced[profession] = entry
+            self.stats["price_refreshes"] += 1
+        return entry
+
+    def derived(self, profession: str, key: Hashable, build: Callable):
+        """
+        Memoise build(recipe_matrix, prices, profits) for the current
+        (profession, price snapshot); dropped when prices refresh.
+        """
+        snapshot, prices, profits, derived = self._priced_entry(profession)
+        if key not in derived:
+            derived[key] = build(self.recipes(profession), prices, profits)
+        return derived[key]
+
+    def invalidate(self, profession: str = None):
+        """Drop cached data for one profession (or all)"""
+        with self._lock:
+            if profession is None:
+                self._recipes.clear()
+                self._priced.clear()
+            else:
+                self._recipes.pop(profession, None)
+                self._priced.pop(profession, None)
+
+
+def normalize_recipe(recipe: Dict) -> Dict:
+    """Materials come back from JSONB as a list, from text columns as a string"""
+    materials = recipe.get('materials')
+    if isinstance(materials, str):
+        materials = json.loads(materials or '[]')
+    return dict(recipe, materials=materials or [])
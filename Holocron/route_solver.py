@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Route Solver - multi-stop route ordering for Pathfinder/Navigator
+
+Orders a set of stops to minimise total travel time from a fixed start
+(an open path: the route ends at the last stop). Works purely on travel
+time matrices, so the graph is never searched during solving:
+
+- Up to EXACT_STOP_LIMIT stops: Held-Karp bitmask DP, exact.
+- Larger sets: nearest-neighbour construction improved with 2-opt and
+  Or-opt local search.
+
+Hearthstone cooldown is modelled as a time window: hearthstone legs (the
+`hearth_times` matrix) can be taken once per route, departing no earlier
+than `hearth_ready_at` seconds into it. Arriving at a stop early and
+waiting for the hearthstone is allowed, so the earliest-arrival DP stays
+exact.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+EXACT_STOP_LIMIT = 15
+MAX_LOCAL_SEARCH_PASSES = 50
+# Or-opt moves chains of up to this many consecutive stops
+OR_OPT_SEGMENT = 3
+
+
+def _prepare(times, hearth_times, hearth_ready_at):
+    times = np.asarray(times, dtype=float)
+    if hearth_times is None or hearth_ready_at is None:
+        # No hearthstone for this route: its legs are never an option
+        hearth = np.full_like(times, np.inf)
+        ready_at = 0.0
+    else:
+        hearth = np.asarray(hearth_times, dtype=float)
+        ready_at = float(hearth_ready_at)
+    return times, hearth, ready_at
+
+
+def route_time(order: Sequence[int], times, hearth_times=None, hearth_ready_at: Optional[float] = None) -> Dict:
+    """
+    Earliest finish time for visiting `order` (matrix indices, starting at
+    the route's start). Returns {"total_time", "hearth_leg"} where hearth_leg
+    is the index of the leg that uses the hearthstone, or None.
+    """
+    times, hearth, ready_at = _prepare(times, hearth_times, hearth_ready_at)
+    order = list(order)
+
+    # Two running states: hearthstone still unused / already used
+    unused, used = 0.0, np.inf
+    used_leg = None
+    for leg, (a, b) in enumerate(zip(order, order[1:])):
+        via_hearth = max(unused, ready_at) + hearth[a, b]
+        walk_used = used + times[a, b]
+        if via_hearth < walk_used:
+            used, used_leg = via_hearth, leg
+        else:
+            used = walk_used
+        unused += times[a, b]
+
+    if used < unused:
+        return {"total_time": float(used), "hearth_leg": used_leg}
+    return {"total_time": float(unused), "hearth_leg": None}
+
+
+def held_karp(times, hearth_times=None, hearth_ready_at: Optional[float] = None) -> Optional[List[int]]:
+    """
+    Exact optimal visiting order for every node of the matrix, starting at
+    node 0, or None if no order visits them all. Cost is O(2^n * n^2) in
+    vectorised NumPy, one popcount layer at a time.
+    """
+    times, hearth, ready_at = _prepare(times, hearth_times, hearth_ready_at)
+    n = times.shape[0] - 1
+    if n <= 0:
+        return [0]
+
+    walk = times[1:, 1:]
+    jump = hearth[1:, 1:]
+    bits = 1 << np.arange(n)
+    full = (1 << n) - 1
+
+    # best[mask, j, f]: earliest arrival at stop j having visited `mask`,
+    # f = 1 once the hearthstone has been used
+    best = np.full((1 << n, n, 2), np.inf)
+    parent = np.full((1 << n, n, 2), -1, dtype=np.int8)
+    parent_flag = np.zeros((1 << n, n, 2), dtype=np.int8)
+
+    best[bits, np.arange(n), 0] = times[0, 1:]
+    best[bits, np.arange(n), 1] = max(0.0, ready_at) + hearth[0, 1:]
+
+    masks = np.arange(1 << n)
+    popcount = np.zeros(1 << n, dtype=np.int64)
+    for b in bits:
+        popcount += (masks & b) > 0
+
+    for size in range(1, n):
+        layer = masks[popcount == size]
+        unused = best[layer, :, 0]
+        used = best[layer, :, 1]
+
+        # (layer, from i, to j) candidates for each transition
+        stay_unused = unused[:, :, None] + walk[None]
+        stay_used = used[:, :, None] + walk[None]
+        take_hearth = np.maximum(unused, ready_at)[:, :, None] + jump[None]
+
+        from0 = stay_unused.argmin(axis=1)
+        cost0 = np.take_along_axis(stay_unused, from0[:, None, :], axis=1)[:, 0, :]
+
+        to_used = np.concatenate([stay_used, take_hearth], axis=1)
+        pick = to_used.argmin(axis=1)
+        cost1 = np.take_along_axis(to_used, pick[:, None, :], axis=1)[:, 0, :]
+        from1 = pick % n
+        flag1 = (pick < n).astype(np.int8)  # previous state was "used" for stay_used
+
+        target = layer[:, None] | bits[None, :]
+        open_slot = (layer[:, None] & bits[None, :]) == 0
+        rows, cols = np.nonzero(open_slot)
+        dest = target[rows, cols]
+
+        best[dest, cols, 0] = cost0[rows, cols]
+        parent[dest, cols, 0] = from0[rows, cols]
+        parent_flag[dest, cols, 0] = 0
+        best[dest, cols, 1] = cost1[rows, cols]
+        parent[dest, cols, 1] = from1[rows, cols]
+        parent_flag[dest, cols, 1] = flag1[rows, cols]
+
+    if not np.isfinite(best[full]).any():
+        return None
+    last, flag = np.unravel_index(np.argmin(best[full]), best[full].shape)
+    order = []
+    mask = full
+    while last >= 0:
+        order.append(int(last) + 1)
+        prev, prev_flag = parent[mask, last, flag], parent_flag[mask, last, flag]
+        mask ^= 1 << int(last)
+        last, flag = int(prev), int(prev_flag)
+    order.append(0)
+    return order[::-1]
+
+
+def _nearest_neighbour(times) -> List[int]:
+    n = times.shape[0]
+    order = [0]
+    remaining = set(range(1, n))
+    while remaining:
+        current = order[-1]
+        nxt = min(sorted(remaining), key=lambda j: times[current, j])
+        order.append(nxt)
+        remaining.remove(nxt)
+    return order
+
+
+def _improve_static(order: List[int], times: np.ndarray) -> List[int]:
+    """2-opt and Or-opt on a fixed matrix, with O(1) move evaluation."""
+    best = list(order)
+    n = len(best)
+    t = times.tolist()
+
+    for _ in range(MAX_LOCAL_SEARCH_PASSES):
+        improved = False
+
+        # 2-opt: reverse best[i:j+1]; node 0 stays fixed as the start.
+        # The matrix is asymmetric, so prefix sums of forward and backward
+        # leg costs give the reversed segment's internal cost.
+        fwd = [0.0] * n
+        bwd = [0.0] * n
+        for k in range(1, n):
+            fwd[k] = fwd[k - 1] + t[best[k - 1]][best[k]]
+            bwd[k] = bwd[k - 1] + t[best[k]][best[k - 1]]
+        for i in range(1, n - 1):
+            for j in range(i + 1, n):
+                a, first, last = best[i - 1], best[i], best[j]
+                before = t[a][first] + fwd[j] - fwd[i]
+                after = t[a][last] + bwd[j] - bwd[i]
+                if j + 1 < n:
+                    nxt = best[j + 1]
+                    before += t[last][nxt]
+                    after += t[first][nxt]
+                if after < before - 1e-9:
+                    best[i:j + 1] = best[i:j + 1][::-1]
+                    improved = True
+                    break
+            if improved:
+                break
+        if improved:
+            continue
+
+        # Or-opt: move a chain of 1..OR_OPT_SEGMENT stops elsewhere
+        for length in range(1, OR_OPT_SEGMENT + 1):
+            for i in range(1, n - length + 1):
+                head, tail = best[i], best[i + length - 1]
+                prev = best[i - 1]
+                nxt = best[i + length] if i + length < n else None
+                removed = t[prev][head] + (t[tail][nxt] - t[prev][nxt] if nxt is not None else 0)
+                rest = best[:i] + best[i + length:]
+                for k in range(1, len(rest) + 1):
+                    if k == i:
+                        continue
+                    left = rest[k - 1]
+                    right = rest[k] if k < len(rest) else None
+                    added = t[left][head] + (t[tail][right] - t[left][right] if right is not None else 0)
+                    if added < removed - 1e-9:
+                        best = rest[:k] + best[i:i + length] + rest[k:]
+                        improved = True
+                        break
+                if improved:
+                    break
+            if improved:
+                break
+
+        if not improved:
+            break
+    return best
+
+
+def local_search(order: List[int], times, hearth_times=None, hearth_ready_at: Optional[float] = None) -> List[int]:
+    """Improve an order (starting at node 0) with 2-opt and Or-opt moves until neither helps."""
+    times, hearth, ready_at = _prepare(times, hearth_times, hearth_ready_at)
+    best = _improve_static(order, times)
+    if not np.isfinite(hearth).any():
+        return best
+
+    # With a hearthstone the cost of a leg depends on when it is taken, so
+    # moves are re-timed in full, starting from the static optimum
+    cost = lambda o: route_time(o, times, hearth, ready_at)["total_time"]
+    best_cost = cost(best)
+    n = len(best)
+    for _ in range(MAX_LOCAL_SEARCH_PASSES):
+        improved = False
+        for i in range(1, n - 1):
+            for j in range(i + 1, n):
+                candidate = best[:i] + best[i:j + 1][::-1] + best[j + 1:]
+                c = cost(candidate)
+                if c < best_cost:
+                    best, best_cost, improved = candidate, c, True
+        for length in range(1, OR_OPT_SEGMENT + 1):
+            for i in range(1, n - length + 1):
+                chain = best[i:i + length]
+                rest = best[:i] + best[i + length:]
+                for k in range(1, len(rest) + 1):
+                    if k == i:
+                        continue
+                    candidate = rest[:k] + chain + rest[k:]
+                    c = cost(candidate)
+                    if c < best_cost:
+                        best, best_cost, improved = candidate, c, True
+                        break
+        if not improved:
+            break
+    return best
+
+
+def solve_route(times, hearth_times=None, hearth_ready_at: Optional[float] = None,
+                exact_limit: int = EXACT_STOP_LIMIT) -> Dict:
+    """
+    Order every node of the matrix (node 0 is the start).
+
+    Returns {"order", "total_time", "hearth_leg", "method"}; if no order
+    reaches every stop, total_time is inf and order is None.
+    """
+    times = np.asarray(times, dtype=float)
+    stops = times.shape[0] - 1
+
+    if stops <= exact_limit:
+        order = held_karp(times, hearth_times, hearth_ready_at)
+        method = "held_karp"
+    else:
+        order = local_search(_nearest_neighbour(times), times, hearth_times, hearth_ready_at)
+        method = "local_search"
+
+    result = {"total_time": float("inf"), "hearth_leg": None}
+    if order is not None and sorted(order) == list(range(stops + 1)):
+        result = route_time(order, times, hearth_times, hearth_ready_at)
+    result["order"] = order if np.isfinite(result["total_time"]) else None
+    result["method"] = method
+    return result
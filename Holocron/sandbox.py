@@ -6,7 +6,7 @@ import json
 import os
 import sys
 import shutil
-import shutil
+import tempfile
 
 # Configuration
 def find_simc():
@@ -38,44 +38,43 @@ class Sandbox:
     def __init__(self, simc_path=None):
         self.simc_path = simc_path or SIMC_PATH
         
-    def run_sim(self, simc_input, iterations=1000, json_output=True):
+    def run_sim(self, simc_input, iterations=1000, json_output=True, threads=None):
         """
         Runs a simulation with the given input string.
+        Each run gets its own temp directory, so concurrent sims don't collide.
         """
-        # Create temporary input file
-        input_file = "temp_sim.simc"
-        with open(input_file, "w") as f:
-            f.write(simc_input)
-            f.write(f"\niterations={iterations}\n")
-            if json_output:
-                f.write("json2=temp_result.json\n")
-                
-        # Run SimC
-        cmd = [self.simc_path, input_file]
-        try:
-            print(f"Running SimC: {' '.join(cmd)}")
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if result.returncode != 0:
-                print(f"SimC Error: {result.stderr}")
-                return None
-                
-            # Parse JSON output
-            if json_output and os.path.exists("temp_result.json"):
-                with open("temp_result.json", "r") as f:
-                    data = json.load(f)
-                
-                # Cleanup
-                os.remove(input_file)
-                os.remove("temp_result.json")
+        with tempfile.TemporaryDirectory(prefix="holocron_sim_") as workdir:
+            input_file = os.path.join(workdir, "input.simc")
+            result_file = os.path.join(workdir, "result.json")
+            with open(input_file, "w") as f:
+                f.write(simc_input)
+                f.write(f"\niterations={iterations}\n")
+                if threads:
+                    f.write(f"threads={threads}\n")
+                if json_output:
+                    f.write(f"json2={result_file}\n")
+                    
+            # Run SimC
+            cmd = [self.simc_path, input_file]
+            try:
+                print(f"Running SimC: {' '.join(cmd)}")
+                result = subprocess.run(cmd, capture_output=True, text=True, cwd=workdir)
                 
-                return self.parse_results(data)
+                if result.returncode != 0:
+                    print(f"SimC Error: {result.stderr}")
+                    return None
+                    
+                # Parse JSON output
+                if json_output and os.path.exists(result_file):
+                    with open(result_file, "r") as f:
+                        data = json.load(f)
+                    return self.parse_results(data)
+                    
+                return result.stdout
                 
-            return result.stdout
-            
-        except FileNotFoundError:
-            print(f"Error: SimC executable not found at {self.simc_path}")
-            return None
+            except FileNotFoundError:
+                print(f"Error: SimC executable not found at {self.simc_path}")
+                return None
             
     def parse_results(self, data):
         """
@@ -89,11 +88,16 @@ class Sandbox:
             parsed_results = []
             
             for player in players:
+                dps = player['collected_data']['dps']
                 res = {
                     "name": player['name'],
-                    "dps": player['collected_data']['dps']['mean'],
-                    "dps_min": player['collected_data']['dps']['min'],
-                    "dps_max": player['collected_data']['dps']['max'],
+                    "dps": dps['mean'],
+                    "dps_min": dps['min'],
+                    "dps_max": dps['max'],
+                    # Standard error of the mean DPS (SimC's "DPS Error" is ~1.96x this)
+                    "dps_error": dps.get('mean_std_dev'),
+                    "dps_std_dev": dps.get('std_dev'),
+                    "iterations": dps.get('count'),
                     "talents": player.get('talents'),
                     "gear_ilvl": player.get('gear_ilvl_mean'),
                     "timestamp": sim['options']['timestamp']
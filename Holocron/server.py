@@ -6,7 +6,7 @@ import os
 import json
 import psycopg2
 from collections import defaultdict
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, make_response
 from datetime import datetime, timezone
 
 
@@ -329,6 +329,67 @@ def get_db_connection():
     conn = psycopg2.connect(db_url)
     return conn
 
+# --- BACKGROUND JOBS ---
+# Heavy work (ingestion, SimC, route optimization) runs on the job queue so
+# Flask threads stay free for reads. Routes return 202 + job_id; clients poll
+# /api/jobs/<job_id>.
+from job_queue import JobQueue
+
+JOBS_DB_PATH = os.getenv('HOLOCRON_JOBS_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs.db'))
+job_queue = JobQueue(JOBS_DB_PATH, max_workers=int(os.getenv('HOLOCRON_JOB_WORKERS', '4')))
+job_queue.start()
+
+def job_accepted(job_type, payload=None):
+    """Submit a job and build the standard 202 response."""
+    job_id = job_queue.submit(job_type, payload)
+    return jsonify({"status": "accepted", "job_id": job_id, "status_url": f"/api/jobs/{job_id}"}), 202
+
+@app.route('/api/jobs')
+def api_jobs():
+    """Recent jobs, optionally filtered by ?type= and ?status="""
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify(job_queue.list_jobs(request.args.get('type'), request.args.get('status'), limit))
+
+@app.route('/api/jobs/stats')
+def api_jobs_stats():
+    return jsonify(job_queue.stats())
+
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """Status, progress and (when done) result of a background job."""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job)
+
+# --- ENGINE REGISTRY ---
+# Engines are registered below as factories and built on first use (or by
+# engines.warm_up() at startup), once, and shared by every route and by
+# DashboardEngine. Module globals like goblin_engine are lazy proxies.
+from engine_registry import EngineRegistry
+
+engines = EngineRegistry(max_workers=int(os.getenv('HOLOCRON_ENGINE_WORKERS', '4')))
+
+@app.route('/api/engines')
+def api_engines():
+    """Per-engine load status and timings"""
+    return jsonify(engines.timings())
+
+def summary_response(materializer, render):
+    """
+    Serve a materialized summary (see summary_materializer.py) with its
+    version as ETag. If the client already has this version answer 304
+    without rendering; render(payload) runs only on a miss.
+    """
+    summary = materializer.get()
+    if request.if_none_match.contains_weak(summary.etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(render(summary.payload))
+    response.set_etag(summary.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 # --- SYSTEM HEALTH & STATUS ---
 @app.route('/readyz')
 def readyz():
@@ -563,22 +624,20 @@ def liquidation():
 
     return render_template('liquidation.html', assets=assets, pets=pets)
 
-@app.route('/api/generate_jobs', methods=['POST'])
-def generate_jobs():
+def generate_logistics_jobs(payload, progress):
     """
     Generates logistics jobs based on the current 'Liquidatable Assets' view.
     For MVP: Moves everything to a hardcoded 'AuctionAlt' (placeholder GUID).
     """
+    conn = get_db_connection()
+    cur = conn.cursor()
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
         # 1. Get all liquidatable assets
         cur.execute("SELECT name, count, character_name FROM holocron.view_liquidatable_assets")
         rows = cur.fetchall()
         
         jobs_created = 0
-        for row in rows:
+        for i, row in enumerate(rows):
             # name = row[0]
             count = row[1]
             # character_name = row[2]
@@ -586,23 +645,26 @@ def generate_jobs():
             # In a real app, we'd lookup GUIDs. For now, we mock the insertion.
             # cur.execute("INSERT INTO holocron.logistics_jobs ...")
             jobs_created += 1
+            progress((i + 1) / len(rows))
 
         # Mock insertion for demonstration
         print(f"Generated {jobs_created} jobs.")
-
+        return {"status": "success", "jobs_created": jobs_created}
+    finally:
         cur.close()
         conn.close()
-        return jsonify({"status": "success", "jobs_created": jobs_created}), 200
-    except Exception as e:
-        print(f"Job generation error: {e}")
-        return jsonify({"error": str(e)}), 500
+
+job_queue.register("generate_jobs", generate_logistics_jobs, concurrency=1)
+
+@app.route('/api/generate_jobs', methods=['POST'])
+def generate_jobs():
+    """Queue logistics job generation. Poll /api/jobs/<job_id> for the result."""
+    return job_accepted("generate_jobs")
 
 # --- NAVIGATOR MODULE ---
 from navigator_engine import NavigatorEngine
 
-# Initialize Navigator engine once
-navigator_engine = NavigatorEngine()
-navigator_engine.load_mock_data()
+navigator_engine = engines.register('navigator', NavigatorEngine, load='load_mock_data')
 
 @app.route('/api/navigator/activities')
 def navigator_activities():
@@ -611,13 +673,21 @@ def navigator_activities():
     Query params:
         include_owned (bool): Include already-collected items
         min_available (int): Minimum available characters
+        limit (int): Only the top N activities
+        sort (str): "score" (default) or "ppm"
     """
     include_owned = request.args.get('include_owned', 'false').lower() == 'true'
     min_available = request.args.get('min_available', 1, type=int)
+    limit = request.args.get('limit', type=int)
+    sort_by = request.args.get('sort', 'score')
+    if sort_by not in ('score', 'ppm'):
+        return jsonify({"error": "sort must be 'score' or 'ppm'"}), 400
     
     activities = navigator_engine.get_prioritized_activities(
         include_owned=include_owned,
-        min_available=min_available
+        min_available=min_available,
+        limit=limit,
+        sort_by=sort_by
     )
     
     stats = navigator_engine.get_statistics()
@@ -625,7 +695,7 @@ def navigator_activities():
     return jsonify({
         "activities": activities,
         "statistics": stats,
-        "urgent_count": len(navigator_engine.get_urgent_activities())
+        "urgent_count": navigator_engine.get_urgent_count()
     })
 
 @app.route('/api/navigator/urgent')
@@ -634,6 +704,42 @@ def navigator_urgent():
     urgent = navigator_engine.get_urgent_activities(limit=10)
     return jsonify({"urgent_activities": urgent})
 
+@app.route('/api/navigator/owned', methods=['POST'])
+def navigator_owned():
+    """
+    Mark a drop as collected (or not) and re-rank its activities
+    POST body: {drop: str, owned: bool}
+    """
+    data = request.get_json() or {}
+    drop = data.get('drop')
+    owned = data.get('owned', True)
+    
+    if not drop:
+        return jsonify({"error": "Missing drop"}), 400
+    
+    navigator_engine.mark_owned(drop, owned)
+    engines.changed('navigator')
+    
+    return jsonify({"success": True, "drop": drop, "owned": owned})
+
+@app.route('/api/navigator/lockouts', methods=['POST'])
+def navigator_lockouts():
+    """
+    Update how many characters can still run an instance
+    POST body: {instance: str, available_chars: int}
+    """
+    data = request.get_json() or {}
+    instance = data.get('instance')
+    available_chars = data.get('available_chars')
+    
+    if not instance or not isinstance(available_chars, int) or available_chars < 0:
+        return jsonify({"error": "Missing instance or available_chars"}), 400
+    
+    navigator_engine.set_available_chars(instance, available_chars)
+    engines.changed('navigator')
+    
+    return jsonify({"success": True, "instance": instance, "available_chars": available_chars})
+
 @app.route('/navigator')
 def navigator():
     """Navigator UI page"""
@@ -664,9 +770,13 @@ def navigator():
 # --- PATHFINDER MODULE ---
 from pathfinder_engine import PathfinderEngine
 
-# Initialize Pathfinder engine once
-pathfinder_engine = PathfinderEngine(None)
-pathfinder_engine.load_mock_data()
+def _build_pathfinder():
+    engine = PathfinderEngine(os.getenv('DATABASE_URL'), engines.proxy('deeppockets'))
+    engine.load_mock_data()
+    engine.load_real_data()  # Player state from SavedInstances, if uploaded
+    return engine
+
+pathfinder_engine = engines.register('pathfinder', _build_pathfinder, depends_on=('deeppockets',))
 
 @app.route('/api/pathfinder/route')
 def pathfinder_route():
@@ -728,9 +838,7 @@ def pathfinder():
 # --- KNOWLEDGE POINT TRACKER ---
 from knowledge_tracker import KnowledgeTracker, Profession
 
-# Initialize Knowledge tracker once
-knowledge_tracker = KnowledgeTracker()
-knowledge_tracker.load_mock_data()
+knowledge_tracker = engines.register('knowledge', KnowledgeTracker, load='load_mock_data')
 
 @app.route('/api/knowledge/checklist')
 def knowledge_checklist():
@@ -769,6 +877,7 @@ def knowledge_complete():
         knowledge_tracker.mark_complete(source_id, character_guid)
     else:
         knowledge_tracker.mark_incomplete(source_id, character_guid)
+    engines.changed('knowledge')
     
     return jsonify({"success": True, "source_id": source_id, "complete": complete})
 
@@ -785,9 +894,8 @@ def knowledge():
 # --- UTILITY TRACKER ---
 from utility_tracker import UtilityTracker, CollectionType
 
-# Initialize Utility tracker once
-utility_tracker = UtilityTracker()
-utility_tracker.load_mock_data()
+# Real collection data when uploaded/found, mock otherwise
+utility_tracker = engines.register('utility', UtilityTracker, load='load_real_data')
 
 @app.route('/api/utility/summary')
 def utility_summary():
@@ -827,9 +935,7 @@ def utility():
 # --- GOBLIN BRAIN MODULE ---
 from goblin_engine import GoblinEngine, ItemType, GoblinEngineExpanded
 
-# Initialize Goblin engine once
-goblin_engine = GoblinEngineExpanded()
-goblin_engine.load_mock_data()
+goblin_engine = engines.register('goblin', GoblinEngineExpanded, load='load_mock_data')
 
 @app.route('/api/goblin/dashboard')
 def goblin_dashboard():
@@ -1131,10 +1237,8 @@ def goblin_dominate():
 # --- CODEX MODULE ---
 from codex_engine import CodexEngine, Role
 
-# Initialize Codex engine once
-codex_engine = CodexEngine()
 # Use mock data by default to avoid scraping on startup
-codex_engine.load_from_wowhead_json()
+codex_engine = engines.register('codex', CodexEngine, load='load_from_wowhead_json')
 # try:
 #     codex_engine.load_real_data()
 # except Exception as e:
@@ -1262,9 +1366,7 @@ def codex_page():
 # --- VAULT VISUALIZER ---
 from vault_engine import VaultEngine, VaultCategory
 
-# Initialize Vault engine once
-vault_engine = VaultEngine()
-vault_engine.load_mock_data()
+vault_engine = engines.register('vault', VaultEngine, load='load_mock_data')
 
 @app.route('/api/vault/status')
 def vault_status():
@@ -1292,9 +1394,7 @@ def vault():
 # --- THE SCOUT MODULE ---
 from scout_engine import ScoutEngine, EventType
 
-# Initialize Scout engine once
-scout_engine = ScoutEngine()
-scout_engine.load_mock_data()
+scout_engine = engines.register('scout', ScoutEngine, load='load_mock_data')
 
 @app.route('/api/scout/alerts')
 def scout_alerts():
@@ -1314,9 +1414,15 @@ def scout():
 # --- DEEPPOCKETS MODULE ---
 from deeppockets_engine import DeepPocketsEngine
 
-# Initialize DeepPockets engine once
-deeppockets_engine = DeepPocketsEngine()
-deeppockets_engine.load_real_data()
+def goblin_item_names():
+    """Item names known to the Goblin engine (price data and items)"""
+    goblin = engines.get('goblin')
+    names = {item.id: item.name for item in goblin.items}
+    names.update({item_id: price.name for item_id, price in goblin.prices.items() if price.name})
+    return names
+
+deeppockets_engine = engines.register(
+    'deeppockets', lambda: DeepPocketsEngine(name_source=goblin_item_names), load='load_real_data')
 
 @app.route('/api/deeppockets/inventory')
 def deeppockets_inventory():
@@ -1344,9 +1450,15 @@ def deeppockets_search():
     results = deeppockets_engine.search_inventory(query)
     return jsonify(results)
 
+@app.route('/api/deeppockets/characters')
+def deeppockets_characters():
+    """Per-character totals, optionally for one item_id"""
+    item_id = request.args.get('item_id', type=int)
+    return jsonify(deeppockets_engine.get_character_totals(item_id))
+
 @app.route('/api/deeppockets/incinerate', methods=['POST'])
 def deeppockets_incinerate():
-    data = request.get_json()
+    data = request.get_json() or {}
     items = data.get("items", [])
     
     # Sync prices from Goblin
@@ -1356,7 +1468,11 @@ def deeppockets_incinerate():
         
     deeppockets_engine.set_prices(price_map)
     
-    candidates = deeppockets_engine.calculate_value_density(items)
+    if items:
+        candidates = deeppockets_engine.calculate_value_density(items)
+    else:
+        # No bag posted: rank the stacks we already hold
+        candidates = deeppockets_engine.get_incinerator_candidates(data.get("character"), data.get("limit", 50))
     return jsonify({"candidates": candidates})
 
 @app.route('/api/deeppockets/remote')
@@ -1371,7 +1487,9 @@ def deeppockets_remote():
 
 # --- Artificer Endpoints ---
 from artificer_engine import ArtificerEngine
-artificer_engine = ArtificerEngine(goblin_engine, deeppockets_engine)
+artificer_engine = engines.register(
+    'artificer', lambda: ArtificerEngine(engines.proxy('goblin'), engines.proxy('deeppockets')),
+    depends_on=('goblin', 'deeppockets'))
 
 @app.route('/artificer')
 def artificer_page():
@@ -1395,38 +1513,56 @@ def artificer_supply_chain():
     return jsonify(data)
 
 # --- Navigator Endpoints ---
-# Re-initialize Pathfinder with DeepPockets
-pathfinder_engine = PathfinderEngine(os.getenv('DATABASE_URL'), deeppockets_engine)
-pathfinder_engine.load_mock_data() # Ensure mock data is loaded
+# pathfinder_engine (registered above) already has DeepPockets wired in
 
 @app.route('/navigator')
 def navigator_page():
     return render_template('navigator.html')
 
-@app.route('/api/navigator/optimize', methods=['POST'])
-def navigator_optimize():
-    data = request.get_json()
-    current_zone = data.get('current_zone', 84) # Default Stormwind
-    quests = data.get('quests', []) # List of Quest IDs
-    destinations = data.get('destinations', []) # List of Zone IDs
+def optimize_navigator_route(payload, progress):
+    current_zone = payload.get('current_zone', 84) # Default Stormwind
+    quests = payload.get('quests', []) # List of Quest IDs
+    destinations = payload.get('destinations', []) # List of Zone IDs
     
     # 1. Check for Bank Stops
     bank_stops = pathfinder_engine.check_quest_items(quests)
     if bank_stops:
         destinations.extend(bank_stops)
+    progress(0.5, "bank stops checked")
         
     # 2. Optimize Route
-    result = pathfinder_engine.optimize_route(current_zone, destinations)
+    result = pathfinder_engine.optimize_route(
+        current_zone, destinations,
+        character_class=payload.get('char_class'),
+        hearthstone_ready_at=payload.get('hearthstone_ready_at', 0)
+    )
     
-    return jsonify({
+    return {
         "route": result,
         "bank_stops_added": len(bank_stops) > 0,
         "bank_zones": bank_stops
+    }
+
+job_queue.register("navigator_optimize", optimize_navigator_route, concurrency=2, cache_ttl=300)
+
+@app.route('/api/navigator/optimize', methods=['POST'])
+def navigator_optimize():
+    """Queue a route optimization. Poll /api/jobs/<job_id> for the result."""
+    data = request.get_json() or {}
+    return job_accepted("navigator_optimize", {
+        "current_zone": data.get('current_zone', 84),
+        "quests": data.get('quests', []),
+        "destinations": data.get('destinations', []),
+        "char_class": data.get('char_class'),
+        # Seconds until the hearthstone is off cooldown; null if unavailable
+        "hearthstone_ready_at": data.get('hearthstone_ready_at', 0),
     })
 
 # --- Synergy Endpoints ---
 from synergy_engine import SynergyEngine
-synergy_engine = SynergyEngine(goblin_engine, deeppockets_engine)
+synergy_engine = engines.register(
+    'synergy', lambda: SynergyEngine(engines.proxy('goblin'), engines.proxy('deeppockets')),
+    depends_on=('goblin', 'deeppockets'))
 
 @app.route('/synergy')
 def synergy_page():
@@ -1461,10 +1597,11 @@ from skillweaver_engine import SkillWeaverEngine
 from arbiter_engine import ArbiterEngine
 
 # Initialize Engines
-skillweaver_engine = SkillWeaverEngine()
+skillweaver_engine = engines.register('skillweaver', SkillWeaverEngine)
 # skillweaver_engine.start()  # DISABLED: Causes blocking on startup, preventing Flask from serving requests
 
-arbiter_engine = ArbiterEngine(skillweaver_engine)
+arbiter_engine = engines.register('arbiter', lambda: ArbiterEngine(engines.proxy('skillweaver')),
+                                  depends_on=('skillweaver',))
 # arbiter_engine.start()  # DISABLED: Same issue
 
 @app.route('/api/arbiter/status')
@@ -1474,24 +1611,26 @@ def arbiter_status():
 
 # --- DASHBOARD MODULE ---
 from dashboard_engine import DashboardEngine
+from commander_engine import CommanderEngine
+
+commander_engine = engines.register('commander', CommanderEngine, load='load_mock_data')
 
-# Initialize Dashboard engine once
-dashboard_engine = DashboardEngine()
+# Shares the registry's engines instead of building its own set
+dashboard_engine = engines.register('dashboard', lambda: DashboardEngine(engines))
 
 @app.route('/api/dashboard/summary')
 def dashboard_summary():
     """Get unified dashboard summary"""
     try:
-        summary = dashboard_engine.get_dashboard_summary()
-        return jsonify(summary)
+        return summary_response(dashboard_engine.summary, jsonify)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/dashboard')
 def dashboard():
     """Enhanced Dashboard UI"""
-    summary = dashboard_engine.get_dashboard_summary()
-    return render_template('dashboard.html', summary=summary)
+    return summary_response(dashboard_engine.summary,
+                            lambda summary: render_template('dashboard.html', summary=summary))
 
 def fetch_campaigns():
     """
@@ -1728,7 +1867,7 @@ from fabricator import Fabricator
 # Initialize Fabricator (DB connection will be created per request or shared)
 # For now, we pass the connection string from env
 DB_URL = os.environ.get('DATABASE_URL')
-fabricator_engine = Fabricator(DB_URL)
+fabricator_engine = engines.register('fabricator', lambda: Fabricator(DB_URL))
 
 @app.route('/api/fabricator/plan')
 def fabricator_plan():
@@ -1756,41 +1895,55 @@ def fabricator_plan():
 from sandbox import Sandbox
 from loadout_lottery import LoadoutLottery
 
-sandbox_engine = Sandbox()
-lottery_engine = LoadoutLottery()
+sandbox_engine = engines.register('sandbox', Sandbox)
+lottery_engine = engines.register('lottery', LoadoutLottery)
+
+def run_sandbox_sim(payload, progress):
+    result = sandbox_engine.run_sim(payload['simc_input'])
+    if not result:
+        raise RuntimeError("Simulation failed")
+    return result
+
+def run_loadout_lottery(payload, progress):
+    winner = lottery_engine.run_comparison(payload['base_profile'], payload['talent_strings'],
+                                           progress=progress)
+    if not winner:
+        raise RuntimeError("Optimization failed")
+    return winner
+
+# Each SimC job already spreads across every core; two at once keeps a
+# quick single sim from waiting behind a long lottery
+job_queue.register("sandbox_run", run_sandbox_sim, concurrency=2, cache_ttl=3600)
+job_queue.register("sandbox_optimize", run_loadout_lottery, concurrency=1, cache_ttl=3600)
 
 @app.route('/api/sandbox/run', methods=['POST'])
 def sandbox_run():
     """
-    Run a raw SimC simulation
+    Queue a raw SimC simulation
     POST body: {simc_input: str}
     """
-    data = request.get_json()
+    data = request.get_json() or {}
     simc_input = data.get('simc_input')
     
     if not simc_input:
         return jsonify({"error": "Missing simc_input"}), 400
         
-    result = sandbox_engine.run_sim(simc_input)
-    if result:
-        return jsonify(result)
-    return jsonify({"error": "Simulation failed"}), 500
+    return job_accepted("sandbox_run", {"simc_input": simc_input})
 
 @app.route('/api/sandbox/optimize', methods=['POST'])
 def sandbox_optimize():
     """
-    Run a talent optimization (Loadout Lottery)
+    Queue a talent optimization (Loadout Lottery)
     POST body: {base_profile: str, talent_strings: [str]}
     """
-    data = request.get_json()
+    data = request.get_json() or {}
     base_profile = data.get('base_profile')
     talent_strings = data.get('talent_strings', [])
     
     if not base_profile or not talent_strings:
         return jsonify({"error": "Missing base_profile or talent_strings"}), 400
         
-        return jsonify(winner)
-    return jsonify({"error": "Optimization failed"}), 500
+    return job_accepted("sandbox_optimize", {"base_profile": base_profile, "talent_strings": talent_strings})
 
 # =============================================================================
 # PETWEAVER MODULE
@@ -2042,9 +2195,7 @@ def codex_blocker():
 # --- DIPLOMAT MODULE ---
 from diplomat_engine import DiplomatEngine
 
-# Initialize Diplomat engine once
-diplomat_engine = DiplomatEngine()
-diplomat_engine.load_real_data()
+diplomat_engine = engines.register('diplomat', DiplomatEngine, load='load_real_data')
 
 @app.route('/api/diplomat/opportunities')
 def diplomat_opportunities():
@@ -2124,15 +2275,93 @@ def api_codex_encounter(encounter_id):
         return jsonify({"error": "Not found"}), 404
     return jsonify(encounter)
 
+# --- SAVEDVARIABLES INGESTION ---
+# Parsing multi-MB SavedVariables and the SQL ingest run on the job queue;
+# upload endpoints only validate, enqueue and return a job id.
+import re
+import tempfile
+from delta_upload import BlockStore, decode_body
+
+SYNCED_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "synced_data")
+block_store = BlockStore(os.path.join(SYNCED_DATA_DIR, "blocks"))
+# Uploads waiting for their ingest job; the job row only holds the path
+UPLOAD_SPOOL_DIR = os.path.join(SYNCED_DATA_DIR, "uploads")
+
+# SavedVariables source -> engine that loads it
+SAVED_VARIABLES_ENGINES = {
+    "DataStore_Reputations": "diplomat",
+    "SavedInstances": "pathfinder",
+    "DataStore_Containers": "deeppockets",
+    "DataStore_Mounts": "utility",
+    "DataStore_Pets": "utility",
+    "CanIMogIt": "utility",
+}
+
+def ingest_saved_variables(payload, progress):
+    """Parse a spooled SavedVariables upload and hand it to the engines."""
+    source = payload['source']
+
+    from lua_parser import parse_lua_table
+    try:
+        parsed_data = parse_lua_table(payload['path'])
+    finally:
+        if os.path.exists(payload['path']):
+            os.remove(payload['path'])
+
+    if not parsed_data:
+        raise ValueError("Failed to parse Lua data")
+    progress(0.5, "parsed")
+
+    # Save to JSON file for engines to consume
+    with open(f"{source}.json", "w") as f:
+        json.dump(parsed_data, f, separators=(',', ':'))
+
+    print(f"Received and saved data from {source}: {payload['size']} bytes")
+
+    # SQL Ingestion
+    try:
+        import ingest_sql
+        if source == "DataStore_Reputations":
+            ingest_sql.ingest_reputations(parsed_data)
+        elif source == "SavedInstances":
+            ingest_sql.ingest_saved_instances(parsed_data)
+    except Exception as e:
+        print(f"SQL Ingestion Error: {e}")
+
+    # Engines that read <source>.json pick it up on a rebuild; the reload
+    # also tells the dashboard/briefing summaries which sections are stale
+    engine_name = SAVED_VARIABLES_ENGINES.get(source)
+    if engine_name == 'deeppockets' and engines.status('deeppockets') == 'ready':
+        # Per-character replace; keeps the item name index warm
+        deeppockets_engine.sync_containers(parsed_data)
+        engines.changed('deeppockets')
+    elif engine_name:
+        engines.reload(engine_name)
+
+    return {"source": source, "size": len(parsed_data)}
+
+# One ingest at a time keeps <source>.json writes ordered
+job_queue.register("ingest_saved_variables", ingest_saved_variables, concurrency=1)
+
+def submit_ingest(source, content):
+    """Spool the upload to disk and queue an ingest job that references it."""
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    prefix = re.sub(r'[^A-Za-z0-9_-]', '_', source)
+    fd, path = tempfile.mkstemp(prefix=f"{prefix}-", suffix=".lua", dir=UPLOAD_SPOOL_DIR)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return job_queue.submit("ingest_saved_variables", {"source": source, "path": path, "size": len(content)})
+
 @app.route('/upload_data', methods=['POST'])
 def upload_data():
     """
-    Endpoint to receive JSON payloads from the Bridge script.
+    Endpoint to receive full JSON payloads from older Bridge scripts.
     Expected JSON format:
     {
         "source": "DataStore", 
         "data": "raw lua string"
     }
+    Parsing happens on the job queue; returns 202 with a job id.
     """
     try:
         payload = request.get_json()
@@ -2145,36 +2374,47 @@ def upload_data():
         if not source or not data:
             return jsonify({"error": "Missing 'source' or 'data' fields"}), 400
 
-        # Parse Lua
-        from lua_parser import parse_lua_table
-        parsed_data = parse_lua_table(data)
-        
-        if not parsed_data:
-             return jsonify({"error": "Failed to parse Lua data"}), 400
-             
-        # Save to JSON file for engines to consume
-        filename = f"{source}.json"
-        # os.makedirs("data", exist_ok=True)
-        
-        with open(filename, "w") as f:
-            json.dump(parsed_data, f, indent=2)
+        job_id = submit_ingest(source, data)
+        return jsonify({"status": "accepted", "source": source, "job_id": job_id,
+                        "status_url": f"/api/jobs/{job_id}"}), 202
 
-        print(f"Received and saved data from {source}: {len(str(parsed_data))} bytes")
-            
-        # SQL Ingestion (Async-ish)
+    except Exception as e:
+        print(f"Error processing upload: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/upload_data/delta', methods=['POST'])
+def upload_data_delta():
+    """
+    Content-addressed upload (see delta_upload.py).
+    Body: compressed manifest {source, digest, blocks: [hash...]} plus
+    optional "data": {hash: block} for blocks the server asked for.
+    """
+    try:
         try:
-            import ingest_sql
-            if source == "DataStore_Reputations":
-                ingest_sql.ingest_reputations(parsed_data)
-            elif source == "SavedInstances":
-                ingest_sql.ingest_saved_instances(parsed_data)
-        except Exception as e:
-            print(f"SQL Ingestion Error: {e}")
-            
-        return jsonify({"status": "success", "source": source, "size": len(parsed_data)}), 200
+            payload = decode_body(request.get_data(), request.headers.get('Content-Encoding'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        source = payload.get('source')
+        if not source or not payload.get('digest') or not isinstance(payload.get('blocks'), list):
+            return jsonify({"error": "Missing 'source', 'digest' or 'blocks' fields"}), 400
+
+        try:
+            state, result = block_store.receive(payload, payload.get('data'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if state == "unchanged":
+            return jsonify({"status": "unchanged", "source": source}), 200
+        if state == "missing":
+            return jsonify({"status": "missing", "source": source, "missing": result}), 200
+
+        job_id = submit_ingest(source, result)
+        return jsonify({"status": "accepted", "source": source, "job_id": job_id,
+                        "status_url": f"/api/jobs/{job_id}"}), 202
 
     except Exception as e:
-        print(f"Error processing upload: {e}")
+        print(f"Error processing delta upload: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/health', methods=['GET'])
@@ -2323,13 +2563,10 @@ def mirror_sync():
 
 # --- TSM MODULE ---
 from tsm_engine import TSMEngine
-tsm_engine = TSMEngine()
-tsm_engine.load_data()
+tsm_engine = engines.register('tsm', TSMEngine, load='load_data')
 
 # --- GOBLIN MODULE ---
-from goblin_engine import GoblinEngine
-goblin_engine = GoblinEngineExpanded()
-goblin_engine.load_mock_data()
+# goblin_engine is registered with the Goblin Brain module above
 
 @app.route('/api/goblin')
 def api_goblin():
@@ -2346,8 +2583,7 @@ def api_goblin_history():
 
 # --- WARDEN MODULE ---
 from warden_engine import WardenEngine
-warden_engine = WardenEngine()
-warden_engine.load_mock_data()
+warden_engine = engines.register('warden', WardenEngine, load='load_mock_data')
 
 @app.route('/api/warden')
 def warden_api():
@@ -2356,7 +2592,8 @@ def warden_api():
 
 # --- QUARTERMASTER ENGINE (Logistics) ---
 from quartermaster_engine import QuartermasterEngine
-quartermaster_engine = QuartermasterEngine(warden_engine)
+quartermaster_engine = engines.register('quartermaster', lambda: QuartermasterEngine(engines.proxy('warden')),
+                                        depends_on=('warden',))
 
 @app.route('/api/quartermaster/jobs')
 def api_quartermaster_jobs():
@@ -2365,7 +2602,8 @@ def api_quartermaster_jobs():
 
 # --- MUSEUM ENGINE (Shadow Collection) ---
 from museum_engine import MuseumEngine
-museum_engine = MuseumEngine(warden_engine)
+museum_engine = engines.register('museum', lambda: MuseumEngine(engines.proxy('warden')),
+                                 depends_on=('warden',))
 
 @app.route('/api/museum/shadow')
 def api_museum_shadow():
@@ -2377,27 +2615,32 @@ from briefing_engine import BriefingEngine
 
 # --- BRIEFING ENGINE (Executive Assistant) ---
 # Pass quartermaster to BriefingEngine
-briefing_engine = BriefingEngine(
-    diplomat=diplomat_engine,
-    goblin=goblin_engine,
-    vault=vault_engine,
-    scout=scout_engine,
-    knowledge=knowledge_tracker,
-    warden=warden_engine,
-    quartermaster=quartermaster_engine, # Added quartermaster
-    museum=museum_engine
-)
+def _build_briefing():
+    engine = BriefingEngine(
+        diplomat=engines.proxy('diplomat'),
+        goblin=engines.proxy('goblin'),
+        vault=engines.proxy('vault'),
+        scout=engines.proxy('scout'),
+        knowledge=engines.proxy('knowledge'),
+        warden=engines.proxy('warden'),
+        quartermaster=engines.proxy('quartermaster'), # Added quartermaster
+        museum=engines.proxy('museum')
+    )
+    engines.subscribe(engine.summary.notify)
+    return engine
+
+briefing_engine = engines.register('briefing', _build_briefing)
 
 @app.route('/api/briefing')
 def briefing_api():
     """Daily Briefing API"""
-    return jsonify(briefing_engine.generate_briefing())
+    return summary_response(briefing_engine.summary, jsonify)
 
 @app.route('/briefing')
 def briefing():
     """Daily Briefing UI"""
-    data = briefing_engine.generate_briefing()
-    return render_template('briefing.html', briefing=data)
+    return summary_response(briefing_engine.summary,
+                            lambda data: render_template('briefing.html', briefing=data))
 
 # --- COMMANDER ENGINE (Alt-Army) ---
 @app.route('/api/commander/cooldowns')
@@ -2452,7 +2695,9 @@ def api_commander_cooldowns():
 from intelligent_profession_engine import IntelligentProfessionEngine
 from recommend_specs import generate_spec_guide
 
-prof_engine = IntelligentProfessionEngine(goblin_engine=goblin_engine)
+prof_engine = engines.register(
+    'profession', lambda: IntelligentProfessionEngine(goblin_engine=engines.proxy('goblin')),
+    depends_on=('goblin',))
 
 @app.route('/api/profession/guide/<character>/<profession>')
 def api_profession_guide(character, profession):
@@ -2526,4 +2771,6 @@ if __name__ == '__main__':
     # Start the Flask server
     PORT = 8003
     print(f"Starting Holocron Server on port {PORT}...")
+    # Build engines in the background; requests that arrive first build what they need
+    engines.warm_up()
     app.run(host='0.0.0.0', port=PORT, debug=False)
@@ -0,0 +1,142 @@
+# sim_runner.py
+# Parallel SimulationCraft batch runner for the Sandbox and Loadout Lottery
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sandbox import Sandbox
+
+# Options that control how SimC runs or where it writes, not what it sims.
+# They are stripped before hashing so they don't split the cache.
+_RUNTIME_OPTIONS = re.compile(r'^(iterations|threads|json2?|html|output|xml|report_details)\s*=', re.IGNORECASE)
+
+
+def normalize_profile(simc_input):
+    """Canonical form of a profile: no comments, blank lines, padding or runtime options."""
+    lines = []
+    for line in simc_input.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if not line or _RUNTIME_OPTIONS.match(line):
+            continue
+        lines.append(re.sub(r'\s*=\s*', '=', line, count=1))
+    return "\n".join(lines)
+
+
+def profile_hash(simc_input, iterations):
+    key = f"{iterations}\n{normalize_profile(simc_input)}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class SimRunner:
+    """
+    Fans SimC profiles out across parallel SimC processes.
+
+    Each profile runs as its own SimC process in its own temp directory
+    (via Sandbox.run_sim). The pool is sized to the machine's cores and each
+    process gets cores / concurrent_sims threads, so a small batch still uses
+    every core and a large batch doesn't oversubscribe them. Results are
+    cached by normalized profile hash + iteration count.
+    """
+
+    def __init__(self, sandbox=None, max_workers=None, cache_size=1024, cache_dir=None):
+        self.sandbox = sandbox or Sandbox()
+        self.cores = os.cpu_count() or 1
+        self.max_workers = max_workers or self.cores
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.stats = {"sims_run": 0, "cache_hits": 0, "failures": 0}
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def threads_for(self, batch_size):
+        """SimC threads per process when `batch_size` sims run at once."""
+        concurrent = max(1, min(self.max_workers, batch_size))
+        return max(1, self.cores // concurrent)
+
+    # --- Cache ---
+
+    def _cache_get(self, key):
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        if self.cache_dir:
+            path = os.path.join(self.cache_dir, f"{key}.json")
+            if os.path.exists(path):
+                with open(path, "r") as f:
+                    result = json.load(f)
+                self._cache_put(key, result, persist=False)
+                return result
+        return None
+
+    def _cache_put(self, key, result, persist=True):
+        with self._cache_lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        if persist and self.cache_dir:
+            with open(os.path.join(self.cache_dir, f"{key}.json"), "w") as f:
+                json.dump(result, f)
+
+    # --- Running ---
+
+    def _run_one(self, simc_input, iterations, threads):
+        result = self.sandbox.run_sim(simc_input, iterations=iterations, threads=threads)
+        if isinstance(result, list):
+            # One profile per process; take the primary actor
+            result = result[0] if result else None
+        return result
+
+    def run_iter(self, profiles, iterations=1000):
+        """
+        Sim every profile, yielding (index, result) as each one finishes.
+        Cached profiles are yielded first. A failed sim yields (index, None).
+        """
+        pending = {}
+        for i, profile in enumerate(profiles):
+            key = profile_hash(profile, iterations)
+            cached = self._cache_get(key)
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                yield i, cached
+            else:
+                pending[i] = key
+
+        if not pending:
+            return
+
+        threads = self.threads_for(len(pending))
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+            futures = {
+                pool.submit(self._run_one, profiles[i], iterations, threads): i
+                for i in pending
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"SimRunner: profile {i} failed: {e}")
+                    result = None
+                self.stats["sims_run"] += 1
+                if result is None:
+                    self.stats["failures"] += 1
+                else:
+                    self._cache_put(pending[i], result)
+                yield i, result
+
+    def run_batch(self, profiles, iterations=1000):
+        """Sim every profile and return results in input order."""
+        results = [None] * len(profiles)
+        for i, result in self.run_iter(profiles, iterations):
+            results[i] = result
+        return results
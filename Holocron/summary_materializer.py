@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Summary Materializer - precomputed dashboard/briefing summaries
+
+A summary is split into sections, each built from a few engines. Sections
+are kept in memory and rebuilt only when one of their engines reports a
+data change (EngineRegistry.changed) or, for time-dependent sections such
+as reset countdowns, when their ttl runs out. The assembled summary carries
+a version that only moves when some section's content actually changed, so
+endpoints can answer If-None-Match with 304.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterable, Optional
+
+MaterializedSummary = namedtuple('MaterializedSummary', 'version etag payload updated_at')
+
+
+class _Section:
+    def __init__(self, build, depends_on, ttl):
+        self.build = build
+        self.depends_on = frozenset(depends_on)
+        self.ttl = ttl
+        self.value = None
+        self.built_at = None
+        self.dirty = True
+
+
+class SummaryMaterializer:
+    def __init__(self, name: str, assemble: Callable[[Dict[str, Any], float], Any]):
+        """
+        assemble(sections, updated_at) builds the served payload from the
+        section values; it runs only when the version changes.
+        """
+        self.name = name
+        self.assemble = assemble
+        self._sections: Dict[str, _Section] = {}
+        # Re-entrant: a section build can load an engine, whose ready event
+        # comes back through notify() on the same thread
+        self._lock = threading.RLock()
+        self._version = 0
+        self._current: Optional[MaterializedSummary] = None
+        # Distinguishes versions across restarts so stale ETags never match
+        self._boot = format(int(time.time() * 1000), 'x')
+        self.stats = {"hits": 0, "section_builds": 0}
+
+    def section(self, key: str, build: Callable[[], Any], depends_on: Iterable[str] = (),
+                ttl: Optional[float] = None):
+        """Register a section; ttl (seconds) for sections that change with the clock."""
+        self._sections[key] = _Section(build, depends_on, ttl)
+
+    def notify(self, engine_name: str):
+        """Data-change event: mark sections built from this engine stale."""
+        with self._lock:
+            for section in self._sections.values():
+                if engine_name in section.depends_on:
+                    section.dirty = True
+
+    def invalidate(self):
+        with self._lock:
+            for section in self._sections.values():
+                section.dirty = True
+
+    def get(self) -> MaterializedSummary:
+        """Current summary, rebuilding only stale sections."""
+        with self._lock:
+            now = time.time()
+            changed = False
+            for section in self._sections.values():
+                stale = section.dirty or (section.ttl is not None and now - section.built_at >= section.ttl)
+                if not stale:
+                    continue
+                value = section.build()
+                self.stats["section_builds"] += 1
+                if section.built_at is None or value != section.value:
+                    changed = True
+                section.value = value
+                section.built_at = now
+                section.dirty = False
+
+            if changed or self._current is None:
+                self._version += 1
+                payload = self.assemble({k: s.value for k, s in self._sections.items()}, now)
+                self._current = MaterializedSummary(
+                    self._version, f"{self.name}-{self._boot}-{self._version}", payload, now)
+            else:
+                self.stats["hits"] += 1
+            return self._current
@@ -0,0 +1,245 @@
+"""
+sv_watcher.py - Debounced SavedVariables watcher
+
+WoW rewrites SavedVariables several times on logout/reload, so reacting to
+every on_modified event re-reads and re-uploads the same file 3-10 times.
+This watcher collects filesystem events per file, waits until the file has
+stopped changing (size and mtime unchanged for a full debounce window) and
+then dispatches it once to the registered handlers on a bounded worker pool.
+
+Usage:
+    watcher = SavedVariablesWatcher(saved_variables_dir)
+    watcher.register("DataStore*.lua", handler)   # handler(filepath, filename)
+    watcher.start()
+"""
+
+import fnmatch
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+Handler = Callable[[str, str], None]
+
+
+class SavedVariablesWatcher(FileSystemEventHandler):
+    """
+    Per-file debouncing watcher shared by the sync tools.
+
+    Events for the same file are coalesced into one pending entry. A pending
+    file is dispatched once its debounce window has elapsed and its size/mtime
+    match the snapshot taken when the window started. Files that change while
+    their handlers are running stay pending and are dispatched again after the
+    running pass completes, so a handler never runs twice concurrently for the
+    same file.
+    """
+
+    def __init__(self, path: str, debounce: float = 1.5, poll_interval: float = 0.25,
+                 max_workers: int = 2, max_in_flight: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.path = path
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight or max_workers
+        self.clock = clock
+
+        self._handlers: List[Tuple[str, Handler]] = []
+        self._pending: Dict[str, Dict] = {}
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._observer = None
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            "events_received": 0,
+            "events_coalesced": 0,
+            "events_ignored": 0,
+            "quiescence_waits": 0,
+            "deferred_backpressure": 0,
+            "dispatched": 0,
+            "handler_failures": 0,
+            "vanished": 0,
+            "max_pending": 0,
+            "total_settle_seconds": 0.0,
+            "total_handler_seconds": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def register(self, pattern: str, handler: Handler):
+        """Dispatch files whose basename matches the glob `pattern` to `handler`."""
+        self._handlers.append((pattern, handler))
+
+    def _handlers_for(self, filename: str) -> List[Handler]:
+        return [h for pattern, h in self._handlers if fnmatch.fnmatch(filename, pattern)]
+
+    # ------------------------------------------------------------------
+    # Event intake (watchdog callbacks)
+    # ------------------------------------------------------------------
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.notify(event.src_path)
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.notify(event.src_path)
+
+    def on_moved(self, event):
+        # WoW writes a temp file and renames it over the real one
+        if not event.is_directory:
+            self.notify(event.dest_path)
+
+    def notify(self, filepath: str):
+        """Record a change to `filepath` and (re)start its debounce window."""
+        if not self._handlers_for(os.path.basename(filepath)):
+            with self._lock:
+                self.stats["events_ignored"] += 1
+            return
+
+        now = self.clock()
+        snapshot = self._stat(filepath)
+        with self._lock:
+            self.stats["events_received"] += 1
+            entry = self._pending.get(filepath)
+            if entry:
+                self.stats["events_coalesced"] += 1
+                entry["due"] = now + self.debounce
+                entry["stat"] = snapshot
+            else:
+                self._pending[filepath] = {"first_seen": now, "due": now + self.debounce, "stat": snapshot}
+                self.stats["max_pending"] = max(self.stats["max_pending"], len(self._pending))
+
+    # ------------------------------------------------------------------
+    # Settling and dispatch
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _stat(filepath: str) -> Optional[Tuple[int, float]]:
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime)
+
+    def check_pending(self, now: Optional[float] = None) -> int:
+        """
+        Dispatch every pending file whose write has settled.
+        Called periodically by the watcher thread; returns the number dispatched.
+        """
+        now = self.clock() if now is None else now
+        ready = []
+
+        with self._lock:
+            for filepath, entry in list(self._pending.items()):
+                if entry["due"] > now:
+                    continue
+
+                current = self._stat(filepath)
+                if current is None:
+                    # Deleted (or renamed away) before it settled
+                    del self._pending[filepath]
+                    self.stats["vanished"] += 1
+                    continue
+
+                if current != entry["stat"]:
+                    # Still being written - wait for another quiet window
+                    entry["stat"] = current
+                    entry["due"] = now + self.debounce
+                    self.stats["quiescence_waits"] += 1
+                    continue
+
+                if filepath in self._in_flight:
+                    # Coalesce with the pass already running for this file
+                    entry["due"] = now + self.poll_interval
+                    continue
+
+                if len(self._in_flight) >= self.max_in_flight:
+                    entry["due"] = now + self.poll_interval
+                    self.stats["deferred_backpressure"] += 1
+                    continue
+
+                del self._pending[filepath]
+                self._in_flight.add(filepath)
+                self.stats["total_settle_seconds"] += now - entry["first_seen"]
+                ready.append(filepath)
+
+        for filepath in ready:
+            self._get_executor().submit(self._dispatch, filepath)
+        return len(ready)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="sv-watcher")
+        return self._executor
+
+    def _dispatch(self, filepath: str):
+        filename = os.path.basename(filepath)
+        started = time.perf_counter()
+        failures = 0
+        try:
+            for handler in self._handlers_for(filename):
+                try:
+                    handler(filepath, filename)
+                except Exception as e:
+                    failures += 1
+                    print(f"[Watcher] Handler failed for {filename}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(filepath)
+                self.stats["dispatched"] += 1
+                self.stats["handler_failures"] += failures
+                self.stats["total_handler_seconds"] += time.perf_counter() - started
+
+    def metrics(self) -> Dict:
+        """Counters plus current queue depths for backpressure monitoring."""
+        with self._lock:
+            data = dict(self.stats)
+            data["pending"] = len(self._pending)
+            data["in_flight"] = len(self._in_flight)
+        dispatched = data["dispatched"] or 1
+        data["avg_settle_seconds"] = round(data.pop("total_settle_seconds") / dispatched, 3)
+        data["avg_handler_seconds"] = round(data.pop("total_handler_seconds") / dispatched, 3)
+        return data
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the filesystem observer and the settle loop."""
+        self._stop.clear()
+        self._observer = Observer()
+        self._observer.schedule(self, self.path, recursive=False)
+        self._observer.start()
+        self._thread = threading.Thread(target=self._run, name="sv-watcher-settle", daemon=True)
+        self._thread.start()
+        print(f"[Watcher] Watching {self.path} ({len(self._handlers)} handlers, debounce {self.debounce}s)")
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check_pending()
+
+    def stop(self, wait: bool = True):
+        """Stop watching and wait for running handlers to finish."""
+        self._stop.set()
+        if self._observer:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+import random
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from navigator_engine import NavigatorEngine, Activity, ActivityType
+from activity_index import activity_row
+
+def reference(activities, include_owned=False, min_available=1, order='score'):
+    """The original filter + full (stable) sort"""
+    kept = [a for a in activities
+            if (include_owned or not a.is_owned) and a.available_chars >= min_available]
+    kept.sort(key=lambda a: getattr(a, order), reverse=True)
+    return [activity_row(a) for a in kept]
+
+class TestActivityIndex(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(3)
+        self.activities = [
+            Activity(f"Instance {i % 40}", f"Drop {i}", rng.choice(list(ActivityType)), "TWW", "Raid",
+                     available_chars=rng.randint(0, 5), is_owned=rng.random() < 0.3,
+                     rarity=rng.choice(["Rare", "Common", "Epic"]), time_estimate=rng.randint(5, 60))
+            for i in range(500)
+        ]
+        self.engine = NavigatorEngine()
+        self.engine.activities = self.activities
+
+    def check(self, **kwargs):
+        for order in ('score', 'ppm'):
+            expected = reference(self.activities, order=order, **kwargs)
+            got = self.engine.get_prioritized_activities(sort_by=order, **kwargs)
+            self.assertEqual(got, expected)
+            self.assertEqual(self.engine.get_prioritized_activities(limit=7, sort_by=order, **kwargs), expected[:7])
+
+    def check_statistics(self):
+        total = len(self.activities)
+        owned = sum(1 for a in self.activities if a.is_owned)
+        by_type = {}
+        for a in self.activities:
+            by_type[a.drop_type.value] = by_type.get(a.drop_type.value, 0) + 1
+        self.assertEqual(self.engine.get_statistics(), {
+            "total_activities": total,
+            "owned": owned,
+            "available": sum(1 for a in self.activities if a.available_chars > 0 and not a.is_owned),
+            "locked": sum(1 for a in self.activities if a.available_chars == 0),
+            "by_type": by_type,
+            "completion_percent": int(owned / total * 100),
+        })
+        urgent = [r for r in reference(self.activities) if r["score"] >= 80]
+        self.assertEqual(self.engine.get_urgent_count(), len(urgent))
+        self.assertEqual(self.engine.get_urgent_activities(limit=5), urgent[:5])
+
+    def test_matches_full_sort(self):
+        self.check()
+        self.check(include_owned=True)
+        self.check(min_available=3)
+        self.check_statistics()
+
+    def test_incremental_updates(self):
+        rng = random.Random(11)
+        for step in range(300):
+            if rng.random() < 0.5:
+                self.engine.mark_owned(f"Drop {rng.randrange(500)}", owned=rng.random() < 0.7)
+            else:
+                self.engine.set_available_chars(f"Instance {rng.randrange(40)}", rng.randint(0, 5))
+            if step % 50 == 0:
+                self.check()
+        self.check()
+        self.check(include_owned=True, min_available=0)
+        self.check_statistics()
+
+    def test_mark_owned_drops_out_of_default_view(self):
+        top = self.engine.get_prioritized_activities(limit=1)[0]
+        self.engine.mark_owned(top["drop"])
+        self.assertIn(top["drop"], self.engine.owned_items)
+        drops = [r["drop"] for r in self.engine.get_prioritized_activities()]
+        self.assertNotIn(top["drop"], drops)
+
+    def test_rows_are_copies(self):
+        row = self.engine.get_prioritized_activities(limit=1)[0]
+        row["score"] = -1
+        self.assertNotEqual(self.engine.get_prioritized_activities(limit=1)[0]["score"], -1)
+
+if __name__ == '__main__':
+    unittest.main()
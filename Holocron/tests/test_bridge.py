@@ -2,55 +2,64 @@ import unittest
 from unittest.mock import patch, MagicMock
 import sys
 import os
-import time
-from watchdog.events import FileSystemEvent
+import tempfile
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from bridge import SavedVariablesHandler
+from sv_watcher import SavedVariablesWatcher
 
 class TestBridge(unittest.TestCase):
-    @patch('bridge.requests.post')
     @patch('builtins.open', new_callable=unittest.mock.mock_open, read_data="lua content")
-    def test_process_lua_file(self, mock_file, mock_post):
-        handler = SavedVariablesHandler()
+    def test_process_lua_file(self, mock_file):
+        uploader = MagicMock()
+        handler = SavedVariablesHandler(uploader=uploader)
         
         # Mock successful server response
         mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_post.return_value = mock_response
+        mock_response.status_code = 202
+        mock_response.json.return_value = {"status": "accepted", "job_id": "abc"}
+        uploader.upload.return_value = mock_response
 
         handler.process_lua_file("/path/to/DataStore.lua", "DataStore.lua")
 
         # Verify file was read
         mock_file.assert_called_with("/path/to/DataStore.lua", 'r', encoding='utf-8')
         
-        # Verify post was called with correct payload
-        mock_post.assert_called_once()
-        args, kwargs = mock_post.call_args
-        self.assertEqual(kwargs['json']['source'], "DataStore")
-        self.assertEqual(kwargs['json']['data'], "lua content")
+        # Verify the delta uploader got the source name and content
+        uploader.upload.assert_called_once_with("DataStore", "lua content")
 
-    @patch('bridge.SavedVariablesHandler.process_lua_file')
-    def test_on_modified_matching_file(self, mock_process):
-        handler = SavedVariablesHandler()
-        event = FileSystemEvent("/path/to/DataStore.lua")
-        event.is_directory = False
-        
-        handler.on_modified(event)
-        
-        mock_process.assert_called_once_with("/path/to/DataStore.lua", "DataStore.lua")
+    def test_register_with_watcher(self):
+        handler = SavedVariablesHandler(uploader=MagicMock())
+        watcher = MagicMock()
+
+        handler.register(watcher)
+
+        patterns = [c.args[0] for c in watcher.register.call_args_list]
+        self.assertIn("DataStore*.lua", patterns)
+        self.assertIn("SavedInstances.lua", patterns)
 
     @patch('bridge.SavedVariablesHandler.process_lua_file')
-    def test_on_modified_ignored_file(self, mock_process):
-        handler = SavedVariablesHandler()
-        event = FileSystemEvent("/path/to/RandomFile.txt")
-        event.is_directory = False
-        
-        handler.on_modified(event)
-        
-        mock_process.assert_not_called()
+    def test_watcher_dispatches_matching_files(self, mock_process):
+        with tempfile.TemporaryDirectory() as tmp:
+            now = [1000.0]
+            watcher = SavedVariablesWatcher(tmp, debounce=1.0, clock=lambda: now[0])
+            SavedVariablesHandler(uploader=MagicMock()).register(watcher)
+            paths = {}
+            for name in ("DataStore.lua", "DataStore_Reputations.lua", "RandomFile.txt"):
+                paths[name] = os.path.join(tmp, name)
+                with open(paths[name], 'w', encoding='utf-8') as f:
+                    f.write("lua content")
+                watcher.notify(paths[name])
+
+            now[0] += 2.0
+            self.assertEqual(watcher.check_pending(), 2)
+            watcher.stop()
+
+        dispatched = sorted(c.args for c in mock_process.call_args_list)
+        self.assertEqual(dispatched, [(paths["DataStore.lua"], "DataStore.lua"),
+                                      (paths["DataStore_Reputations.lua"], "DataStore_Reputations.lua")])
 
 if __name__ == '__main__':
     unittest.main()
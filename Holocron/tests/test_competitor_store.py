@@ -0,0 +1,116 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from competitor_store import CompetitorStore, hour_of_week
+import goblin_domination
+from goblin_domination import CompetitorTracker, MarketDominationEngine
+
+T0 = datetime(2024, 5, 1, 12).timestamp()  # a Wednesday
+
+class TestCompetitorStore(unittest.TestCase):
+    def test_heavy_hitters_and_bounds(self):
+        rng = np.random.default_rng(2)
+        sellers = np.minimum(rng.zipf(1.5, 50000), 3000)
+        store = CompetitorStore(capacity=50, half_life_hours=1e9)
+        for batch in np.array_split(np.arange(len(sellers)), 40):
+            store.record([f"s{i}" for i in sellers[batch]], ["listing"] * len(batch), [T0] * len(batch))
+        self.assertEqual(len(store), 50)
+        true = Counter(sellers.tolist())
+        now = T0
+        for seller, count in true.items():
+            name = f"s{seller}"
+            if count > len(sellers) / 50:
+                self.assertIn(name, store._slots)
+            self.assertGreaterEqual(store.estimate(name, now) * (1 + 1e-9), count)
+            if name in store._slots:
+                slot = store._slots[name]
+                self.assertGreaterEqual(count, (store.activity[slot] - store.error[slot]) * (1 - 1e-9))
+        top = store.top(3, now)
+        self.assertEqual([r['name'] for r in top], [f"s{s}" for s, _ in true.most_common(3)])
+        self.assertEqual(top[0]['listings'], true.most_common(1)[0][1])
+
+    def test_decay_and_rescaling(self):
+        store = CompetitorStore(half_life_hours=1)
+        store.record(["Old"] * 400, ["listing"] * 400, [T0] * 400)
+        store.record(["New"] * 100, ["listing"] * 100, [T0 + 3 * 3600] * 100)
+        top = store.top(now=T0 + 3 * 3600)
+        self.assertEqual([r['name'] for r in top], ["New", "Old"])
+        self.assertAlmostEqual(top[1]['activity'], 50)  # three half-lives
+        # Far past the rescaling point, values stay finite and decayed
+        store.record(["New"], ["listing"], [T0 + 400 * 3600])
+        self.assertAlmostEqual(store.estimate("New", now=T0 + 400 * 3600), 1)
+        self.assertTrue(np.isfinite(store.activity).all())
+
+    def test_hour_of_week_and_persistence(self):
+        self.assertEqual(hour_of_week([T0, T0 + 86400 * 4 + 7 * 3600]).tolist(), [2 * 24 + 12, 6 * 24 + 19])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "competitors.db")
+            store = CompetitorStore(path, capacity=10)
+            store.record(["Goblinator"] * 4 + ["Quiet"], ["listing", "listing", "undercut", "undercut", "other"],
+                         [T0, T0, T0 + 3600, T0, T0 + 5], amounts=[0, 0, 10, 30, 0])
+            store.close()
+            reloaded = CompetitorStore(path, capacity=10)
+            top = reloaded.top(now=T0)
+            self.assertEqual(top, store.top(now=T0))
+            self.assertEqual(top[0]['name'], "Goblinator")
+            self.assertEqual(top[0]['avg_undercut'], 20)
+            self.assertEqual(top[0]['peak_time'], "Wednesday 12:00")
+            self.assertEqual(top[0]['active_hours'], "12:00-14:00")
+            self.assertEqual(top[1]['listings'], 0)
+            reloaded.close()
+
+    def test_tracker_uses_store(self):
+        tracker = CompetitorTracker(CompetitorStore(capacity=2))
+        for name in ("A", "A", "B", "C"):
+            tracker.track_competitor(name, {"type": "listing", "timestamp": T0})
+        self.assertEqual(len(tracker.store), 2)
+        self.assertEqual(tracker.get_top_competitors()[0]['name'], "A")
+        self.assertEqual(CompetitorStore().top(), [])
+
+    def test_concurrent_records_and_saves(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = CompetitorStore(os.path.join(tmp, "competitors.db"), capacity=100, save_interval=0)
+            def scan(worker):
+                for i in range(50):
+                    store.record([f"s{(worker + i) % 20}"] * 5, ["listing"] * 5, [T0 + i] * 5)
+                    store.top(3, now=T0)
+            threads = [threading.Thread(target=scan, args=(w,)) for w in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(sum(r['listings'] for r in store.top(100, now=T0)), 8 * 50 * 5)
+            store.close()
+            self.assertEqual(sum(r['listings'] for r in CompetitorStore(os.path.join(tmp, "competitors.db"),
+                                                                         capacity=100).top(100, now=T0)), 2000)
+
+    def test_endpoint_store_persists(self):
+        saved = goblin_domination.COMPETITORS_DB_PATH, goblin_domination._competitor_store
+        with tempfile.TemporaryDirectory() as tmp:
+            goblin_domination.COMPETITORS_DB_PATH = os.path.join(tmp, "competitors.db")
+            goblin_domination._competitor_store = None
+            try:
+                store = goblin_domination.shared_competitor_store()
+                self.assertIs(goblin_domination.shared_competitor_store(), store)
+                engine = MarketDominationEngine(competitors=store)
+                engine.competitor.track_competitor("Goblinator", {"type": "listing", "timestamp": T0})
+                goblin_domination.get_domination_strategies([])
+                store.close()
+                reloaded = CompetitorStore(goblin_domination.COMPETITORS_DB_PATH)
+                self.assertEqual(reloaded.top(now=T0)[0]['name'], "Goblinator")
+                reloaded.close()
+            finally:
+                goblin_domination.COMPETITORS_DB_PATH, goblin_domination._competitor_store = saved
+
+if __name__ == '__main__':
+    unittest.main()
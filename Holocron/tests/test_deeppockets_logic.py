@@ -59,5 +59,21 @@ class TestDeepPockets(unittest.TestCase):
         self.assertEqual(candidates[1]["item_id"], 103)
         self.assertEqual(candidates[2]["item_id"], 101)
 
+    def test_value_density_with_bad_item_ids(self):
+        bag_items = [{"item_id": "potion", "count": 3}, {"item_id": None}, {"item_id": 103.0, "count": 1}]
+        candidates = self.engine.calculate_value_density(bag_items)
+        self.assertEqual([c["unit_price"] for c in candidates], [0.0, 0.0, 50.0])
+        self.assertEqual(candidates[0]["item_id"], "potion")
+
+    def test_resync_drops_missing_characters(self):
+        def upload(*names):
+            return {"global": {"Characters": {name: {"Containers": {"Bag0": {"ids": [101], "counts": [2]}}}
+                                              for name in names}}}
+        self.engine.sync_containers(upload("Main", "Alt2"))
+        self.assertEqual(set(self.engine.get_character_totals()), {"Main", "Alt2"})
+        self.engine.sync_containers(upload("Main"))
+        self.assertEqual(set(self.engine.get_character_totals()), {"Main"})
+        self.assertEqual(self.engine.get_total_count(101), 2)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+import tempfile
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import delta_upload
+from delta_upload import BlockStore, DeltaUploadClient, build_manifest, decode_body, encode_body, split_blocks
+
+def make_lua(rows):
+    lines = ["DataStore_ContainersDB = {\n"]
+    for i in range(rows):
+        lines.append(f'\t["item:{i}"] = {{ ["count"] = {i % 20}, ["bag"] = "Bag{i % 5}" }},\n')
+    lines.append("}\n")
+    return "".join(lines)
+
+class TestDeltaUpload(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = BlockStore(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_split_blocks_round_trips(self):
+        content = make_lua(5000)
+        blocks = split_blocks(content)
+        self.assertGreater(len(blocks), 1)
+        self.assertEqual("".join(blocks), content)
+        self.assertTrue(all(len(b) <= delta_upload.BLOCK_MAX + 200 for b in blocks))
+
+    def test_insert_only_changes_nearby_blocks(self):
+        before = make_lua(20000)
+        lines = before.splitlines(keepends=True)
+        lines.insert(100, '\t["new"] = 1,\n')
+        after = "".join(lines)
+
+        old_manifest, _ = build_manifest("DataStore_Containers", before)
+        new_manifest, _ = build_manifest("DataStore_Containers", after)
+        changed = set(new_manifest["blocks"]) - set(old_manifest["blocks"])
+        self.assertLessEqual(len(changed), 2)
+
+    def test_body_encoding_round_trips(self):
+        payload = {"source": "X", "blocks": ["a" * 32]}
+        body, encoding = encode_body(payload)
+        self.assertEqual(decode_body(body, encoding), payload)
+        with self.assertRaises(ValueError):
+            decode_body(body, "br")
+
+    def test_store_asks_only_for_missing_blocks(self):
+        first = make_lua(20000)
+        manifest, blocks = build_manifest("DataStore_Containers", first)
+
+        state, missing = self.store.receive(manifest)
+        self.assertEqual(state, "missing")
+        self.assertEqual(len(missing), len(set(manifest["blocks"])))
+
+        state, content = self.store.receive(manifest, {h: blocks[h] for h in missing})
+        self.assertEqual(state, "complete")
+        self.assertEqual(content, first)
+
+        # Same file again is a no-op
+        self.assertEqual(self.store.receive(manifest)[0], "unchanged")
+
+        # A small edit only needs the changed blocks
+        second = first.replace('["item:10"] = { ["count"] = 10', '["item:10"] = { ["count"] = 11')
+        manifest2, _ = build_manifest("DataStore_Containers", second)
+        state, missing = self.store.receive(manifest2)
+        self.assertEqual(state, "missing")
+        self.assertEqual(len(missing), 1)
+
+    def test_store_rejects_bad_blocks(self):
+        manifest, _ = build_manifest("DataStore_Containers", make_lua(10))
+        with self.assertRaises(ValueError):
+            self.store.receive(manifest, {manifest["blocks"][0]: "tampered"})
+        with self.assertRaises(ValueError):
+            self.store.receive(dict(manifest, blocks=["../../etc/passwd"]))
+
+    def test_store_prunes_unreferenced_blocks(self):
+        for rows in (3000, 4000):
+            manifest, blocks = build_manifest("DataStore_Containers", make_lua(rows))
+            self.store.receive(manifest, blocks)
+        stored = [n for n in os.listdir(self.tmp.name) if n != "manifests"]
+        self.assertEqual(sorted(stored), sorted(set(manifest["blocks"])))
+
+    @patch('delta_upload.requests.post')
+    def test_client_sends_manifest_then_missing_blocks(self, mock_post):
+        content = make_lua(20000)
+
+        def fake_post(url, data, headers, timeout):
+            payload = decode_body(data, headers["Content-Encoding"])
+            state, result = self.store.receive(payload, payload.get("data"))
+            response = MagicMock()
+            response.status_code = 202 if state == "complete" else 200
+            response.json.return_value = {"status": "accepted" if state == "complete" else state,
+                                          "missing": result if state == "missing" else None}
+            return response
+
+        mock_post.side_effect = fake_post
+        client = DeltaUploadClient("http://localhost/upload_data/delta")
+
+        response = client.upload("DataStore_Containers", content)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(mock_post.call_count, 2)
+
+        # Re-upload after a one-line edit sends far less than the file
+        sent_before = client.stats["bytes_sent"]
+        edited = content.replace('["item:500"] = { ["count"] = 0', '["item:500"] = { ["count"] = 1')
+        response = client.upload("DataStore_Containers", edited)
+        self.assertEqual(response.status_code, 202)
+        self.assertLess((client.stats["bytes_sent"] - sent_before) * 10, len(edited))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import sys
+import os
+import random
+import itertools
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domination_analytics import knapsack
+from goblin_domination import FlashCrashBuyer, MarketDominationEngine, MonopolyController, ResetSniper
+
+def reference_resets(scan, max_investment):
+    """The original per-item loop"""
+    opportunities = []
+    for item in scan:
+        num_auctions, avg_price, market_value = item['num_auctions'], item['avg_buyout'], item['market_value']
+        total_cost = avg_price * num_auctions
+        if num_auctions > 15 or num_auctions < 2 or total_cost > max_investment:
+            continue
+        reset_price = market_value * 3
+        profit = reset_price * (num_auctions * 0.5) - total_cost
+        roi = (profit / total_cost) * 100 if total_cost > 0 else 0
+        if profit < 50000:
+            continue
+        opportunities.append((item['item_id'], total_cost, int(profit), round(roi, 1)))
+    opportunities.sort(key=lambda x: x[3], reverse=True)
+    return opportunities
+
+def reference_monopolies(scan):
+    targets = []
+    for item in scan:
+        demand, sellers, margin = item['sale_rate'] * 100, item['num_sellers'], item['profit_margin']
+        if demand < 10 or sellers > 8 or margin < 0.5:
+            continue
+        score = (demand * 2) + (margin * 100) - (sellers * 10) + (20 if item['is_craftable'] else 0)
+        targets.append((item['item_id'], round(score, 1)))
+    targets.sort(key=lambda x: x[1], reverse=True)
+    return targets[:10]
+
+class TestDominationAnalytics(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(21)
+        self.scan = [{
+            "item_id": i,
+            "num_auctions": rng.choice([1, 2, 15, 16, rng.randint(0, 30)]),
+            "avg_buyout": rng.randint(100, 150000),
+            "market_value": rng.randint(100, 200000),
+            "sale_rate": rng.choice([0.09, 0.1, rng.random()]),
+            "num_sellers": rng.choice([8, 9, rng.randint(0, 12)]),
+            "profit_margin": rng.choice([0.49, 0.5, 1.0, rng.random() * 2]),
+            "is_craftable": rng.random() < 0.4,
+        } for i in range(4000)]
+
+    def test_scores_match_item_loops(self):
+        sniper = ResetSniper(max_investment=500000)
+        got = [(o['item_id'], o['buyout_cost'], o['expected_profit'], o['roi'])
+               for o in sniper.find_reset_opportunities(self.scan)]
+        self.assertEqual(got, reference_resets(self.scan, 500000))
+        targets = MonopolyController().identify_monopoly_targets(self.scan)
+        self.assertEqual([(t['item_id'], t['monopoly_score']) for t in targets], reference_monopolies(self.scan))
+
+    def test_knapsack_is_exact_on_small_budgets(self):
+        rng = np.random.default_rng(3)
+        for _ in range(200):
+            n = int(rng.integers(0, 9))
+            costs, values = rng.integers(0, 30, n), rng.integers(-5, 40, n)
+            budget = int(rng.integers(0, 80))
+            best = max(sum(values[list(s)]) for k in range(n + 1) for s in itertools.combinations(range(n), k)
+                       if sum(costs[list(s)]) <= budget)
+            chosen = knapsack(costs, values, budget)
+            self.assertLessEqual(costs[chosen].sum(), budget)
+            self.assertEqual(values[chosen].sum(), max(best, 0))
+        # Best value per cost first would stop at 7
+        self.assertEqual(knapsack([6, 5, 5], [7, 5, 5], 10).tolist(), [1, 2])
+
+    def test_reset_plan_fits_budget(self):
+        sniper = ResetSniper(max_investment=300000)
+        plan = sniper.plan_resets(self.scan)
+        self.assertLessEqual(sum(r['buyout_cost'] for r in plan), 300000)
+        # At least as much profit as funding the best ROIs until the money runs out
+        spent, greedy = 0, 0
+        for r in sniper.find_reset_opportunities(self.scan):
+            if spent + r['buyout_cost'] <= 300000:
+                spent += r['buyout_cost']
+                greedy += r['expected_profit']
+        self.assertGreaterEqual(sum(r['expected_profit'] for r in plan), greedy)
+        engine = MarketDominationEngine(capital=1500000)
+        result = engine.analyze_and_dominate(self.scan)
+        self.assertEqual(result['total_profit_potential'], sum(r['expected_profit'] for r in result['reset_opportunities']))
+
+    def test_fractional_prices(self):
+        sniper = ResetSniper(max_investment=500000)
+        # Cost 1.8, profit 49999.2: just short of the 50g minimum
+        scan = [{'item_id': 1, 'num_auctions': 2, 'avg_buyout': 0.9, 'market_value': 16667}]
+        self.assertEqual(sniper.find_reset_opportunities(scan), [])
+        scan = [{'item_id': 1, 'num_auctions': 2, 'avg_buyout': 0.9, 'market_value': 16667.5}]
+        got = [(o['item_id'], o['buyout_cost'], o['expected_profit'], o['roi'])
+               for o in sniper.find_reset_opportunities(scan)]
+        self.assertEqual(got, reference_resets(scan, 500000))
+        self.assertEqual(got[0][1], 1.8)
+
+    def test_flash_crash_from_history(self):
+        history = [{"price": 10000}] * 6
+        crash = FlashCrashBuyer().detect_crash({"avg_buyout": 4000}, history)
+        self.assertTrue(crash['crash'])
+        self.assertEqual(crash['drop_pct'], 60.0)
+        self.assertFalse(FlashCrashBuyer().detect_crash({"avg_buyout": 9000}, history)['crash'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine_registry import EngineRegistry
+
+class Counter:
+    built = 0
+
+    def __init__(self, dep=None):
+        Counter.built += 1
+        self.dep = dep
+        self.loaded = False
+        self.value = 1
+
+    def load(self):
+        time.sleep(0.01)
+        self.loaded = True
+
+class TestEngineRegistry(unittest.TestCase):
+    def setUp(self):
+        Counter.built = 0
+        self.registry = EngineRegistry(max_workers=4)
+
+    def test_lazy_until_first_use(self):
+        proxy = self.registry.register('a', Counter, load='load')
+        self.assertEqual(Counter.built, 0)
+        self.assertEqual(self.registry.status('a'), 'pending')
+
+        self.assertTrue(proxy.loaded)
+        self.assertEqual(Counter.built, 1)
+        self.assertIs(self.registry.get('a'), self.registry.get('a'))
+
+        timing = self.registry.timings()['a']
+        self.assertEqual(timing['status'], 'ready')
+        self.assertGreater(timing['load_ms'], 0)
+
+    def test_proxy_setattr_reaches_engine(self):
+        proxy = self.registry.register('a', Counter)
+        proxy.value = 5
+        self.assertEqual(self.registry.get('a').value, 5)
+
+    def test_dependencies_are_shared(self):
+        self.registry.register('base', Counter, load='load')
+        self.registry.register('x', lambda: Counter(self.registry.get('base')))
+        self.registry.register('y', lambda: Counter(self.registry.get('base')))
+        self.assertIs(self.registry.get('x').dep, self.registry.get('y').dep)
+        self.assertEqual(Counter.built, 3)
+
+    def test_concurrent_get_builds_once(self):
+        self.registry.register('a', Counter, load='load')
+        threads = [threading.Thread(target=self.registry.get, args=('a',)) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(Counter.built, 1)
+
+    def test_warm_up(self):
+        self.registry.register('base', Counter, load='load')
+        for name in ('x', 'y', 'z'):
+            self.registry.register(name, lambda: Counter(self.registry.get('base')))
+        self.registry.warm_up(wait=True)
+        self.assertEqual(Counter.built, 4)
+        self.assertTrue(all(t['status'] == 'ready' for t in self.registry.timings().values()))
+
+    def test_failure_recorded_and_retried(self):
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise IOError("no data")
+            return Counter()
+
+        self.registry.register('flaky', flaky)
+        self.registry.warm_up(wait=True)
+        timing = self.registry.timings()['flaky']
+        self.assertEqual(timing['status'], 'failed')
+        self.assertIn('no data', timing['error'])
+
+        self.assertEqual(self.registry.get('flaky').value, 1)
+        self.assertEqual(self.registry.status('flaky'), 'ready')
+
+    def test_cycle_detected(self):
+        self.registry.register('a', lambda: Counter(self.registry.get('b')))
+        self.registry.register('b', lambda: Counter(self.registry.get('a')))
+        with self.assertRaises(RuntimeError):
+            self.registry.get('a')
+
+    def test_duplicate_name_rejected(self):
+        self.registry.register('a', Counter)
+        with self.assertRaises(ValueError):
+            self.registry.register('a', Counter)
+
+if __name__ == '__main__':
+    unittest.main()
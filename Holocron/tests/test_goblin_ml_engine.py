@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+import random
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from goblin_ml_engine import GROUPS, GoblinMLEngine, generate_auto_groups_endpoint
+
+def reference_group(item):
+    """The original chain of ifs"""
+    margin, sale_rate, volume = item['profit_margin'], item['sale_rate'], item['num_auctions']
+    if item['profit'] < 1000:
+        return None
+    if margin > 0.5 and sale_rate > 0.8:
+        return "Instant Profit Flips"
+    if volume > 100 and margin > 0.1:
+        return "Volume Trading"
+    if item.get('is_craftable', False) and item['profit'] > 5000:
+        return "Profitable Crafts"
+    if margin > 0.8 and sale_rate < 0.3:
+        return "Transmog Slow Burn"
+    if any(k in item.get('name', '').lower() for k in ['ore', 'herb', 'leather', 'cloth', 'dust', 'essence']):
+        return "Material Stockpile"
+    return None
+
+class TestGoblinMLEngine(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(9)
+        names = ['Bismuth Ore', 'Mycobloom', 'Stormcharged Leather', 'Weavercloth', 'Potion', 'Null Stone', 'Arcane DUST', 'Sword']
+        self.market = [{
+            "item_id": 1000 + i,
+            "name": rng.choice(names),
+            # Boundary values and profit ties
+            "profit": rng.choice([999, 1000, 5000, 5001, 20000, rng.randint(0, 100000)]),
+            "profit_margin": rng.choice([0.1, 0.5, 0.51, 0.8, 0.81, rng.random()]),
+            "sale_rate": rng.choice([0.29, 0.3, 0.8, 0.81, rng.random()]),
+            "num_auctions": rng.choice([100, 101, rng.randint(0, 400)]),
+            "is_craftable": rng.random() < 0.3,
+            "category": rng.choice(["consumables", "enchants", "trade_goods", None]),
+        } for i in range(3000)]
+
+    def test_groups_match_chained_ifs_ranked_by_profit(self):
+        engine = GoblinMLEngine()
+        groups = engine.generate_auto_groups(self.market)
+        members = {}
+        for item in self.market:
+            members.setdefault(reference_group(item), []).append(item)
+        expected = [group for group in GROUPS if members.get(group['name'])]
+        self.assertEqual([g['name'] for g in groups], [group['name'] for group in expected])
+        for group, spec in zip(groups, expected):
+            ranked = sorted(members[spec['name']], key=lambda item: -item['profit'])[:spec['limit']]
+            self.assertEqual(group['items'], [item['item_id'] for item in ranked])
+            self.assertEqual(group['operation'], spec['operation'])
+        self.assertEqual(engine.generate_auto_groups([]), [])
+
+    def test_classify_and_weekend_items(self):
+        engine = GoblinMLEngine()
+        labels = [engine.classify(item) for item in self.market]
+        self.assertEqual([g['name'] if g is not None else None for g in labels], [reference_group(i) for i in self.market])
+        self.assertEqual(engine.detect_weekend_spike_items(self.market),
+                         [i['item_id'] for i in self.market if i['category'] in ('consumables', 'enchants')][:20])
+
+    def test_custom_groups(self):
+        crafts = dict(GROUPS[2], limit=3)
+        bulk = {"name": "Bulk", "operation": "volume_pricing", "reason": "Many listings", "priority": 1,
+                "post_frequency": "hourly", "limit": 5, "match": lambda ml, item: item['num_auctions'] > 300}
+        engine = GoblinMLEngine(groups=[bulk, crafts])
+        groups = engine.generate_auto_groups(self.market)
+        self.assertEqual([g['name'] for g in groups], ["Bulk", "Profitable Crafts"])
+        kept = [i for i in self.market if i['profit'] >= 1000]
+        bulky = [i for i in kept if i['num_auctions'] > 300]
+        crafted = [i for i in kept if i['num_auctions'] <= 300 and i['is_craftable'] and i['profit'] > 5000]
+        self.assertEqual(groups[0]['items'], [i['item_id'] for i in sorted(bulky, key=lambda i: -i['profit'])[:5]])
+        self.assertEqual(groups[1]['items'], [i['item_id'] for i in sorted(crafted, key=lambda i: -i['profit'])[:3]])
+
+    def test_endpoint_adds_operation_details(self):
+        result = generate_auto_groups_endpoint(self.market)
+        for group in result['groups']:
+            self.assertIn('minPrice', group['operation_details'])
+        self.assertEqual(result['total_items'], sum(len(g['items']) for g in result['groups']))
+
+if __name__ == '__main__':
+    unittest.main()
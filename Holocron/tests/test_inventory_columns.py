@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import random
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deeppockets_engine import DeepPocketsEngine
+
+def random_locations(rng, characters, items):
+    """The legacy {item_id: [{character, container, slot, count}]} shape"""
+    locations = {}
+    for char in characters:
+        for slot in range(1, rng.randint(20, 60)):
+            item_id = rng.choice(items)
+            locations.setdefault(item_id, []).append({
+                "character": char, "container": rng.choice(["Bag0", "Bag1", "Bank"]),
+                "slot": slot, "count": rng.randint(1, 200)})
+    return locations
+
+def reference_remote(item_locations, main, character_order):
+    """The original per-location loop; stacks ordered by character sync order"""
+    remote = []
+    for item_id, locations in item_locations.items():
+        if any(loc['character'] == main for loc in locations):
+            continue
+        first = min(locations, key=lambda loc: character_order.index(loc['character']))
+        remote.append({"item_id": item_id, "count": sum(loc['count'] for loc in locations),
+                       "character": first['character'], "container": first['container']})
+    return remote
+
+class TestInventoryColumns(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(8)
+        self.characters = [f"Alt{i}" for i in range(30)]
+        self.locations = random_locations(rng, self.characters, list(range(1000, 1400)))
+        self.engine = DeepPocketsEngine()
+        self.engine.item_locations = self.locations
+
+    def test_matches_dict_of_lists(self):
+        order = self.engine.columns.characters
+        by_character = lambda locs: sorted(locs, key=lambda loc: (order.index(loc["character"]), loc["slot"]))
+        self.assertEqual(self.engine.item_locations,
+                         {item_id: by_character(locs) for item_id, locs in self.locations.items()})
+        for item_id, locations in self.locations.items():
+            self.assertEqual(self.engine.get_total_count(item_id), sum(loc["count"] for loc in locations))
+        self.assertEqual(self.engine.get_total_count(1), 0)
+        self.assertEqual(self.engine.find_item(1), [])
+
+        for main in ("Alt0", "Alt17", "Nobody"):
+            self.assertEqual(self.engine.get_remote_stash(main), reference_remote(self.locations, main, order))
+
+    def test_character_totals(self):
+        expected = {}
+        for item_id, locations in self.locations.items():
+            for loc in locations:
+                row = expected.setdefault(loc["character"], {"count": 0, "stacks": 0, "items": set()})
+                row["count"] += loc["count"]
+                row["stacks"] += 1
+                row["items"].add(item_id)
+        totals = self.engine.get_character_totals()
+        self.assertEqual(totals, {c: {**r, "items": len(r["items"])} for c, r in expected.items()})
+
+        item_id = next(iter(self.locations))
+        per_item = self.engine.get_character_totals(item_id)
+        self.assertEqual(sum(r["count"] for r in per_item.values()), self.engine.get_total_count(item_id))
+
+    def test_resync_and_value_ranking(self):
+        self.engine.set_prices({1000: 2.0, 1001: 0.01})
+        self.engine.columns.set_character("Alt0", [(1000, "Bag0", 1, 3), (1001, "Bag0", 2, 100), (9, "Bag0", 3, 1)])
+        self.assertEqual(self.engine.character_inventory["Alt0"], {1000: 3, 1001: 100, 9: 1})
+
+        ranked = self.engine.get_incinerator_candidates("Alt0")
+        self.assertEqual([r["item_id"] for r in ranked], [9, 1001, 1000])
+        self.assertEqual(ranked[-1]["slot_value"], 6.0)
+        self.assertEqual(len(self.engine.get_incinerator_candidates(limit=5)), 5)
+
+        self.engine.columns.drop_character("Alt0")
+        self.assertNotIn("Alt0", self.engine.get_character_totals())
+        self.assertEqual(self.engine.find_item(9), [])
+
+if __name__ == '__main__':
+    unittest.main()
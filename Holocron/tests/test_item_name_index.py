@@ -0,0 +1,119 @@
+import unittest
+import sys
+import os
+import random
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from item_name_index import ItemNameIndex, SCORE_EXACT, SCORE_SUBSTRING
+from deeppockets_engine import DeepPocketsEngine
+
+NAMES = {
+    191380: "Elemental Potion of Ultimate Power",
+    191381: "Elemental Potion of Power",
+    191382: "Potion of Frozen Focus",
+    210796: "Mycobloom",
+    210799: "Luredrop",
+    222502: "Algari Healing Potion",
+    12345: "Grey Rock",
+}
+
+def containers(characters):
+    """DataStore_Containers layout for {char: [(item_id, count), ...]}"""
+    return {"global": {"Characters": {
+        char: {"Containers": {"Bag0": {
+            "ids": [item_id for item_id, _ in stacks],
+            "counts": [count for _, count in stacks],
+            "links": [f"|cffffffff|Hitem:{item_id}::|h[{NAMES.get(item_id, 'Item %d' % item_id)}]|h|r"
+                      for item_id, _ in stacks],
+        }}}
+        for char, stacks in characters.items()
+    }}}
+
+class TestItemNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ItemNameIndex()
+        self.index.update(NAMES)
+
+    def ids(self, query, **kwargs):
+        return [item_id for item_id, _ in self.index.search(query, **kwargs)]
+
+    def test_ranking(self):
+        results = self.index.search("elemental potion of power")
+        self.assertEqual(results[0], (191381, SCORE_EXACT))
+        self.assertEqual(self.ids("potion")[:1], [191382])  # Name starts with the query
+        self.assertEqual(set(self.ids("potion")), {191380, 191381, 191382, 222502})
+        self.assertEqual(self.ids("pot ult"), [191380])
+
+    def test_substring_and_fuzzy(self):
+        self.assertEqual(self.index.search("bloom"), [(210796, SCORE_SUBSTRING)])
+        self.assertEqual(self.ids("mycobloon")[:1], [210796])
+        self.assertEqual(self.ids("elemntal potoin")[:2], [191381, 191380])
+        self.assertEqual(self.ids("zzzz"), [])
+
+    def test_within_and_tiebreak(self):
+        held = {191380: 5, 191381: 50}
+        self.assertEqual(self.ids("elemental", within=held.keys(), tiebreak=held.get), [191381, 191380])
+
+    def test_cut_prefers_shorter_names(self):
+        index = ItemNameIndex()
+        # Longest names first, so insertion order can't pick the winners
+        index.update({i: "Potion of " + "x" * (40 - i) for i in range(1, 40)})
+        self.assertEqual([item_id for item_id, _ in index.search("pot", limit=3)], [39, 38, 37])
+        held = {i: 1 for i in range(1, 40)}
+        held[2] = 9
+        self.assertEqual([item_id for item_id, _ in index.search("pot", limit=3, tiebreak=held.get)], [2, 39, 38])
+
+    def test_rename_and_remove(self):
+        self.index.add(12345, "Shiny Pebble")
+        self.assertEqual(self.ids("rock"), [])
+        self.assertEqual(self.ids("pebble"), [12345])
+        self.index.remove(12345)
+        self.assertEqual(self.ids("pebble"), [])
+        self.assertNotIn("pebble", self.index._vocabulary)
+
+class TestDeepPocketsSearch(unittest.TestCase):
+    def test_names_from_links_and_source(self):
+        engine = DeepPocketsEngine(name_source=lambda: {210799: "Luredrop"})
+        engine._process_containers(containers({"Main": [(191380, 20), (210799, 3)], "Alt": [(191380, 5)]}))
+        engine._load_names()
+
+        results = engine.search_inventory("ultimate power")
+        self.assertEqual({(r["character"], r["count"]) for r in results}, {("Main", 20), ("Alt", 5)})
+        self.assertEqual(results[0]["name"], "Elemental Potion of Ultimate Power")
+        self.assertEqual(engine.search_inventory("luredrop")[0]["item_id"], 210799)
+        # Numeric queries still return raw locations
+        self.assertEqual(len(engine.search_inventory("191380")), 2)
+
+    def test_resync_replaces_character(self):
+        engine = DeepPocketsEngine()
+        engine.sync_containers(containers({"Main": [(191380, 20)], "Alt": [(210796, 7)]}))
+        engine.sync_containers(containers({"Main": [(210796, 2)], "Alt": [(210796, 7)]}))
+
+        self.assertEqual(engine.search_inventory("potion"), [])
+        self.assertEqual(engine.get_total_count(210796), 9)
+        self.assertEqual(engine.get_total_count(191380), 0)
+        self.assertEqual(sorted(r["character"] for r in engine.search_inventory("mycobloom")), ["Alt", "Main"])
+        # A character missing from the upload is gone
+        engine.sync_containers(containers({"Main": [(210796, 2)]}))
+        self.assertEqual(engine.get_total_count(210796), 2)
+
+    def test_large_inventory_search(self):
+        rng = random.Random(5)
+        words = ["Elemental", "Potion", "Flask", "Ore", "Herb", "Draconic", "Algari", "Tempered",
+                 "Crystal", "Bismuth", "Ironclaw", "Weavercloth", "Storm", "Dust", "Shard", "Bolt"]
+        names = {100000 + i: " ".join(rng.sample(words, 3)) + f" {i}" for i in range(20000)}
+        engine = DeepPocketsEngine(name_source=lambda: names)
+        ids = list(names)
+        characters = {f"Char{c}": [(rng.choice(ids), rng.randint(1, 200)) for _ in range(2500)]
+                      for c in range(40)}
+        engine._process_containers(containers(characters))
+        engine._load_names()
+        self.assertGreaterEqual(sum(len(v) for v in engine.item_locations.values()), 100000)
+
+        for query in ("weaver", "potion flask", "bismth shard", "ore 123"):
+            self.assertTrue(engine.search_inventory(query), query)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,230 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_queue import JobQueue
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, "jobs.db")
+        self.queue = JobQueue(self.db_path, max_workers=4, poll_interval=0.05)
+
+    def tearDown(self):
+        self.queue.stop()
+        self.tmp.cleanup()
+
+    def test_job_runs_and_reports_progress(self):
+        def handler(payload, progress):
+            progress(0.5, "halfway")
+            return {"total": sum(payload["values"])}
+
+        self.queue.register("sum", handler)
+        self.queue.start()
+        job_id = self.queue.submit("sum", {"values": [1, 2, 3]})
+
+        job = self.queue.wait(job_id, timeout=5)
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["result"], {"total": 6})
+        self.assertEqual(job["progress"], 1)
+        self.assertEqual(job["progress_message"], "halfway")
+
+    def test_failed_job_is_retried(self):
+        calls = []
+
+        def flaky(payload, progress):
+            calls.append(1)
+            if len(calls) < 2:
+                raise RuntimeError("transient")
+            return "ok"
+
+        self.queue.register("flaky", flaky, max_attempts=3, retry_delay=0.01)
+        self.queue.start()
+        job = self.queue.wait(self.queue.submit("flaky"), timeout=5)
+
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["attempts"], 2)
+
+    def test_job_fails_after_max_attempts(self):
+        def broken(payload, progress):
+            raise RuntimeError("boom")
+
+        self.queue.register("broken", broken, max_attempts=2, retry_delay=0.01)
+        self.queue.start()
+        job = self.queue.wait(self.queue.submit("broken"), timeout=5)
+
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["attempts"], 2)
+        self.assertIn("boom", job["error"])
+
+    def test_concurrency_limit_per_type(self):
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+
+        def slow(payload, progress):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            threading.Event().wait(0.05)
+            with lock:
+                active[0] -= 1
+
+        self.queue.register("slow", slow, concurrency=1)
+        self.queue.start()
+        ids = [self.queue.submit("slow", {"n": i}) for i in range(4)]
+        for job_id in ids:
+            self.assertEqual(self.queue.wait(job_id, timeout=5)["status"], "done")
+        self.assertEqual(peak[0], 1)
+
+    def test_identical_submissions_reuse_cached_result(self):
+        calls = []
+        self.queue.register("cached", lambda payload, progress: calls.append(payload) or len(calls), cache_ttl=60)
+        self.queue.start()
+
+        first = self.queue.submit("cached", {"x": 1})
+        self.queue.wait(first, timeout=5)
+        second = self.queue.submit("cached", {"x": 1})
+        third = self.queue.submit("cached", {"x": 2})
+        self.queue.wait(third, timeout=5)
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+        self.assertEqual(len(calls), 2)
+
+    def test_interrupted_jobs_resume_after_restart(self):
+        self.queue.register("noop", lambda payload, progress: "ran")
+        job_id = self.queue.submit("noop")
+        # Simulate a crash mid-run
+        self.queue._conn.execute("UPDATE jobs SET status = 'running' WHERE id = ?", (job_id,))
+        self.queue._conn.commit()
+
+        restarted = JobQueue(self.db_path, poll_interval=0.05)
+        restarted.register("noop", lambda payload, progress: "ran")
+        restarted.start()
+        try:
+            self.assertEqual(restarted.wait(job_id, timeout=5)["result"], "ran")
+        finally:
+            restarted.stop()
+
+    def test_restart_leaves_jobs_with_a_live_lease(self):
+        self.queue.register("noop", lambda payload, progress: "ran")
+        live, expired = self.queue.submit("noop"), self.queue.submit("noop")
+        # Another process is running `live`; the owner of `expired` died
+        self.queue._conn.execute("UPDATE jobs SET status = 'running', owner = 'other', lease_until = ? WHERE id = ?",
+                                 (time.time() + 60, live))
+        self.queue._conn.execute("UPDATE jobs SET status = 'running', owner = 'dead', lease_until = ? WHERE id = ?",
+                                 (time.time() - 1, expired))
+        self.queue._conn.commit()
+
+        restarted = JobQueue(self.db_path, poll_interval=0.05)
+        restarted.register("noop", lambda payload, progress: "ran")
+        restarted.start()
+        try:
+            self.assertEqual(restarted.wait(expired, timeout=5)["result"], "ran")
+            self.assertEqual(restarted.get(live)["status"], "running")
+        finally:
+            restarted.stop()
+
+    def test_job_claimed_by_one_process_only(self):
+        other = JobQueue(self.db_path)
+        for queue in (self.queue, other):
+            queue.register("noop", lambda payload, progress: "ran")
+        job_id = self.queue.submit("noop")
+
+        # `other` claims the job between this queue's SELECT and its UPDATE
+        conn = self.queue._conn
+        class Rows(list):
+            def fetchall(self):
+                return self
+
+        class RacingConnection:
+            def execute(self, sql, params=()):
+                cursor = conn.execute(sql, params)
+                if sql.startswith("SELECT * FROM jobs WHERE status"):
+                    rows = Rows(cursor.fetchall())
+                    other._claim_ready()
+                    return rows
+                return cursor
+
+            def __getattr__(self, name):
+                return getattr(conn, name)
+
+        self.queue._conn = RacingConnection()
+        try:
+            self.assertEqual(self.queue._claim_ready(), [])
+        finally:
+            self.queue._conn = conn
+        self.assertEqual(self.queue.get(job_id)["attempts"], 1)
+        self.assertEqual(other._running["noop"], 1)
+        self.assertEqual(self.queue._running["noop"], 0)
+
+    def test_lost_lease_does_not_overwrite_new_owner(self):
+        started, release = threading.Event(), threading.Event()
+
+        def handler(payload, progress):
+            started.set()
+            release.wait(5)
+            if payload["fail"]:
+                raise RuntimeError("late failure")
+            return "late"
+
+        self.queue.register("slow", handler, max_attempts=1)
+        self.queue.start()
+        for fail in (False, True):
+            started.clear()
+            release.clear()
+            job_id = self.queue.submit("slow", {"fail": fail})
+            started.wait(5)
+            # The lease ran out and another process re-claimed the job
+            with self.queue._db_lock:
+                self.queue._conn.execute("UPDATE jobs SET owner = 'other' WHERE id = ?", (job_id,))
+                self.queue._conn.commit()
+            release.set()
+            deadline = time.time() + 5
+            while self.queue._running["slow"] and time.time() < deadline:
+                time.sleep(0.02)
+            job = self.queue.get(job_id)
+            self.assertEqual((job["status"], job["result"], job["error"]), ("running", None, None))
+            self.assertEqual(self.queue._conn.execute("SELECT owner FROM jobs WHERE id = ?", (job_id,)).fetchone()[0],
+                             "other")
+
+    def test_progress_is_written_in_batches(self):
+        started, release = threading.Event(), threading.Event()
+
+        def handler(payload, progress):
+            for i in range(100):
+                progress(i / 100, f"row {i}")
+            started.set()
+            release.wait(5)
+            return "ok"
+
+        self.queue.register("rows", handler)
+        self.queue.start()
+        job_id = self.queue.submit("rows")
+        started.wait(5)
+        # Visible right away, and in the database after the next poll
+        self.assertEqual(self.queue.get(job_id)["progress_message"], "row 99")
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            row = self.queue._conn.execute("SELECT progress_message FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row[0] == "row 99":
+                break
+            time.sleep(0.02)
+        self.assertEqual(row[0], "row 99")
+        release.set()
+        job = self.queue.wait(job_id, timeout=5)
+        self.assertEqual((job["status"], job["progress"], job["progress_message"]), ("done", 1, "row 99"))
+
+    def test_unknown_job_type_rejected(self):
+        with self.assertRaises(ValueError):
+            self.queue.submit("missing")
+
+if __name__ == '__main__':
+    unittest.main()
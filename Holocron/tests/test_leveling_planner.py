@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+import time
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from intelligent_profession_engine import IntelligentProfessionEngine
+from leveling_planner import LevelingPlanner, skill_bands, skill_up_chance
+
+def recipe(rid, name, required, cost_item, quantity, yellow=None, gray=None):
+    return {'id': rid, 'name': name, 'tier': 'Alchemy', 'crafted_item_id': None, 'crafted_quantity': 1,
+            'skill_required': required, 'skill_yellow': yellow, 'skill_green': None, 'skill_gray': gray,
+            'materials': [{'item_id': cost_item, 'quantity': quantity}]}
+
+class TestSkillUpModel(unittest.TestCase):
+    def test_colour_bands(self):
+        required, yellow, green, gray = skill_bands([10], [20], None, [40])
+        chances = skill_up_chance(np.array([5, 10, 19, 20, 30, 39, 40]), required, yellow, gray)
+        np.testing.assert_allclose(chances, [0, 1, 1, 1, 0.5, 0.05, 0])
+        self.assertEqual(green[0], 25)
+
+    def test_missing_skill_data_is_unusable(self):
+        required, yellow, _, gray = skill_bands([np.nan], [np.nan], None, [np.nan])
+        self.assertEqual(skill_up_chance(5, required, yellow, gray)[0], 0)
+
+class TestLevelingPlanner(unittest.TestCase):
+    def test_picks_cheapest_expected_recipe_per_level(self):
+        # A: cheap but goes yellow at 10, gray at 20; B: pricier, orange until 30
+        planner = LevelingPlanner(required=[0, 0], yellow=[10, 30], gray=[20, 40], cost_per_craft=[1, 3])
+        plan = planner.plan(0, 30)
+        self.assertTrue(plan['complete'])
+        # A costs 1 / ((20 - s) / 10); switches to B once that exceeds 3 (s > 16.67)
+        self.assertEqual([(s['recipe_index'], s['from_skill'], s['to_skill']) for s in plan['steps']],
+                         [(0, 0, 17), (1, 17, 30)])
+        expected = 10 + sum(10 / (20 - s) for s in range(10, 17)) + 13 * 3
+        self.assertAlmostEqual(plan['total_cost'], expected)
+
+    def test_incomplete_when_no_recipe_skills_up(self):
+        plan = LevelingPlanner([0], [5], [10], [2]).plan(0, 50)
+        self.assertFalse(plan['complete'])
+        self.assertEqual(plan['reached_skill'], 10)
+
+    def test_full_range_is_fast(self):
+        rng = np.random.default_rng(3)
+        required = rng.integers(0, 100, 600).astype(float)
+        planner = LevelingPlanner(required, required + 10, required + 25, rng.random(600) * 100)
+        start = time.perf_counter()
+        plan = planner.plan(0, 100)
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertEqual(plan['steps'][-1]['to_skill'], 100)
+
+class TestEnginePlanCache(unittest.TestCase):
+    def setUp(self):
+        with patch.object(IntelligentProfessionEngine, '_get_db_connection', return_value=None):
+            self.engine = IntelligentProfessionEngine()
+        self.prices = {1: 1.0, 2: 3.0}
+        self.engine.get_market_price = lambda item_id: self.prices[item_id]
+        self.engine.analytics.price_of = self.engine.get_market_price
+        self.snapshot = 1
+        self.engine.analytics.price_snapshot = lambda: self.snapshot
+        self.engine.analytics.load_recipes = lambda profession: [
+            recipe(1, 'Cheap Draught', 0, 1, 1, yellow=10, gray=20),
+            recipe(2, 'Steady Tonic', 0, 2, 1, yellow=30, gray=40),
+            recipe(3, 'Unknown Brew', None, 1, 1),
+        ]
+
+    def test_guide_follows_prices(self):
+        guide = self.engine.generate_dynamic_leveling_guide('Vaxo', 'Alchemy', 0, 30)
+        self.assertEqual([b['skill_range'] for b in guide['leveling_path']], ['0-17', '17-30'])
+        self.assertEqual(guide['leveling_path'][0]['recommended_recipes'][0]['recipe'], 'Cheap Draught')
+        self.assertTrue(guide['complete'])
+
+        # Cached for this snapshot
+        planner = self.engine.analytics.derived('Alchemy', ('leveling', None), None)
+        self.engine.plan_leveling('Alchemy', 5, 25)
+        self.assertIs(self.engine.analytics.derived('Alchemy', ('leveling', None), None), planner)
+
+        # Tonic materials crash in price: it wins everywhere
+        self.prices[2] = 0.5
+        self.snapshot = 2
+        guide = self.engine.generate_dynamic_leveling_guide('Vaxo', 'Alchemy', 0, 30)
+        self.assertEqual([b['skill_range'] for b in guide['leveling_path']], ['0-30'])
+        self.assertEqual(guide['total_estimated_cost'], 15)
+
+    def test_guide_without_skill_data_uses_brackets(self):
+        self.engine.analytics.load_recipes = lambda profession: [
+            recipe(1, 'Cheap Draught', None, 1, 2), recipe(3, 'Unknown Brew', None, 1, 1)]
+        guide = self.engine.generate_dynamic_leveling_guide('Vaxo', 'Alchemy', 0, 50)
+        self.assertEqual([b['skill_range'] for b in guide['leveling_path']], ['0-20', '20-40', '40-50'])
+        first = guide['leveling_path'][0]['recommended_recipes']
+        self.assertEqual([r['recipe'] for r in first], ['Unknown Brew', 'Cheap Draught'])
+
+class TestPersonalizedGuide(unittest.TestCase):
+    def test_falls_back_to_recipe_list(self):
+        import generate_personalized_guides as guides
+        professions = [{'name': 'Alchemy', 'current_skill': 0, 'max_skill': 30}]
+        recipes = [{'name': f'Potion {i}', 'materials': [{'item_id': 1, 'quantity': 1}]} for i in range(8)]
+        with patch.object(guides, 'get_character_professions', return_value=professions), \
+                patch.object(guides, 'get_leveling_steps', return_value=[]), \
+                patch.object(guides, 'get_recipes_for_skill_range', return_value=recipes):
+            path = guides.generate_personalized_guide('Vaxo')['professions'][0]['recommended_path']
+        self.assertEqual([b['skill_range'] for b in path], ['0-10', '10-20', '20-30'])
+        self.assertEqual(path[0]['recipes'][0]['name'], 'Potion 0')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import sys
+import os
+import random
+import threading
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_detector import StreamingMarketDetector
+from goblin_domination import MarketDominationEngine
+
+def reference_alerts(history, price, quantity, share, detector):
+    """Rules recomputed from an item's full history list"""
+    if len(history) + 1 < detector.min_history:
+        return set()
+    prev_price, prev_quantity = history[-1]
+    window = [p for p, _ in history[-detector.window:]]
+    median = np.median(window)
+    holds = set()
+    if price / prev_price > detector.reset_threshold:
+        holds.add('MARKET_RESET')
+    if price / prev_price < detector.dump_threshold:
+        holds.add('PRICE_CRASH')
+    if (median - price) / median > detector.crash_drop:
+        holds.add('FLASH_CRASH')
+    if share >= detector.scarcity_share and price > median * detector.scarcity_markup:
+        holds.add('ARTIFICIAL_SCARCITY')
+    return holds
+
+class TestStreamingMarketDetector(unittest.TestCase):
+    def test_matches_full_history_rules(self):
+        rng = random.Random(5)
+        detector = StreamingMarketDetector(window=12)
+        items = list(range(1, 41))
+        histories = {item_id: [] for item_id in items}
+        active = {item_id: set() for item_id in items}
+        emitted = 0
+        for scan in range(60):
+            present = rng.sample(items, 30)
+            prices = [rng.choice([1000, 1000, 1100, 300, 2500, rng.randint(200, 4000)]) for _ in present]
+            quantities = [rng.randint(0, 50) for _ in present]
+            shares = [rng.choice([0.1, 0.5, 0.9]) for _ in present]
+            alerts = detector.update(present, prices, quantities, shares, timestamp=scan)
+
+            expected = set()
+            for item_id, price, quantity, share in zip(present, prices, quantities, shares):
+                holds = reference_alerts(histories[item_id], price, quantity, share, detector)
+                expected |= {(rule, item_id) for rule in holds - active[item_id]}
+                active[item_id] = holds
+                histories[item_id].append((price, quantity))
+            self.assertEqual({(a['type'], a['item_id']) for a in alerts}, expected)
+            emitted += len(alerts)
+        self.assertGreater(emitted, 0)
+
+        stats = detector.stats(items + [999])
+        for item_id, median, count in zip(items, stats['median'], stats['count']):
+            window = [p for p, _ in histories[item_id][-12:]]
+            self.assertEqual(count, len(window))
+            self.assertAlmostEqual(median, np.median(window))
+        self.assertTrue(np.isnan(stats['median'][-1]))
+
+    def test_reset_alert_is_edge_triggered(self):
+        detector = StreamingMarketDetector()
+        for t in range(5):
+            self.assertEqual(detector.update([7], [1000 + t], [40], timestamp=t), [])
+        alerts = detector.update([7], [5000], [10], timestamp=5)
+        self.assertEqual([a['type'] for a in alerts], ['MARKET_RESET'])
+        self.assertEqual(alerts[0]['confidence'], 0.9)
+        self.assertEqual(alerts[0]['price_jump_pct'], 398)
+        # Same scan again is ignored; a further spike is a new reset
+        self.assertEqual(detector.update([7], [5000], [10], timestamp=5), [])
+        self.assertEqual(detector.scans, 6)
+        self.assertEqual(detector.update([7], [5100], [10], timestamp=6), [])
+
+    def test_concurrent_updates(self):
+        detector = StreamingMarketDetector(window=64)
+        def scans(worker):
+            items = list(range(worker * 100, worker * 100 + 100))
+            for t in range(50):
+                detector.update(items, [1000 + worker + t] * 100, timestamp=t)
+                detector.stats(items[:5])
+        threads = [threading.Thread(target=scans, args=(w,)) for w in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(detector.scans, 8 * 50)
+        self.assertEqual(len(detector.item_ids), 800)
+        self.assertEqual(detector.stats()['count'].tolist(), [50] * 800)
+
+    def test_domination_engine_reports_crashes(self):
+        engine = MarketDominationEngine(detector=StreamingMarketDetector())
+        scan = lambda price: [{"item_id": 1, "avg_buyout": price, "num_auctions": 20}]
+        for price in (10000, 10200, 9900, 10100):
+            self.assertEqual(engine.analyze_and_dominate(scan(price))['flash_crashes'], [])
+        crashes = engine.analyze_and_dominate(scan(4000))['flash_crashes']
+        self.assertEqual({c['type'] for c in crashes}, {'PRICE_CRASH', 'FLASH_CRASH'})
+
+if __name__ == '__main__':
+    unittest.main()
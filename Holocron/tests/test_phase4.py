@@ -7,7 +7,7 @@ import json
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from server import app
+from server import app, job_queue
 
 class TestPhase4(unittest.TestCase):
     def setUp(self):
@@ -30,9 +30,14 @@ class TestPhase4(unittest.TestCase):
         ]
 
         response = self.app.post('/api/generate_jobs')
-        self.assertEqual(response.status_code, 200)
-        
-        data = json.loads(response.data)
+        self.assertEqual(response.status_code, 202)
+        job_id = json.loads(response.data)['job_id']
+
+        job = job_queue.wait(job_id, timeout=5)
+        self.assertEqual(job['status'], 'done')
+
+        response = self.app.get(f'/api/jobs/{job_id}')
+        data = json.loads(response.data)['result']
         self.assertEqual(data['status'], 'success')
         self.assertEqual(data['jobs_created'], 2)
 
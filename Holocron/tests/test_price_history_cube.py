@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_history_cube import PriceHistoryCube
+from goblin_training import EventPriceCorrelator
+
+class FakeLoader:
+    """In-memory stand-in for HistoricalDataLoader; counts round trips"""
+    def __init__(self, events, points):
+        self.events = events
+        self.points = points  # (item_id, timestamp, price)
+        self.queries = 0
+
+    def load_news_events(self, start_date, end_date):
+        return [e for e in self.events if start_date <= e['timestamp'] <= end_date]
+
+    def load_price_history(self, item_id, start_date, end_date):
+        return sorted(({"timestamp": t, "price": p, "quantity": 1} for i, t, p in self.points
+                       if i == item_id and start_date <= t <= end_date), key=lambda h: h['timestamp'])
+
+    def load_price_cube(self, item_ids, start_date, end_date):
+        self.queries += 1
+        wanted = set(item_ids)
+        return PriceHistoryCube.from_rows(p for p in self.points
+                                          if p[0] in wanted and start_date <= p[1] <= end_date)
+
+def reference_correlation(loader, event, window_hours=72):
+    """The original per-item loop over load_price_history"""
+    event_time = event['timestamp']
+    impacts = []
+    for item_id in event.get('affected_items') or []:
+        history = loader.load_price_history(item_id, event_time - timedelta(days=7),
+                                            event_time + timedelta(hours=window_hours))
+        if len(history) < 10:
+            continue
+        baseline = [h['price'] for h in history if h['timestamp'] < event_time]
+        after = [h for h in history if h['timestamp'] >= event_time]
+        if not baseline or not after:
+            continue
+        baseline_avg = np.mean(baseline)
+        peak_price = max(p['price'] for p in after)
+        peak_time = next(p['timestamp'] for p in after if p['price'] == peak_price)
+        impacts.append({
+            "item_id": item_id,
+            "baseline_price": int(baseline_avg),
+            "peak_price": peak_price,
+            "price_change_pct": round((peak_price - baseline_avg) / baseline_avg * 100, 1),
+            "peak_time_hours": round((peak_time - event_time).total_seconds() / 3600, 1),
+        })
+    return impacts
+
+class TestPriceHistoryCube(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(11)
+        self.start = datetime(2024, 1, 1)
+        items = list(range(100, 130))
+        self.points = []
+        for item_id in items:
+            hour = 0
+            while hour < 60 * 24:
+                # Irregular scans with repeated prices (ties for the peak)
+                self.points.append((item_id, self.start + timedelta(hours=hour), rng.choice([100, 150, 200, rng.randint(50, 400)])))
+                hour += rng.choice([1, 1, 2, 5])
+        self.events = [{
+            "event_id": n, "event_type": rng.choice(["raid", "patch"]), "title": f"Event {n}",
+            # Some events land exactly on a scan hour (boundary cases)
+            "timestamp": self.start + timedelta(hours=rng.randint(0, 58 * 24), minutes=rng.choice([0, 0, 30])),
+            "affected_items": rng.sample(items + [999], 6),
+        } for n in range(40)]
+        self.events.append({"event_id": 99, "event_type": "raid", "title": "No items",
+                            "timestamp": self.start + timedelta(days=10), "affected_items": None})
+        self.loader = FakeLoader(self.events, self.points)
+
+    def test_matches_per_item_loop(self):
+        correlator = EventPriceCorrelator(self.loader)
+        for event in self.events:
+            result = correlator.correlate_event_to_prices(event)
+            self.assertEqual(result['item_impacts'], reference_correlation(self.loader, event))
+            self.assertEqual(result['event_time'], event['timestamp'].isoformat())
+
+    def test_training_dataset_loads_history_once(self):
+        correlator = EventPriceCorrelator(self.loader)
+        dataset = correlator.build_training_dataset(self.start, self.start + timedelta(days=60))
+        self.assertEqual(self.loader.queries, 1)
+        expected = [e for e in self.events if reference_correlation(self.loader, e)]
+        self.assertEqual([d['event_id'] for d in dataset], [e['event_id'] for e in expected])
+        for correlation, event in zip(dataset, expected):
+            self.assertEqual(correlation['item_impacts'], reference_correlation(self.loader, event))
+
+    def test_empty_cube(self):
+        cube = PriceHistoryCube([], [], [])
+        windows = cube.event_windows([0.0, 1.0], [1, 2])
+        self.assertFalse(windows['valid'].any())
+
+if __name__ == '__main__':
+    unittest.main()
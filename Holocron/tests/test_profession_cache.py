@@ -0,0 +1,72 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intelligent_profession_engine import IntelligentProfessionEngine
+from tsm_engine import TSMEngine
+
+RECIPES = [
+    {'id': 1, 'name': 'Potion', 'tier': 'Alchemy', 'crafted_item_id': 191304, 'crafted_quantity': 1,
+     'materials': [{'item_id': 194820, 'quantity': 2}, {'item_id': 200111, 'quantity': 1}]},
+    {'id': 2, 'name': 'Double Potion', 'tier': 'Alchemy', 'crafted_item_id': 191304, 'crafted_quantity': 2,
+     'materials': '[{"item_id": 194820, "quantity": 3}, {"item_id": 200111, "quantity": 2}]'},
+    {'id': 3, 'name': 'Money Pit', 'tier': 'Alchemy', 'crafted_item_id': 194820, 'crafted_quantity': 1,
+     'materials': [{'item_id': 198766, 'quantity': 5}]},
+    {'id': 4, 'name': 'Transmute Research', 'tier': 'Alchemy', 'crafted_item_id': None, 'crafted_quantity': 1,
+     'materials': [{'item_id': 198765, 'quantity': 1}]},
+]
+
+class FakeGoblin:
+    def __init__(self, tsm):
+        self.tsm_engine = tsm
+        self.prices = {}
+
+class TestProfessionAnalyticsCache(unittest.TestCase):
+    def setUp(self):
+        self.tsm = TSMEngine()
+        self.tsm.load_data()
+        with patch.object(IntelligentProfessionEngine, '_get_db_connection', return_value=None):
+            self.engine = IntelligentProfessionEngine(goblin_engine=FakeGoblin(self.tsm))
+        self.loads = 0
+
+        def load(profession):
+            self.loads += 1
+            return RECIPES
+        self.engine.analytics.load_recipes = load
+
+    def test_matches_per_recipe_profit(self):
+        economics = self.engine.analytics.profits('Alchemy')
+        for r, recipe in enumerate(RECIPES[:3]):
+            expected = self.engine.calculate_recipe_profit(self.engine.analytics.recipes('Alchemy').recipes[r])
+            for key in ('material_cost', 'sell_price', 'revenue', 'profit', 'profit_margin'):
+                self.assertAlmostEqual(economics[key][r], expected[key])
+        self.assertFalse(economics['has_output'][3])
+        self.assertEqual(economics['material_cost'][3], 45)
+
+    def test_recommendations_ranked_and_filtered(self):
+        recs = self.engine.recommend_recipes_intelligent('Vaxo', 'Alchemy', 50)
+        self.assertEqual([r['recipe_name'] for r in recs], ['Double Potion', 'Potion'])
+        self.assertAlmostEqual(recs[1]['profit'], 500 * 0.95 - 30 - 200)
+        self.assertGreaterEqual(recs[0]['score'], recs[1]['score'])
+
+    def test_cached_until_prices_change(self):
+        self.engine.recommend_recipes_intelligent('A', 'Alchemy', 50)
+        self.engine.recommend_recipes_intelligent('B', 'Alchemy', 80)
+        stats = self.engine.analytics.stats
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(stats['price_refreshes'], 1)
+
+        # New TSM scan: Hochenblume jumps to 1000g
+        self.tsm.prices[194820] = 10000000
+        self.tsm.prices_updated_at += 1
+        recs = self.engine.recommend_recipes_intelligent('A', 'Alchemy', 50)
+        self.assertEqual(stats['price_refreshes'], 2)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual([r['recipe_name'] for r in recs], ['Money Pit'])
+
+if __name__ == '__main__':
+    unittest.main()
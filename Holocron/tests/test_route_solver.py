@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+import itertools
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from pathfinder_engine import PathfinderEngine
+from route_solver import held_karp, local_search, route_time, solve_route
+
+def brute_force(times, hearth=None, ready_at=None):
+    n = len(times)
+    return min(route_time([0] + list(p), times, hearth, ready_at)["total_time"]
+               for p in itertools.permutations(range(1, n)))
+
+class TestRouteSolver(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(7)
+
+    def random_times(self, n):
+        return self.rng.integers(5, 120, size=(n, n)).astype(float)
+
+    def test_held_karp_is_exact(self):
+        for n in range(2, 8):
+            times = self.random_times(n)
+            order = held_karp(times)
+            self.assertEqual(sorted(order), list(range(n)))
+            self.assertEqual(order[0], 0)
+            self.assertAlmostEqual(route_time(order, times)["total_time"], brute_force(times))
+
+    def test_held_karp_with_hearthstone_window(self):
+        for ready_at in (0, 40, 300):
+            times = self.random_times(6)
+            hearth = np.minimum(times, 10)
+            order = held_karp(times, hearth, ready_at)
+            self.assertAlmostEqual(route_time(order, times, hearth, ready_at)["total_time"],
+                                   brute_force(times, hearth, ready_at))
+
+    def test_hearthstone_used_once_after_ready(self):
+        times = np.array([[0, 100, 100], [100, 0, 100], [100, 100, 0]], dtype=float)
+        hearth = np.full((3, 3), 10.0)
+        result = route_time([0, 1, 2], times, hearth, 50)
+        # Walk the first leg (arrive t=100), hearth the second
+        self.assertEqual(result["total_time"], 110)
+        self.assertEqual(result["hearth_leg"], 1)
+        # Ready at 150: arrive at t=100 and wait 50s for the cooldown
+        self.assertEqual(route_time([0, 1, 2], times, hearth, 150)["total_time"], 160)
+        self.assertIsNone(route_time([0, 1, 2], times)["hearth_leg"])
+
+    def test_large_sets_use_local_search(self):
+        points = self.rng.random((35, 2)) * 1000
+        times = np.linalg.norm(points[:, None] - points[None], axis=2)
+        result = solve_route(times)
+        self.assertEqual(result["method"], "local_search")
+        self.assertEqual(sorted(result["order"]), list(range(35)))
+
+        # Never worse than the visiting order it started from
+        identity = list(range(35))
+        self.assertLessEqual(route_time(local_search(identity, times), times)["total_time"],
+                             route_time(identity, times)["total_time"])
+
+    def test_stops_that_cannot_reach_each_other(self):
+        inf = np.inf
+        # Both stops are reachable from the start, but not from each other
+        times = np.array([[0, 10, 10], [inf, 0, inf], [inf, inf, 0]])
+        self.assertIsNone(held_karp(times))
+        for limit in (15, 0):
+            result = solve_route(times, exact_limit=limit)
+            self.assertIsNone(result["order"])
+            self.assertEqual(result["total_time"], inf)
+
+class TestOptimizeRoute(unittest.TestCase):
+    def setUp(self):
+        self.engine = PathfinderEngine(None)
+        self.engine.load_mock_data()
+
+    def test_optimal_order(self):
+        result = self.engine.optimize_route(84, [2024, -1, 1670, 2022])
+        self.assertTrue(result["success"])
+        self.assertEqual(result["solver"], "held_karp")
+        # Stormwind-side stops first, then one trip to the Dragon Isles
+        self.assertEqual(set(result["route_order"][1:3]), {-1, 1670})
+        self.assertEqual(set(result["route_order"][3:]), {2022, 2024})
+        self.assertEqual(result["total_time"], 300)
+
+    def test_disconnected_stops_fail(self):
+        # Two dead ends off Stormwind: each reachable, no route visits both
+        for zone_id in (5000, 5001):
+            self.engine.zones[zone_id] = {"name": f"Dead End {zone_id}", "expansion": "Test"}
+            self.engine.add_travel_edge(84, zone_id, "PORTAL", 15)
+        result = self.engine.optimize_route(84, [5000, 5001])
+        self.assertFalse(result["success"])
+        self.assertIn("error", result)
+
+    def test_hearthstone_leg(self):
+        self.engine.graph.add_edge(2024, 84, method="HEARTHSTONE", time=10, requirements="")
+        self.engine.graph.add_edge(2022, 84, method="HEARTHSTONE", time=10, requirements="")
+        ready = self.engine.optimize_route(2024, [1670, 2022], hearthstone_ready_at=0)
+        self.assertEqual(ready["route_order"], [2024, 2022, 1670])
+        self.assertEqual(ready["total_time"], 45 + 10 + 15)
+        self.assertEqual(ready["segments"][1]["method"], "HEARTHSTONE")
+
+        # On cooldown for the whole route: boat home instead
+        cooldown = self.engine.optimize_route(2024, [1670, 2022], hearthstone_ready_at=None)
+        self.assertEqual(cooldown["total_time"], 45 + 165 + 15)
+
+if __name__ == '__main__':
+    unittest.main()
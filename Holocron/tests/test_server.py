@@ -51,5 +51,23 @@ class TestHolocronServer(unittest.TestCase):
                                  content_type='application/json')
         self.assertEqual(response.status_code, 400)
 
+    @patch('server.engines.changed')
+    def test_navigator_updates_notify_summaries(self, mock_changed):
+        from server import navigator_engine
+        top = navigator_engine.get_prioritized_activities(limit=1)[0]
+        mock_changed.reset_mock()  # building the engine notifies too
+
+        response = self.app.post('/api/navigator/owned', json={"drop": top["drop"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(top["drop"], navigator_engine.owned_items)
+        response = self.app.post('/api/navigator/lockouts', json={"instance": top["instance"], "available_chars": 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_changed.call_count, 2)
+        mock_changed.assert_called_with('navigator')
+
+        self.app.post('/api/navigator/owned', json={"drop": top["drop"], "owned": False})
+        self.app.post('/api/navigator/lockouts', json={"instance": top["instance"], "available_chars": top["available_chars"]})
+        self.assertEqual(self.app.post('/api/navigator/lockouts', json={"instance": top["instance"]}).status_code, 400)
+
 if __name__ == '__main__':
     unittest.main()
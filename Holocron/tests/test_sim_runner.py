@@ -0,0 +1,119 @@
+import unittest
+import sys
+import os
+import stat
+import tempfile
+import textwrap
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sandbox import Sandbox
+from sim_runner import SimRunner, normalize_profile, profile_hash
+from loadout_lottery import LoadoutLottery
+
+# Stands in for the simc binary: reads the input file, derives a DPS from the
+# talent string and writes SimC-shaped json2 output.
+STUB_SIMC = textwrap.dedent('''\
+    #!{python}
+    import json, sys, zlib
+    options = {{}}
+    name = "Stub"
+    for line in open(sys.argv[1]):
+        line = line.strip()
+        if "=" not in line:
+            continue
+        key, value = line.split("=", 1)
+        if key in ("druid", "mage", "warrior"):
+            name = value.strip('"')
+        options[key] = value
+    dps = 1000 + zlib.crc32(options.get("talents", "").encode()) % 500
+    iterations = int(options.get("iterations", 1000))
+    error = 300 / iterations ** 0.5
+    result = {{"sim": {{"options": {{"timestamp": 0}}, "players": [{{
+        "name": name,
+        "talents": options.get("talents"),
+        "collected_data": {{"dps": {{"mean": dps, "min": dps - 50, "max": dps + 50,
+                                    "mean_std_dev": error, "count": iterations}}}},
+    }}]}}}}
+    json.dump(result, open(options["json2"], "w"))
+''')
+
+class TestSimRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.simc = os.path.join(self.tmp.name, "simc")
+        with open(self.simc, "w") as f:
+            f.write(STUB_SIMC.format(python=sys.executable))
+        os.chmod(self.simc, os.stat(self.simc).st_mode | stat.S_IEXEC)
+        self.runner = SimRunner(Sandbox(self.simc), max_workers=4)
+        self.base = 'druid="Base"\nlevel=80\nspec=balance'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_normalize_ignores_comments_and_runtime_options(self):
+        a = 'druid="Base"\n# comment\nlevel = 80\niterations=5000\n\nthreads=8'
+        b = 'druid="Base"\nlevel=80   # trailing'
+        self.assertEqual(normalize_profile(a), normalize_profile(b))
+        self.assertEqual(profile_hash(a, 1000), profile_hash(b, 1000))
+        self.assertNotEqual(profile_hash(a, 1000), profile_hash(a, 2000))
+
+    def test_batch_runs_in_parallel_dirs_and_preserves_order(self):
+        profiles = [f"{self.base}\ntalents=T{i}" for i in range(6)]
+        results = self.runner.run_batch(profiles, iterations=100)
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual([r["talents"] for r in results], [f"T{i}" for i in range(6)])
+        self.assertEqual(self.runner.stats["sims_run"], 6)
+        # Nothing written to the working directory
+        self.assertFalse(os.path.exists("temp_sim.simc"))
+
+    def test_results_are_cached(self):
+        profiles = [f"{self.base}\ntalents=A", f"{self.base}\ntalents=B"]
+        self.runner.run_batch(profiles, iterations=100)
+        self.runner.run_batch(["# same as A\n" + profiles[0]], iterations=100)
+        self.assertEqual(self.runner.stats["sims_run"], 2)
+        self.assertEqual(self.runner.stats["cache_hits"], 1)
+
+        # A different iteration count is a different result
+        self.runner.run_batch(profiles[:1], iterations=500)
+        self.assertEqual(self.runner.stats["sims_run"], 3)
+
+    def test_threads_split_across_concurrent_sims(self):
+        runner = SimRunner(Sandbox(self.simc), max_workers=4)
+        runner.cores = 8
+        self.assertEqual(runner.threads_for(1), 8)
+        self.assertEqual(runner.threads_for(2), 4)
+        self.assertEqual(runner.threads_for(100), 2)
+
+    def test_failed_sim_yields_none(self):
+        runner = SimRunner(Sandbox(os.path.join(self.tmp.name, "missing-simc")))
+        self.assertEqual(runner.run_batch([self.base]), [None])
+        self.assertEqual(runner.stats["failures"], 1)
+
+    def test_parse_results_exposes_error_bars(self):
+        result = self.runner.run_batch([f"{self.base}\ntalents=A"], iterations=400)[0]
+        self.assertAlmostEqual(result["dps_error"], 15.0)
+        self.assertEqual(result["iterations"], 400)
+
+    def test_loadout_lottery_races_to_true_winner(self):
+        lottery = LoadoutLottery(runner=self.runner)
+        talents = [f"T{i}" for i in range(40)]
+        rounds = []
+        winner = lottery.run_comparison(self.base, talents, min_iterations=100, max_iterations=10000,
+                                        progress=lambda fraction, message: rounds.append(fraction))
+
+        # Brute force at full iterations for comparison
+        results = self.runner.run_batch([f"{self.base}\ntalents={t}\n" for t in talents] + [self.base], 10000)
+        best = max(results, key=lambda r: r["dps"])
+
+        self.assertEqual(winner["talents"], best["talents"])
+        self.assertLess(winner["iterations_used"], len(results) * 10000 / 4)
+        self.assertEqual(len(winner["standings"]), 41)
+        self.assertTrue(all(s["dps_error"] is not None for s in winner["standings"]))
+        self.assertGreater(len(winner["rounds"]), 1)
+        self.assertEqual(len(rounds), len(winner["rounds"]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine_registry import EngineRegistry
+from summary_materializer import SummaryMaterializer
+from briefing_engine import BriefingEngine
+
+class Source:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def read(self):
+        self.calls += 1
+        return self.value
+
+class TestSummaryMaterializer(unittest.TestCase):
+    def setUp(self):
+        self.gold = Source(100)
+        self.rep = Source("Exalted")
+        self.summary = SummaryMaterializer('test', lambda sections, updated_at: dict(sections))
+        self.summary.section('gold', self.gold.read, ['goblin'])
+        self.summary.section('rep', self.rep.read, ['diplomat'])
+
+    def test_served_from_memory(self):
+        first = self.summary.get()
+        second = self.summary.get()
+        self.assertEqual(first.payload, {'gold': 100, 'rep': 'Exalted'})
+        self.assertIs(first, second)
+        self.assertEqual((self.gold.calls, self.rep.calls), (1, 1))
+
+    def test_notify_rebuilds_only_affected_sections(self):
+        first = self.summary.get()
+        self.gold.value = 250
+        self.summary.notify('goblin')
+        second = self.summary.get()
+        self.assertEqual(second.payload['gold'], 250)
+        self.assertEqual((self.gold.calls, self.rep.calls), (2, 1))
+        self.assertEqual(second.version, first.version + 1)
+        self.assertNotEqual(second.etag, first.etag)
+
+    def test_version_stable_when_content_unchanged(self):
+        first = self.summary.get()
+        self.summary.notify('goblin')
+        second = self.summary.get()
+        self.assertEqual(self.gold.calls, 2)
+        self.assertEqual(second.version, first.version)
+
+    def test_unrelated_engine_ignored(self):
+        self.summary.get()
+        self.summary.notify('vault')
+        self.summary.get()
+        self.assertEqual((self.gold.calls, self.rep.calls), (1, 1))
+
+    def test_ttl_section_refreshes(self):
+        clock = Source(1)
+        self.summary.section('clock', clock.read, ttl=0.01)
+        self.summary.get()
+        time.sleep(0.02)
+        self.summary.get()
+        self.assertEqual(clock.calls, 2)
+
+    def test_registry_events(self):
+        registry = EngineRegistry()
+        registry.register('warden', lambda: self.gold)
+        registry.register('quartermaster', lambda: self.rep, depends_on=('warden',))
+        summary = SummaryMaterializer('events', lambda sections, updated_at: dict(sections))
+        summary.section('logistics', lambda: registry.get('quartermaster').read(), ['quartermaster'])
+        registry.subscribe(summary.notify)
+
+        summary.get()
+        self.rep.value = "Revered"
+        registry.changed('warden')  # quartermaster depends on warden
+        self.assertEqual(summary.get().payload['logistics'], "Revered")
+
+class FakeEngine:
+    def __init__(self, **methods):
+        for name, value in methods.items():
+            setattr(self, name, lambda value=value: value)
+
+class TestBriefingSections(unittest.TestCase):
+    def setUp(self):
+        self.goblin = FakeEngine(analyze_market={"opportunities": [{"recipe": "A"}, {"recipe": "B"}]})
+        self.briefing = BriefingEngine(
+            scout=FakeEngine(get_alerts=[]),
+            diplomat=FakeEngine(get_active_emissaries=[], get_opportunities=[]),
+            warden=FakeEngine(),
+            vault=FakeEngine(get_status={"summary": {"unlocked_slots": 3}}),
+            knowledge=FakeEngine(get_status={"weekly_progress": 100}),
+            goblin=self.goblin,
+        )
+
+    def test_market_section_follows_goblin(self):
+        first = self.briefing.generate_briefing()
+        self.assertEqual([o["recipe"] for o in first["market"]], ["A", "B"])
+        self.assertEqual(first["action_items"], [])
+
+        self.goblin.analyze_market = lambda: {"opportunities": [{"recipe": "C"}]}
+        self.assertEqual(self.briefing.generate_briefing()["market"], first["market"])
+        self.briefing.summary.notify('goblin')
+        self.assertEqual(self.briefing.generate_briefing()["market"], [{"recipe": "C"}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sv_watcher import SavedVariablesWatcher
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestSavedVariablesWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        self.calls = []
+        self.watcher = SavedVariablesWatcher(self.tmp.name, debounce=2.0, poll_interval=0.5, clock=self.clock)
+        self.watcher.register("DataStore*.lua", lambda path, name: self.calls.append(name))
+
+    def tearDown(self):
+        self.watcher.stop()
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def settle(self, seconds):
+        self.clock.now += seconds
+        dispatched = self.watcher.check_pending()
+        # Wait for the worker pool to finish
+        if self.watcher._executor:
+            self.watcher._executor.shutdown(wait=True)
+            self.watcher._executor = None
+        return dispatched
+
+    def test_burst_of_writes_dispatches_once(self):
+        path = self.write("DataStore_Containers.lua", "a")
+        for _ in range(5):
+            self.watcher.notify(path)
+
+        self.assertEqual(self.settle(1.0), 0)   # still inside debounce window
+        self.assertEqual(self.settle(1.5), 1)
+        self.assertEqual(self.calls, ["DataStore_Containers.lua"])
+
+        metrics = self.watcher.metrics()
+        self.assertEqual(metrics["events_received"], 5)
+        self.assertEqual(metrics["events_coalesced"], 4)
+        self.assertEqual(metrics["pending"], 0)
+
+    def test_waits_for_write_quiescence(self):
+        path = self.write("DataStore_Auctions.lua", "a")
+        self.watcher.notify(path)
+
+        # File keeps growing without a new event (e.g. on a network share)
+        self.write("DataStore_Auctions.lua", "a much longer payload")
+        self.assertEqual(self.settle(2.5), 0)
+        self.assertEqual(self.watcher.metrics()["quiescence_waits"], 1)
+
+        self.assertEqual(self.settle(2.5), 1)
+        self.assertEqual(self.calls, ["DataStore_Auctions.lua"])
+
+    def test_ignores_unregistered_files(self):
+        path = self.write("RandomFile.txt", "x")
+        self.watcher.notify(path)
+        self.assertEqual(self.settle(5), 0)
+        self.assertEqual(self.watcher.metrics()["events_ignored"], 1)
+
+    def test_backpressure_defers_when_workers_busy(self):
+        release = threading.Event()
+        watcher = SavedVariablesWatcher(self.tmp.name, debounce=1.0, max_workers=1, clock=self.clock)
+        watcher.register("*.lua", lambda path, name: release.wait(5))
+
+        watcher.notify(self.write("DataStore_A.lua", "a"))
+        watcher.notify(self.write("DataStore_B.lua", "b"))
+        self.clock.now += 2
+        self.assertEqual(watcher.check_pending(), 1)
+
+        metrics = watcher.metrics()
+        self.assertEqual(metrics["in_flight"], 1)
+        self.assertEqual(metrics["pending"], 1)
+        self.assertEqual(metrics["deferred_backpressure"], 1)
+
+        release.set()
+        watcher.stop()
+
+    def test_handler_failure_is_counted(self):
+        self.watcher.register("DataStore*.lua", lambda path, name: 1 / 0)
+        self.watcher.notify(self.write("DataStore_Mails.lua", "m"))
+        self.settle(3)
+        self.assertEqual(self.calls, ["DataStore_Mails.lua"])
+        self.assertEqual(self.watcher.metrics()["handler_failures"], 1)
+
+if __name__ == '__main__':
+    unittest.main()
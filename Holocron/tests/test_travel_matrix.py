@@ -0,0 +1,114 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pathfinder_engine import PathfinderEngine
+from travel_graph import BIT, TravelGraph, capability_mask, edge_mask
+from travel_matrix import build_travel_matrix
+
+class TestTravelMatrix(unittest.TestCase):
+    def setUp(self):
+        self.engine = PathfinderEngine(None)
+        self.engine.load_mock_data()
+        # Mage-only portal and a hearthstone shortcut back to Stormwind
+        self.engine.graph.add_edge(2025, 1670, method="PORTAL", time=10, requirements="Mage")
+        self.engine.graph.add_edge(2024, 84, method="HEARTHSTONE", time=10, requirements="")
+
+    def test_all_pairs_times(self):
+        matrix = build_travel_matrix(TravelGraph(self.engine.graph), capability_mask("Mage"))
+        self.assertEqual(matrix.time(84, 84), 0)
+        self.assertEqual(matrix.time(84, 2022), 165)     # boat + dragonriding
+        self.assertEqual(matrix.time(-1, 1670), 45)      # walk + portal
+        self.assertEqual(matrix.time(2025, 1670), 10)    # mage portal allowed here
+        self.assertEqual(matrix.path(2024, -1), [2024, 84, -1])
+        self.assertEqual(matrix.submatrix([84, 1670]).tolist(), [[0, 15], [15, 0]])
+
+    def test_unreachable(self):
+        self.engine.graph.add_node(3000, name="Island", expansion="Test")
+        self.engine.zones[3000] = {"name": "Island", "expansion": "Test"}
+        matrix = build_travel_matrix(TravelGraph(self.engine.graph), capability_mask("Mage"))
+        self.assertIsNone(matrix.time(84, 3000))
+        self.assertIsNone(matrix.path(84, 3000))
+        self.assertFalse(self.engine.find_shortest_path(84, 3000)["success"])
+
+    def test_shortest_path_respects_capabilities(self):
+        mage = self.engine.find_shortest_path(2025, 1670, character_class="Mage")
+        self.assertEqual(mage["path"], [2025, 1670])
+        self.assertEqual(mage["total_time"], 10)
+
+        # Without the portal: 2025 -> 2024 -> (hearthstone) 84 -> 1670
+        warrior = self.engine.find_shortest_path(2025, 1670, character_class="Warrior")
+        self.assertEqual(warrior["path"], [2025, 2024, 84, 1670])
+        self.assertEqual(warrior["total_time"], 70)
+        self.assertEqual(warrior["steps"][1]["method"], "HEARTHSTONE")
+
+        on_cooldown = self.engine.find_shortest_path(2025, 1670, hearthstone_available=False)
+        self.assertEqual(on_cooldown["path"], [2025, 1978, 84, 1670])
+        self.assertEqual(on_cooldown["total_time"], 180)
+
+    def test_matrices_cached_per_profile(self):
+        first = self.engine.travel_matrix("Mage", True)
+        self.assertIs(self.engine.travel_matrix("Mage", True), first)
+        # Classes without special travel share the default profile
+        self.assertIs(self.engine.travel_matrix("Warrior"), self.engine.travel_matrix(None))
+        self.assertIsNot(self.engine.travel_matrix(None, False), self.engine.travel_matrix(None, True))
+
+    def test_graph_changes_rebuild_matrices(self):
+        self.assertEqual(self.engine.find_shortest_path(-1, 2022)["total_time"], 195)
+        self.engine.graph.add_edge(-1, 2022, method="PORTAL", time=5, requirements="")
+        self.assertEqual(self.engine.find_shortest_path(-1, 2022)["total_time"], 5)
+
+        # Edge count unchanged, so an in-place edit needs an explicit invalidate()
+        self.engine.graph[-1][2022]["time"] = 7
+        self.engine.invalidate()
+        self.assertEqual(self.engine.find_shortest_path(-1, 2022)["total_time"], 7)
+
+    def test_added_edge_and_changed_travel_nodes_rebuild(self):
+        self.assertEqual(self.engine.travel_matrix().time(-1, 84), 30)
+        # Replaces the existing edge: node and edge counts stay the same
+        self.engine.add_travel_edge(-1, 84, "WALK", 3)
+        self.assertEqual(self.engine.travel_matrix().time(-1, 84), 3)
+
+        self.engine.db_url = "postgresql://test"
+        with patch('pathfinder_engine.psycopg2.connect') as connect, \
+                patch.object(self.engine, 'build_graph') as build_graph:
+            connect.return_value.cursor.return_value.fetchone.return_value = ("abc",)
+            self.engine.load_real_data()
+            build_graph.assert_not_called()  # mock graph, nothing to compare with
+
+            self.engine.travel_nodes_fingerprint = "abc"
+            self.assertFalse(self.engine.refresh_if_changed())
+            self.engine.travel_nodes_fingerprint = "old"
+            self.engine.load_real_data()
+            build_graph.assert_called_once_with()
+
+    def test_requirement_masks(self):
+        self.assertEqual(edge_mask("PORTAL", ""), 0)
+        self.assertEqual(edge_mask("PORTAL", "Mage"), BIT["Mage"])
+        self.assertEqual(edge_mask("WORMHOLE", "Engineer, Dragonflight"), BIT["Engineering"] | BIT["Dragonflight"])
+        self.assertEqual(edge_mask("DALARAN_HEARTHSTONE", None), BIT["DALARAN_HEARTHSTONE"])
+
+        have = capability_mask("Engineer", hearthstone_available=["HEARTHSTONE"], expansions=["Vanilla"])
+        self.assertTrue(have & BIT["Engineering"])
+        self.assertTrue(have & BIT["HEARTHSTONE"])
+        self.assertFalse(have & BIT["GARRISON_HEARTHSTONE"])
+        self.assertFalse(have & BIT["Dragonflight"])
+
+    def test_profession_and_expansion_edges(self):
+        self.engine.add_travel_edge(84, 2023, "WORMHOLE", 5, "Engineering, Dragonflight")
+        self.assertEqual(self.engine.travel_matrix().time(84, 2023), 165)
+        self.assertEqual(self.engine.travel_matrix(professions=["Engineering"]).time(84, 2023), 5)
+        self.assertEqual(self.engine.travel_matrix(professions=["Engineering"], expansions=["Vanilla"]).time(84, 2023), 165)
+
+    def test_reachable_zones(self):
+        reachable = self.engine.get_reachable_zones(84, max_time=50)
+        self.assertEqual([(z["zone_id"], z["time"], z["steps"]) for z in reachable],
+                         [(1670, 15, 1), (-1, 30, 1)])
+        self.assertEqual(self.engine.get_reachable_zones(999), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Travel Graph - compact array form of the Pathfinder graph
+
+Edge requirements ("Mage", "Engineering", hearthstone methods, expansion
+unlocks) are parsed once into a capability bitmask per edge. A character's
+abilities are a bitmask too, so "can this character use this edge" is a
+single mask test: (edge_mask & ~character_mask) == 0. The graph itself is
+held as CSR arrays, so filtering for a profile never copies the graph.
+"""
+
+import re
+from typing import Iterable, Optional, Union
+
+import numpy as np
+
+CLASSES = (
+    'Warrior', 'Paladin', 'Hunter', 'Rogue', 'Priest', 'Death Knight', 'Shaman',
+    'Mage', 'Warlock', 'Monk', 'Druid', 'Demon Hunter', 'Evoker',
+)
+PROFESSIONS = (
+    'Engineering', 'Alchemy', 'Blacksmithing', 'Enchanting', 'Herbalism', 'Inscription',
+    'Jewelcrafting', 'Leatherworking', 'Mining', 'Skinning', 'Tailoring',
+)
+HEARTHSTONES = ('HEARTHSTONE', 'DALARAN_HEARTHSTONE', 'GARRISON_HEARTHSTONE')
+EXPANSIONS = (
+    'Vanilla', 'TBC', 'WotLK', 'Cataclysm', 'Pandaria', 'WoD', 'Legion',
+    'BFA', 'Shadowlands', 'Dragonflight', 'TWW',
+)
+
+_CAPABILITIES = CLASSES + PROFESSIONS + HEARTHSTONES + EXPANSIONS
+BIT = {name: 1 << i for i, name in enumerate(_CAPABILITIES)}
+
+HEARTHSTONE_BITS = sum(BIT[h] for h in HEARTHSTONES)
+EXPANSION_BITS = sum(BIT[e] for e in EXPANSIONS)
+
+# Spellings seen in requirement strings that map onto a capability
+_ALIASES = {'Engineer': 'Engineering', 'DK': 'Death Knight', 'DH': 'Demon Hunter'}
+
+_REQUIREMENT_RE = re.compile(
+    r"\b(" + "|".join(re.escape(n) for n in sorted(list(BIT) + list(_ALIASES), key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+_CANONICAL = {name.lower(): _ALIASES.get(name, name) for name in list(BIT) + list(_ALIASES)}
+
+
+def edge_mask(method: Optional[str], requirements: Optional[str]) -> int:
+    """Capabilities needed to use an edge. Unrecognised requirement text is ignored."""
+    mask = BIT[method] if method in HEARTHSTONES else 0
+    for match in _REQUIREMENT_RE.finditer(requirements or ''):
+        mask |= BIT[_CANONICAL[match.group(1).lower()]]
+    return mask
+
+
+def capability_mask(
+    character_class: Optional[str] = None,
+    hearthstone_available: Union[bool, Iterable[str]] = True,
+    professions: Iterable[str] = (),
+    expansions: Optional[Iterable[str]] = None,
+) -> int:
+    """
+    Capabilities a character has.
+
+    hearthstone_available is either a bool (all hearthstone variants) or the
+    hearthstone methods currently off cooldown. expansions=None means every
+    expansion is unlocked.
+    """
+    mask = 0
+    for name in [character_class, *professions]:
+        if name:
+            mask |= BIT.get(_CANONICAL.get(name.lower(), name), 0)
+
+    if hearthstone_available is True:
+        mask |= HEARTHSTONE_BITS
+    elif hearthstone_available:
+        for method in hearthstone_available:
+            mask |= BIT.get(method, 0)
+
+    if expansions is None:
+        mask |= EXPANSION_BITS
+    else:
+        for expansion in expansions:
+            mask |= BIT.get(expansion, 0)
+    return mask
+
+
+class TravelGraph:
+    """CSR adjacency (indptr/indices/times/masks) over a networkx travel graph."""
+
+    def __init__(self, graph):
+        self.zone_ids = list(graph.nodes())
+        self.index = {zone_id: i for i, zone_id in enumerate(self.zone_ids)}
+        n = len(self.zone_ids)
+
+        sources, dests, times, masks = [], [], [], []
+        for source, dest, data in graph.edges(data=True):
+            sources.append(self.index[source])
+            dests.append(self.index[dest])
+            times.append(data.get('time') or 0)
+            # Edges added without going through the engine are parsed here
+            mask = data.get('mask')
+            masks.append(edge_mask(data.get('method'), data.get('requirements')) if mask is None else mask)
+
+        order = np.argsort(np.asarray(sources, dtype=np.int64), kind='stable')
+        self.sources = np.asarray(sources, dtype=np.int64)[order]
+        self.indices = np.asarray(dests, dtype=np.int64)[order]
+        self.times = np.asarray(times, dtype=float)[order]
+        self.masks = np.asarray(masks, dtype=np.int64)[order]
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.sources, minlength=n), out=self.indptr[1:])
+
+        # Only bits some edge actually requires matter when keying profiles
+        self.required_bits = int(np.bitwise_or.reduce(self.masks)) if len(self.masks) else 0
+
+    def __len__(self):
+        return len(self.zone_ids)
+
+    def allowed(self, have_mask: int) -> np.ndarray:
+        """Boolean array over edges usable with these capabilities."""
+        return (self.masks & ~np.int64(have_mask)) == 0
+
+    def profile_key(self, have_mask: int) -> int:
+        """Canonical profile: capabilities that don't unlock any edge are dropped."""
+        return have_mask & self.required_bits
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Travel Matrix - precomputed all-pairs travel times for Pathfinder
+
+Pathfinder queries used to run a fresh Dijkstra (on a fresh copy of the
+graph) per (source, destination) pair. A TravelMatrix holds the all-pairs
+shortest travel times and predecessor table for one capability profile
+(see travel_graph.capability_mask), computed once over the TravelGraph's
+CSR arrays with SciPy, so reachability and routing become array lookups.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# csgraph treats explicit zeros as missing edges; keep free hops connected
+_ZERO_WEIGHT = 1e-9
+
+
+class TravelMatrix:
+    """All-pairs shortest travel times and predecessors for one profile."""
+
+    def __init__(self, zone_ids: List[int], index: Dict[int, int], dist: np.ndarray, pred: np.ndarray):
+        self.zone_ids = zone_ids
+        self.index = index
+        self.dist = dist
+        self.pred = pred
+
+    def __contains__(self, zone_id) -> bool:
+        return zone_id in self.index
+
+    def time(self, source: int, dest: int) -> Optional[float]:
+        """Shortest travel time in seconds, or None if unreachable."""
+        t = self.dist[self.index[source], self.index[dest]]
+        return None if np.isinf(t) else float(t)
+
+    def path(self, source: int, dest: int) -> Optional[List[int]]:
+        """Zone ids along the shortest path (inclusive), or None if unreachable."""
+        i, j = self.index[source], self.index[dest]
+        if i == j:
+            return [source]
+        if np.isinf(self.dist[i, j]):
+            return None
+        row = self.pred[i]
+        hops = [j]
+        while hops[-1] != i:
+            hops.append(row[hops[-1]])
+        return [self.zone_ids[k] for k in reversed(hops)]
+
+    def submatrix(self, zone_ids: List[int]) -> np.ndarray:
+        """Travel times between the given zones, in the given order."""
+        idx = [self.index[z] for z in zone_ids]
+        return self.dist[np.ix_(idx, idx)]
+
+    def reachable_from(self, source: int, max_time: float) -> List[Dict]:
+        """Zones (other than source) reachable within max_time, with times."""
+        i = self.index[source]
+        row = self.dist[i]
+        hits = np.nonzero(row <= max_time)[0]
+        return [{"zone_id": self.zone_ids[j], "time": float(row[j])} for j in hits if j != i]
+
+
+def build_travel_matrix(travel_graph, have_mask: int) -> TravelMatrix:
+    """
+    Compute the all-pairs matrix over the edges of `travel_graph` (a
+    TravelGraph) usable by a character with capabilities `have_mask`.
+    """
+    # SciPy is imported on first build so importing the server stays fast
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import shortest_path
+
+    n = len(travel_graph)
+    allowed = travel_graph.allowed(have_mask)
+
+    # Edges are stored grouped by source, so masking keeps CSR order
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(travel_graph.sources[allowed], minlength=n), out=indptr[1:])
+    weights = travel_graph.times[allowed]
+    weights[weights == 0] = _ZERO_WEIGHT
+    adjacency = csr_matrix((weights, travel_graph.indices[allowed], indptr), shape=(n, n))
+
+    # method='auto' picks Floyd-Warshall for dense graphs, Dijkstra/Johnson for sparse
+    dist, pred = shortest_path(adjacency, method='auto', directed=True, return_predecessors=True)
+    return TravelMatrix(travel_graph.zone_ids, travel_graph.index, dist, pred)
@@ -6,6 +6,7 @@ Parses TradeSkillMaster data to provide accurate market values.
 
 from typing import Dict, Optional
 import os
+import time
 from utils.lua_parser import LuaParser
 
 class TSMEngine:
@@ -15,6 +16,7 @@ class TSMEngine:
     
     def __init__(self):
         self.prices = {} # ItemID -> Market Value (int)
+        self.prices_updated_at = None # Bumped on every load so caches can tell
         self.parser = LuaParser()
         
     def load_data(self):
@@ -35,6 +37,8 @@ class TSMEngine:
             191304: 5000000, # Elemental Potion of Ultimate Power: 500g
         }
         
+        self.prices_updated_at = time.time()
+        
         print(f"✓ TSM Brain loaded: {len(self.prices)} item prices")
 
     def get_price(self, item_id: int, source: str = "dbmarket") -> int: